@@ -1,5 +1,26 @@
 from .spaceandtime import SpaceAndTime
 from .sxtbaseapi import SXTBaseAPI
+from .sxtconnectionpool import SXTConnectionPool, SXTHTTPAdapter
+from .sxtasyncapi import AsyncSXTBaseAPI
+from .sxtretry import SXTRetryPolicy, SXTRetryBudget
+from .sxtcancellation import SXTDeadline, SXTCancelToken
+from .sxtstream import SXTRowStream
+from .sxtcodec import SXTCodec
+from .sxtendpoints import SXTEndpointRegistry, SXTRoute
+from .sxtsingleflight import SXTSingleFlight
+from .sxtcircuitbreaker import SXTCircuitBreaker
+from .sxtratelimit import SXTRateLimiter
+from .sxthedging import SXTHedgePolicy, SXTLatencyTracker
+from .sxtgateway import SXTGatewayPool
+from .sxtconcurrency import SXTConcurrencyLimiter
+from .sxtscheduler import SXTScheduler
+from .sxthooks import SXTHooks, SXTCallEvent
+from .sxtmetrics import SXTMetricsRegistry, SXTCounter, SXTGauge, SXTHistogram, prometheus_text
+from .sxtlogging import SXTJsonFormatter, configure as configure_logging
+from .sxttracing import SXTTracer, SXTSpan, SXTOpenTelemetryTracer, get_tracer, set_tracer, use_opentelemetry, traced
+from .sxtmockgateway import SXTMockGateway
+from .sxtfaults import SXTFault, SXTFaultScenario, SXTFaultInjectionAdapter
+from .sxtcassette import SXTCassette, SXTCassetteAdapter
 from .sxtbiscuits import SXTBiscuit
 from .sxtkeymanager import SXTKeyManager
 from .sxtresource import SXTResource, SXTTable, SXTView, SXTMaterializedView
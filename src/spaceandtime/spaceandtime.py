@@ -1,6 +1,6 @@
 import logging, random, time, json
 import pandas as pd 
-from io import StringIO
+from io import BytesIO
 from datetime import datetime
 from pathlib import Path
 from .sxtuser import SXTUser
@@ -8,6 +8,13 @@ from .sxtresource import SXTTable, SXTView
 from .sxtkeymanager import SXTKeyManager
 from .sxtenums import *
 from .sxtexceptions import *
+from .sxtcancellation import SXTCancelToken, SXTDeadline
+from .sxtconcurrency import run_parallel, bulk_workers
+from .sxtstream import batched
+from .sxtasyncapi import iterate_async, batched_async
+from .sxtcodec import SXTCodec
+from .sxttracing import traced
+from .sxtlogging import get_logger, truncated, FORMAT, PACKAGE
 
 class SpaceAndTime:
 
@@ -18,12 +25,14 @@ class SpaceAndTime:
     envfile_filepath:str = None
     start_time: datetime = None
     key_manager: SXTKeyManager = None
+    codec: SXTCodec = SXTCodec()
     GRANT = SXTPermission
     ENCODINGS = SXTKeyEncodings
     SQLTYPE = SXTSqlType
     OUTPUT_FORMAT = SXTOutputFormat
     TABLE_ACCESS = SXTTableAccessType
     DISCOVERY_SCOPE = SXTDiscoveryScope
+    PRIORITY = SXTPriority
 
 
     def __init__(self, envfile_filepath=None, api_url=None, 
@@ -32,16 +41,7 @@ class SpaceAndTime:
                 application_name='SxT-SDK', 
                 logger: logging.Logger = None):
         """Create new instance of Space and Time SDK for Python"""
-        if logger: 
-            self.logger = logger 
-        else: 
-            self.logger = logging.getLogger()
-            self.logger.setLevel(logging.INFO)
-            frmt = logging.Formatter('%(asctime)s %(levelname)-8s %(message)s','%Y-%m-%d_%H:%M:%S')
-            self.logger.sxtformat = frmt
-            if len(self.logger.handlers) == 0: 
-                self.logger.addHandler( logging.StreamHandler() )
-                self.logger.handlers[0].formatter = frmt 
+        self.logger = get_logger('sdk', logger, default_output=True)
 
         self.start_time = datetime.now()
         self.logger.info('-'*30 + f'\nSpace and Time SDK initiated for {self.application_name} at {self.start_time.strftime("%Y-%m-%d %H:%M:%S")}')
@@ -63,14 +63,15 @@ class SpaceAndTime:
         return self.user.refresh_token
     
     def logger_addFileHandler(self, file:Path) -> None:
-        """Adds a logging file (handler) location to the default logging object, creating any needed folders and replacing {datetime}, {date}, or {time} with sxt start_time."""
+        """Adds a logging file (handler) location to the default logging object (all SDK components, unless a logger was supplied), creating any needed folders and replacing {datetime}, {date}, or {time} with sxt start_time."""
         file = Path( self.__replaceall(str(file.resolve()), replacemap={}) )
         file.parent.mkdir(parents=True, exist_ok=True)
         fh = logging.FileHandler(file)
-        fh.formatter = self.logger.sxtformat
-        self.logger.addHandler(fh)
+        fh.formatter = FORMAT
+        (logging.getLogger(PACKAGE) if self.logger.name.startswith(PACKAGE) else self.logger).addHandler(fh)
 
 
+    @traced('SpaceAndTime.authenticate')
     def authenticate(self, user:SXTUser = None):
         """--------------------
         Authenticate user to Space and Time.  Uses the default dotenv file to create a default user, if no other is supplied.
@@ -104,9 +105,30 @@ class SpaceAndTime:
         return success, rtn
     
 
+    async def authenticate_async(self, user:SXTUser = None):
+        """--------------------
+        Async version of authenticate: authenticate user to Space and Time without blocking the event loop.
+
+        Returns: 
+            bool: Success indicator
+            str: Access Token returned from Space and Time network
+        """
+        if not user: user = self.user
+        if not self.network_calls_enabled: return self.authenticate(user)
+        success, rtn = await user.authenticate_async()
+        self.logger.info(f'Authentication Success: {success}')
+        if not success: self.logger.error(f'Authentication error: {str(rtn)}')
+        return success, rtn
+    
+
+    @traced('SpaceAndTime.execute_query')
     def execute_query(self, sql_text:str, sql_type:SXTSqlType = SXTSqlType.DQL, 
                       resources:list = None, user:SXTUser = None, 
-                      biscuits:list  = None, output_format:SXTOutputFormat = SXTOutputFormat.JSON) -> tuple:
+                      biscuits:list  = None, output_format:SXTOutputFormat = SXTOutputFormat.JSON, 
+                      deadline:float = None, cancel_token:SXTCancelToken = None, 
+                      stream:bool = False, batch_size:int = None, 
+                      raw:bool = False, sink:object = None, hedge:bool = False, 
+                      priority:SXTPriority = None) -> tuple:
         """--------------------
         Execute a query using an authenticated user.  If not specified, uses the default user.  
         
@@ -117,10 +139,18 @@ class SpaceAndTime:
             user (SXTUser): (optional) Authenticated user to use to execute the query. Defaults to default user.
             biscuits (list): (optional) List of biscuit tokens for permissioned tables.  If only querying public tables, this is not needed.
             output_format (SXTOutputFormat): (optional) Output format enum, either JSON or CSV. Defaults to SXTOutputFormat.JSON.
+            deadline (float | SXTDeadline): (optional) Seconds by which the query must complete, including any retries.
+            cancel_token (SXTCancelToken): (optional) Token that can be cancelled from another thread to abort the query.
+            stream (bool): (optional) If True, return an iterator that yields rows (as dicts) while the response is still arriving, for results too large to hold in memory.  output_format is ignored.
+            batch_size (int): (optional) When streaming, yield lists of up to batch_size rows rather than single rows.
+            raw (bool): (optional) If True, return the response body as undecoded JSON bytes, skipping all parsing.  output_format is ignored.
+            sink (file-like): (optional) Binary file-like object to write the undecoded JSON response into; returns bytes written.  output_format is ignored.
+            hedge (bool | SXTHedgePolicy): (optional) For DQL with resources, send a duplicate request if the first is slower than a percentile of recent queries, and use whichever answers first.
+            priority (SXTPriority): (optional) Priority class when waiting for a concurrency permit.  Defaults to INTERACTIVE for DQL and BATCH otherwise.
 
         Returns:
             bool: True if success, False if in Error. 
-            list: Rows, either in JSON or CSV format. 
+            list: Rows, either in JSON or CSV format, an iterator of rows if streaming, or bytes if raw. 
 
         Examples:
             >>> from spacenadtime import SpaceAndTime
@@ -134,26 +164,39 @@ class SpaceAndTime:
         if not resources: resources = []
         if not biscuits: biscuits = []
         rtn = []
+        calloptions = {'deadline': deadline, 'cancel_token': cancel_token}
+        if raw: calloptions['raw'] = True
+        if sink is not None: calloptions['sink'] = sink
+        if hedge and sql_type == SXTSqlType.DQL: calloptions['hedge'] = hedge
+        calloptions['priority'] = priority if priority is not None else SXTPriority.INTERACTIVE if sql_type == SXTSqlType.DQL else SXTPriority.BATCH
 
         try: 
             resources = resources if type(resources)==list else [str(resources)]
             sql_text = self.__replaceall(mainstr=sql_text, replacemap={'resource':resources[0] if resources else [] ,'public_key':user.public_key })
-            self.logger.info(f'Executing query: \n{sql_text}')
+            self.logger.info('Executing query: \n%s', truncated(sql_text), extra={'sxt': {'app': self.application_name, 'resources': resources}})
 
             if self.network_calls_enabled: 
                 if  sql_type == SXTSqlType.DDL :
-                    success, rtn = user.base_api.sql_ddl(sql_text=sql_text, biscuits=biscuits, app_name=self.application_name)
+                    success, rtn = user.base_api.sql_ddl(sql_text=sql_text, biscuits=biscuits, app_name=self.application_name, **calloptions)
 
                 elif sql_type == SXTSqlType.DML and resources:
-                    success, rtn = user.base_api.sql_dml(sql_text=sql_text, biscuits=biscuits, app_name=self.application_name, resources=resources)
+                    success, rtn = user.base_api.sql_dml(sql_text=sql_text, biscuits=biscuits, app_name=self.application_name, resources=resources, **calloptions)
+
+                elif sql_type == SXTSqlType.DQL and resources and stream:
+                    success, rtn = user.base_api.sql_dql_stream(sql_text=sql_text, biscuits=biscuits, app_name=self.application_name, resources=resources, batch_size=batch_size, **calloptions)
 
                 elif sql_type == SXTSqlType.DQL and resources:
-                    success, rtn = user.base_api.sql_dql(sql_text=sql_text, biscuits=biscuits, app_name=self.application_name, resources=resources)
+                    success, rtn = user.base_api.sql_dql(sql_text=sql_text, biscuits=biscuits, app_name=self.application_name, resources=resources, **calloptions)
 
                 else:
-                    success, rtn = user.base_api.sql_exec(sql_text=sql_text, biscuits=biscuits, app_name=self.application_name)
+                    if stream: calloptions['stream'] = True
+                    success, rtn = user.base_api.sql_exec(sql_text=sql_text, biscuits=biscuits, app_name=self.application_name, **calloptions)
+                    if success and stream and batch_size: rtn = batched(rtn, batch_size)
             else:
                 success, rtn = (True, [{'col1':'data', 'col2':'data'},{'col1':'data', 'col2':'data'},{'col1':'data', 'col2':'data'}] )
+                if stream: rtn = batched(rtn, batch_size) if batch_size else iter(rtn)
+                if sink is not None: rtn = sink.write(self.codec.dumps(rtn))
+                elif raw: rtn = self.codec.dumps(rtn)
 
             if not success: raise SxTQueryError(f'Query Failed: {str(rtn)}', logger=self.logger)
 
@@ -161,6 +204,112 @@ class SpaceAndTime:
             self.logger.error(f'Error in query execution: {ex}')
             return False, {'error':f'Error in query execution: {ex}'}
 
+        if stream or raw or sink is not None: return True, rtn
+        return self.__format_output(rtn, output_format)
+
+
+    async def execute_query_async(self, sql_text:str, sql_type:SXTSqlType = SXTSqlType.DQL, 
+                                  resources:list = None, user:SXTUser = None, 
+                                  biscuits:list  = None, output_format:SXTOutputFormat = SXTOutputFormat.JSON, 
+                                  deadline:float = None, cancel_token:SXTCancelToken = None, 
+                                  stream:bool = False, batch_size:int = None, 
+                                  raw:bool = False, sink:object = None, 
+                                  priority:SXTPriority = None) -> tuple:
+        """--------------------
+        Async version of execute_query: executes a query using an authenticated user without blocking the event loop. 
+        Accepts the same arguments except hedge (async calls are not hedged), and returns the same (success, rows) tuple, 
+        except that a stream is an async iterator, to be read with async for.
+
+        Examples:
+            >>> sxt = SpaceAndTime()
+            >>> await sxt.authenticate_async()
+            >>> results = await asyncio.gather(*[sxt.execute_query_async(sql) for sql in many_queries])
+        """
+        if not user: user = self.user
+        if not resources: resources = []
+        if not biscuits: biscuits = []
+        rtn = []
+        calloptions = {'deadline': deadline, 'cancel_token': cancel_token}
+        if raw: calloptions['raw'] = True
+        if sink is not None: calloptions['sink'] = sink
+        calloptions['priority'] = priority if priority is not None else SXTPriority.INTERACTIVE if sql_type == SXTSqlType.DQL else SXTPriority.BATCH
+
+        try: 
+            resources = resources if type(resources)==list else [str(resources)]
+            sql_text = self.__replaceall(mainstr=sql_text, replacemap={'resource':resources[0] if resources else [] ,'public_key':user.public_key })
+            self.logger.info('Executing query: \n%s', truncated(sql_text), extra={'sxt': {'app': self.application_name, 'resources': resources}})
+
+            if self.network_calls_enabled: 
+                if  sql_type == SXTSqlType.DDL :
+                    success, rtn = await user.async_api.sql_ddl(sql_text=sql_text, biscuits=biscuits, app_name=self.application_name, **calloptions)
+
+                elif sql_type == SXTSqlType.DML and resources:
+                    success, rtn = await user.async_api.sql_dml(sql_text=sql_text, biscuits=biscuits, app_name=self.application_name, resources=resources, **calloptions)
+
+                elif sql_type == SXTSqlType.DQL and resources and stream:
+                    success, rtn = await user.async_api.sql_dql_stream(sql_text=sql_text, biscuits=biscuits, app_name=self.application_name, resources=resources, batch_size=batch_size, **calloptions)
+
+                elif sql_type == SXTSqlType.DQL and resources:
+                    success, rtn = await user.async_api.sql_dql(sql_text=sql_text, biscuits=biscuits, app_name=self.application_name, resources=resources, **calloptions)
+
+                else:
+                    if stream: calloptions['stream'] = True
+                    success, rtn = await user.async_api.sql_exec(sql_text=sql_text, biscuits=biscuits, app_name=self.application_name, **calloptions)
+                    if success and stream and batch_size: rtn = batched_async(rtn, batch_size)
+            else:
+                success, rtn = (True, [{'col1':'data', 'col2':'data'},{'col1':'data', 'col2':'data'},{'col1':'data', 'col2':'data'}] )
+                if stream: rtn = batched_async(iterate_async(rtn), batch_size) if batch_size else iterate_async(rtn)
+                if sink is not None: rtn = sink.write(self.codec.dumps(rtn))
+                elif raw: rtn = self.codec.dumps(rtn)
+
+            if not success: raise SxTQueryError(f'Query Failed: {str(rtn)}', logger=self.logger)
+
+        except SxTQueryError as ex:
+            self.logger.error(f'Error in query execution: {ex}')
+            return False, {'error':f'Error in query execution: {ex}'}
+
+        if stream or raw or sink is not None: return True, rtn
+        return self.__format_output(rtn, output_format)
+
+
+    @traced('SpaceAndTime.execute_queries')
+    def execute_queries(self, queries:list, max_workers:int = None, deadline:float = None, 
+                        cancel_token:SXTCancelToken = None, **kwargs) -> list:
+        """--------------------
+        Executes many queries concurrently, as many at once as the api concurrency_limiter allows.  
+        
+        Args: 
+            queries (list): SQL text strings, or dicts of execute_query arguments (e.g. {'sql_text':..., 'resources':[...]}), which override kwargs, deadline and cancel_token.
+            max_workers (int): (optional) Maximum threads.  Defaults to the connection pool size, or the concurrency_limiter max_limit if enabled and lower.
+            deadline (float | SXTDeadline): (optional) Seconds by which all queries must complete.  Queries not started by then fail.
+            cancel_token (SXTCancelToken): (optional) Token that can be cancelled from another thread to abort the remaining queries.
+            **kwargs: (optional) Further execute_query arguments applied to every query, e.g. sql_type or output_format.
+
+        Returns:
+            list: One (success, rows) tuple per query, in the same order as queries.
+
+        Examples:
+            >>> results = sxt.execute_queries(['SELECT 1', {'sql_text':'SELECT * FROM SXTDEMO.Singularity', 'resources':['SXTDEMO.Singularity']}])
+        """
+        deadline = SXTDeadline.coerce(deadline)
+        user = kwargs.get('user') or self.user
+        workers = bulk_workers(max_workers or True, user.base_api, len(queries))
+
+        def run_query(query):
+            args = {**kwargs, **(query if isinstance(query, dict) else {'sql_text': query})}
+            args.setdefault('deadline', deadline) # a query's own deadline or cancel_token wins
+            args.setdefault('cancel_token', cancel_token)
+            return self.execute_query(**args)
+
+        results = [None] * len(queries)
+        for i, outcome in run_parallel(run_query, queries, workers, deadline, cancel_token):
+            if isinstance(outcome, (SxTTimeoutError, SxTCancelledError)):
+                outcome = (False, {'error':f'Query not attempted: {outcome}'})
+            results[i] = outcome
+        return results
+
+
+    def __format_output(self, rtn:list, output_format:SXTOutputFormat) -> tuple:
         if output_format == SXTOutputFormat.JSON: return True, rtn
         if output_format == SXTOutputFormat.CSV: return self.json_to_csv(rtn)
         if output_format == SXTOutputFormat.DATAFRAME: return self.json_to_dataframe(rtn)
@@ -171,6 +320,7 @@ class SpaceAndTime:
     def json_to_csv(self, list_of_dicts:list) -> list:
         """--------------------
         Takes a list of dictionaries (default return from DQL query) and transforms to a list of CSV rows, preceded with a header row.
+        Nested values (objects and arrays) are written as JSON, using the API codec.
 
         Args:
             list_of_dicts (list): A list of dictionary items, i.e., rows of JSON columns.
@@ -181,9 +331,11 @@ class SpaceAndTime:
         """
         if list_of_dicts == []: return False, []
         try:
+            dumps = self.codec.dumps
             rows = [','.join( list(list_of_dicts[0].keys()) )] # headers
             for row in list_of_dicts:
-                rows.append( ','.join([f'"{str(val).replace(chr(34),chr(34)+chr(34))}"' for val in list(row.values())]) )
+                values = [dumps(val).decode('utf-8') if isinstance(val, (dict, list)) else str(val) for val in row.values()] # nested values as JSON
+                rows.append( ','.join([f'"{val.replace(chr(34),chr(34)+chr(34))}"' for val in values]) )
             self.logger.debug('Query JSON transformed to CSV')
             return True, rows 
         except Exception as ex:
@@ -203,7 +355,7 @@ class SpaceAndTime:
             list: pandas dataframe object.
         """
         try:
-            df = pd.read_json( StringIO(json.dumps(list_of_dicts)) )
+            df = pd.read_json( BytesIO(self.codec.dumps(list_of_dicts)) )
             self.logger.debug('Query JSON transformed to DataFrame')
             return True, df 
         except Exception as ex:
@@ -214,6 +366,7 @@ class SpaceAndTime:
     def json_to_parquet(self, list_of_dicts:list) -> bytes:
         """--------------------
         Takes a list of dictionaries (default return from DQL query) and transforms to a parquet byte array.
+        Built from json_to_dataframe(), so the JSON is serialized once, by the API codec.
 
         Args:
             list_of_dicts (list): A list of dictionary items, i.e., rows of JSON columns.
@@ -244,6 +397,7 @@ class SpaceAndTime:
         return mainstr
 
     
+    @traced('SpaceAndTime.discovery_get_schemas')
     def discovery_get_schemas(self, scope:SXTDiscoveryScope = SXTDiscoveryScope.ALL, 
                               user:SXTUser = None, 
                               return_as:type = list) -> tuple:
@@ -271,6 +425,7 @@ class SpaceAndTime:
         return success, response
 
         
+    @traced('SpaceAndTime.discovery_get_tables')
     def discovery_get_tables(self, schema:str, 
                              scope:SXTDiscoveryScope = SXTDiscoveryScope.ALL, 
                              user:SXTUser = None, 
@@ -302,6 +457,7 @@ class SpaceAndTime:
         return success, response
 
 
+    @traced('SpaceAndTime.discovery_get_table_columns')
     def discovery_get_table_columns(self, schema:str, tablename:str, 
                              user:SXTUser = None, 
                              search_pattern:str = None, 
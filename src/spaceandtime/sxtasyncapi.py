@@ -0,0 +1,696 @@
+import asyncio, logging, os, threading, time
+from collections import deque
+from .sxtenums import SXTApiCallTypes, SXTPriority, SXTHookEvent
+from .sxtexceptions import SxTArgumentError, SxTAPINotDefinedError, SxTTimeoutError, SxTCancelledError, SxTCircuitOpenError, SxTControlFlowError
+from .sxtbaseapi import SXTBaseAPI
+from .sxtretry import SXTRetryPolicy, SXTRetryBudget
+from .sxtcancellation import SXTDeadline, SXTCancelToken, check_abort
+from .sxthooks import SXTCallEvent
+from .sxtstream import SXTJsonArrayParser
+from .sxttracing import get_tracer, traced, NOOP_SPAN
+from .sxtlogging import truncated
+
+try:
+    import aiohttp
+except ImportError: # optional dependency, see pyproject [async] extra
+    aiohttp = None
+
+
+
+
+class SXTAsyncRetryPolicy(SXTRetryPolicy):
+    """SXTRetryPolicy for AsyncSXTBaseAPI: also recognizes aiohttp transport failures as transient, and aiohttp 
+    connection failures (the request was never sent) as safe to retry even for non-idempotent calls."""
+
+    retryable_exceptions: tuple = SXTRetryPolicy.retryable_exceptions + \
+        ((aiohttp.ClientConnectionError, aiohttp.ServerTimeoutError) if aiohttp is not None else ())
+    unprocessed_exceptions: tuple = (aiohttp.ClientConnectorError, getattr(aiohttp, 'ConnectionTimeoutError', aiohttp.ClientConnectorError)) if aiohttp is not None else ()
+
+    def is_unprocessed(self, status_code:int = None, exception:Exception = None) -> bool:
+        if isinstance(exception, self.unprocessed_exceptions): return True
+        return super().is_unprocessed(status_code, exception)
+
+
+
+
+class SXTAsyncRowStream():
+    """Async iterator over the rows of a JSON array response, parsed incrementally as the body arrives.  
+    Async counterpart of SXTRowStream: use with async for, and close() (or async with) if not read to the end."""
+
+    response: object = None
+    chunk_size: int = 65536
+    deadline: SXTDeadline = None
+    cancel_token: SXTCancelToken = None
+    rows_read: int = 0
+    bytes_read: int = 0
+    __parser__: SXTJsonArrayParser = None
+    __pending__: deque = None
+    __eof__: bool = False
+
+
+    def __init__(self, response, chunk_size:int = None, deadline:SXTDeadline = None, cancel_token:SXTCancelToken = None) -> None:
+        """--------------------
+        Wraps an aiohttp response, whose body (a JSON array) has not yet been read.
+
+        Args:
+            response (aiohttp.ClientResponse): Response to read.  Released when the stream is exhausted or closed.
+            chunk_size (int): (optional) Bytes to read from the network at a time.
+            deadline (SXTDeadline): (optional) Deadline checked between chunks.
+            cancel_token (SXTCancelToken): (optional) Token checked between chunks.
+        """
+        self.response = response
+        if chunk_size: self.chunk_size = chunk_size
+        self.deadline = deadline
+        self.cancel_token = cancel_token
+        self.rows_read = self.bytes_read = 0
+        self.__parser__ = SXTJsonArrayParser()
+        self.__pending__ = deque()
+        self.__eof__ = False
+
+    def __str__(self) -> str:
+        return f'SXTAsyncRowStream(rows_read={self.rows_read}, bytes_read={self.bytes_read})'
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while not self.__pending__:
+            if self.__eof__: raise StopAsyncIteration
+            check_abort(self.deadline, self.cancel_token)
+            try:
+                chunk = await self.response.content.read(self.chunk_size)
+                self.bytes_read += len(chunk)
+                self.__eof__ = chunk == b''
+                self.__pending__.extend(self.__parser__.feed(chunk, self.__eof__))
+            except BaseException:
+                self.close()
+                raise
+            if self.__eof__: self.close()
+        self.rows_read += 1
+        return self.__pending__.popleft()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Stops the stream and releases the underlying connection.  Safe to call more than once."""
+        self.__eof__ = True
+        if self.response is not None: self.response.release()
+
+    def batches(self, batch_size:int = 1000):
+        """Yields the remaining rows as lists of up to batch_size rows, as an async iterator."""
+        return batched_async(self, batch_size)
+
+
+
+
+async def iterate_async(chunks):
+    """Wraps a synchronous iterable (e.g. the bytes from SXTCodec.dumps_iter, or rows) as an async generator, for a streamed aiohttp request body."""
+    for chunk in chunks:
+        yield chunk
+        await asyncio.sleep(0) # let other tasks run between chunks
+
+
+async def batched_async(rows, batch_size:int = 1000):
+    """Yields lists of up to batch_size items from any async iterable of rows."""
+    batch = []
+    async for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch: yield batch
+
+
+
+class SXTAsyncConnectionPool():
+    """Pool of non-blocking aiohttp sessions, one per running event loop, shared by every AsyncSXTBaseAPI."""
+
+    limit: int = 100
+    limit_per_host: int = 20
+    keepalive_timeout: float = 30.0
+    __sessions__: dict = None
+    __lock__: threading.Lock = None
+
+
+    def __init__(self, limit:int = None, limit_per_host:int = None, keepalive_timeout:float = None) -> None:
+        """--------------------
+        Creates a new async connection pool.
+
+        Args:
+            limit (int): (optional) Maximum number of simultaneous connections, across all hosts.
+            limit_per_host (int): (optional) Maximum number of simultaneous connections to a single host.
+            keepalive_timeout (float): (optional) Seconds an idle keep-alive connection is kept open before being closed.
+        """
+        if limit is not None: self.limit = limit
+        if limit_per_host is not None: self.limit_per_host = limit_per_host
+        if keepalive_timeout is not None: self.keepalive_timeout = keepalive_timeout
+        self.__sessions__ = {}
+        self.__lock__ = threading.Lock()
+
+
+    def get_session(self) -> object:
+        """Returns the shared aiohttp.ClientSession for the currently running event loop, creating it if needed."""
+        if aiohttp is None:
+            raise ImportError('AsyncSXTBaseAPI requires the optional dependency aiohttp:  pip install spaceandtime[async]')
+        loop = asyncio.get_running_loop()
+        with self.__lock__:
+            # drop sessions belonging to loops that have since closed
+            for closed_loop in [l for l in self.__sessions__ if l.is_closed()]:
+                self.__sessions__.pop(closed_loop)
+            session = self.__sessions__.get(loop)
+            if session is None or session.closed:
+                connector = aiohttp.TCPConnector(limit=self.limit, limit_per_host=self.limit_per_host,
+                                                 keepalive_timeout=self.keepalive_timeout)
+                session = aiohttp.ClientSession(connector=connector)
+                self.__sessions__[loop] = session
+        return session
+
+
+    def after_fork(self) -> None:
+        """Called in a forked child: forgets the parent's sessions, whose event loops and sockets belong to the parent."""
+        self.__sessions__ = {}
+        self.__lock__ = threading.Lock()
+
+
+    async def close(self) -> None:
+        """Closes the session (and all connections) belonging to the currently running event loop."""
+        loop = asyncio.get_running_loop()
+        with self.__lock__:
+            session = self.__sessions__.pop(loop, None)
+        if session is not None: await session.close()
+
+
+
+
+class AsyncSXTBaseAPI(SXTBaseAPI):
+    """asyncio-native counterpart of SXTBaseAPI.  Every API method is a coroutine returning the same (success, result) tuple."""
+
+    async_connection_pool: SXTAsyncConnectionPool = SXTAsyncConnectionPool() # shared by all instances in the process
+    retry_policy: SXTRetryPolicy = SXTAsyncRetryPolicy() # shared, also classifies aiohttp errors; use SXTAsyncRetryPolicy for custom policies
+
+
+    @traced('sxt {endpoint}')
+    async def call_api(self, endpoint: str,
+                       auth_header:bool = True,
+                       request_type:str = SXTApiCallTypes.POST,
+                       header_parms: dict = {},
+                       data_parms: dict = {},
+                       query_parms: dict = {},
+                       path_parms: dict = {},
+                       retry_policy: SXTRetryPolicy = None,
+                       retry_budget: SXTRetryBudget = None,
+                       deadline: SXTDeadline = None,
+                       cancel_token: SXTCancelToken = None,
+                       raw: bool = False,
+                       sink: object = None, 
+                       priority: SXTPriority = None,
+                       stream: bool = False,
+                       retry_non_idempotent: bool = False ):
+        """--------------------
+        Generic coroutine to call and return SxT API.  Async version of SXTBaseAPI.call_api, with the same arguments 
+        except hedge.  A sink must have a synchronous write(bytes) method.  With stream=True, a successful call returns 
+        an SXTAsyncRowStream, to be read with async for.
+
+        The call can also be aborted by cancelling the awaiting task, in which case asyncio.CancelledError 
+        propagates as normal.  Cancelling the cancel_token instead returns (False, error) like any other failure.
+
+        Results:
+            bool: Indicating request success
+            json: Result of the API, expressed as a JSON object
+        """
+        txt = 'response.text not available - are you sure you have the correct API Endpoint?'
+        statuscode = 555
+        response = {}
+
+        if not self.network_calls_enabled: 
+            fakedata = self.__fakedata__(endpoint)
+            if sink is not None: return True, sink.write(self.codec.dumps(fakedata))
+            if stream: return True, iterate_async(fakedata if type(fakedata)==list else [fakedata])
+            return True, self.codec.dumps(fakedata) if raw else fakedata
+
+        try:
+            method, path, headers, body = self.__prepare_call__(endpoint, auth_header, request_type, header_parms, data_parms, query_parms, path_parms)
+        except Exception as ex:
+            return self.__fail__(SXTCallEvent(endpoint, user_id=self.user_id), txt, ex, statuscode, response)
+
+        if not retry_policy: retry_policy = self.retry_policy
+        request_bytes = len(body) if isinstance(body, bytes) else None
+        if not isinstance(body, bytes): # a streamed body can only be sent once
+            retry_policy = SXTRetryPolicy(max_attempts=1)
+            body = iterate_async(body)
+        if retry_budget: retry_budget.record_call()
+        deadline = SXTDeadline.coerce(deadline)
+        priority = self.__priority__(endpoint, method, priority)
+
+        # cancel_token.cancel() may come from any thread, so hop onto this loop to cancel the task
+        task = asyncio.current_task()
+        loop = asyncio.get_running_loop()
+        listening = [True]
+        canceller = lambda: loop.call_soon_threadsafe(lambda: task.cancel() if listening[0] else None)
+        if cancel_token is not None: cancel_token.add_callback(canceller)
+
+        gateways = self.gateway_pool()
+        idempotent = self.route(endpoint).is_idempotent(method) or retry_non_idempotent
+        failover = len(gateways) > 1 and idempotent
+        gateway = gateways.choose()
+        tried = []
+        attempt = 0
+        event = SXTCallEvent(endpoint, method, attempt, headers.get('originApp'), priority, request_bytes, self.user_id)
+        tracer = get_tracer()
+        if tracer.active: tracer.current_span().set_attributes({'sxt.endpoint': endpoint, 'sxt.app': headers.get('originApp'), 'sxt.user_id': self.user_id, 'sxt.priority': str(priority)})
+        try:
+            while True:
+                attempt += 1
+                txt = 'response.text not available - are you sure you have the correct API Endpoint?'
+                statuscode = 555
+                response = {}
+                permit = False
+                http_span = NOOP_SPAN
+                event = SXTCallEvent(endpoint, method, attempt, headers.get('originApp'), priority, request_bytes, self.user_id)
+                try:
+                    check_abort(deadline, cancel_token)
+                    await self.rate_limiter.acquire_async(self.user_id, endpoint, headers.get('originApp'), deadline, cancel_token)
+                    if not self.circuit_breaker.allow(endpoint): 
+                        raise SxTCircuitOpenError(f'Circuit open for endpoint "{endpoint}", failing fast')
+                    await self.concurrency_limiter.acquire_async(deadline, cancel_token, priority, headers.get('originApp'))
+                    permit = True
+                    event.timings['queue'] = time.monotonic() - event.started
+                    session = self.async_connection_pool.get_session()
+                    connect_timeout, read_timeout = self.timeout_for(endpoint, deadline)
+                    timeout = aiohttp.ClientTimeout(total = deadline.remaining() if deadline else None, 
+                                                    sock_connect = connect_timeout, sock_read = read_timeout)
+                    event.url = gateway + path
+                    http_span = tracer.start_span(f'{method} {endpoint}', 'client', attributes={'http.request.method': method, 'url.full': event.url, 'sxt.attempt': attempt})
+                    self.__emit__(SXTHookEvent.PRE_REQUEST, event)
+                    started = time.monotonic()
+                    response = await session.request(method=method, url=gateway + path, data=body, headers=tracer.inject(headers, http_span), timeout=timeout)
+                    streaming = False
+                    try:
+                        statuscode = event.status = response.status
+                        event.timings['ttfb'] = time.monotonic() - started # includes any connect time
+                        if response.ok: 
+                            latency = time.monotonic() - started
+                            self.circuit_breaker.record_success(endpoint)
+                            gateways.record_success(gateway, latency)
+                            self.concurrency_limiter.release(False, latency, endpoint)
+                            permit = False
+                        if stream and response.ok:
+                            self.logger.debug('API call streaming for endpoint: "%s"', endpoint)
+                            self.__emit__(SXTHookEvent.POST_RESPONSE, event)
+                            streaming = True # released by the stream
+                            return True, SXTAsyncRowStream(response, self.read_chunk_size, deadline, cancel_token)
+                        if sink is not None and response.ok:
+                            self.__emit__(SXTHookEvent.POST_RESPONSE, event)
+                            return await self.__write_sink_async__(endpoint, response, sink, deadline, cancel_token)
+                        downloading = time.monotonic()
+                        content = await response.read()
+                        event.timings['download'] = time.monotonic() - downloading
+                        event.response_bytes = len(content)
+                        if not response.ok: 
+                            txt = content.decode('utf-8', errors='replace')
+                            self.__emit__(SXTHookEvent.POST_RESPONSE, event)
+                        response.raise_for_status()
+                    finally:
+                        if not streaming: response.release()
+
+                    if raw:
+                        self.logger.debug('API call completed for endpoint: "%s" with %d raw bytes', endpoint, len(content))
+                        self.__emit__(SXTHookEvent.POST_RESPONSE, event)
+                        return True, content
+
+                    parsing = time.monotonic()
+                    try:
+                        rtn = self.codec.loads(content) # straight from bytes, no intermediate str
+                    except self.codec.decode_errors as ex:
+                        txt = content.decode('utf-8', errors='replace')
+                        rtn = {'text':txt, 'status_code':statuscode}
+                    event.timings['parse'] = time.monotonic() - parsing
+                    if type(rtn) == list: event.rows = len(rtn)
+                    self.__emit__(SXTHookEvent.POST_RESPONSE, event)
+
+                    if self.logger.isEnabledFor(logging.DEBUG):
+                        self.logger.debug('API return content type: %s', response.headers.get('content-type',''))
+                        self.logger.debug('API call completed for endpoint: "%s" with result: %s', endpoint, truncated(content))
+                    return True, rtn
+
+                except asyncio.CancelledError:
+                    raise
+                except SxTControlFlowError as ex: # stops the call, never retried
+                    return self.__fail__(event, txt, ex, statuscode, response)
+                except Exception as ex:
+                    if retry_non_idempotent and retry_policy.already_applied(attempt, txt):
+                        return self.__already_applied__(event, endpoint, attempt)
+                    retry_after = response.headers.get('Retry-After') if hasattr(response, 'headers') else None
+                    self.__record_outcome__(endpoint, retry_policy, statuscode, txt, ex, headers, retry_after, gateways, gateway)
+                    if permit: 
+                        self.concurrency_limiter.release(retry_policy.is_retryable(statuscode, txt, ex) or None)
+                        permit = False # not held while backing off
+                    if deadline and deadline.expired: 
+                        return self.__fail__(event, txt, SxTTimeoutError(f'Deadline of {deadline.seconds}s exceeded: {ex}'), statuscode, response)
+                    delay = retry_policy.retry_delay(attempt, statuscode, txt, ex, retry_after, retry_budget, idempotent)
+                    if delay is not None and deadline and delay >= deadline.remaining(): delay = None
+                    if delay is not None and self.circuit_breaker.is_open(endpoint): delay = None # just tripped, don't pile on
+                    if delay is None:
+                        return self.__fail__(event, txt, ex, statuscode, response)
+                    if failover:
+                        tried.append(gateway)
+                        gateway = gateways.choose(exclude=tried)
+                        if gateway not in tried: delay = 0.0 # another gateway, no need to back off
+                    self.logger.warning('API call to "%s" failed (attempt %d, status %s), retrying in %.2fs on %s: %s', endpoint, attempt, statuscode, delay, gateway, truncated(ex),
+                                        extra={'sxt': {'endpoint': endpoint, 'attempt': attempt, 'status': statuscode, 'retry_delay': delay, 'gateway': gateway}})
+                    event.exception, event.status, event.retry_delay = ex, statuscode, delay
+                    self.__emit__(SXTHookEvent.ON_RETRY, event)
+                    self.__end_span__(http_span, event)
+                    with tracer.span('sxt.retry.backoff', attributes={'sxt.attempt': attempt, 'sxt.retry.delay': delay}):
+                        await asyncio.sleep(delay)
+                finally:
+                    if permit: self.concurrency_limiter.release()
+                    self.__end_span__(http_span, event)
+
+        except asyncio.CancelledError:
+            if cancel_token is None or not cancel_token.cancelled: raise
+            if hasattr(task, 'uncancel'): task.uncancel()
+            return self.__fail__(event, txt, SxTCancelledError(cancel_token.reason), statuscode, response)
+        finally:
+            listening[0] = False
+            if cancel_token is not None: cancel_token.remove_callback(canceller)
+
+
+    async def __write_sink_async__(self, endpoint:str, response:object, sink:object, deadline:SXTDeadline = None, cancel_token:SXTCancelToken = None) -> tuple:
+        """Copies a response body into sink, undecoded.  Returns (True, bytes_written), or call_api style errors."""
+        written = 0
+        try:
+            async for chunk in response.content.iter_chunked(self.read_chunk_size):
+                check_abort(deadline, cancel_token)
+                sink.write(chunk)
+                written += len(chunk)
+        except asyncio.CancelledError:
+            raise
+        except Exception as ex: # partially written, so never retried
+            return self.__handle_errors__(f'Response failed after {written} bytes were written to sink', ex, response.status, response)
+        self.logger.debug('API call completed for endpoint: "%s" with %d bytes written to sink', endpoint, written)
+        return True, written
+
+
+    async def close(self) -> None:
+        """Closes the shared session for the running event loop.  Call before the loop shuts down."""
+        await self.async_connection_pool.close()
+
+
+    async def get_auth_challenge_token(self, user_id:str, prefix:str = None, joincode:str = None):
+        """(alias) Async version of SXTBaseAPI.auth_code."""
+        return await self.auth_code(user_id, prefix, joincode)
+
+
+    async def auth_code(self, user_id:str, prefix:str = None, joincode:str = None):
+        """--------------------
+        Async version of SXTBaseAPI.auth_code: issues a random challenge token to be signed as part of the authentication workflow.
+
+        Returns:
+            bool: Success flag (True/False) indicating the api call worked as expected.
+            object: Response information from the Space and Time network, as list or dict(json).
+        """
+        dataparms = {"userId": user_id}
+        if prefix: dataparms["prefix"] = prefix
+        if joincode: dataparms[joincode] = joincode
+        success, rtn = await self.call_api(endpoint = 'auth/code', auth_header = False, data_parms = dataparms)
+        return success, rtn if success else [rtn]
+
+
+    async def get_access_token(self, user_id:str, challange_token:str, signed_challange_token:str='', public_key:str=None, keymanager:object=None, scheme:str = "ed25519"):
+        """(alias) Async version of SXTBaseAPI.auth_token."""
+        return await self.auth_token(user_id, challange_token, signed_challange_token, public_key, keymanager, scheme)
+
+
+    async def auth_token(self, user_id:str, challange_token:str, signed_challange_token:str='', public_key:str=None, keymanager:object=None, scheme:str = "ed25519"):
+        """--------------------
+        Async version of SXTBaseAPI.auth_token: validates signed challenge token and provides new Access_Token and Refresh_Token.
+
+        Returns:
+            bool: Success flag (True/False) indicating the api call worked as expected.
+            object: Response information from the Space and Time network, as list or dict(json).
+        """
+        if keymanager:
+            try:
+                public_key = keymanager.public_key_to(keymanager.ENCODINGS.BASE64)
+                signed_challange_token = keymanager.sign_message(challange_token)
+            except Exception as ex:
+                return False, {'error':'keymanager object must be of type SXTKeyManager, if supplied.'}
+
+        dataparms = { "userId": user_id
+                     ,"signature": signed_challange_token
+                     ,"authCode": challange_token
+                     ,"key": public_key
+                     ,"scheme": scheme}
+        success, rtn = await self.call_api(endpoint='auth/token', auth_header=False, data_parms=dataparms)
+        return success, rtn if success else [rtn]
+
+
+    async def token_refresh(self, refresh_token:str):
+        """Async version of SXTBaseAPI.token_refresh."""
+        headers = { 'authorization': f'Bearer {refresh_token}' }
+        success, rtn = await self.call_api('auth/refresh', False, header_parms=headers)
+        return success, rtn if success else [rtn]
+
+
+    async def auth_logout(self):
+        """Async version of SXTBaseAPI.auth_logout."""
+        success, rtn = await self.call_api('auth/logout', True)
+        return success, rtn if success else [rtn]
+
+
+    async def auth_validtoken(self):
+        """Async version of SXTBaseAPI.auth_validtoken."""
+        success, rtn = await self.call_api('auth/validtoken', True, SXTApiCallTypes.GET)
+        return success, rtn if success else [rtn]
+
+
+    async def auth_idexists(self, user_id:str ):
+        """Async version of SXTBaseAPI.auth_idexists."""
+        success, rtn = await self.call_api('auth/idexists/{id}', False, SXTApiCallTypes.GET, path_parms={'id': user_id})
+        return success, rtn if success else [rtn]
+
+
+    async def auth_keys(self):
+        """Async version of SXTBaseAPI.auth_keys."""
+        success, rtn = await self.call_api('auth/keys', True, SXTApiCallTypes.GET)
+        return success, rtn if success else [rtn]
+
+
+    async def auth_addkey(self, user_id:str, public_key:str, challange_token:str, signed_challange_token:str, scheme:str = "ed25519"):
+        """Async version of SXTBaseAPI.auth_addkey."""
+        dataparms = { "authCode": challange_token
+                    ,"signature": signed_challange_token
+                    ,"key": public_key
+                    ,"scheme": scheme }
+        success, rtn = await self.call_api('auth/keys', True, SXTApiCallTypes.POST, data_parms=dataparms)
+        return success, rtn if success else [rtn]
+
+
+    async def auth_addkey_challenge(self):
+        """(alias) Async version of SXTBaseAPI.auth_keys_code."""
+        return await self.auth_keys_code()
+
+
+    async def auth_keys_code(self):
+        """Async version of SXTBaseAPI.auth_keys_code."""
+        success, rtn = await self.call_api('auth/keys/code', True)
+        return success, rtn if success else [rtn]
+
+
+    async def sql_exec(self, sql_text:str, biscuits:list = None, app_name:str = None, validate:bool = False, **kwargs):
+        """--------------------
+        Async version of SXTBaseAPI.sql_exec: executes a database statement/query of arbitrary type (DML, DDL, DQL).
+
+        Returns:
+            bool: Success flag (True/False) indicating the api call worked as expected.
+            object: Response information from the Space and Time network, as list or dict(json).
+        """
+        headers = { 'originApp': app_name } if app_name else {}
+        sql_text = self.prep_sql(sql_text=sql_text)
+        biscuit_tokens = self.prep_biscuits(biscuits)
+        if type(biscuit_tokens) != list:  raise SxTArgumentError("sql_all requires parameter 'biscuits' to be a list of biscuit_tokens or SXTBiscuit objects.",  logger = self.logger)
+        dataparms = {"sqlText": sql_text
+                    ,"biscuits": biscuit_tokens
+                    ,"validate": str(validate).lower() }
+        success, rtn = await self.call_api('sql', True, header_parms=headers, data_parms=dataparms, **kwargs)
+        return success, rtn if success else [rtn]
+
+
+    async def sql_ddl(self, sql_text:str, biscuits:list = None, app_name:str = None, **kwargs):
+        """--------------------
+        Async version of SXTBaseAPI.sql_ddl: executes a database DDL statement, and returns status.
+
+        Returns:
+            bool: Success flag (True/False) indicating the api call worked as expected.
+            object: Response information from the Space and Time network, as list or dict(json).
+        """
+        headers = { 'originApp': app_name } if app_name else {}
+        sql_text = self.prep_sql(sql_text=sql_text)
+        biscuit_tokens = self.prep_biscuits(biscuits)
+        if biscuit_tokens==[]:  raise SxTArgumentError("sql_ddl requires 'biscuits', none were provided.", logger = self.logger)
+        dataparms = {"sqlText": sql_text
+                    ,"biscuits": biscuit_tokens }
+        success, rtn = await self.call_api('sql/ddl', True, header_parms=headers, data_parms=dataparms, **kwargs)
+        return success, rtn if success else [rtn]
+
+
+    async def sql_dml(self, sql_text:str, resources:list, biscuits:list = None, app_name:str = None, **kwargs):
+        """--------------------
+        Async version of SXTBaseAPI.sql_dml: executes a database DML statement, and returns status.
+        As there, sql_text may be an iterable of str chunks, streamed to the network without building the whole body.
+
+        Returns:
+            bool: Success flag (True/False) indicating the api call worked as expected.
+            object: Response information from the Space and Time network, as list or dict(json).
+        """
+        if type(resources) != list: resources = [resources]
+        headers = { 'originApp': app_name } if app_name else {}
+        sql_text = self.prep_sql(sql_text=sql_text) if isinstance(sql_text, str) else iter(sql_text)
+        biscuit_tokens = self.prep_biscuits(biscuits)
+        if type(biscuit_tokens) != list:  raise SxTArgumentError("sql_all requires parameter 'biscuits' to be a list of biscuit_tokens or SXTBiscuit objects.",  logger = self.logger)
+        dataparms = {"sqlText": sql_text
+                    ,"biscuits": biscuit_tokens
+                    ,"resources": [r for r in resources] }
+        success, rtn = await self.call_api('sql/dml', True, header_parms=headers, data_parms=dataparms, **kwargs)
+        return success, rtn if success else [rtn]
+
+
+    async def sql_dql(self, sql_text:str, resources:list, biscuits:list = None, app_name:str = None, **kwargs):
+        """--------------------
+        Async version of SXTBaseAPI.sql_dql: executes a database DQL / SQL query, and returns a dataset as a list of dictionaries.
+        If coalesce_dql is True (default), identical concurrent calls on the same event loop share one request.
+
+        Returns:
+            bool: Success flag (True/False) indicating the api call worked as expected.
+            object: Response information from the Space and Time network, as list or dict(json).
+        """
+        if type(resources) != list: resources = [resources]
+        headers = { 'originApp': app_name } if app_name else {}
+        sql_text = self.prep_sql(sql_text=sql_text)
+        biscuit_tokens = self.prep_biscuits(biscuits)
+        if type(biscuit_tokens) != list:  raise SxTArgumentError("sql_all requires parameter 'biscuits' to be a list of biscuit_tokens or SXTBiscuit objects.",  logger = self.logger)
+        dataparms = {"sqlText": sql_text
+                    ,"biscuits": biscuit_tokens
+                    ,"resources": [r for r in resources] }
+        kwargs['deadline'] = SXTDeadline.coerce(kwargs.get('deadline')) # starts now, whether leading or following
+        call = lambda: self.call_api('sql/dql', True, header_parms=headers, data_parms=dataparms, **kwargs)
+
+        if self.coalesce_dql and not kwargs.get('stream') and kwargs.get('sink') is None:
+            key = (str(self.api_url), self.access_token, app_name, sql_text, tuple(dataparms['resources']), tuple(biscuit_tokens), bool(kwargs.get('raw')))
+            success, rtn = await self.__coalesce__(key, call, kwargs['deadline'], kwargs.get('cancel_token'))
+        else:
+            success, rtn = await call()
+        return success, rtn if success else [rtn]
+
+
+    async def __coalesce__(self, key:tuple, call, deadline:SXTDeadline = None, cancel_token:SXTCancelToken = None) -> tuple:
+        """Async version of SXTBaseAPI.__coalesce__, through single_flight.do_async."""
+        async def lead():
+            success, rtn = await call()
+            return success, rtn, not success and self.__aborted__(rtn, deadline, cancel_token)
+        try:
+            (success, rtn, aborted), shared = await self.single_flight.do_async(key, lead, deadline, cancel_token)
+        except (SxTTimeoutError, SxTCancelledError) as ex:
+            return self.__handle_errors__('Stopped waiting for an identical in-flight query', ex, 555, {})
+        if not shared: return success, rtn
+        if aborted: return await call() # the leader's deadline or cancel_token, not this caller's
+        self.logger.debug('Query %s shared from an identical in-flight query', 'result' if success else 'failure')
+        if type(rtn) == dict: return success, dict(rtn)
+        if type(rtn) == list: rtn = [dict(row) if type(row) == dict else row for row in rtn]
+        return success, rtn
+
+
+    async def sql_dql_stream(self, sql_text:str, resources:list, biscuits:list = None, app_name:str = None, batch_size:int = None, **kwargs):
+        """--------------------
+        Async version of SXTBaseAPI.sql_dql_stream: executes a database DQL / SQL query, and returns an async iterator 
+        that yields rows (or lists of up to batch_size rows) as the response is received and parsed.
+
+        Returns:
+            bool: Success flag (True/False) indicating the api call worked as expected.
+            object: Async iterator of rows or batches if successful, otherwise error information as list.
+
+        Examples:
+            >>> success, rows = await api.sql_dql_stream('SELECT * FROM ETHEREUM.BLOCKS', 'ETHEREUM.BLOCKS', batch_size=10000)
+            >>> async for batch in rows:
+            ...     archive(batch)
+        """
+        success, rtn = await self.sql_dql(sql_text, resources, biscuits, app_name, stream=True, **kwargs)
+        if success and batch_size: rtn = batched_async(rtn, batch_size)
+        return success, rtn
+
+
+    async def discovery_get_schemas(self, scope:str = 'ALL', **kwargs):
+        """Async version of SXTBaseAPI.discovery_get_schemas."""
+        success, rtn = await self.call_api('discover/schema',True, SXTApiCallTypes.GET, query_parms={'scope':scope}, **kwargs)
+        return success, (rtn if success else [rtn])
+
+
+    async def discovery_get_tables(self, schema:str = 'ETHEREUM', scope:str = 'ALL', search_pattern:str = None, **kwargs):
+        """Async version of SXTBaseAPI.discovery_get_tables."""
+        version = 'v2' if 'discover/table' not in list(self.versions.keys()) else self.versions['discover/table']
+        schema_or_namespace = 'namespace' if version=='v1' else 'schema'
+        query_parms = {'scope':scope.upper(), schema_or_namespace:schema.upper()}
+        if version != 'v1' and search_pattern: query_parms['searchPattern'] = search_pattern
+        success, rtn = await self.call_api('discover/table',True,  SXTApiCallTypes.GET, query_parms=query_parms, **kwargs)
+        return success, (rtn if success else [rtn])
+
+
+    async def discovery_get_views(self, schema:str = 'ETHEREUM', scope:str = 'ALL', search_pattern:str = None, **kwargs):
+        """Async version of SXTBaseAPI.discovery_get_views."""
+        version = 'v2' if 'discover/view' not in list(self.versions.keys()) else self.versions['discover/view']
+        query_parms = {'scope':scope.upper(), 'schema':schema.upper()}
+        if version != 'v1' and search_pattern: query_parms['searchPattern'] = search_pattern
+        success, rtn = await self.call_api('discover/view',True,  SXTApiCallTypes.GET, query_parms=query_parms, **kwargs)
+        return success, (rtn if success else [rtn])
+
+
+    async def discovery_get_columns(self, schema:str, table:str, **kwargs):
+        """Async version of SXTBaseAPI.discovery_get_columns."""
+        version = 'v2' if 'discover/table/column' not in list(self.versions.keys()) else self.versions['discover/table/column']
+        schema_or_namespace = 'namespace' if version=='v1' else 'schema'
+        query_parms = {schema_or_namespace:schema.upper(), 'table':table}
+        success, rtn = await self.call_api('discover/table/column',True,  SXTApiCallTypes.GET, query_parms=query_parms, **kwargs)
+        return success, (rtn if success else [rtn])
+
+
+    async def subscription_get_info(self):
+        """Async version of SXTBaseAPI.subscription_get_info."""
+        success, rtn = await self.call_api(endpoint='subscription', auth_header=True, request_type=SXTApiCallTypes.GET )
+        return success, (rtn if success else [rtn])
+
+
+    async def subscription_get_users(self):
+        """Async version of SXTBaseAPI.subscription_get_users."""
+        success, rtn = await self.call_api(endpoint='subscription/users', auth_header=True, request_type=SXTApiCallTypes.GET )
+        return success, (rtn if success else [rtn])
+
+
+    async def subscription_invite_user(self, role:str = 'member'):
+        """Async version of SXTBaseAPI.subscription_invite_user."""
+        role = role.upper().strip()
+        if role not in ['MEMBER','ADMIN','OWNER']:
+            return False, {'error':'Invites must be either member, admin, or owner.  Permissions cannot exceed the invitor.'}
+        success, rtn = await self.call_api(endpoint='subscription/invite', auth_header=True, request_type=SXTApiCallTypes.POST,
+                                           query_parms={'role':role} )
+        return success, (rtn if success else [rtn])
+
+
+    async def subscription_join(self, joincode:str):
+        """Async version of SXTBaseAPI.subscription_join."""
+        success, rtn = await self.call_api(endpoint='subscription/invite/{joinCode}', auth_header=True, request_type=SXTApiCallTypes.POST,
+                                           path_parms= {'{joinCode}': joincode} )
+        return success, (rtn if success else [rtn])
+
+
+
+def __after_fork__() -> None:
+    """Registered with os.register_at_fork: resets the async client's own shared objects in a forked child."""
+    AsyncSXTBaseAPI.async_connection_pool.after_fork()
+    AsyncSXTBaseAPI.retry_policy.after_fork()
+
+if hasattr(os, 'register_at_fork'): os.register_at_fork(after_in_child=__after_fork__)
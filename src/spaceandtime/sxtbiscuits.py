@@ -5,6 +5,7 @@ from biscuit_auth import KeyPair, PrivateKey, PublicKey, Authorizer, Biscuit, Bi
 from .sxtexceptions import SxTArgumentError, SxTFileContentError, SxTBiscuitError, SxTKeyEncodingError
 from .sxtenums import SXTPermission, SXTKeyEncodings
 from .sxtkeymanager import SXTKeyManager
+from .sxtlogging import get_logger
 
 
 
@@ -27,14 +28,8 @@ class SXTBiscuit():
     def __init__(self, name:str = '', private_key: str = None, new_keypair: bool = False, 
                  from_file: Path = None, logger:logging.Logger = None, 
                  biscuit_token:str = None, default_resource:str = None) -> None:
-        if logger: 
-            self.logger = logger 
-        else: 
-            self.logger = logging.getLogger()
-            self.logger.setLevel(logging.INFO)
-            if len(self.logger.handlers) == 0: 
-                self.logger.addHandler( logging.StreamHandler() )
-        self.logger.info('-'*30 + '\nNew SXT Biscuit initiated')
+        self.logger = get_logger('biscuits', logger, default_output=True)
+        self.logger.debug('New SXT Biscuit initiated')
         self.key_manager = SXTKeyManager(logger=self.logger, encoding=SXTKeyEncodings.BASE64)
         if new_keypair: self.key_manager.new_keypair()
         if private_key: self.private_key = private_key
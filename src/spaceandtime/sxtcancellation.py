@@ -0,0 +1,162 @@
+import threading, time
+from concurrent.futures import ThreadPoolExecutor
+from .sxtexceptions import SxTTimeoutError, SxTCancelledError
+
+
+class SXTDeadline():
+    """An absolute point in time by which an operation must finish.  Created once per operation and carried, unchanged, through every retry and every call of a bulk operation."""
+
+    seconds: float = None
+    expires_at: float = None
+
+
+    def __init__(self, seconds:float) -> None:
+        """--------------------
+        Creates a deadline {seconds} from now.
+
+        Args:
+            seconds (float): Total time budget for the operation, in seconds.
+        """
+        self.seconds = float(seconds)
+        self.expires_at = time.monotonic() + self.seconds
+
+    def __str__(self) -> str:
+        return f'SXTDeadline({self.seconds}s, {self.remaining():.3f}s remaining)'
+
+    @staticmethod
+    def coerce(deadline) -> 'SXTDeadline':
+        """Accepts None, a number of seconds, or an SXTDeadline, and returns an SXTDeadline (or None)."""
+        if deadline is None or isinstance(deadline, SXTDeadline): return deadline
+        return SXTDeadline(deadline)
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def remaining(self) -> float:
+        """Seconds left before the deadline, never negative."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def cap(self, timeout:tuple) -> tuple:
+        """Returns a (connect, read) timeout tuple, with each value capped to the time remaining."""
+        remaining = self.remaining()
+        return tuple(remaining if t is None else min(t, remaining) for t in timeout)
+
+
+
+
+class SXTCancelToken():
+    """Thread-safe cancellation token.  Pass one to an API call, and call cancel() from any other thread or task to abort it."""
+
+    reason: str = None
+    __event__: threading.Event = None
+    __callbacks__: list = None
+    __lock__: threading.Lock = None
+
+
+    def __init__(self) -> None:
+        self.reason = None
+        self.__event__ = threading.Event()
+        self.__callbacks__ = []
+        self.__lock__ = threading.Lock()
+
+    def __str__(self) -> str:
+        return f'SXTCancelToken(cancelled={self.cancelled}, reason={self.reason})'
+
+    @property
+    def cancelled(self) -> bool:
+        return self.__event__.is_set()
+
+    def cancel(self, reason:str = 'Cancelled by caller') -> None:
+        """Cancels every call using this token.  Safe to call more than once, from any thread."""
+        with self.__lock__:
+            if self.__event__.is_set(): return None
+            self.reason = reason
+            self.__event__.set()
+            callbacks = list(self.__callbacks__)
+        for func in callbacks:
+            func()
+
+    def wait(self, seconds:float) -> bool:
+        """Sleeps up to {seconds}, waking early if cancelled.  Returns True if the token was cancelled."""
+        return self.__event__.wait(seconds)
+
+    def add_callback(self, func) -> None:
+        """Registers a no-argument function to call on cancel().  Called immediately if already cancelled."""
+        with self.__lock__:
+            if not self.__event__.is_set():
+                self.__callbacks__.append(func)
+                return None
+        func()
+
+    def remove_callback(self, func) -> None:
+        with self.__lock__:
+            if func in self.__callbacks__: self.__callbacks__.remove(func)
+
+    def raise_if_cancelled(self) -> None:
+        if self.cancelled: raise SxTCancelledError(self.reason)
+
+
+
+def check_abort(deadline:SXTDeadline = None, cancel_token:SXTCancelToken = None) -> None:
+    """Raises SxTCancelledError or SxTTimeoutError if the token is cancelled or the deadline has passed."""
+    if cancel_token is not None: cancel_token.raise_if_cancelled()
+    if deadline is not None and deadline.expired:
+        raise SxTTimeoutError(f'Deadline of {deadline.seconds}s exceeded')
+
+
+
+__executor__ = None
+__executor_lock__ = threading.Lock()
+
+def shared_executor() -> ThreadPoolExecutor:
+    """Returns the process-wide worker pool used to run blocking calls that must remain abortable."""
+    global __executor__
+    with __executor_lock__:
+        if __executor__ is None:
+            __executor__ = ThreadPoolExecutor(max_workers=64, thread_name_prefix='sxt-call')
+        return __executor__
+
+
+def after_fork() -> None:
+    """Called in a forked child: the parent's worker threads did not survive the fork, so a new pool is started on first use."""
+    global __executor__, __executor_lock__
+    __executor__ = None
+    __executor_lock__ = threading.Lock()
+
+
+def run_cancellable(func, cancel_token:SXTCancelToken = None, deadline:SXTDeadline = None, on_abandon = None, poll_interval:float = 0.05, abort = None):
+    """--------------------
+    Runs a blocking function on a worker thread, returning its result unless the cancel_token is
+    cancelled or the deadline passes first, in which case the caller is released immediately.
+
+    Args:
+        func (function): No-argument function to run.
+        cancel_token (SXTCancelToken): (optional) Token that aborts the wait when cancelled.
+        deadline (SXTDeadline): (optional) Deadline that aborts the wait when reached.
+        on_abandon (function): (optional) Called with func's eventual result if the caller stopped waiting, e.g. to close a response.
+        poll_interval (float): (optional) Seconds between checks of the deadline.
+        abort (function): (optional) Called if the caller stopped waiting, to make func return early and free its worker 
+            thread, e.g. SXTAbortableSend.abort.  Without it, func runs on until it completes by itself.
+
+    Returns:
+        object: The return value of func.
+    """
+    if cancel_token is None and deadline is None: return func()
+    future = shared_executor().submit(func)
+    wake = threading.Event()
+    if cancel_token is not None: cancel_token.add_callback(wake.set)
+    future.add_done_callback(lambda f: wake.set())
+    try:
+        while not future.done():
+            wake.wait(poll_interval)
+            try:
+                check_abort(deadline, cancel_token)
+            except (SxTCancelledError, SxTTimeoutError):
+                if on_abandon is not None:
+                    future.add_done_callback(lambda f: on_abandon(f.result()) if f.exception() is None else None)
+                if abort is not None and not future.done(): abort()
+                raise
+        return future.result()
+    finally:
+        if cancel_token is not None: cancel_token.remove_callback(wake.set)
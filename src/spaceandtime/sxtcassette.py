@@ -0,0 +1,238 @@
+import base64, datetime, gzip, hashlib, json, logging, threading, time, zlib
+from pathlib import Path
+from urllib.parse import urlsplit
+import requests
+from requests.structures import CaseInsensitiveDict
+from .sxtexceptions import SxTCassetteError, SxTArgumentError
+from .sxtconnectionpool import SXTHTTPAdapter
+from .sxtfaults import SXTInjectedBody
+from .sxtlogging import get_logger
+
+
+REDACTED = '<redacted>'
+
+
+class SXTCassette():
+    """Recorded API request / response pairs, for replaying real response shapes with no network.
+
+    In 'record' mode, calls go to the network as usual and each exchange is captured; save() (or uninstall())
+    writes them to a gzip-compressed JSON-lines file.  In 'replay' mode, calls never leave the process: each
+    request is answered with a recorded response for the same method, path and body (falling back to the same
+    method and path), at the recorded speed scaled by speed, so client-side work (prep_sql, biscuits, JSON
+    decoding, DataFrame conversion) can be timed end to end, repeatably.
+
+    Secrets are never written: request headers are not kept, and values of redact_keys (tokens, signatures,
+    keys, biscuits, auth codes) are replaced in request and response bodies, also before matching.
+
+        >>> cassette = SXTCassette('blocks.cassette.gz', 'record').install(user.base_api)
+        >>> user.base_api.sql_dql('SELECT * FROM ETHEREUM.BLOCKS LIMIT 10000', ['ETHEREUM.BLOCKS'])
+        >>> cassette.uninstall(user.base_api)        # saves
+        >>> SXTCassette('blocks.cassette.gz', 'replay', speed=0).install(api)"""
+
+    filepath: Path = None
+    mode: str = 'replay'
+    speed: float = 1.0
+    redact_keys: set = {'accessToken', 'refreshToken', 'authCode', 'signature', 'key', 'publicKey', 'biscuits', 'password', 'joinCode'}
+    logger: logging.Logger = None
+    interactions: list = None
+    __queues__: dict = None
+    __served__: dict = None
+    __lock__: threading.Lock = None
+
+
+    def __init__(self, filepath:Path, mode:str = 'replay', speed:float = None, logger:logging.Logger = None) -> None:
+        """--------------------
+        Opens a cassette.
+
+        Args:
+            filepath (Path): Cassette file.  Loaded in replay mode; written by save() in record mode.
+            mode (str): (optional) 'record' or 'replay'.  Default 'replay'.
+            speed (float): (optional) Replay speed relative to the recording: 2 is twice as fast, 0 is as fast as possible.  Default 1.
+        """
+        if mode not in ('record', 'replay'): raise SxTArgumentError(f'Cassette mode must be "record" or "replay", not "{mode}"')
+        self.logger = get_logger('cassette', logger)
+        self.filepath = Path(filepath)
+        self.mode = mode
+        if speed is not None: self.speed = float(speed)
+        self.interactions = []
+        self.__lock__ = threading.Lock()
+        if mode == 'replay': self.load()
+
+    def __str__(self) -> str:
+        return f'SXTCassette({self.filepath.name}, {self.mode}, interactions={len(self.interactions)})'
+
+
+    def load(self) -> list:
+        """Reads the cassette file, replacing any interactions in memory, and returns them."""
+        if not self.filepath.exists(): raise SxTCassetteError(f'Cassette file not found: {self.filepath}', logger=self.logger)
+        with gzip.open(self.filepath, 'rt', encoding='utf-8') as fh:
+            lines = [json.loads(line) for line in fh if line.strip()]
+        if not lines or lines[0].get('cassette') != 1: raise SxTCassetteError(f'Not a cassette file: {self.filepath}', logger=self.logger)
+        with self.__lock__:
+            self.interactions = lines[1:]
+            self.rewind()
+        return self.interactions
+
+
+    def save(self) -> Path:
+        """Writes the recorded interactions to the cassette file, and returns its path."""
+        self.filepath.parent.mkdir(parents=True, exist_ok=True)
+        with self.__lock__:
+            interactions = list(self.interactions)
+        with gzip.open(self.filepath, 'wt', encoding='utf-8') as fh:
+            fh.write(json.dumps({'cassette': 1, 'recorded': datetime.datetime.now(datetime.timezone.utc).isoformat(), 'interactions': len(interactions)}) + '\n')
+            for interaction in interactions: fh.write(json.dumps(interaction, separators=(',', ':')) + '\n')
+        self.logger.info(f'Cassette saved with {len(interactions)} interactions: {self.filepath}')
+        return self.filepath
+
+
+    def rewind(self) -> None:
+        """Restarts replay from the first recorded response for every request."""
+        self.__queues__ = {}
+        for i, interaction in enumerate(self.interactions):
+            self.__queues__.setdefault(self.__key__(interaction['method'], interaction['path'], interaction['body_hash']), []).append(i)
+            self.__queues__.setdefault(self.__key__(interaction['method'], interaction['path']), []).append(i)
+        self.__served__ = {}
+
+
+    def install(self, api:object) -> 'SXTCassette':
+        """--------------------
+        Routes an API client's calls through this cassette, by giving it its own connection pool whose sessions
+        use an SXTCassetteAdapter.  Other clients keep the shared pool.  Applies to SXTBaseAPI (sync) calls.
+
+        Args:
+            api (SXTBaseAPI): Client to record or replay.
+
+        Returns:
+            SXTCassette: self, for chaining.
+        """
+        api.connection_pool = api.connection_pool.copy(adapter_factory = lambda **kwargs: SXTCassetteAdapter(self, **kwargs))
+        if self.mode == 'replay': api.coalesce_dql = False # every call is answered, in order
+        self.logger.info(f'Cassette {self.mode} installed: {self.filepath}')
+        return self
+
+
+    def uninstall(self, api:object) -> None:
+        """Returns a client installed with install() to the shared connection pool, saving the cassette if recording."""
+        if 'connection_pool' in vars(api):
+            api.connection_pool.close()
+            del api.connection_pool
+        if 'coalesce_dql' in vars(api): del api.coalesce_dql
+        if self.mode == 'record': self.save()
+
+
+
+    def redact(self, value):
+        """Returns a copy of a decoded JSON value with the values of redact_keys replaced."""
+        if isinstance(value, dict):
+            return {k: (REDACTED if k in self.redact_keys and v not in (None, '', []) else self.redact(v)) for k, v in value.items()}
+        if isinstance(value, list): return [self.redact(v) for v in value]
+        return value
+
+
+    def __key__(self, method:str, path:str, body_hash:str = None) -> tuple:
+        return (str(method).upper(), path) if body_hash is None else (str(method).upper(), path, body_hash)
+
+
+    def __normalize__(self, body, headers) -> tuple:
+        """Returns (redacted JSON value or None, hash) of a request body, decompressing it first if needed."""
+        if body is None or not isinstance(body, (bytes, str)): return None, None # streamed bodies are not kept
+        if isinstance(body, str): body = body.encode('utf-8')
+        encoding = str(headers.get('content-encoding', '')).lower()
+        if encoding == 'gzip': body = gzip.decompress(body)
+        elif encoding == 'deflate': body = zlib.decompress(body)
+        try:
+            value = self.redact(json.loads(body)) if body else None
+        except ValueError:
+            value = None
+        digest = hashlib.sha256(json.dumps(value, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+        return value, digest
+
+
+    def record(self, request:requests.PreparedRequest, response:requests.Response, content:bytes, ttfb:float, duration:float) -> None:
+        """Adds one exchange to the cassette, redacted."""
+        body, body_hash = self.__normalize__(request.body, request.headers)
+        try:
+            response_body, encoding = self.redact(json.loads(content)) if content else None, 'json'
+        except ValueError:
+            response_body, encoding = base64.b64encode(content).decode('ascii'), 'base64'
+        interaction = {'method': request.method, 'path': self.path_of(request.url), 'body': body, 'body_hash': body_hash,
+                       'status': response.status_code, 'reason': response.reason, 'content_type': response.headers.get('content-type'),
+                       'retry_after': response.headers.get('retry-after'), 'encoding': encoding, 'response': response_body,
+                       'ttfb': round(ttfb, 6), 'duration': round(duration, 6)}
+        with self.__lock__: self.interactions.append(interaction)
+
+
+    def find(self, request:requests.PreparedRequest) -> dict:
+        """Returns the recorded interaction to replay for a request, or None.  Repeated requests get successive
+        recordings of the same request, then the last one again."""
+        body, body_hash = self.__normalize__(request.body, request.headers)
+        path = self.path_of(request.url)
+        with self.__lock__:
+            for key in (self.__key__(request.method, path, body_hash), self.__key__(request.method, path)):
+                queue = self.__queues__.get(key)
+                if not queue: continue
+                n = self.__served__.get(key, 0)
+                self.__served__[key] = n + 1
+                return self.interactions[queue[min(n, len(queue) - 1)]]
+        return None
+
+
+    def path_of(self, url:str) -> str:
+        """Path and query of a URL, without the gateway, so a cassette replays against any api_url."""
+        parts = urlsplit(url)
+        return parts.path + (f'?{parts.query}' if parts.query else '')
+
+
+
+
+class SXTCassetteAdapter(SXTHTTPAdapter):
+    """requests transport adapter that records exchanges into, or replays them from, an SXTCassette."""
+
+    cassette: SXTCassette = None
+
+
+    def __init__(self, cassette:SXTCassette, **kwargs) -> None:
+        self.cassette = cassette
+        super().__init__(**kwargs)
+
+
+    def send(self, request:requests.PreparedRequest, stream:bool = False, timeout = None, **kwargs) -> requests.Response:
+        if self.cassette.mode == 'replay': return self.__replay__(request)
+        started = time.monotonic()
+        response = super().send(request, stream=stream, timeout=timeout, **kwargs)
+        ttfb = time.monotonic() - started
+        content = response.raw.read(decode_content=True)
+        response.raw.release_conn()
+        self.cassette.record(request, response, content, ttfb, time.monotonic() - started)
+        response.headers.pop('content-encoding', None) # body is already decoded
+        response.raw = SXTInjectedBody(content)
+        return response
+
+
+    def __replay__(self, request:requests.PreparedRequest) -> requests.Response:
+        interaction = self.cassette.find(request)
+        if interaction is None:
+            raise SxTCassetteError(f'No recorded response for {request.method} {self.cassette.path_of(request.url)} in cassette {self.cassette.filepath}')
+        speed = self.cassette.speed
+        if interaction['encoding'] == 'json':
+            content = json.dumps(interaction['response']).encode('utf-8') if interaction['response'] is not None else b''
+        else:
+            content = base64.b64decode(interaction['response'])
+        chunk_size, interval = 65536, 0.0
+        if speed:
+            time.sleep(interaction['ttfb'] / speed)
+            chunks = max(1, -(-len(content) // chunk_size))
+            if chunks > 1: interval = max(0.0, interaction['duration'] - interaction['ttfb']) / speed / (chunks - 1)
+
+        response = requests.Response()
+        response.status_code = interaction['status']
+        response.reason = interaction.get('reason')
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        response.encoding = 'utf-8'
+        response.headers = CaseInsensitiveDict({'content-type': interaction.get('content_type') or 'application/json'})
+        if interaction.get('retry_after') is not None: response.headers['Retry-After'] = interaction['retry_after']
+        response.raw = SXTInjectedBody(content, chunk_size, interval)
+        return response
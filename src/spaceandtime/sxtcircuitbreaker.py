@@ -0,0 +1,158 @@
+import logging, threading, time
+from .sxtenums import SXTCircuitState
+from .sxtlogging import get_logger
+
+
+class SXTCircuit():
+    """State of one circuit (one endpoint)."""
+
+    state: SXTCircuitState = SXTCircuitState.CLOSED
+    failures: int = 0
+    successes: int = 0
+    opened_at: float = 0.0
+    probe_started: float = 0.0
+    times_opened: int = 0
+
+    def __init__(self) -> None:
+        self.state = SXTCircuitState.CLOSED
+        self.failures = 0
+        self.successes = 0
+        self.opened_at = 0.0
+        self.probe_started = 0.0
+        self.times_opened = 0
+
+    def __str__(self) -> str:
+        return f'SXTCircuit({self.state.value}, failures={self.failures}, times_opened={self.times_opened})'
+
+
+
+
+class SXTCircuitBreaker():
+    """Per-endpoint circuit breaker used by SXTBaseAPI.call_api, so callers fail fast while the gateway is unhealthy.
+
+    CLOSED: calls flow, consecutive transient failures are counted.  At failure_threshold the circuit OPENs.
+    OPEN: calls fail immediately with SxTCircuitOpenError.  After recovery_timeout the circuit goes HALF_OPEN.
+    HALF_OPEN: one probe call is let through (another each recovery_timeout while none completes).  success_threshold
+    successful probes CLOSE the circuit, any failure re-OPENs it."""
+
+    logger: logging.Logger = None
+    enabled: bool = True
+    failure_threshold: int = 5
+    recovery_timeout: float = 30.0
+    success_threshold: int = 1
+    __circuits__: dict = None
+    __lock__: threading.Lock = None
+
+
+    def __init__(self, failure_threshold:int = None, recovery_timeout:float = None, success_threshold:int = None,
+                 enabled:bool = None, logger:logging.Logger = None) -> None:
+        """--------------------
+        Creates a new circuit breaker.  Normally there is only one per process, shared by every SXTBaseAPI.
+
+        Args:
+            failure_threshold (int): (optional) Consecutive transient failures that open a circuit.
+            recovery_timeout (float): (optional) Seconds a circuit stays open before a probe call is allowed.
+            success_threshold (int): (optional) Successful probe calls needed to close a half-open circuit.
+            enabled (bool): (optional) If False, every call is allowed and nothing is tracked.
+        """
+        self.logger = get_logger('circuitbreaker', logger)
+        if failure_threshold is not None: self.failure_threshold = max(1, int(failure_threshold))
+        if recovery_timeout is not None: self.recovery_timeout = recovery_timeout
+        if success_threshold is not None: self.success_threshold = max(1, int(success_threshold))
+        if enabled is not None: self.enabled = enabled
+        self.__circuits__ = {}
+        self.__lock__ = threading.Lock()
+
+    def __str__(self) -> str:
+        return f'SXTCircuitBreaker({ {k: v.state.value for k,v in self.__circuits__.items()} })'
+
+
+    def circuit(self, key:str) -> SXTCircuit:
+        """Returns the circuit for a key (typically an endpoint), creating it closed if needed."""
+        with self.__lock__:
+            circuit = self.__circuits__.get(key)
+            if circuit is None:
+                circuit = SXTCircuit()
+                self.__circuits__[key] = circuit
+            return circuit
+
+
+    def state(self, key:str) -> SXTCircuitState:
+        """Returns the current SXTCircuitState for a key."""
+        return self.circuit(key).state
+
+
+    def is_open(self, key:str) -> bool:
+        """True if calls for a key are currently failing fast.  Unlike allow(), never changes state."""
+        if not self.enabled: return False
+        circuit = self.circuit(key)
+        return circuit.state == SXTCircuitState.OPEN and time.monotonic() - circuit.opened_at < self.recovery_timeout
+
+
+    def allow(self, key:str) -> bool:
+        """--------------------
+        Decides whether a call may proceed.  Moves an OPEN circuit to HALF_OPEN once recovery_timeout has passed.
+
+        Args:
+            key (str): Circuit key, typically the endpoint.
+
+        Returns:
+            bool: True if the call may proceed, False if it should fail fast.
+        """
+        if not self.enabled: return True
+        circuit = self.circuit(key)
+        now = time.monotonic()
+        with self.__lock__:
+            if circuit.state == SXTCircuitState.CLOSED: return True
+            if circuit.state == SXTCircuitState.OPEN:
+                if now - circuit.opened_at < self.recovery_timeout: return False
+                circuit.state = SXTCircuitState.HALF_OPEN
+                circuit.successes = 0
+                self.logger.info(f'Circuit half-open for "{key}", sending a probe call')
+            if now - circuit.probe_started < self.recovery_timeout: return False # a probe is already in flight
+            circuit.probe_started = now
+            return True
+
+
+    def record_success(self, key:str) -> None:
+        """Records a call that reached a healthy gateway (including client errors such as bad SQL)."""
+        if not self.enabled: return None
+        circuit = self.circuit(key)
+        with self.__lock__:
+            circuit.failures = 0
+            if circuit.state == SXTCircuitState.HALF_OPEN:
+                circuit.successes += 1
+                circuit.probe_started = 0.0 # let the next probe through
+                if circuit.successes >= self.success_threshold:
+                    circuit.state = SXTCircuitState.CLOSED
+                    self.logger.info(f'Circuit closed for "{key}"')
+
+
+    def record_failure(self, key:str) -> None:
+        """Records a transient failure (connection error, timeout, 429 / 5xx), opening the circuit if the threshold is reached."""
+        if not self.enabled: return None
+        circuit = self.circuit(key)
+        with self.__lock__:
+            circuit.failures += 1
+            if circuit.state == SXTCircuitState.HALF_OPEN or \
+              (circuit.state == SXTCircuitState.CLOSED and circuit.failures >= self.failure_threshold):
+                circuit.state = SXTCircuitState.OPEN
+                circuit.opened_at = time.monotonic()
+                circuit.probe_started = 0.0
+                circuit.times_opened += 1
+                self.logger.warning(f'Circuit open for "{key}" after {circuit.failures} consecutive failures, failing fast for {self.recovery_timeout}s')
+
+
+    def after_fork(self) -> None:
+        """Called in a forked child: replaces the lock (it may have been held by a parent thread) and closes all circuits."""
+        self.__lock__ = threading.Lock()
+        self.__circuits__ = {}
+
+
+    def reset(self, key:str = None) -> None:
+        """Closes one circuit, or all circuits if no key is supplied."""
+        with self.__lock__:
+            if key is None:
+                self.__circuits__ = {}
+            else:
+                self.__circuits__.pop(key, None)
@@ -0,0 +1,124 @@
+import json, re, zlib
+from collections.abc import Iterator
+
+try:
+    import orjson
+except ImportError: # optional dependency, see pyproject [fast] extra
+    orjson = None
+
+
+# orjson parses integers outside the int64 / uint64 range as floats, losing precision (e.g. wei or uint256 values).
+# Documents with any run of 19+ digits are parsed with the stdlib json module instead, which keeps exact ints.
+__long_digits__ = re.compile(rb'\d{19}')
+__long_digits_str__ = re.compile(r'\d{19}')
+
+
+def is_text_stream(value) -> bool:
+    """True if a request body value is an iterator (e.g. a generator) of str chunks, to be sent incrementally."""
+    return isinstance(value, Iterator)
+
+
+
+
+def gzip_chunks(chunks, level:int = 5):
+    """Gzip-compresses an iterable of bytes a chunk at a time, yielding compressed bytes as they become available."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31) # wbits 31: gzip header and trailer
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed: yield compressed
+    yield compressor.flush()
+
+
+
+
+class SXTCodec():
+    """JSON encoder / decoder for API request bodies and responses.  Uses orjson when installed, otherwise the stdlib json module."""
+
+    backend: str = None
+    decode_errors: tuple = (json.JSONDecodeError, UnicodeDecodeError)
+
+
+    def __init__(self, backend:str = None) -> None:
+        """--------------------
+        Creates a new codec.
+
+        Args:
+            backend (str): (optional) 'orjson' or 'json'.  Defaults to orjson if installed, otherwise json.
+        """
+        if backend is None: backend = 'json' if orjson is None else 'orjson'
+        if backend not in ('orjson', 'json'):
+            raise ValueError(f"Codec backend must be 'orjson' or 'json', not '{backend}'")
+        if backend == 'orjson' and orjson is None:
+            raise ImportError('The orjson codec backend requires the optional dependency orjson:  pip install spaceandtime[fast]')
+        self.backend = backend
+
+    def __str__(self) -> str:
+        return f'SXTCodec({self.backend})'
+
+
+    def dumps(self, obj) -> bytes:
+        """--------------------
+        Serializes an object to UTF-8 JSON bytes, ready to send as a request body.
+
+        Args:
+            obj (object): Any JSON serializable object.
+
+        Returns:
+            bytes: UTF-8 encoded JSON.
+        """
+        if self.backend == 'orjson':
+            try:
+                return orjson.dumps(obj)
+            except TypeError: # e.g. integers beyond 64 bits, which stdlib json supports
+                pass
+        return json.dumps(obj).encode('utf-8')
+
+
+    def loads(self, data):
+        """--------------------
+        Parses JSON directly from response bytes (or str / memoryview), without first decoding to a str.
+        With the orjson backend, documents containing integers too large for 64 bits are parsed with stdlib json,
+        so they are returned as exact ints rather than floats.
+
+        Args:
+            data (bytes | bytearray | memoryview | str): JSON document.
+
+        Returns:
+            object: Parsed JSON, typically a list or dict.
+        """
+        if self.backend == 'orjson':
+            long_digits = __long_digits_str__ if isinstance(data, str) else __long_digits__
+            if long_digits.search(data) is None: return orjson.loads(data)
+        if isinstance(data, memoryview): data = data.tobytes()
+        return json.loads(data)
+
+
+    def dumps_iter(self, obj:dict, buffer_size:int = 65536):
+        """--------------------
+        Serializes a dict to UTF-8 JSON bytes a piece at a time, for request bodies too large to hold in memory.
+        Values that are iterators of str (see is_text_stream) are written as one JSON string, escaping and encoding 
+        each chunk as it is read, so the full text never exists in memory.  Other values are serialized with dumps().
+
+        Args:
+            obj (dict): JSON object, with one or more values supplied as iterators of str.
+            buffer_size (int): (optional) Bytes gathered before each piece is yielded.  Default 64KB.
+
+        Yields:
+            bytes: Consecutive pieces of the JSON document.
+        """
+        buffer = bytearray(b'{')
+        for i, (key, value) in enumerate(obj.items()):
+            if i: buffer += b','
+            buffer += self.dumps(str(key)) + b':'
+            if not is_text_stream(value):
+                buffer += self.dumps(value)
+                continue
+            buffer += b'"'
+            for chunk in value:
+                buffer += self.dumps(str(chunk))[1:-1] # escaped, without the quotes
+                if len(buffer) >= buffer_size:
+                    yield bytes(buffer)
+                    buffer = bytearray()
+            buffer += b'"'
+        buffer += b'}'
+        yield bytes(buffer)
@@ -0,0 +1,250 @@
+import asyncio, contextvars, threading, time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from .sxtexceptions import SxTTimeoutError, SxTCancelledError
+from .sxtcancellation import SXTDeadline, SXTCancelToken, check_abort
+from .sxtenums import SXTPriority
+from .sxtscheduler import SXTScheduler
+
+
+class SXTConcurrencyLimiter():
+    """Adaptive limit on concurrent API calls (AIMD, as in Netflix concurrency-limits), shared by every SXTBaseAPI.
+    The shared limiter is off by default, so it never caps the async client's calls in flight: turn it on with 
+    SXTBaseAPI.concurrency_limiter.enabled = True, or assign a new SXTConcurrencyLimiter().
+
+    Each call_api attempt holds a permit while its request is in flight.  The limit grows by one after each
+    on-time success while at least half the permits are in use, and is cut by backoff_ratio after a drop: a
+    transient failure (timeout, connection error, 429 / 5xx) or a response slower than latency_tolerance times
+    the usual latency for its endpoint.  Callers beyond the limit wait, so any number of worker threads
+    converges on the parallelism the gateway can sustain.  The scheduler decides which waiting caller goes
+    next, by priority class and fair share per app."""
+
+    enabled: bool = True
+    limit: float = 10.0
+    min_limit: int = 1
+    max_limit: int = 64
+    backoff_ratio: float = 0.9
+    latency_tolerance: float = 2.0
+    latency_alpha: float = 0.05
+    poll_interval: float = 0.05
+    in_flight: int = 0
+    waiting: int = 0
+    drops: int = 0
+    wait_total: float = 0.0
+    scheduler: SXTScheduler = None
+    __baselines__: dict = None
+    __cond__: threading.Condition = None
+    __async_waiters__: list = None
+
+
+    def __init__(self, initial_limit:int = None, min_limit:int = None, max_limit:int = None,
+                 backoff_ratio:float = None, latency_tolerance:float = None, enabled:bool = None, 
+                 scheduler:SXTScheduler = None) -> None:
+        """--------------------
+        Creates a new concurrency limiter.  Normally there is only one per process, shared by every SXTBaseAPI.
+
+        Args:
+            initial_limit (int): (optional) Starting limit.  Default 10.
+            min_limit (int): (optional) The limit never drops below this.  Default 1.
+            max_limit (int): (optional) The limit never grows above this.  Default 64.
+            backoff_ratio (float): (optional) Multiplier applied to the limit after a drop.  Default 0.9.
+            latency_tolerance (float): (optional) Responses slower than this multiple of the endpoint's usual latency count as drops.  Default 2.0.
+            enabled (bool): (optional) If False, calls never wait for a permit.
+            scheduler (SXTScheduler): (optional) Orders waiting callers.  Defaults to a new SXTScheduler with equal app weights.
+        """
+        if min_limit is not None: self.min_limit = max(1, int(min_limit))
+        if max_limit is not None: self.max_limit = max(self.min_limit, int(max_limit))
+        if initial_limit is not None: self.limit = float(initial_limit)
+        self.limit = float(min(self.max_limit, max(self.min_limit, self.limit)))
+        if backoff_ratio is not None: self.backoff_ratio = backoff_ratio
+        if latency_tolerance is not None: self.latency_tolerance = latency_tolerance
+        if enabled is not None: self.enabled = enabled
+        self.in_flight = self.waiting = self.drops = 0
+        self.wait_total = 0.0
+        self.scheduler = scheduler if scheduler is not None else SXTScheduler()
+        self.__baselines__ = {}
+        self.__cond__ = threading.Condition()
+        self.__async_waiters__ = []
+
+    def __str__(self) -> str:
+        return f'SXTConcurrencyLimiter(limit={int(self.limit)}, in_flight={self.in_flight}, waiting={self.waiting}, drops={self.drops})'
+
+
+    def try_acquire(self) -> bool:
+        """Takes a permit if one is free and no one is waiting.  Returns True if taken (release() must follow), False otherwise."""
+        with self.__cond__:
+            if self.enabled and (self.in_flight >= int(self.limit) or self.scheduler.pending): return False
+            self.in_flight += 1
+            return True
+
+
+    def acquire(self, deadline:SXTDeadline = None, cancel_token:SXTCancelToken = None, 
+                priority:SXTPriority = None, app:str = None) -> float:
+        """--------------------
+        Takes a permit, waiting until one is free and the scheduler picks this caller.  Every acquire() must be followed by release().
+
+        Args:
+            deadline (SXTDeadline): (optional) Stops waiting when reached, raising SxTTimeoutError.
+            cancel_token (SXTCancelToken): (optional) Stops waiting when cancelled, raising SxTCancelledError.
+            priority (SXTPriority): (optional) Priority class while waiting.  Default BATCH.
+            app (str): (optional) App the call is made for, for fair sharing between apps.
+
+        Returns:
+            float: Seconds spent waiting for the permit.
+        """
+        if self.try_acquire(): return 0.0
+        started = time.monotonic()
+        with self.__cond__:
+            ticket = self.scheduler.enqueue(priority, app)
+            self.waiting += 1
+            try:
+                while not self.__grant__(ticket):
+                    check_abort(deadline, cancel_token)
+                    self.__cond__.wait(self.poll_interval)
+            finally:
+                self.__done_waiting__(ticket, started)
+        return time.monotonic() - started
+
+
+    async def acquire_async(self, deadline:SXTDeadline = None, cancel_token:SXTCancelToken = None, 
+                            priority:SXTPriority = None, app:str = None) -> float:
+        """Async version of acquire(): waits on an asyncio.Event, set when a permit is released, so the event loop is not blocked."""
+        if self.try_acquire(): return 0.0
+        started = time.monotonic()
+        loop = asyncio.get_running_loop()
+        wake = asyncio.Event()
+        waiter = lambda: loop.call_soon_threadsafe(wake.set) # release() may run on any thread
+        with self.__cond__: 
+            ticket = self.scheduler.enqueue(priority, app)
+            self.waiting += 1
+            self.__async_waiters__.append(waiter)
+        if cancel_token is not None: cancel_token.add_callback(waiter)
+        try:
+            while True:
+                with self.__cond__:
+                    if self.__grant__(ticket): break
+                    wake.clear()
+                check_abort(deadline, cancel_token)
+                try:
+                    await asyncio.wait_for(wake.wait(), deadline.remaining() if deadline is not None else None)
+                except asyncio.TimeoutError:
+                    pass # check_abort raises on the next pass
+        finally:
+            if cancel_token is not None: cancel_token.remove_callback(waiter)
+            with self.__cond__: 
+                self.__async_waiters__.remove(waiter)
+                self.__done_waiting__(ticket, started)
+        return time.monotonic() - started
+
+
+    def __grant__(self, ticket:list) -> bool:
+        """With the lock held: gives the ticket a permit if one is free and it is next in line."""
+        if self.enabled and (self.in_flight >= int(self.limit) or self.scheduler.head() is not ticket): return False
+        self.scheduler.grant(ticket)
+        self.in_flight += 1
+        return True
+
+
+    def __done_waiting__(self, ticket:list, started:float) -> None:
+        """With the lock held: withdraws the ticket (no-op if it was granted), and wakes the next in line."""
+        self.scheduler.cancel(ticket)
+        self.waiting -= 1
+        self.wait_total += time.monotonic() - started
+        self.__notify__()
+
+
+    def __notify__(self) -> None:
+        """With the lock held: wakes every waiting caller, threads and async tasks, to check whether it is next."""
+        self.__cond__.notify_all()
+        for waiter in self.__async_waiters__: waiter()
+
+
+    def release(self, dropped:bool = None, latency:float = None, key:str = None) -> None:
+        """--------------------
+        Returns a permit, and adjusts the limit from the outcome of the call.
+
+        Args:
+            dropped (bool): True for a transient failure, False for a success, None if the outcome says nothing about load (e.g. bad SQL).
+            latency (float): (optional) Seconds the successful call took.
+            key (str): (optional) Key for the latency baseline, typically the endpoint.
+        """
+        with self.__cond__:
+            inflight = self.in_flight
+            self.in_flight = max(0, self.in_flight - 1)
+            if dropped is False and latency is not None and key is not None:
+                baseline = self.__baselines__.get(key)
+                if baseline is not None and latency > self.latency_tolerance * baseline: dropped = True
+                self.__baselines__[key] = latency if baseline is None else self.latency_alpha * latency + (1 - self.latency_alpha) * baseline
+            if dropped:
+                self.drops += 1
+                self.limit = max(float(self.min_limit), self.limit * self.backoff_ratio)
+            elif dropped is False and inflight * 2 >= self.limit:
+                self.limit = min(float(self.max_limit), self.limit + 1.0)
+            self.__notify__() # the scheduler, not the wakeup order, decides who goes next
+
+
+    def after_fork(self) -> None:
+        """Called in a forked child: no calls are in flight or waiting here, and the lock may have been held by a parent thread.  
+        The learned limit and latency baselines are kept."""
+        self.__cond__ = threading.Condition()
+        self.__async_waiters__ = []
+        self.in_flight = self.waiting = 0
+        self.scheduler.after_fork()
+
+
+    def metrics(self) -> dict:
+        """Returns the current limit, permits in use, callers waiting, drops, total seconds spent waiting, and the scheduler's queues."""
+        return {'limit': int(self.limit), 'in_flight': self.in_flight, 'waiting': self.waiting,
+                'drops': self.drops, 'wait_total': self.wait_total, 'scheduler': self.scheduler.metrics()}
+
+
+
+
+def run_parallel(func, items:list, max_workers:int = 1, deadline:SXTDeadline = None, cancel_token:SXTCancelToken = None):
+    """--------------------
+    Calls func(item) for each item on up to max_workers threads, yielding (index, result) as each completes.
+    With max_workers of 1, items run in order on the calling thread.  Items not started when the deadline passes
+    or the cancel_token is cancelled are not run, and yield the SxTTimeoutError / SxTCancelledError instead.
+    Combined with the concurrency limiter in call_api, the threads settle at the parallelism the gateway sustains.
+    Each item runs in a copy of the caller's context, so tracing spans opened by func nest under the caller's.
+
+    Args:
+        func (function): Function of one item, typically making one or more API calls.
+        items (list): Items to process.
+        max_workers (int): (optional) Maximum threads.  Default 1 (sequential).
+        deadline (SXTDeadline): (optional) Items not started by the deadline are skipped.
+        cancel_token (SXTCancelToken): (optional) Items not started when cancelled are skipped.
+
+    Returns:
+        iterator: (index, result or abort exception) tuples, in order of completion.
+    """
+    def task(item):
+        check_abort(deadline, cancel_token)
+        return func(item)
+
+    if max_workers is None or max_workers <= 1 or len(items) <= 1:
+        for i, item in enumerate(items):
+            try:
+                yield i, task(item)
+            except (SxTTimeoutError, SxTCancelledError) as ex:
+                yield i, ex
+        return None
+
+    pool = ThreadPoolExecutor(max_workers=min(max_workers, len(items)), thread_name_prefix='sxt-bulk')
+    try:
+        futures = {pool.submit(contextvars.copy_context().run, task, item): i for i, item in enumerate(items)}
+        for future in as_completed(futures):
+            ex = future.exception()
+            if ex is not None and not isinstance(ex, (SxTTimeoutError, SxTCancelledError)): raise ex
+            yield futures[future], ex if ex is not None else future.result()
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def bulk_workers(parallel, api, count:int) -> int:
+    """Threads to use for a bulk operation on an SXTBaseAPI: 1 unless parallel, the supplied number if an int, otherwise 
+    the connections kept alive per gateway, or fewer if the concurrency_limiter is enabled with a lower max_limit."""
+    if not parallel: return 1
+    if parallel is True: 
+        limiter = api.concurrency_limiter
+        parallel = min(limiter.max_limit, api.connection_pool.pool_maxsize) if limiter.enabled else api.connection_pool.pool_maxsize
+    return max(1, min(int(parallel), count))
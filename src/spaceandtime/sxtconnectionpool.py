@@ -0,0 +1,282 @@
+import logging, socket, threading, time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlsplit
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from .sxtlogging import get_logger
+
+
+__connect_time__ = threading.local() # seconds spent connecting during the current send(), per thread
+__current__ = threading.local() # the SXTAbortableSend running on this thread, if any
+__in_use_lock__ = threading.Lock()
+
+
+def __attach__(conn) -> None:
+    """Registers a connection with the SXTAbortableSend running on this thread, if any."""
+    current = getattr(__current__, 'send', None)
+    if current is not None: current[0].attach(current[1], conn)
+
+def __shutdown__(conn) -> None:
+    """Shuts down a connection's socket, so a thread blocked reading it fails at once.  Bypasses SSLSocket.shutdown, 
+    which would tear down the TLS state under the reading thread."""
+    sock = getattr(conn, 'sock', None)
+    if sock is None: return None
+    try:
+        socket.socket.shutdown(sock, socket.SHUT_RDWR)
+    except OSError:
+        pass
+
+
+class TimedHTTPConnection(HTTPConnection):
+    def connect(self) -> None:
+        started = time.monotonic()
+        try:
+            super().connect()
+        finally:
+            __connect_time__.seconds = getattr(__connect_time__, 'seconds', 0.0) + time.monotonic() - started
+        __attach__(self) # again, in case the send was aborted while connecting
+
+class TimedHTTPSConnection(HTTPSConnection):
+    def connect(self) -> None: # includes the TLS handshake
+        started = time.monotonic()
+        try:
+            super().connect()
+        finally:
+            __connect_time__.seconds = getattr(__connect_time__, 'seconds', 0.0) + time.monotonic() - started
+        __attach__(self)
+
+class CountedPool():
+    """Mixin for urllib3 connection pools: counts connections checked out, i.e. requests in flight plus 
+    streamed responses not yet read to the end or closed.  Every checked out connection is put back (as None 
+    if it was discarded), so the count returns to 0 once the pool is idle."""
+    in_use: int = 0
+
+    def _get_conn(self, timeout = None):
+        conn = super()._get_conn(timeout)
+        with __in_use_lock__: self.in_use += 1
+        __attach__(conn)
+        return conn
+
+    def _put_conn(self, conn) -> None:
+        with __in_use_lock__: self.in_use = max(0, self.in_use - 1)
+        return super()._put_conn(conn)
+
+class TimedHTTPConnectionPool(CountedPool, HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+class TimedHTTPSConnectionPool(CountedPool, HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class SXTHTTPAdapter(HTTPAdapter):
+    """requests HTTPAdapter that also reports time spent opening connections: each response it returns has a 
+    connect_seconds attribute, 0 when a pooled keep-alive connection was reused."""
+
+    def init_poolmanager(self, *args, **kwargs) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {'http': TimedHTTPConnectionPool, 'https': TimedHTTPSConnectionPool}
+
+    @property
+    def in_use(self) -> int:
+        """Connections currently checked out of this adapter's pools, by requests in flight or responses not yet consumed."""
+        pools = self.poolmanager.pools
+        return sum(getattr(pools.get(key), 'in_use', 0) for key in pools.keys())
+
+    def send(self, request:requests.PreparedRequest, *args, **kwargs) -> requests.Response:
+        __connect_time__.seconds = 0.0
+        response = super().send(request, *args, **kwargs)
+        response.connect_seconds = __connect_time__.seconds
+        return response
+
+
+
+class SXTAbortableSend():
+    """Wraps a blocking send (a no-argument function making one request through an SXTHTTPAdapter session) so another 
+    thread can abort it: abort() shuts down the sockets of every call still in progress, so it fails at once rather than 
+    holding its worker thread until the read timeout.  Calls that have already returned are not affected."""
+
+    aborted: bool = False
+    __send__ = None
+    __active__: list = None
+    __lock__: threading.Lock = None
+
+
+    def __init__(self, send) -> None:
+        self.__send__ = send
+        self.aborted = False
+        self.__active__ = []
+        self.__lock__ = threading.Lock()
+
+    def __call__(self):
+        connections = []
+        with self.__lock__:
+            if self.aborted: raise requests.exceptions.ConnectionError('Send aborted before it started')
+            self.__active__.append(connections)
+        __current__.send = (self, connections)
+        try:
+            return self.__send__()
+        finally:
+            __current__.send = None
+            with self.__lock__:
+                self.__active__.remove(connections)
+
+    def attach(self, connections:list, conn) -> None:
+        """Called on the sending thread with each connection it uses.  Shut down at once if already aborted."""
+        with self.__lock__:
+            if not self.aborted:
+                if conn not in connections: connections.append(conn)
+                return None
+        __shutdown__(conn)
+
+    def abort(self) -> None:
+        """Aborts every call in progress, and any later call.  Safe to call from any thread, and more than once."""
+        with self.__lock__:
+            self.aborted = True
+            connections = [conn for active in self.__active__ for conn in active]
+        for conn in connections:
+            __shutdown__(conn)
+
+
+
+
+class SXTConnectionPool():
+    """Process-wide pool of keep-alive HTTP sessions, one requests.Session per API host."""
+
+    logger: logging.Logger = None
+    pool_connections: int = 10
+    pool_maxsize: int = 20
+    keep_alive: bool = True
+    max_idle_seconds: float = 300.0
+    adapter_factory = None
+    __sessions__: dict = None
+    __lastused__: dict = None
+    __lock__: threading.Lock = None
+
+
+    def __init__(self, pool_connections:int = None, pool_maxsize:int = None,
+                 keep_alive:bool = None, max_idle_seconds:float = None,
+                 adapter_factory = None, logger:logging.Logger = None) -> None:
+        """--------------------
+        Creates a new connection pool.  Normally there is only one per process, shared by every SXTBaseAPI.
+
+        Args:
+            pool_connections (int): (optional) Number of urllib3 connection pools to cache per session (i.e., per host).
+            pool_maxsize (int): (optional) Maximum number of connections kept alive per host.
+            keep_alive (bool): (optional) If False, every request asks the server to close the connection afterwards.
+            max_idle_seconds (float): (optional) Sessions unused for longer than this are closed and rebuilt on next use.
+            adapter_factory (callable): (optional) Builds the transport adapter mounted on each session, called with 
+                pool_connections, pool_maxsize and pool_block keyword arguments.  Defaults to SXTHTTPAdapter.
+        """
+        self.logger = get_logger('pool', logger)
+        if pool_connections is not None: self.pool_connections = pool_connections
+        if pool_maxsize is not None: self.pool_maxsize = pool_maxsize
+        if keep_alive is not None: self.keep_alive = keep_alive
+        if max_idle_seconds is not None: self.max_idle_seconds = max_idle_seconds
+        if adapter_factory is not None: self.adapter_factory = adapter_factory
+        self.__sessions__ = {}
+        self.__lastused__ = {}
+        self.__lock__ = threading.Lock()
+
+
+    @property
+    def hosts(self) -> list:
+        """List of hosts (scheme://netloc) that currently have an open session."""
+        return list(self.__sessions__.keys())
+
+
+    def host_key(self, url:str) -> str:
+        """Returns the scheme://netloc portion of a URL, used as the pool key."""
+        parts = urlsplit(str(url))
+        return f'{parts.scheme}://{parts.netloc}'.lower()
+
+
+    def new_session(self) -> requests.Session:
+        """Builds a new requests.Session with a pooled HTTPAdapter mounted for http and https."""
+        session = requests.Session()
+        adapter = (self.adapter_factory or SXTHTTPAdapter)(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize, pool_block=False)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers['Connection'] = 'keep-alive' if self.keep_alive else 'close'
+        return session
+
+
+    def copy(self, adapter_factory = None) -> 'SXTConnectionPool':
+        """Returns a new, empty pool with the same settings, and optionally a different adapter_factory."""
+        return SXTConnectionPool(self.pool_connections, self.pool_maxsize, self.keep_alive, self.max_idle_seconds,
+                                 adapter_factory or self.adapter_factory, self.logger)
+
+
+    def get_session(self, url:str) -> requests.Session:
+        """--------------------
+        Returns the shared session for the host of the supplied URL, creating it if needed.
+
+        Also opportunistically prunes any sessions that have been idle longer than max_idle_seconds.
+
+        Args:
+            url (str): Any URL on the target host, e.g., the SXTBaseAPI.api_url.
+
+        Returns:
+            requests.Session: Session shared by all callers of the same host.
+        """
+        key = self.host_key(url)
+        now = time.monotonic()
+        self.prune_idle(now = now)
+        with self.__lock__:
+            session = self.__sessions__.get(key)
+            if session is None:
+                session = self.new_session()
+                self.__sessions__[key] = session
+                self.logger.debug(f'Connection pool: new session for {key}')
+            self.__lastused__[key] = now
+        return session
+
+
+    def prune_idle(self, max_idle_seconds:float = None, now:float = None) -> int:
+        """--------------------
+        Closes sessions (and their keep-alive connections) that have not been used recently.  A session with a 
+        request in flight, or a streamed response still being read, is never closed: it counts as used now.
+
+        Args:
+            max_idle_seconds (float): (optional) Idle threshold, defaults to the pool's max_idle_seconds.
+
+        Returns:
+            int: Number of sessions closed.
+        """
+        if max_idle_seconds is None: max_idle_seconds = self.max_idle_seconds
+        if max_idle_seconds is None or max_idle_seconds < 0: return 0
+        if now is None: now = time.monotonic()
+        with self.__lock__:
+            stale = [k for k,t in self.__lastused__.items() if now - t > max_idle_seconds]
+            for k in [k for k in stale if self.in_use(self.__sessions__[k])]:
+                stale.remove(k)
+                self.__lastused__[k] = now # busy since last seen, so idle from now at the earliest
+            sessions = [self.__sessions__.pop(k) for k in stale]
+            for k in stale: self.__lastused__.pop(k, None)
+        for session in sessions:
+            session.close()
+        if stale: self.logger.debug(f'Connection pool: pruned idle sessions {stale}')
+        return len(stale)
+
+
+    def in_use(self, session:requests.Session) -> int:
+        """Returns the number of connections a session has checked out, for requests in flight or responses not yet consumed.
+        Adapters that do not count (e.g. a custom adapter_factory not derived from SXTHTTPAdapter) count as 0."""
+        return sum(getattr(adapter, 'in_use', 0) for adapter in set(session.adapters.values()))
+
+
+    def after_fork(self) -> None:
+        """Called in a forked child: forgets the parent's sessions without closing them, as their sockets belong to the parent."""
+        self.__sessions__ = {}
+        self.__lastused__ = {}
+        self.__lock__ = threading.Lock()
+
+
+    def close(self) -> None:
+        """Closes all sessions and their connections.  The pool remains usable, and will reconnect as needed."""
+        with self.__lock__:
+            sessions = list(self.__sessions__.values())
+            self.__sessions__ = {}
+            self.__lastused__ = {}
+        for session in sessions:
+            session.close()
@@ -0,0 +1,178 @@
+import json, threading
+from pathlib import Path
+from urllib.parse import quote, urlencode
+from .sxtexceptions import SxTArgumentError, SxTAPINotDefinedError
+
+
+# endpoint: (default method, requires bearer token, safe to repeat).  Versions come from apiversions.json.
+ROUTE_DEFAULTS = {
+    'auth/token':                             ('POST', False, False),
+    'auth/refresh':                           ('POST', False, False),
+    'auth/logout':                            ('POST', True,  False),
+    'auth/code':                              ('POST', False, False),
+    'auth/validtoken':                        ('GET',  True,  True),
+    'auth/idexists/{id}':                     ('GET',  False, True),
+    'auth/keys/code':                         ('POST', True,  False),
+    'auth/keys':                              ('GET',  True,  True),
+    'sql':                                    ('POST', True,  False),
+    'sql/ddl':                                ('POST', True,  False),
+    'sql/dml':                                ('POST', True,  False),
+    'sql/dql':                                ('POST', True,  True),
+    'encryption/sql/dql':                     ('POST', True,  True),
+    'encryption/sql/dml':                     ('POST', True,  False),
+    'encryption/configure':                   ('POST', True,  False),
+    'sql/queries/{queryName}':                ('GET',  True,  True),
+    'sql/queries-by-id/{queryId}':            ('GET',  True,  True),
+    'subscription':                           ('GET',  True,  True),
+    'subscription/users':                     ('GET',  True,  True),
+    'subscription/invite':                    ('POST', True,  False),
+    'subscription/invite/{joinCode}':         ('POST', True,  False),
+}
+
+
+def endpoint_family(endpoint:str) -> str:
+    """Returns the family of an endpoint ('auth', 'sql', 'discover'), used to group timeouts and limits.  Anything else is 'default'."""
+    segments = str(endpoint).split('/')
+    if segments[0] in ('auth', 'discover'): return segments[0]
+    if 'sql' in segments: return 'sql'
+    return 'default'
+
+
+
+
+class SXTRoute():
+    """One API endpoint, compiled once: version, URL template, default method, auth requirement and idempotency."""
+
+    endpoint: str = None
+    version: str = None
+    method: str = 'POST'
+    auth: bool = True
+    idempotent: bool = False
+    family: str = 'default'
+    template: str = None
+    placeholders: tuple = ()
+
+
+    def __init__(self, endpoint:str, version:str, method:str = None, auth:bool = None, idempotent:bool = None) -> None:
+        """--------------------
+        Compiles a route.  Arguments not supplied are taken from ROUTE_DEFAULTS, or, for unknown endpoints,
+        default to an authenticated, non-idempotent POST (discover/* endpoints default to an idempotent GET).
+
+        Args:
+            endpoint (str): Endpoint template after the version, e.g. 'auth/idexists/{id}'.
+            version (str): API version, e.g. 'v1'.
+            method (str): (optional) Default HTTP method.
+            auth (bool): (optional) True if the endpoint requires a bearer token.
+            idempotent (bool): (optional) True if the call is safe to repeat (e.g. for hedging or failover).
+        """
+        fallback = ('GET', True, True) if str(endpoint).startswith('discover/') else ('POST', True, False)
+        default_method, default_auth, default_idempotent = ROUTE_DEFAULTS.get(endpoint, fallback)
+        self.endpoint = endpoint
+        self.version = version
+        self.method = default_method if method is None else str(method).upper()
+        self.auth = default_auth if auth is None else auth
+        self.idempotent = default_idempotent if idempotent is None else idempotent
+        self.family = endpoint_family(endpoint)
+        self.template = f'{version}/{endpoint}'
+        self.placeholders = tuple(part[1:-1] for part in endpoint.split('/') if part.startswith('{') and part.endswith('}'))
+
+    def __str__(self) -> str:
+        return f'SXTRoute({self.method} {self.template}, auth={self.auth}, idempotent={self.idempotent})'
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+
+    def is_idempotent(self, method:str = None) -> bool:
+        """True if a call to this route with the given method (default: the route's method) is safe to repeat."""
+        method = self.method if method is None else str(method).upper()
+        return method in ('GET', 'HEAD', 'OPTIONS') or (self.idempotent and method == self.method)
+
+
+    def path(self, path_parms:dict = None) -> str:
+        """--------------------
+        Returns the versioned path with placeholders filled in and URL-encoded.
+
+        Args:
+            path_parms (dict): Placeholder values, keyed by name with or without braces, e.g. {'id': 'bob'} or {'{id}': 'bob'}.
+
+        Returns:
+            str: Path such as 'v1/auth/idexists/bob'.
+        """
+        if not self.placeholders: return self.template
+        values = {str(n).strip('{}'): v for n,v in (path_parms or {}).items()}
+        missing = [p for p in self.placeholders if p not in values]
+        if missing: raise SxTArgumentError(f'Endpoint {self.endpoint} requires path parameter(s): {missing}')
+        path = self.template
+        for name in self.placeholders:
+            path = path.replace(f'{{{name}}}', quote(str(values[name]), safe=''))
+        return path
+
+
+    def url(self, api_url:str, path_parms:dict = None, query_parms:dict = None) -> str:
+        """Returns the full URL for a call: api_url / version / endpoint ? query, with all values URL-encoded."""
+        url = f'{api_url}/{self.path(path_parms)}'
+        if query_parms: url = f'{url}?{urlencode(query_parms, doseq=True, quote_via=quote)}'
+        return url
+
+
+
+
+class SXTEndpointRegistry():
+    """Process-wide registry of SXTRoutes, loaded lazily from apiversions.json and shared by every SXTBaseAPI."""
+
+    versions_file: Path = Path(Path(__file__).resolve().parent / 'apiversions.json')
+    __versions__: dict = None
+    __routes__: dict = None
+    __lock__: threading.Lock = None
+
+
+    def __init__(self, versions_file:Path = None) -> None:
+        if versions_file: self.versions_file = Path(versions_file)
+        self.__versions__ = None
+        self.__routes__ = {}
+        self.__lock__ = threading.Lock()
+
+
+    def after_fork(self) -> None:
+        """Called in a forked child: replaces the lock, which may have been held by a parent thread."""
+        self.__lock__ = threading.Lock()
+
+
+    @property
+    def versions(self) -> dict:
+        """The endpoint-to-version map from apiversions.json, read on first use.  Always the same (shared) dict."""
+        if self.__versions__ is None:
+            with self.__lock__:
+                if self.__versions__ is None:
+                    with open(self.versions_file, 'r') as fh:
+                        self.__versions__ = json.loads(fh.read())
+        return self.__versions__
+
+
+    def route(self, endpoint:str, versions:dict = None) -> SXTRoute:
+        """--------------------
+        Returns the compiled route for an endpoint template.  Routes are compiled once per endpoint and version,
+        so clients with different versions maps share them too.
+
+        Args:
+            endpoint (str): Endpoint template, e.g. 'sql/dql' or 'auth/idexists/{id}'.
+            versions (dict): (optional) Endpoint-to-version map to use, e.g. SXTBaseAPI.versions.  Defaults to apiversions.json.
+
+        Returns:
+            SXTRoute: Compiled route.
+        """
+        if versions is None: versions = self.versions
+        version = versions.get(endpoint)
+        if version is None:
+            raise SxTAPINotDefinedError("Endpoint not defined in API Lookup (apiversions.json). Please reach out to Space and Time for assistance. \nAs a work-around, you can try manually adding the endpoint to the SXTBaseAPI.versions dictionary.")
+        route = self.__routes__.get((endpoint, version))
+        if route is None:
+            route = SXTRoute(endpoint, version)
+            self.__routes__[(endpoint, version)] = route
+        return route
+
+
+    def routes(self) -> list:
+        """Returns a compiled route for every endpoint in apiversions.json."""
+        return [self.route(endpoint) for endpoint in self.versions]
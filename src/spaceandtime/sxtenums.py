@@ -76,3 +76,44 @@ class SXTDiscoveryScope(Enum):
     def __str__(self) -> str:
         return super().__str__()
     
+
+class SXTCircuitState(Enum):
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+    def __str__(self) -> str:
+        return super().__str__()
+    
+
+class SXTRateLimitPolicy(Enum):
+    BLOCK = 'block'
+    FAIL_FAST = 'fail_fast'
+    def __str__(self) -> str:
+        return super().__str__()
+    
+
+class SXTPriority(Enum):
+    INTERACTIVE = 'interactive'
+    BATCH = 'batch'
+    MAINTENANCE = 'maintenance'
+    def __str__(self) -> str:
+        return super().__str__()
+
+
+class SXTFaultKind(Enum):
+    LATENCY = 'latency'
+    RESET = 'reset'
+    STATUS = 'status'
+    TRUNCATE = 'truncate'
+    SLOW_DRIP = 'slow_drip'
+    def __str__(self) -> str:
+        return super().__str__()
+    
+
+class SXTHookEvent(Enum):
+    PRE_REQUEST = 'pre_request'
+    POST_RESPONSE = 'post_response'
+    ON_RETRY = 'on_retry'
+    ON_ERROR = 'on_error'
+    def __str__(self) -> str:
+        return super().__str__()
@@ -2,13 +2,13 @@ import logging
 
 def log_if_logger(*args, **kwargs) -> None:
 
-    # use supplied logger if supplied, or root if it has been setup, otherwise no logger, just exit
+    # use supplied logger if supplied, or the SDK's if it has been setup, otherwise no logger, just exit
     if 'logger' in kwargs and type(kwargs['logger']) in [logging.RootLogger, logging.Logger]: 
         errlogger = kwargs['logger']
     else: 
         try:
-            if logging.getLogger().hasHandlers():  
-                errlogger = logging.getLogger()
+            if logging.getLogger('spaceandtime').hasHandlers():  
+                errlogger = logging.getLogger('spaceandtime')
             else: 
                 return None
         except:
@@ -67,6 +67,35 @@ class SxTAPINotSuccessfulError(Exception):
         super().__init__(*args)
 
 
+class SxTControlFlowError(Exception):
+    """Base of the errors that stop a call on purpose (deadline, cancellation, open circuit, client rate limit) rather 
+    than because something failed.  Not logged on construction: the call or bulk operation that stops reports it once."""
+    def __init__(self, *args: object, **kwargs) -> None:
+        super().__init__(*args)
+
+
+class SxTTimeoutError(SxTControlFlowError):
+    pass
+
+
+class SxTCancelledError(SxTControlFlowError):
+    pass
+
+
+class SxTCircuitOpenError(SxTControlFlowError):
+    pass
+
+
+class SxTRateLimitError(SxTControlFlowError):
+    pass
+
+
+class SxTCassetteError(Exception):
+    def __init__(self, *args: object, **kwargs) -> None:
+        log_if_logger(*args, **kwargs)
+        super().__init__(*args)
+
+
 class SxTExceptions():
     SxTAuthenticationError = SxTAuthenticationError
     SxTQueryError = SxTQueryError
@@ -75,4 +104,10 @@ class SxTExceptions():
     SxTKeyEncodingError = SxTKeyEncodingError
     SxTBiscuitError = SxTBiscuitError
     SxTAPINotDefinedError = SxTAPINotDefinedError
-    SxTAPINotSuccessfulError = SxTAPINotSuccessfulError
\ No newline at end of file
+    SxTAPINotSuccessfulError = SxTAPINotSuccessfulError
+    SxTControlFlowError = SxTControlFlowError
+    SxTTimeoutError = SxTTimeoutError
+    SxTCancelledError = SxTCancelledError
+    SxTCircuitOpenError = SxTCircuitOpenError
+    SxTRateLimitError = SxTRateLimitError
+    SxTCassetteError = SxTCassetteError
@@ -0,0 +1,329 @@
+import fnmatch, io, json, logging, math, random, re, threading, time
+from pathlib import Path
+from urllib.parse import urlsplit
+import requests
+from requests.structures import CaseInsensitiveDict
+from urllib3.exceptions import ProtocolError, ReadTimeoutError
+from .sxtenums import SXTFaultKind
+from .sxtexceptions import SxTArgumentError
+from .sxtconnectionpool import SXTConnectionPool, SXTHTTPAdapter
+from .sxtlogging import get_logger
+
+
+class SXTFault():
+    """One kind of failure to inject, into calls to endpoints matching a pattern, with a given probability.
+
+    Kinds and their settings:
+        LATENCY:   distribution ('fixed', 'uniform', 'normal', 'lognormal', 'exponential' or 'pareto') and its parameters,
+                   see delay().  Latency longer than the call's read timeout ends in a read timeout.
+        RESET:     when ('before' the request is sent, or 'after' the server has processed it).
+        STATUS:    status (e.g. 429, 503), retry_after (optional seconds for the Retry-After header), body (optional).
+        TRUNCATE:  fraction of the response body delivered before the connection breaks.  Default 0.5.
+        SLOW_DRIP: chunk_size bytes of the response body every interval seconds.  Defaults 1024 and 0.1."""
+
+    kind: SXTFaultKind = None
+    endpoint: str = '*'
+    probability: float = 1.0
+    settings: dict = None
+
+
+    def __init__(self, kind:SXTFaultKind, endpoint:str = '*', probability:float = 1.0, **settings) -> None:
+        """--------------------
+        Creates a fault.
+
+        Args:
+            kind (SXTFaultKind): Kind of failure, or its name, e.g. 'status'.
+            endpoint (str): (optional) Endpoint (after the version) to inject into, with * and ? wildcards, e.g. 'sql/*'.  Default all.
+            probability (float): (optional) Chance, from 0 to 1, that a matching call is affected.  Default 1.
+            **settings: Settings for the kind, see the class docstring.
+        """
+        try:
+            self.kind = SXTFaultKind(kind)
+        except ValueError:
+            raise SxTArgumentError(f'Unknown fault kind "{kind}", expected one of {[k.value for k in SXTFaultKind]}')
+        self.endpoint = str(endpoint)
+        self.probability = float(probability)
+        self.settings = dict(settings)
+        if self.kind == SXTFaultKind.STATUS and 'status' not in self.settings:
+            raise SxTArgumentError('A status fault requires a "status" setting, e.g. 503')
+
+    def __str__(self) -> str:
+        return f'SXTFault({self.kind.value} on "{self.endpoint}", p={self.probability}, {self.settings})'
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+
+    def matches(self, endpoint:str) -> bool:
+        """True if the fault applies to calls to this endpoint."""
+        return fnmatch.fnmatchcase(endpoint, self.endpoint)
+
+
+    def delay(self, rng:random.Random) -> float:
+        """--------------------
+        Draws a latency, in seconds, from the fault's distribution:
+            fixed:       seconds
+            uniform:     low, high
+            normal:      mean, stddev (negative draws count as 0)
+            lognormal:   median, sigma
+            exponential: mean
+            pareto:      scale (minimum), alpha (shape; smaller is a heavier tail)
+
+        Args:
+            rng (random.Random): Source of randomness for this call.
+
+        Returns:
+            float: Seconds of latency to add.
+        """
+        s = self.settings
+        distribution = s.get('distribution', 'fixed')
+        if distribution == 'fixed':       value = s.get('seconds', 0.0)
+        elif distribution == 'uniform':   value = rng.uniform(s.get('low', 0.0), s['high'])
+        elif distribution == 'normal':    value = rng.gauss(s['mean'], s.get('stddev', 0.0))
+        elif distribution == 'lognormal': value = rng.lognormvariate(math.log(s['median']), s.get('sigma', 0.5))
+        elif distribution == 'exponential': value = rng.expovariate(1.0 / s['mean'])
+        elif distribution == 'pareto':    value = s.get('scale', 0.01) * rng.paretovariate(s.get('alpha', 2.0))
+        else: raise SxTArgumentError(f'Unknown latency distribution "{distribution}"')
+        return max(0.0, float(value))
+
+
+
+
+class SXTFaultScenario():
+    """A named, seeded set of SXTFaults, deciding which failures each call gets.
+
+    Decisions are replayable: the n-th call to an endpoint draws from a random stream seeded by (seed, endpoint, n),
+    so the same seed gives the same failures for the same calls, however calls to different endpoints interleave.
+    Call reset() to replay from the start.  Every injected fault is counted, see metrics().
+
+    Scenarios are usually loaded from a JSON file:
+
+        {"name": "bad-day", "seed": 42, "faults": [
+            {"kind": "latency", "endpoint": "sql/dql", "distribution": "lognormal", "median": 0.2, "sigma": 0.6},
+            {"kind": "status",  "endpoint": "sql/*", "probability": 0.05, "status": 503},
+            {"kind": "status",  "endpoint": "*", "probability": 0.02, "status": 429, "retry_after": 1},
+            {"kind": "reset",   "endpoint": "sql/dml", "probability": 0.01, "when": "after"},
+            {"kind": "truncate", "endpoint": "sql/dql", "probability": 0.01, "fraction": 0.5},
+            {"kind": "slow_drip", "endpoint": "sql/dql", "probability": 0.05, "chunk_size": 4096, "interval": 0.05}]}
+
+    and installed on a client with install(api)."""
+
+    name: str = 'scenario'
+    seed: object = 0
+    faults: list = None
+    logger: logging.Logger = None
+    __counts__: dict = None
+    __injected__: dict = None
+    __lock__: threading.Lock = None
+
+
+    def __init__(self, faults:list = None, seed:object = None, name:str = None, logger:logging.Logger = None) -> None:
+        """--------------------
+        Creates a scenario.
+
+        Args:
+            faults (list): (optional) SXTFaults, or dicts of SXTFault arguments.
+            seed (int | str): (optional) Seed for the scenario's random streams.  Default 0.
+            name (str): (optional) Name, for logs.
+        """
+        self.logger = get_logger('faults', logger)
+        if seed is not None: self.seed = seed
+        if name is not None: self.name = name
+        self.faults = [f if isinstance(f, SXTFault) else SXTFault(**f) for f in (faults or [])]
+        self.__lock__ = threading.Lock()
+        self.reset()
+
+    def __str__(self) -> str:
+        return f'SXTFaultScenario({self.name}, seed={self.seed}, faults={len(self.faults)})'
+
+
+    @classmethod
+    def from_dict(cls, config:dict, logger:logging.Logger = None) -> 'SXTFaultScenario':
+        """Creates a scenario from a dict with 'faults' and optional 'seed' and 'name'."""
+        return cls(config.get('faults'), config.get('seed'), config.get('name'), logger)
+
+
+    @classmethod
+    def from_file(cls, filepath:Path, logger:logging.Logger = None) -> 'SXTFaultScenario':
+        """Loads a scenario from a JSON file, see the class docstring for the format."""
+        filepath = Path(filepath)
+        with open(filepath, 'r') as fh:
+            config = json.loads(fh.read())
+        if 'name' not in config: config['name'] = filepath.stem
+        return cls.from_dict(config, logger)
+
+
+    def reset(self, seed:object = None) -> None:
+        """Restarts the scenario's random streams (optionally with a new seed), and clears metrics, so a run can be replayed."""
+        with self.__lock__:
+            if seed is not None: self.seed = seed
+            self.__counts__ = {}
+            self.__injected__ = {}
+
+
+    def decide(self, endpoint:str) -> list:
+        """--------------------
+        Decides which faults the next call to an endpoint gets, and records them.
+
+        Args:
+            endpoint (str): Endpoint of the call, after the version, e.g. 'sql/dql'.
+
+        Returns:
+            list: (SXTFault, random.Random) pairs for each fault to inject, in declared order.  The Random
+            is the call's own stream, for drawing the fault's details (e.g. latency).
+        """
+        with self.__lock__:
+            n = self.__counts__.get(endpoint, 0)
+            self.__counts__[endpoint] = n + 1
+        rng = random.Random(f'{self.seed}:{endpoint}:{n}')
+        chosen = [(fault, rng) for fault in self.faults if fault.matches(endpoint) and rng.random() < fault.probability]
+        if chosen:
+            with self.__lock__:
+                for fault, r in chosen:
+                    key = (endpoint, fault.kind.value)
+                    self.__injected__[key] = self.__injected__.get(key, 0) + 1
+        return chosen
+
+
+    def metrics(self) -> dict:
+        """Returns calls seen per endpoint, and faults injected per endpoint and kind."""
+        with self.__lock__:
+            injected = {}
+            for (endpoint, kind), count in self.__injected__.items(): injected.setdefault(endpoint, {})[kind] = count
+            return {'calls': dict(self.__counts__), 'injected': injected}
+
+
+    def install(self, api:object) -> SXTConnectionPool:
+        """--------------------
+        Routes an API client's calls through this scenario, by giving it its own connection pool whose sessions
+        use an SXTFaultInjectionAdapter.  Other clients keep the shared pool.  Applies to SXTBaseAPI (sync) calls.
+
+        Args:
+            api (SXTBaseAPI): Client to inject faults into.
+
+        Returns:
+            SXTConnectionPool: The client's new connection pool.
+        """
+        api.connection_pool = api.connection_pool.copy(adapter_factory = lambda **kwargs: SXTFaultInjectionAdapter(self, **kwargs))
+        self.logger.info(f'Fault scenario "{self.name}" (seed {self.seed}) installed')
+        return api.connection_pool
+
+
+    def uninstall(self, api:object) -> None:
+        """Returns a client installed with install() to the shared connection pool."""
+        if 'connection_pool' in vars(api):
+            api.connection_pool.close()
+            del api.connection_pool
+
+
+
+
+class SXTFaultInjectionAdapter(SXTHTTPAdapter):
+    """requests transport adapter that injects an SXTFaultScenario's failures into the calls it sends.
+
+    Endpoint is taken from the URL path after the version segment (e.g. /v1/sql/dql is 'sql/dql').  Latency is added
+    before sending; resets and status responses replace (or, for reset 'after', follow) the real exchange; truncated
+    and slow-drip bodies replace the real response body after it is received."""
+
+    scenario: SXTFaultScenario = None
+
+
+    def __init__(self, scenario:SXTFaultScenario, **kwargs) -> None:
+        self.scenario = scenario
+        super().__init__(**kwargs)
+
+
+    def send(self, request:requests.PreparedRequest, stream:bool = False, timeout = None, **kwargs) -> requests.Response:
+        match = re.search(r'/v\d+/(.*)$', urlsplit(request.url).path)
+        endpoint = match.group(1) if match else urlsplit(request.url).path.strip('/')
+        faults = self.scenario.decide(endpoint)
+        if not faults: return super().send(request, stream=stream, timeout=timeout, **kwargs)
+        read_timeout = timeout[1] if isinstance(timeout, tuple) else timeout
+        if not isinstance(read_timeout, (int, float)): read_timeout = None
+
+        delay = sum(fault.delay(rng) for fault, rng in faults if fault.kind == SXTFaultKind.LATENCY)
+        if delay:
+            if read_timeout is not None and delay > read_timeout:
+                time.sleep(read_timeout)
+                raise requests.exceptions.ReadTimeout(f'Read timed out after {read_timeout}s (injected latency of {delay:.3f}s)', request=request)
+            time.sleep(delay)
+
+        for fault, rng in faults:
+            if fault.kind == SXTFaultKind.STATUS:
+                return self.__status_response__(request, fault)
+            if fault.kind == SXTFaultKind.RESET and fault.settings.get('when', 'before') == 'before':
+                raise self.__reset__(request)
+
+        response = super().send(request, stream=stream, timeout=timeout, **kwargs)
+        for fault, rng in faults:
+            if fault.kind == SXTFaultKind.RESET:
+                response.close()
+                raise self.__reset__(request)
+            if fault.kind in (SXTFaultKind.TRUNCATE, SXTFaultKind.SLOW_DRIP):
+                body = response.raw.read(decode_content=True)
+                response.raw.release_conn()
+                response.headers.pop('content-encoding', None) # body is already decoded
+                if fault.kind == SXTFaultKind.TRUNCATE:
+                    response.raw = SXTInjectedBody(body[:int(len(body) * fault.settings.get('fraction', 0.5))], broken=True)
+                else:
+                    response.raw = SXTInjectedBody(body, fault.settings.get('chunk_size', 1024), fault.settings.get('interval', 0.1), read_timeout, request.url)
+                break
+        return response
+
+
+    def __reset__(self, request:requests.PreparedRequest) -> requests.exceptions.ConnectionError:
+        reason = ProtocolError('Connection aborted.', ConnectionResetError(104, 'Connection reset by peer (injected)'))
+        return requests.exceptions.ConnectionError(reason, request=request)
+
+
+    def __status_response__(self, request:requests.PreparedRequest, fault:SXTFault) -> requests.Response:
+        status = int(fault.settings['status'])
+        body = fault.settings.get('body', {'title': 'Injected fault', 'status': status, 'detail': f'Injected by fault scenario "{self.scenario.name}"'})
+        response = requests.Response()
+        response.status_code = status
+        response.reason = 'Injected Fault'
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        response.encoding = 'utf-8'
+        response.headers = CaseInsensitiveDict({'content-type': 'application/json'})
+        if fault.settings.get('retry_after') is not None: response.headers['Retry-After'] = str(fault.settings['retry_after'])
+        response.raw = SXTInjectedBody(json.dumps(body).encode('utf-8'))
+        return response
+
+
+
+
+class SXTInjectedBody(io.RawIOBase):
+    """Stand-in for a urllib3 response body: delivers data in chunks, optionally slowly, and optionally ends in a broken connection."""
+
+    def __init__(self, data:bytes, chunk_size:int = None, interval:float = 0.0, read_timeout:float = None, url:str = None, broken:bool = False) -> None:
+        self.data, self.position = data, 0
+        self.chunk_size, self.interval, self.read_timeout, self.url, self.broken = chunk_size, interval, read_timeout, url, broken
+
+    def readable(self) -> bool:
+        return True
+
+    def stream(self, amt:int = 65536, decode_content:bool = None):
+        while True:
+            chunk = self.read(amt)
+            if not chunk: break
+            yield chunk
+
+    def read(self, amt:int = None, decode_content:bool = None, **kwargs) -> bytes:
+        if self.position >= len(self.data):
+            if self.broken: raise ProtocolError('Connection broken: IncompleteRead (injected truncation)')
+            return b''
+        size = len(self.data) - self.position if amt is None or amt < 0 else amt
+        if self.chunk_size: size = min(size, self.chunk_size)
+        if self.interval and self.position:
+            if self.read_timeout is not None and self.interval > self.read_timeout:
+                time.sleep(self.read_timeout)
+                raise ReadTimeoutError(None, self.url, 'Read timed out (injected slow drip)')
+            time.sleep(self.interval)
+        chunk = self.data[self.position:self.position + size]
+        self.position += len(chunk)
+        return chunk
+
+    def release_conn(self) -> None:
+        pass
@@ -0,0 +1,223 @@
+import logging, threading, time
+import requests
+from .sxtlogging import get_logger
+
+
+def gateway_urls(api_url) -> list:
+    """Returns a list of gateway URLs from a single URL, a comma-separated string of URLs, or a list of URLs."""
+    if isinstance(api_url, str): api_url = api_url.replace(';', ',').split(',')
+    return [str(url).strip().rstrip('/') for url in (api_url or []) if str(url).strip()]
+
+
+
+
+class SXTGateway():
+    """Observed health of one gateway URL: smoothed latency and error rate, and consecutive failures."""
+
+    url: str = None
+    healthy: bool = True
+    latency: float = None
+    error_rate: float = 0.0
+    failures: int = 0
+    calls: int = 0
+
+    def __init__(self, url:str) -> None:
+        self.url = url
+        self.healthy = True
+        self.latency = None
+        self.error_rate = 0.0
+        self.failures = 0
+        self.calls = 0
+
+    def __str__(self) -> str:
+        latency = 'n/a' if self.latency is None else f'{self.latency*1000:.0f}ms'
+        return f'SXTGateway({self.url}, healthy={self.healthy}, latency={latency}, error_rate={self.error_rate:.2f})'
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+    def score(self, error_weight:float) -> float:
+        """Lower is better: smoothed latency, inflated by the recent error rate.  Gateways not yet measured score 0, so each is 
+        tried, unless they have only failed so far."""
+        if self.latency is None: return float('inf') if self.error_rate else 0.0
+        return self.latency * (1.0 + error_weight * self.error_rate)
+
+
+
+
+class SXTGatewayPool():
+    """Set of equivalent gateway URLs (e.g. one per region) for one SXTBaseAPI.api_url.
+
+    Calls go to the healthy gateway with the lowest smoothed latency, adjusted for recent errors, so each worker
+    settles on its nearest healthy gateway.  After failure_threshold consecutive failures a gateway is marked
+    unhealthy and skipped, and a background thread health-checks it every health_interval seconds until it
+    responds again.  Pools are shared process-wide, see get_gateway_pool()."""
+
+    logger: logging.Logger = None
+    alpha: float = 0.2
+    error_weight: float = 10.0
+    failure_threshold: int = 3
+    health_interval: float = 10.0
+    health_timeout: float = 5.0
+    health_path: str = ''
+    __gateways__: list = None
+    __checker__: threading.Thread = None
+    __lock__: threading.Lock = None
+
+
+    def __init__(self, api_url, failure_threshold:int = None, health_interval:float = None,
+                 health_path:str = None, logger:logging.Logger = None) -> None:
+        """--------------------
+        Creates a new gateway pool.
+
+        Args:
+            api_url (str | list): Gateway URL, comma-separated URLs, or list of URLs.  The first is preferred until latencies are known.
+            failure_threshold (int): (optional) Consecutive transient failures that mark a gateway unhealthy.
+            health_interval (float): (optional) Seconds between health checks of unhealthy gateways.
+            health_path (str): (optional) Path requested by health checks.  Any response below 500 counts as healthy.
+        """
+        self.logger = get_logger('gateway', logger)
+        urls = gateway_urls(api_url)
+        if not urls: raise ValueError('At least one gateway URL is required')
+        if failure_threshold is not None: self.failure_threshold = max(1, int(failure_threshold))
+        if health_interval is not None: self.health_interval = health_interval
+        if health_path is not None: self.health_path = health_path
+        self.__gateways__ = [SXTGateway(url) for url in urls]
+        self.__checker__ = None
+        self.__lock__ = threading.Lock()
+
+    def __str__(self) -> str:
+        return f'SXTGatewayPool({self.__gateways__})'
+
+    def __len__(self) -> int:
+        return len(self.__gateways__)
+
+
+    @property
+    def urls(self) -> list:
+        """All gateway URLs, in configured order."""
+        return [gateway.url for gateway in self.__gateways__]
+
+    @property
+    def healthy(self) -> list:
+        """Gateway URLs currently considered healthy."""
+        return [gateway.url for gateway in self.__gateways__ if gateway.healthy]
+
+
+    def gateway(self, url:str) -> SXTGateway:
+        """Returns the SXTGateway for a URL, or None if it is not in the pool."""
+        return next((gateway for gateway in self.__gateways__ if gateway.url == url), None)
+
+
+    def choose(self, exclude:list = ()) -> str:
+        """--------------------
+        Picks the gateway for the next call.
+
+        Args:
+            exclude (list): (optional) Gateway URLs to avoid, e.g. those that already failed this call.
+
+        Returns:
+            str: Healthy gateway with the best score, not excluded if possible.  If none are healthy, the best of the rest.
+        """
+        with self.__lock__:
+            gateways = self.__gateways__
+            if len(gateways) == 1: return gateways[0].url
+            candidates = [g for g in gateways if g.healthy and g.url not in exclude] \
+                      or [g for g in gateways if g.healthy] \
+                      or [g for g in gateways if g.url not in exclude] \
+                      or gateways
+            return min(candidates, key=lambda g: g.score(self.error_weight)).url # ties go to the first configured
+
+
+    def record_success(self, url:str, latency:float = None) -> None:
+        """Records a response from a gateway (including client errors such as bad SQL), with its latency if known."""
+        gateway = self.gateway(url)
+        if gateway is None: return None
+        with self.__lock__:
+            gateway.calls += 1
+            gateway.failures = 0
+            gateway.error_rate = (1 - self.alpha) * gateway.error_rate
+            if latency is not None:
+                gateway.latency = latency if gateway.latency is None else self.alpha * latency + (1 - self.alpha) * gateway.latency
+            recovered = not gateway.healthy
+            gateway.healthy = True
+        if recovered: self.logger.info(f'Gateway {url} is healthy again')
+
+
+    def record_failure(self, url:str) -> None:
+        """Records a transient failure (connection error, timeout, 5xx), marking the gateway unhealthy at failure_threshold."""
+        gateway = self.gateway(url)
+        if gateway is None: return None
+        with self.__lock__:
+            gateway.calls += 1
+            gateway.failures += 1
+            gateway.error_rate = self.alpha + (1 - self.alpha) * gateway.error_rate
+            tripped = gateway.healthy and gateway.failures >= self.failure_threshold and len(self.__gateways__) > 1
+            if tripped: gateway.healthy = False
+        if tripped: self.logger.warning(f'Gateway {url} marked unhealthy after {gateway.failures} consecutive failures')
+        if len(self.__gateways__) > 1: self.__start_checker__() # calls may now avoid it, so check it in the background
+
+
+    def check(self, url:str) -> bool:
+        """Health-checks one gateway now, updating its state.  Returns True if it responded."""
+        started = time.monotonic()
+        try:
+            response = requests.get(f'{url}/{self.health_path.lstrip("/")}', timeout=self.health_timeout)
+            response.close()
+            ok = response.status_code < 500
+        except requests.exceptions.RequestException:
+            ok = False
+        if ok:
+            self.record_success(url, time.monotonic() - started)
+        else:
+            self.logger.debug(f'Health check failed for gateway {url}')
+        return ok
+
+
+    def after_fork(self) -> None:
+        """Called in a forked child: the health checker thread did not survive the fork, and the lock may have been held.  
+        Observed latencies and health are kept."""
+        self.__lock__ = threading.Lock()
+        self.__checker__ = None
+        if any(not gateway.healthy or gateway.failures for gateway in self.__gateways__): self.__start_checker__()
+
+
+    def __start_checker__(self) -> None:
+        with self.__lock__:
+            if self.__checker__ is not None and self.__checker__.is_alive(): return None
+            self.__checker__ = threading.Thread(target=self.__health_loop__, name='sxt-gateway-health', daemon=True)
+            self.__checker__.start()
+
+
+    def __health_loop__(self) -> None:
+        """Background health checks of gateways that are unhealthy or whose last call failed, until all have recovered."""
+        while True:
+            time.sleep(self.health_interval)
+            unhealthy = [gateway.url for gateway in self.__gateways__ if not gateway.healthy or gateway.failures]
+            if not unhealthy: return None
+            for url in unhealthy: self.check(url)
+
+
+
+
+__gateway_pools__ = {}
+__gateway_pools_lock__ = threading.Lock()
+
+def get_gateway_pool(api_url) -> SXTGatewayPool:
+    """Returns the process-wide SXTGatewayPool for an api_url (single URL, comma-separated URLs or list), creating it on first use."""
+    key = tuple(gateway_urls(api_url))
+    pool = __gateway_pools__.get(key)
+    if pool is None:
+        with __gateway_pools_lock__:
+            pool = __gateway_pools__.get(key)
+            if pool is None:
+                pool = SXTGatewayPool(list(key))
+                __gateway_pools__[key] = pool
+    return pool
+
+
+def after_fork() -> None:
+    """Called in a forked child: makes every gateway pool usable again, see SXTGatewayPool.after_fork()."""
+    global __gateway_pools_lock__
+    __gateway_pools_lock__ = threading.Lock()
+    for pool in list(__gateway_pools__.values()): pool.after_fork()
@@ -0,0 +1,239 @@
+import math, threading, time
+from collections import deque
+from .sxtcancellation import SXTDeadline, SXTCancelToken, check_abort, shared_executor
+
+
+class SXTLatencyTracker():
+    """Rolling window of recent response latencies (time to response headers), per endpoint."""
+
+    window: int = 200
+    __samples__: dict = None
+    __lock__: threading.Lock = None
+
+
+    def __init__(self, window:int = None) -> None:
+        if window is not None: self.window = max(1, int(window))
+        self.__samples__ = {}
+        self.__lock__ = threading.Lock()
+
+    def __str__(self) -> str:
+        return f'SXTLatencyTracker({ {k: len(v) for k,v in self.__samples__.items()} })'
+
+
+    def record(self, key:str, seconds:float) -> None:
+        """Adds one observed latency for a key (typically an endpoint)."""
+        with self.__lock__:
+            samples = self.__samples__.get(key)
+            if samples is None:
+                samples = deque(maxlen=self.window)
+                self.__samples__[key] = samples
+            samples.append(seconds)
+
+
+    def count(self, key:str) -> int:
+        """Number of latencies currently held for a key."""
+        return len(self.__samples__.get(key, ()))
+
+
+    def percentile(self, key:str, pct:float) -> float:
+        """--------------------
+        Returns a percentile of the recent latencies for a key.
+
+        Args:
+            key (str): Typically the endpoint, e.g. 'sql/dql'.
+            pct (float): Percentile, 0 to 100.
+
+        Returns:
+            float: Latency in seconds, or None if nothing has been recorded.
+        """
+        with self.__lock__:
+            samples = sorted(self.__samples__.get(key, ()))
+        if not samples: return None
+        rank = max(0, min(len(samples)-1, math.ceil(pct / 100.0 * len(samples)) - 1)) # nearest-rank
+        return samples[rank]
+
+
+    def after_fork(self) -> None:
+        """Called in a forked child: replaces the lock, which may have been held by a parent thread.  Latencies are kept."""
+        self.__lock__ = threading.Lock()
+
+
+    def reset(self, key:str = None) -> None:
+        """Forgets the latencies for one key, or all keys if no key is supplied."""
+        with self.__lock__:
+            if key is None:
+                self.__samples__ = {}
+            else:
+                self.__samples__.pop(key, None)
+
+
+
+
+class SXTHedgePolicy():
+    """Settings for hedged requests: if a read-only call has no response after the given percentile of recently
+    observed latency, a duplicate is sent and whichever answers first is used.  Only DQL and discovery GETs are hedged."""
+
+    percentile: float = 95.0
+    min_samples: int = 20
+    initial_delay: float = 1.0
+    min_delay: float = 0.01
+    max_delay: float = None
+    max_ratio: float = 0.1
+    calls: int = 0
+    hedged: int = 0
+    won: int = 0
+    __lock__: threading.Lock = None
+
+
+    def __init__(self, percentile:float = None, min_samples:int = None, initial_delay:float = None,
+                 min_delay:float = None, max_delay:float = None, max_ratio:float = None) -> None:
+        """--------------------
+        Creates a new hedge policy.
+
+        Args:
+            percentile (float): (optional) Latency percentile after which a duplicate is sent.  Default 95.
+            min_samples (int): (optional) Latencies needed before the percentile is trusted.  Default 20.
+            initial_delay (float): (optional) Hedge delay in seconds until min_samples are observed.  Default 1.0.
+            min_delay (float): (optional) Shortest hedge delay in seconds.
+            max_delay (float): (optional) Longest hedge delay in seconds.
+            max_ratio (float): (optional) Most duplicates sent, as a fraction of hedgeable calls, so a slow
+                gateway is not made slower by doubling its load.  0 never sends a duplicate.  Default 0.1.
+        """
+        if percentile is not None: self.percentile = percentile
+        if min_samples is not None: self.min_samples = min_samples
+        if initial_delay is not None: self.initial_delay = initial_delay
+        if min_delay is not None: self.min_delay = min_delay
+        if max_delay is not None: self.max_delay = max_delay
+        if max_ratio is not None: self.max_ratio = max_ratio
+        self.calls = self.hedged = self.won = 0
+        self.__lock__ = threading.Lock()
+
+    def __str__(self) -> str:
+        return f'SXTHedgePolicy(p{self.percentile}, calls={self.calls}, hedged={self.hedged}, won={self.won})'
+
+
+    def delay(self, key:str, tracker:SXTLatencyTracker) -> float:
+        """Returns the seconds to wait for a response before sending a duplicate, for a key (typically an endpoint)."""
+        delay = self.initial_delay
+        if tracker is not None and tracker.count(key) >= self.min_samples:
+            delay = tracker.percentile(key, self.percentile)
+        if self.max_delay is not None: delay = min(delay, self.max_delay)
+        return max(self.min_delay, delay)
+
+
+    def allow_hedge(self) -> bool:
+        """True if sending one more duplicate keeps hedging within max_ratio of calls."""
+        if self.max_ratio <= 0: return False
+        return self.hedged + 1 <= max(1, self.calls * self.max_ratio)
+
+
+    def record_call(self) -> None:
+        """Counts one hedgeable call."""
+        with self.__lock__:
+            self.calls += 1
+
+
+    def try_hedge(self, admit = None) -> bool:
+        """--------------------
+        Decides whether to send a duplicate, and if so counts it.  Thread-safe.
+
+        Args:
+            admit (function): (optional) No-argument function, called only if max_ratio allows a duplicate, returning False 
+                if the duplicate may not be sent now, e.g. because no rate limit token or concurrency permit is free.
+
+        Returns:
+            bool: True if the duplicate should be sent.
+        """
+        with self.__lock__:
+            if not self.allow_hedge(): return False
+            if admit is not None and not admit(): return False
+            self.hedged += 1
+            return True
+
+
+    def record_win(self) -> None:
+        """Counts a duplicate that answered first."""
+        with self.__lock__:
+            self.won += 1
+
+
+    def after_fork(self) -> None:
+        """Called in a forked child: replaces the lock, which may have been held by a parent thread.  Counters are kept."""
+        self.__lock__ = threading.Lock()
+
+
+
+
+def hedged_send(send, delay:float, policy:SXTHedgePolicy = None, cancel_token:SXTCancelToken = None,
+                deadline:SXTDeadline = None, on_abandon = None, poll_interval:float = 0.05, 
+                admit = None, release = None, abort = None) -> tuple:
+    """--------------------
+    Runs a blocking send on a worker thread and, if it has not completed after delay seconds, runs a duplicate.
+    The first successful response wins; the other is passed to on_abandon when it arrives (e.g. to close it).
+    If every send fails, the first failure is returned (or raised).
+
+    Args:
+        send (function): No-argument function that sends the request and returns the response.
+        delay (float): Seconds to wait before sending the duplicate.
+        policy (SXTHedgePolicy): (optional) Policy whose counters are updated, and whose max_ratio is respected.
+        cancel_token (SXTCancelToken): (optional) Token that aborts the wait when cancelled.
+        deadline (SXTDeadline): (optional) Deadline that aborts the wait when reached.
+        on_abandon (function): (optional) Called with each losing or abandoned response.
+        poll_interval (float): (optional) Seconds between checks of the deadline.
+        admit (function): (optional) Called before the duplicate is sent, without waiting: returns False to hold it back for now, 
+            e.g. if no rate limit token or concurrency permit is free.  Checked again on each poll until the first send completes.
+        release (function): (optional) Called once an admitted duplicate's send completes, e.g. to return its concurrency permit.
+        abort (function): (optional) Called once no further response is wanted while a send is still running, to make it 
+            return early and free its worker thread, e.g. SXTAbortableSend.abort.  Must not affect sends that have returned.
+
+    Returns:
+        object: The winning response.
+        float: Seconds the winning request took.
+        bool: True if the duplicate won.
+    """
+    wake = threading.Event()
+    sends = [] # (future, started)
+    def launch(on_done = None):
+        future = shared_executor().submit(send)
+        sends.append( (future, time.monotonic()) )
+        if on_done is not None: future.add_done_callback(lambda f: on_done())
+        future.add_done_callback(lambda f: wake.set())
+    def abandon(future):
+        if on_abandon is not None:
+            future.add_done_callback(lambda f: on_abandon(f.result()) if f.exception() is None else None)
+
+    if policy is not None: policy.record_call()
+    if cancel_token is not None: cancel_token.add_callback(wake.set)
+    launch()
+    try:
+        while True:
+            wake.clear()
+            finished = [(i, f, t) for i, (f, t) in enumerate(sends) if f.done()]
+            winner = next(((i, f, t) for i, f, t in finished if f.exception() is None and getattr(f.result(), 'ok', True)), None)
+            if winner is None and len(finished) == len(sends): # all failed; the first (unduplicated) failure is left to the retry policy
+                winner = next(((i, f, t) for i, f, t in finished if f.exception() is None), finished[0])
+            if winner is not None:
+                i, future, started = winner
+                for other, t in sends:
+                    if other is not future: abandon(other)
+                if abort is not None and len(finished) < len(sends): abort()
+                if i > 0 and policy is not None: policy.record_win()
+                return future.result(), time.monotonic() - started, i > 0 # raises if every send raised
+
+            try:
+                check_abort(deadline, cancel_token)
+            except Exception:
+                for future, t in sends: abandon(future)
+                if abort is not None: abort()
+                raise
+
+            wait = poll_interval
+            if len(sends) == 1:
+                remaining = delay - (time.monotonic() - sends[0][1])
+                if remaining <= 0 and (policy.try_hedge(admit) if policy is not None else (admit is None or admit())):
+                    launch(release)
+                    continue
+                if remaining > 0: wait = min(wait, remaining)
+            wake.wait(wait)
+    finally:
+        if cancel_token is not None: cancel_token.remove_callback(wake.set)
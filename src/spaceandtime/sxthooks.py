@@ -0,0 +1,127 @@
+import logging, time
+from .sxtenums import SXTHookEvent
+from .sxtlogging import get_logger
+
+
+class SXTCallEvent():
+    """What is known about one attempt of an API call, passed to hook callbacks.
+
+    timings holds seconds spent in each phase of the attempt, as far as it got:
+        queue:    waiting for the rate limiter and a concurrency permit
+        connect:  opening a new connection, including TLS (0 on a reused keep-alive connection; sync client only)
+        ttfb:     from sending the request to the response headers, excluding connect
+        download: reading the response body
+        parse:    decoding the JSON response
+        total:    the whole attempt
+    Streamed and sink calls report post_response as soon as headers arrive, without download or parse."""
+
+    __slots__ = ('event', 'endpoint', 'method', 'url', 'attempt', 'app', 'user_id', 'priority', 'request_bytes', 'response_bytes',
+                 'rows', 'status', 'timings', 'retry_delay', 'exception', 'started')
+
+    def __init__(self, endpoint:str, method:str = None, attempt:int = 1, app:str = None, priority = None, request_bytes:int = None, user_id:str = None) -> None:
+        self.event = None
+        self.endpoint = endpoint
+        self.method = method
+        self.url = None
+        self.attempt = attempt
+        self.app = app
+        self.user_id = user_id
+        self.priority = priority
+        self.request_bytes = request_bytes # None for streamed bodies, whose size is not known up front
+        self.response_bytes = None
+        self.rows = None # rows in a parsed list response
+        self.status = None
+        self.timings = {}
+        self.retry_delay = None
+        self.exception = None
+        self.started = time.monotonic()
+
+    def __str__(self) -> str:
+        timings = ', '.join(f'{k}={v*1000:.1f}ms' for k, v in self.timings.items() if v is not None)
+        return f'SXTCallEvent({self.event}, {self.method} {self.endpoint}, attempt={self.attempt}, status={self.status}, {timings})'
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+
+    def as_dict(self) -> dict:
+        """Returns the event's fields as a dict, e.g. for structured logs."""
+        return {name: getattr(self, name) for name in self.__slots__ if name != 'started'}
+
+
+
+
+class SXTHooks():
+    """Callbacks subscribed to API call lifecycle events, see SXTHookEvent:
+
+        PRE_REQUEST:   an attempt is about to be sent (after queueing)
+        POST_RESPONSE: an attempt got a response, successful or not
+        ON_RETRY:      an attempt failed and will be retried after retry_delay seconds
+        ON_ERROR:      the call failed, and will not be retried
+
+    Callbacks receive an SXTCallEvent.  They run on the calling thread (or event loop), so should be quick;
+    exceptions they raise are logged and otherwise ignored, so a faulty subscriber cannot break calls.
+    Shared by every SXTBaseAPI in the process, unless a client is given its own."""
+
+    logger: logging.Logger = None
+    __callbacks__: dict = None
+
+
+    def __init__(self, logger:logging.Logger = None) -> None:
+        self.logger = get_logger('hooks', logger)
+        self.__callbacks__ = {event: () for event in SXTHookEvent}
+
+    def __str__(self) -> str:
+        return f'SXTHooks({ {str(e.value): len(f) for e, f in self.__callbacks__.items()} })'
+
+
+    @property
+    def active(self) -> bool:
+        """True if any callback is subscribed."""
+        return any(self.__callbacks__.values())
+
+
+    def add(self, event:SXTHookEvent, func = None):
+        """--------------------
+        Subscribes a callback to an event.  Can also be used as a decorator: @api.hooks.add('post_response').
+
+        Args:
+            event (SXTHookEvent): Event, or its name.
+            func (callable): (optional) Function taking an SXTCallEvent.
+
+        Returns:
+            callable: func, or a decorator if func is not supplied.
+        """
+        event = SXTHookEvent(event)
+        if func is None: return lambda f: self.add(event, f)
+        callbacks = dict(self.__callbacks__)
+        callbacks[event] = callbacks[event] + (func,)
+        self.__callbacks__ = callbacks # replaced, never mutated, so emit() needs no lock
+        return func
+
+
+    def remove(self, event:SXTHookEvent, func) -> None:
+        """Unsubscribes a callback from an event, if subscribed."""
+        event = SXTHookEvent(event)
+        callbacks = dict(self.__callbacks__)
+        callbacks[event] = tuple(f for f in callbacks[event] if f is not func)
+        self.__callbacks__ = callbacks
+
+
+    def clear(self, event:SXTHookEvent = None) -> None:
+        """Unsubscribes all callbacks, from one event or all of them."""
+        callbacks = dict(self.__callbacks__)
+        for e in (SXTHookEvent if event is None else [SXTHookEvent(event)]): callbacks[e] = ()
+        self.__callbacks__ = callbacks
+
+
+    def emit(self, event:SXTHookEvent, call:SXTCallEvent) -> None:
+        """Calls each callback subscribed to an event with the call's SXTCallEvent."""
+        callbacks = self.__callbacks__[event]
+        if not callbacks: return None
+        call.event = event
+        for func in callbacks:
+            try:
+                func(call)
+            except Exception as ex:
+                self.logger.warning(f'Hook {getattr(func, "__name__", func)} failed on {event.value}: {ex}')
@@ -4,6 +4,7 @@ import nacl.signing
 from biscuit_auth import KeyPair, PrivateKey 
 from .sxtexceptions import SxTKeyEncodingError
 from .sxtenums import SXTKeyEncodings
+from .sxtlogging import get_logger
 
 
 
@@ -13,10 +14,10 @@ from .sxtenums import SXTKeyEncodings
 class SXTKeyManager():
     """Class to manage creation and maintenance of keys and biscuits."""
 
-    biscuits:list = []
+    biscuits:list = None
     logger:logging.Logger = None
     warning_for_biscuit_length = 1800
-    keychange_callback_func_list = []
+    keychange_callback_func_list: list = None
     __pv:bytes = bytes(''.encode())
     __pb:bytes = bytes(''.encode())
     __en:SXTKeyEncodings = SXTKeyEncodings.HEX
@@ -25,14 +26,9 @@ class SXTKeyManager():
 
     def __init__(self, private_key:str = None, new_keypair: bool = False, encoding:SXTKeyEncodings = None, keychange_callback_func = None, logger:logging.Logger = None) -> None:
         """Class to manage creation and maintenance of keys and biscuits."""
-        if logger: 
-            self.logger = logger 
-        else: 
-            self.logger = logging.getLogger()
-            self.logger.setLevel(logging.INFO)
-            if len(self.logger.handlers) == 0: 
-                self.logger.addHandler( logging.StreamHandler() )
-        self.logger.info('new SXT KeyManager initiated')
+        self.logger = get_logger('keys', logger, default_output=True)
+        self.logger.debug('new SXT KeyManager initiated')
+        self.biscuits = []
         self.keychange_callback_func_list = []
         if keychange_callback_func: self.add_keychange_callback(keychange_callback_func)
 
@@ -71,7 +67,7 @@ class SXTKeyManager():
         self.__pv = self.convert_key(value, self.get_encoding_type(value), SXTKeyEncodings.BYTES) if value else ''
         self.__pb = ''
         self.__callback__('private_key')
-        self.logger.debug(f'private key updated to { self.__pv[:6] }...')
+        self.logger.debug('private key updated to %s...', self.__pv[:6])
 
     @property
     def public_key(self):
@@ -84,7 +80,7 @@ class SXTKeyManager():
     def public_key(self, value):
         self.__pb = self.convert_key(value, self.get_encoding_type(value), SXTKeyEncodings.BYTES) if value else ''
         self.__callback__('public_key')
-        self.logger.debug(f'public key updated to { self.__pb }...')
+        self.logger.debug('public key updated to %s...', self.__pb)
 
     @property
     def encoding(self):
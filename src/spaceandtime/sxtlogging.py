@@ -0,0 +1,143 @@
+import json, logging, threading
+
+
+PACKAGE = 'spaceandtime'
+FORMAT = logging.Formatter('%(asctime)s %(levelname)-8s %(message)s', '%Y-%m-%d_%H:%M:%S')
+
+# Caps applied when messages are formatted, see configure()
+settings = {'max_chars': 2000,   # SQL text, responses and other payloads are cut to this many characters
+            'row_messages': 10,  # per-row progress messages logged per bulk operation, plus the first and last
+            'row_errors': 10}    # per-row errors logged per bulk operation, the rest are summarized
+
+__default_output__ = False
+__lock__ = threading.Lock()
+
+
+class SXTLogValue():
+    """Log message argument that is only converted to text, and cut to settings['max_chars'] (or limit), if the
+    message is actually emitted.  Bytes are decoded as UTF-8; callables are called first."""
+
+    __slots__ = ('value', 'limit')
+
+    def __init__(self, value, limit:int = None) -> None:
+        self.value = value
+        self.limit = limit
+
+    def __str__(self) -> str:
+        value = self.value() if callable(self.value) else self.value
+        limit = self.limit or settings['max_chars']
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            size = len(value)
+            text = bytes(value[:limit * 4]).decode('utf-8', errors='replace')
+            return text if size <= limit and len(text) <= limit else f'{text[:limit]}... ({size:,} bytes)'
+        text = str(value)
+        return text if len(text) <= limit else f'{text[:limit]}... ({len(text) - limit:,} more chars)'
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+
+
+
+class SXTJsonFormatter(logging.Formatter):
+    """Formats each record as one JSON object: time, level, logger and message, plus any structured fields
+    passed as extra={'sxt': {...}}.  Installed by configure(json=True)."""
+
+    def format(self, record:logging.LogRecord) -> str:
+        out = {'time': self.formatTime(record, self.datefmt), 'level': record.levelname, 'logger': record.name, 'message': record.getMessage()}
+        fields = getattr(record, 'sxt', None)
+        if fields: out.update(fields)
+        if record.exc_info: out['exception'] = self.formatException(record.exc_info)
+        return json.dumps(out, default=str)
+
+
+
+
+def truncated(value, limit:int = None) -> SXTLogValue:
+    """--------------------
+    Wraps SQL text, a response body or other payload for logging with %s, so it is only formatted if the message
+    is emitted, and then cut to limit characters.
+
+        >>> logger.info('Executing query:\\n%s', truncated(sql_text))
+
+    Args:
+        value (str | bytes | object | function): Value to log, or a function returning it.
+        limit (int): (optional) Maximum characters.  Default settings['max_chars'].
+
+    Returns:
+        SXTLogValue: Lazily formatted value.
+    """
+    return SXTLogValue(value, limit)
+
+
+def sample_row(n:int, total:int) -> bool:
+    """True if the per-row progress message for row n (from 1) of total should be logged: the first, the last,
+    and about settings['row_messages'] evenly spaced between."""
+    if n <= 1 or n >= total: return True
+    every = max(1, -(-total // max(1, settings['row_messages'])))
+    return n % every == 0
+
+
+def get_logger(component:str, logger:logging.Logger = None, default_output:bool = False) -> logging.Logger:
+    """--------------------
+    Returns the logger an SDK object should use: the logger the application supplied, if any, otherwise
+    the SDK logger for the component, 'spaceandtime.<component>'.  Passing a parent object's SDK logger
+    returns the component's own, so levels can be set per component, e.g. spaceandtime.api or spaceandtime.resource.
+
+    Args:
+        component (str): Component name, e.g. 'api'.
+        logger (Logger): (optional) Logger supplied by the application, or a parent object's logger.
+        default_output (bool): (optional) If True and no logger was supplied, make sure SDK messages are shown, see default_logging().
+
+    Returns:
+        Logger: Logger to use.
+    """
+    if logger is not None and not (logger.name == PACKAGE or logger.name.startswith(PACKAGE + '.')): return logger
+    if default_output: default_logging()
+    return logging.getLogger(f'{PACKAGE}.{component}')
+
+
+def default_logging() -> None:
+    """Shows SDK messages at INFO and above, as the SDK always has, without changing the root logger's level: sets the
+    spaceandtime logger to INFO unless the application set a level, and adds a console handler if none is configured.
+    Runs once per process."""
+    global __default_output__
+    with __lock__:
+        if __default_output__: return None
+        __default_output__ = True
+        package, root = logging.getLogger(PACKAGE), logging.getLogger()
+        if package.level == logging.NOTSET: package.setLevel(logging.INFO)
+        if not root.handlers and not package.handlers:
+            handler = logging.StreamHandler()
+            handler.setFormatter(FORMAT)
+            root.addHandler(handler)
+
+
+def configure(level:int = None, json:bool = False, handler:logging.Handler = None, max_chars:int = None,
+              row_messages:int = None, row_errors:int = None) -> logging.Logger:
+    """--------------------
+    Configures SDK logging.
+
+    Args:
+        level (int): (optional) Level for all SDK loggers, e.g. logging.WARNING.  Set levels per component on 'spaceandtime.<component>'.
+        json (bool): (optional) If True, SDK messages go to handler (default a console handler) as JSON lines, and not to the root logger's handlers.
+        handler (Handler): (optional) Handler for SDK messages only, instead of the root logger's handlers.
+        max_chars (int): (optional) Characters of SQL text and payloads logged before they are cut.  Default 2000.
+        row_messages (int): (optional) Per-row progress messages logged per bulk operation.  Default 10.
+        row_errors (int): (optional) Per-row errors logged per bulk operation, before they are summarized.  Default 10.
+
+    Returns:
+        Logger: The 'spaceandtime' package logger.
+    """
+    package = logging.getLogger(PACKAGE)
+    if level is not None: package.setLevel(level)
+    if max_chars is not None: settings['max_chars'] = int(max_chars)
+    if row_messages is not None: settings['row_messages'] = int(row_messages)
+    if row_errors is not None: settings['row_errors'] = int(row_errors)
+    if json and handler is None: handler = logging.StreamHandler()
+    if handler is not None:
+        if json: handler.setFormatter(SXTJsonFormatter())
+        for old in list(package.handlers): package.removeHandler(old)
+        package.addHandler(handler)
+        package.propagate = False
+    return package
@@ -0,0 +1,359 @@
+import bisect, logging, math, threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import requests
+from .sxtenums import SXTHookEvent
+from .sxtexceptions import SxTArgumentError, SxTTimeoutError, SxTCancelledError, SxTCircuitOpenError, SxTRateLimitError
+from .sxthooks import SXTHooks, SXTCallEvent
+from .sxtlogging import get_logger
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+ROWS_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000, 1000000)
+
+
+class SXTMetric():
+    """A metric family: one named metric, with a value per combination of label values.  Thread-safe."""
+
+    type: str = 'untyped'
+    name: str = None
+    help: str = ''
+    labels: tuple = ()
+    __values__: dict = None
+    __lock__: threading.Lock = None
+
+
+    def __init__(self, name:str, help:str = '', labels:tuple = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.__values__ = {}
+        self.__lock__ = threading.Lock()
+
+    def __str__(self) -> str:
+        return f'{type(self).__name__}({self.name}, labels={self.labels}, series={len(self.__values__)})'
+
+
+    def __key__(self, labels:dict) -> tuple:
+        return tuple('' if labels.get(name) is None else str(labels.get(name)) for name in self.labels)
+
+
+    def samples(self) -> list:
+        """Returns (suffix, labels dict, value) for every series, for export."""
+        with self.__lock__:
+            values = dict(self.__values__)
+        return [('', dict(zip(self.labels, key)), value() if callable(value) else value) for key, value in sorted(values.items())]
+
+
+    def value(self, **labels) -> float:
+        """Current value of one series (0 if never recorded)."""
+        with self.__lock__:
+            value = self.__values__.get(self.__key__(labels), 0.0)
+        return value() if callable(value) else value
+
+
+    def after_fork(self) -> None:
+        """Called in a forked child: replaces the lock, which a parent thread may have held."""
+        self.__lock__ = threading.Lock()
+
+
+    def clear(self) -> None:
+        """Drops every series."""
+        with self.__lock__:
+            self.__values__ = {}
+
+
+
+
+class SXTCounter(SXTMetric):
+    """A value that only goes up, e.g. requests made."""
+    type = 'counter'
+
+    def inc(self, amount:float = 1.0, **labels) -> None:
+        """Adds amount (default 1) to the series for labels."""
+        key = self.__key__(labels)
+        with self.__lock__:
+            self.__values__[key] = self.__values__.get(key, 0.0) + amount
+
+
+
+
+class SXTGauge(SXTMetric):
+    """A value that goes up and down, e.g. calls in flight.  A series can also be a function, read at export."""
+    type = 'gauge'
+
+    def set(self, value:float, **labels) -> None:
+        """Sets the series for labels to value."""
+        with self.__lock__:
+            self.__values__[self.__key__(labels)] = value
+
+    def inc(self, amount:float = 1.0, **labels) -> None:
+        """Adds amount (default 1, or negative) to the series for labels."""
+        key = self.__key__(labels)
+        with self.__lock__:
+            self.__values__[key] = self.__values__.get(key, 0.0) + amount
+
+    def set_function(self, func, **labels) -> None:
+        """Makes the series for labels report func() whenever it is read."""
+        self.set(func, **labels)
+
+
+
+
+class SXTHistogram(SXTMetric):
+    """Counts of observed values in fixed buckets, with their sum and count, e.g. request latency."""
+    type = 'histogram'
+    buckets: tuple = LATENCY_BUCKETS
+
+
+    def __init__(self, name:str, help:str = '', labels:tuple = (), buckets:tuple = None) -> None:
+        super().__init__(name, help, labels)
+        if buckets is not None: self.buckets = tuple(sorted(float(b) for b in buckets))
+        if not self.buckets: raise SxTArgumentError('A histogram needs at least one bucket')
+
+    def observe(self, value:float, **labels) -> None:
+        """Records one value in the series for labels."""
+        key = self.__key__(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.__lock__:
+            series = self.__values__.get(key)
+            if series is None: series = self.__values__[key] = [[0] * len(self.buckets), 0.0, 0]
+            if index < len(self.buckets): series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def value(self, **labels) -> dict:
+        """Count, sum and (cumulative) bucket counts of one series."""
+        with self.__lock__:
+            counts, total, count = self.__values__.get(self.__key__(labels), [[0] * len(self.buckets), 0.0, 0])
+            counts = list(counts)
+        cumulative = [sum(counts[:i+1]) for i in range(len(counts))]
+        return {'count': count, 'sum': total, 'buckets': dict(zip(self.buckets, cumulative))}
+
+    def samples(self) -> list:
+        with self.__lock__:
+            values = {key: (list(s[0]), s[1], s[2]) for key, s in self.__values__.items()}
+        samples = []
+        for key, (counts, total, count) in sorted(values.items()):
+            labels = dict(zip(self.labels, key))
+            running = 0
+            for bound, n in zip(self.buckets, counts):
+                running += n
+                samples.append(('_bucket', dict(labels, le=format_value(bound)), running))
+            samples.append(('_bucket', dict(labels, le='+Inf'), count))
+            samples.append(('_sum', labels, total))
+            samples.append(('_count', labels, count))
+        return samples
+
+
+
+
+class SXTMetricsRegistry():
+    """In-process registry of SDK metrics, exportable in the Prometheus text format.
+
+    Metrics are created (or fetched, if already registered) with counter(), gauge() and histogram().  instrument(api)
+    subscribes the standard SDK metrics to a client's hooks, labelled by endpoint, app (originApp), user_id and outcome:
+
+        sxt_requests_total, sxt_request_duration_seconds, sxt_time_to_first_byte_seconds, sxt_queue_wait_seconds,
+        sxt_request_bytes, sxt_response_bytes, sxt_rows_returned, sxt_retries_total, sxt_call_failures_total,
+        and pool saturation gauges sxt_concurrency_limit / _in_flight / _waiting and sxt_connection_pool_saturation.
+
+    Export with prometheus_text(), or serve it for scraping with serve(port)."""
+
+    logger: logging.Logger = None
+    __metrics__: dict = None
+    __instrumented__: list = None
+    __lock__: threading.Lock = None
+
+
+    def __init__(self, logger:logging.Logger = None) -> None:
+        self.logger = get_logger('metrics', logger)
+        self.__metrics__ = {}
+        self.__instrumented__ = []
+        self.__lock__ = threading.Lock()
+
+    def __str__(self) -> str:
+        return f'SXTMetricsRegistry(metrics={len(self.__metrics__)})'
+
+
+    def after_fork(self) -> None:
+        """Called in a forked child: makes the registry and its metrics safe to use.  Counts inherited from the parent are kept."""
+        self.__lock__ = threading.Lock()
+        for metric in list(self.__metrics__.values()): metric.after_fork()
+
+
+    def __register__(self, cls, name:str, help:str, labels:tuple, **kwargs) -> SXTMetric:
+        with self.__lock__:
+            metric = self.__metrics__.get(name)
+            if metric is None:
+                metric = self.__metrics__[name] = cls(name, help, labels, **kwargs)
+            elif type(metric) != cls or metric.labels != tuple(labels):
+                raise SxTArgumentError(f'Metric {name} is already registered as a {metric.type} with labels {metric.labels}')
+        return metric
+
+
+    def counter(self, name:str, help:str = '', labels:tuple = ()) -> SXTCounter:
+        """Returns the counter called name, registering it if new."""
+        return self.__register__(SXTCounter, name, help, labels)
+
+    def gauge(self, name:str, help:str = '', labels:tuple = ()) -> SXTGauge:
+        """Returns the gauge called name, registering it if new."""
+        return self.__register__(SXTGauge, name, help, labels)
+
+    def histogram(self, name:str, help:str = '', labels:tuple = (), buckets:tuple = None) -> SXTHistogram:
+        """Returns the histogram called name, registering it if new, with fixed buckets (upper bounds; default LATENCY_BUCKETS)."""
+        return self.__register__(SXTHistogram, name, help, labels, buckets=buckets)
+
+    def get(self, name:str) -> SXTMetric:
+        """Returns a registered metric by name, or None."""
+        return self.__metrics__.get(name)
+
+    def metrics(self) -> list:
+        """Returns every registered metric, by name."""
+        with self.__lock__:
+            return [self.__metrics__[name] for name in sorted(self.__metrics__)]
+
+
+    def prometheus_text(self) -> str:
+        """Returns every metric in the Prometheus text exposition format (version 0.0.4)."""
+        return prometheus_text(self)
+
+
+    def serve(self, port:int = 9464, host:str = '127.0.0.1') -> ThreadingHTTPServer:
+        """--------------------
+        Serves prometheus_text() at http://host:port/metrics from a background (daemon) thread.
+
+        Args:
+            port (int): (optional) Port to listen on, 0 for any free port.  Default 9464.
+            host (str): (optional) Interface to listen on.  Default '127.0.0.1'; use '0.0.0.0' to allow remote scrapes.
+
+        Returns:
+            ThreadingHTTPServer: The server; call shutdown() and server_close() to stop it.
+        """
+        registry = self
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args): pass
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/metrics', '/'):
+                    self.send_error(404)
+                    return None
+                out = registry.prometheus_text().encode('utf-8')
+                self.send_response(200)
+                self.send_header('content-type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('content-length', str(len(out)))
+                self.end_headers()
+                self.wfile.write(out)
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name='sxt-metrics', daemon=True).start()
+        self.logger.info(f'Serving SDK metrics at http://{host}:{server.server_port}/metrics')
+        return server
+
+
+    def instrument(self, api:object) -> 'SXTMetricsRegistry':
+        """--------------------
+        Records the standard SDK metrics for every call made through a client's hooks (shared by all clients,
+        unless the client has its own), and pool saturation gauges for its concurrency limiter and connection pool.
+        Instrumenting the same hooks twice has no further effect.
+
+        Args:
+            api (SXTBaseAPI): Client to instrument.
+
+        Returns:
+            SXTMetricsRegistry: self, for chaining.
+        """
+        hooks = api.hooks
+        with self.__lock__:
+            if any(h is hooks for h in self.__instrumented__): return self
+            self.__instrumented__.append(hooks)
+        labels = ('endpoint', 'app', 'user_id', 'outcome')
+        requests_total = self.counter('sxt_requests_total', 'HTTP requests made to the Space and Time API, by outcome.', labels)
+        duration = self.histogram('sxt_request_duration_seconds', 'Time from queueing to the end of each request.', ('endpoint', 'app', 'outcome'))
+        ttfb = self.histogram('sxt_time_to_first_byte_seconds', 'Time from sending a request to its response headers, excluding connect.', ('endpoint',))
+        queue = self.histogram('sxt_queue_wait_seconds', 'Time each request waited for the rate limiter and a concurrency permit.', ('endpoint', 'app'))
+        request_bytes = self.histogram('sxt_request_bytes', 'Request body sizes.', ('endpoint',), BYTES_BUCKETS)
+        response_bytes = self.histogram('sxt_response_bytes', 'Response body sizes, decompressed.', ('endpoint',), BYTES_BUCKETS)
+        rows = self.histogram('sxt_rows_returned', 'Rows in each parsed query result.', ('endpoint', 'app'), ROWS_BUCKETS)
+        retries = self.counter('sxt_retries_total', 'Requests retried after a transient failure.', labels)
+        failures = self.counter('sxt_call_failures_total', 'API calls that failed after any retries.', labels)
+
+        def record_request(event:SXTCallEvent) -> None:
+            kind = outcome(event)
+            requests_total.inc(endpoint=event.endpoint, app=event.app, user_id=event.user_id, outcome=kind)
+            duration.observe(event.timings.get('total', 0.0), endpoint=event.endpoint, app=event.app, outcome=kind)
+
+        def on_pre_request(event:SXTCallEvent) -> None:
+            queue.observe(event.timings.get('queue', 0.0), endpoint=event.endpoint, app=event.app)
+            if event.request_bytes is not None: request_bytes.observe(event.request_bytes, endpoint=event.endpoint)
+
+        def on_response(event:SXTCallEvent) -> None:
+            record_request(event)
+            if event.timings.get('ttfb') is not None: ttfb.observe(event.timings['ttfb'], endpoint=event.endpoint)
+            if event.response_bytes is not None: response_bytes.observe(event.response_bytes, endpoint=event.endpoint)
+            if event.rows is not None: rows.observe(event.rows, endpoint=event.endpoint, app=event.app)
+
+        def on_failure(event:SXTCallEvent) -> None:
+            if event.url is not None and 'ttfb' not in event.timings: record_request(event) # sent, but no response
+            counter = retries if event.event == SXTHookEvent.ON_RETRY else failures
+            counter.inc(endpoint=event.endpoint, app=event.app, user_id=event.user_id, outcome=outcome(event))
+
+        hooks.add(SXTHookEvent.PRE_REQUEST, on_pre_request)
+        hooks.add(SXTHookEvent.POST_RESPONSE, on_response)
+        hooks.add(SXTHookEvent.ON_RETRY, on_failure)
+        hooks.add(SXTHookEvent.ON_ERROR, on_failure)
+
+        limiter, pool = api.concurrency_limiter, api.connection_pool
+        self.gauge('sxt_concurrency_limit', 'Current adaptive limit on API calls in flight.').set_function(lambda: int(limiter.limit))
+        self.gauge('sxt_concurrency_in_flight', 'API calls holding a concurrency permit.').set_function(lambda: limiter.in_flight)
+        self.gauge('sxt_concurrency_waiting', 'API calls waiting for a concurrency permit.').set_function(lambda: limiter.waiting)
+        self.gauge('sxt_connection_pool_saturation', 'Calls in flight as a fraction of the connections kept per host.').set_function(
+                   lambda: limiter.in_flight / pool.pool_maxsize if pool.pool_maxsize else 0.0)
+        return self
+
+
+
+
+def outcome(event:SXTCallEvent) -> str:
+    """Classifies an attempt for metric labels: success, throttled, client_error, server_error, timeout, cancelled,
+    circuit_open, rate_limited or transport_error."""
+    status = event.status
+    if 'ttfb' in event.timings and status is not None:
+        if status < 400: return 'success'
+        if status == 429: return 'throttled'
+        return 'client_error' if status < 500 else 'server_error'
+    ex = event.exception
+    if isinstance(ex, (SxTTimeoutError, requests.exceptions.Timeout)): return 'timeout'
+    if isinstance(ex, SxTCancelledError): return 'cancelled'
+    if isinstance(ex, SxTCircuitOpenError): return 'circuit_open'
+    if isinstance(ex, SxTRateLimitError): return 'rate_limited'
+    return 'transport_error'
+
+
+def format_value(value:float) -> str:
+    """Formats a sample value or bucket bound as Prometheus expects."""
+    if value is None: return 'NaN'
+    value = float(value)
+    if math.isinf(value): return '+Inf' if value > 0 else '-Inf'
+    if math.isnan(value): return 'NaN'
+    return str(int(value)) if value.is_integer() and abs(value) < 1e15 else repr(value)
+
+
+def prometheus_text(registry:SXTMetricsRegistry) -> str:
+    """--------------------
+    Renders a registry's metrics in the Prometheus text exposition format (version 0.0.4).
+
+    Args:
+        registry (SXTMetricsRegistry): Registry to export.
+
+    Returns:
+        str: Exposition text, ending in a newline.
+    """
+    escape = lambda v: str(v).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+    lines = []
+    for metric in registry.metrics():
+        lines.append(f'# HELP {metric.name} {metric.help.replace(chr(92), chr(92)*2).replace(chr(10), chr(92)+"n")}')
+        lines.append(f'# TYPE {metric.name} {metric.type}')
+        for suffix, labels, value in metric.samples():
+            label_text = ','.join(f'{k}="{escape(v)}"' for k, v in labels.items())
+            lines.append(f'{metric.name}{suffix}{{{label_text}}} {format_value(value)}' if label_text else f'{metric.name}{suffix} {format_value(value)}')
+    return '\n'.join(lines) + '\n'
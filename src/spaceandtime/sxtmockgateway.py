@@ -0,0 +1,481 @@
+import base64, fnmatch, gzip, json, random, re, secrets, sqlite3, threading, time, zlib
+from collections import deque
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+from urllib.parse import urlsplit, parse_qs, unquote
+import nacl.signing, nacl.exceptions
+from .sxtendpoints import SXTEndpointRegistry, endpoint_family
+
+
+SQL_TYPES = {'SELECT': 'dql', 'WITH': 'dql', 'VALUES': 'dql', 'EXPLAIN': 'dql',
+             'INSERT': 'dml', 'UPDATE': 'dml', 'DELETE': 'dml', 'REPLACE': 'dml', 'MERGE': 'dml',
+             'CREATE': 'ddl', 'DROP': 'ddl', 'ALTER': 'ddl'}
+
+
+class SXTMockGateway():
+    """Local, in-process stand-in for the Space and Time REST API, backed by an embedded SQLite database.
+
+    Serves the auth (code, token, refresh, logout, validtoken, idexists, keys), sql (sql, sql/dql, sql/dml, sql/ddl)
+    and discover (schema, table, view, table/column) endpoints of apiversions.json on a local port, so throughput,
+    retry and streaming features can be tested and benchmarked with no network.  Point any client at .url:
+
+        >>> with SXTMockGateway(latency=0.05) as gateway:
+        ...     user = SXTUser(user_id='suzy', user_private_key=key, api_url=gateway.url)
+        ...     user.authenticate()
+        ...     user.base_api.sql_ddl('CREATE TABLE SXTDEMO.T (ID INT PRIMARY KEY, TXT VARCHAR)', biscuits=['b'])
+
+    Each schema is an attached SQLite database, created on CREATE SCHEMA or on first CREATE TABLE / VIEW in it.
+    SQL is run as-is by SQLite, so SxT-specific syntax beyond the DDL 'WITH "..."' clause (which is ignored) is
+    not supported, and views may only reference tables in their own schema.  Biscuits are accepted but not checked.
+    Signatures on auth/token are verified (with PyNaCl) unless verify_signatures is False.
+
+    The most recent requests and responses are kept in .requests and .responses, to check what went over the wire, and 
+    fail_next() answers upcoming calls with an error status instead of serving them."""
+
+    database: str = ':memory:'
+    latency: object = 0.0
+    jitter: float = 0.0
+    row_limit: int = None
+    max_request_bytes: int = None
+    max_response_bytes: int = None
+    bandwidth: int = None
+    require_auth: bool = True
+    verify_signatures: bool = True
+    token_ttl: float = 1500.0
+    refresh_ttl: float = 7200.0
+    compress: bool = True
+    history: int = 1000
+    calls: dict = None
+    requests: deque = None
+    responses: deque = None
+    registry: SXTEndpointRegistry = None
+    __routes__: list = None
+    __db__: sqlite3.Connection = None
+    __dblock__: threading.RLock = None
+    __schemas__: set = None
+    __codes__: dict = None
+    __tokens__: dict = None
+    __keys__: dict = None
+    __lock__: threading.Lock = None
+    __failures__: list = None
+    __server__: ThreadingHTTPServer = None
+
+
+    def __init__(self, database:str = None, latency:object = None, jitter:float = None, row_limit:int = None,
+                 max_request_bytes:int = None, max_response_bytes:int = None, bandwidth:int = None,
+                 require_auth:bool = None, verify_signatures:bool = None, history:int = None, host:str = '127.0.0.1', port:int = 0, start:bool = True) -> None:
+        """--------------------
+        Creates a mock gateway, and (by default) starts serving on a background thread.
+
+        Args:
+            database (str): (optional) SQLite database file for the default schema; other schemas are stored alongside it
+                as <database>.<schema>.db.  Default ':memory:', i.e. nothing is persisted.
+            latency (float | dict): (optional) Seconds added to every response, or a dict of seconds by endpoint
+                (e.g. 'sql/dql') or family ('auth', 'sql', 'discover'), with 'default' for the rest.  Default 0.
+            jitter (float): (optional) Random extra latency, as a fraction of latency (0.5 = up to +50%).  Default 0.
+            row_limit (int): (optional) Maximum rows returned by a query; larger results are truncated.  Default no limit.
+            max_request_bytes (int): (optional) Larger request bodies (after decompression) are rejected with 413.  Default no limit.
+            max_response_bytes (int): (optional) Queries with a larger (uncompressed) response fail with 400.  Default no limit.
+            bandwidth (int): (optional) Response bytes per second, to simulate a slow link.  Default unlimited.
+            require_auth (bool): (optional) Reject calls to authenticated endpoints without a valid access token.  Default True.
+            verify_signatures (bool): (optional) Verify the signed auth code on auth/token.  Default True.
+            history (int): (optional) Number of recent requests and responses kept in .requests and .responses.  Default 1000.
+            host (str): (optional) Interface to listen on.  Default '127.0.0.1'.
+            port (int): (optional) Port to listen on.  Default 0, any free port.
+            start (bool): (optional) Start serving immediately.  Default True.
+        """
+        if database is not None: self.database = str(database)
+        if latency is not None: self.latency = latency
+        if jitter is not None: self.jitter = jitter
+        if row_limit is not None: self.row_limit = row_limit
+        if max_request_bytes is not None: self.max_request_bytes = max_request_bytes
+        if max_response_bytes is not None: self.max_response_bytes = max_response_bytes
+        if bandwidth is not None: self.bandwidth = bandwidth
+        if require_auth is not None: self.require_auth = require_auth
+        if verify_signatures is not None: self.verify_signatures = verify_signatures
+        if history is not None: self.history = history
+        self.calls = {}
+        self.requests = deque(maxlen=self.history) # method, endpoint, path, headers (lower case), wire_bytes, body (decoded)
+        self.responses = deque(maxlen=self.history) # status, encoding, wire_bytes
+        self.registry = SXTEndpointRegistry()
+        self.__routes__ = [(re.compile('^' + re.sub(r'\\\{[^/]+?\\\}', '([^/]+)', re.escape(route.template)) + '$'), route)
+                           for route in self.registry.routes()]
+        self.__db__ = sqlite3.connect(self.database, check_same_thread=False, isolation_level=None)
+        self.__dblock__ = threading.RLock()
+        self.__schemas__ = set()
+        self.__codes__ = {} # authCode -> user_id
+        self.__tokens__ = {} # token -> (kind, user_id, expires epoch)
+        self.__keys__ = {} # user_id -> list of public keys
+        self.__lock__ = threading.Lock()
+        self.__failures__ = [] # (endpoint pattern, status, detail)
+        self.__server__ = None
+        self.host, self.port = host, port
+        if start: self.start()
+
+    def __str__(self) -> str:
+        return f'SXTMockGateway(url={self.url}, schemas={sorted(self.__schemas__)})'
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+    @property
+    def url(self) -> str:
+        """Base URL to use as api_url, e.g. 'http://127.0.0.1:54321'.  None if not started."""
+        if self.__server__ is None: return None
+        return f'http://{self.__server__.server_address[0]}:{self.__server__.server_port}'
+
+
+    def start(self) -> str:
+        """Starts serving on a background (daemon) thread, if not already, and returns the url."""
+        if self.__server__ is None:
+            gateway = self
+            class Handler(BaseHTTPRequestHandler):
+                protocol_version = 'HTTP/1.1'
+                def log_message(self, *args): pass
+                def do_GET(self): gateway.__serve__(self)
+                do_POST = do_PUT = do_DELETE = do_GET
+            self.__server__ = ThreadingHTTPServer((self.host, self.port), Handler)
+            self.__server__.daemon_threads = True
+            threading.Thread(target=self.__server__.serve_forever, name='sxt-mock-gateway', daemon=True).start()
+        return self.url
+
+
+    def close(self) -> None:
+        """Stops serving and closes the database.  In-memory data is lost."""
+        if self.__server__ is not None:
+            self.__server__.shutdown()
+            self.__server__.server_close()
+            self.__server__ = None
+        with self.__dblock__:
+            self.__db__.close()
+
+
+    def execute(self, sql_text:str) -> list:
+        """--------------------
+        Runs a statement directly against the database, bypassing HTTP, auth, latency and limits.  Useful to seed test data.
+
+        Args:
+            sql_text (str): SQL statement, as accepted by the sql endpoints.
+
+        Returns:
+            list: Rows as dicts with upper-case column names for queries, [{'UPDATED': n}] for DML, [] for DDL.
+        """
+        return self.__execute__(sql_text)[1]
+
+
+    def add_user(self, user_id:str, public_key:str = None) -> None:
+        """Registers a user (and optionally a public key), so auth/idexists finds it and auth/token only accepts that key."""
+        with self.__lock__:
+            keys = self.__keys__.setdefault(user_id, [])
+            if public_key and public_key not in keys: keys.append(public_key)
+
+
+    def fail_next(self, status:int, detail:str = None, endpoint:str = '*', count:int = 1) -> None:
+        """--------------------
+        Answers the next calls to an endpoint with an error, instead of serving them.  Latency still applies.
+
+        Args:
+            status (int): HTTP status to answer with, e.g. 503.
+            detail (str): (optional) Detail of the error body.  Default 'Injected by the mock gateway'.
+            endpoint (str): (optional) Endpoint (e.g. 'sql/dml'), with * and ? wildcards.  Default all.
+            count (int): (optional) Number of calls to fail.  Default 1.
+        """
+        with self.__lock__:
+            self.__failures__ += [(endpoint, int(status), detail or 'Injected by the mock gateway')] * count
+
+
+    def latency_for(self, endpoint:str) -> float:
+        """Seconds of simulated latency for a call to an endpoint, including jitter."""
+        latency = self.latency
+        if isinstance(latency, dict):
+            latency = latency.get(endpoint, latency.get(endpoint_family(endpoint), latency.get('default', 0.0)))
+        latency = float(latency or 0.0)
+        if self.jitter: latency += latency * self.jitter * random.random()
+        return latency
+
+
+
+    # --- HTTP ---
+
+    def __serve__(self, handler:BaseHTTPRequestHandler) -> None:
+        started = time.monotonic()
+        try:
+            wire = self.__read_body__(handler)
+            encoding = handler.headers.get('content-encoding', '').lower()
+            body = gzip.decompress(wire) if encoding == 'gzip' else zlib.decompress(wire) if encoding == 'deflate' else wire
+        except Exception as ex:
+            return self.__respond__(handler, 400, self.__error__(400, f'Unreadable request body: {ex}'), started)
+
+        parts = urlsplit(handler.path)
+        path = unquote(parts.path).strip('/')
+        endpoint, path_parms = None, ()
+        for pattern, route in self.__routes__:
+            match = pattern.match(path)
+            if match:
+                endpoint, path_parms = route.endpoint, match.groups()
+                break
+        try:
+            decoded = json.loads(body) if body else {}
+        except ValueError as ex:
+            decoded = ex
+        with self.__lock__:
+            self.calls[endpoint or path] = self.calls.get(endpoint or path, 0) + 1
+            self.requests.append({'method': handler.command, 'endpoint': endpoint, 'path': handler.path, 'wire_bytes': len(wire),
+                                  'headers': {k.lower(): v for k, v in handler.headers.items()},
+                                  'body': None if isinstance(decoded, ValueError) else decoded})
+            failure = next((f for f in self.__failures__ if fnmatch.fnmatchcase(endpoint or path, f[0])), None)
+            if failure: self.__failures__.remove(failure)
+        delay = self.latency_for(endpoint or path)
+
+        if failure:
+            status, payload = failure[1], self.__error__(failure[1], failure[2])
+        elif endpoint is None or endpoint.split('/')[0] not in ('auth', 'sql', 'discover'):
+            status, payload = 404, self.__error__(404, f'Not found (or not implemented by the mock gateway): {path}')
+        elif self.max_request_bytes is not None and len(body) > self.max_request_bytes:
+            status, payload = 413, self.__error__(413, f'Request body of {len(body)} bytes exceeds the limit of {self.max_request_bytes}')
+        elif isinstance(decoded, ValueError):
+            status, payload = 400, self.__error__(400, f'Request body is not valid JSON: {decoded}')
+        else:
+            try:
+                request = {'endpoint': endpoint, 'method': handler.command, 'path_parms': path_parms,
+                           'query': {k: v[-1] for k, v in parse_qs(parts.query).items()},
+                           'authorization': handler.headers.get('authorization', ''), 'body': decoded}
+                status, payload = getattr(self, f'__{endpoint.split("/")[0]}__')(request)
+            except Exception as ex:
+                status, payload = 500, self.__error__(500, f'{type(ex).__name__}: {ex}')
+        self.__respond__(handler, status, payload, started, delay)
+
+
+    def __read_body__(self, handler:BaseHTTPRequestHandler) -> bytes:
+        if handler.headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int(handler.rfile.readline().split(b';')[0].strip(), 16)
+                if size == 0:
+                    handler.rfile.readline()
+                    return b''.join(chunks)
+                chunks.append(handler.rfile.read(size))
+                handler.rfile.readline()
+        return handler.rfile.read(int(handler.headers.get('content-length') or 0))
+
+
+    def __respond__(self, handler:BaseHTTPRequestHandler, status:int, payload, started:float, delay:float = 0.0) -> None:
+        out = json.dumps(payload).encode('utf-8') if not isinstance(payload, bytes) else payload
+        accepted = [e.split(';')[0].strip() for e in handler.headers.get('accept-encoding', '').split(',')]
+        encoding = next((e for e in ('gzip', 'deflate') if self.compress and e in accepted), None)
+        if encoding == 'gzip': out = gzip.compress(out, compresslevel=5)
+        elif encoding == 'deflate': out = zlib.compress(out)
+        with self.__lock__: self.responses.append({'status': status, 'encoding': encoding, 'wire_bytes': len(out)})
+        remaining = delay - (time.monotonic() - started)
+        if remaining > 0: time.sleep(remaining)
+
+        handler.send_response(status)
+        handler.send_header('content-type', 'application/json')
+        if encoding: handler.send_header('content-encoding', encoding)
+        handler.send_header('content-length', str(len(out)))
+        handler.end_headers()
+        chunk = max(1024, int(self.bandwidth / 10)) if self.bandwidth else len(out) or 1
+        for i in range(0, len(out), chunk):
+            if i and self.bandwidth: time.sleep(chunk / self.bandwidth)
+            handler.wfile.write(out[i:i+chunk])
+
+
+    def __error__(self, status:int, detail:str) -> dict:
+        titles = {400: 'Bad Request', 401: 'Unauthorized', 404: 'Not Found', 413: 'Payload Too Large', 429: 'Too Many Requests',
+                  500: 'Internal Server Error', 503: 'Service Unavailable'}
+        return {'title': titles.get(status, 'Error'), 'status': status, 'detail': detail}
+
+
+
+    # --- auth ---
+
+    def __issue_tokens__(self, user_id:str) -> dict:
+        now = time.time()
+        tokens = {'accessToken': secrets.token_hex(32), 'refreshToken': secrets.token_hex(32),
+                  'accessTokenExpires': int((now + self.token_ttl) * 1000), 'refreshTokenExpires': int((now + self.refresh_ttl) * 1000)}
+        with self.__lock__:
+            self.__tokens__[tokens['accessToken']] = ('access', user_id, now + self.token_ttl)
+            self.__tokens__[tokens['refreshToken']] = ('refresh', user_id, now + self.refresh_ttl)
+        return tokens
+
+
+    def __bearer__(self, request:dict, kind:str = 'access') -> str:
+        """Returns the user_id for a valid bearer token of the given kind, or None."""
+        token = request['authorization'][7:].strip() if request['authorization'].lower().startswith('bearer ') else ''
+        with self.__lock__:
+            kind_found, user_id, expires = self.__tokens__.get(token, (None, None, 0))
+        return user_id if kind_found == kind and expires > time.time() else None
+
+
+    def __verify__(self, public_key:str, message:str, signature:str) -> bool:
+        def decode(value:str) -> bytes:
+            if re.fullmatch(r'[0-9a-fA-F]+', value or '') and len(value) % 2 == 0: return bytes.fromhex(value)
+            return base64.b64decode(value or '')
+        try:
+            nacl.signing.VerifyKey(decode(public_key)).verify(message.encode('utf-8'), decode(signature))
+            return True
+        except (nacl.exceptions.BadSignatureError, ValueError, TypeError):
+            return False
+
+
+    def __auth__(self, request:dict) -> tuple:
+        endpoint, body = request['endpoint'], request['body']
+        if endpoint == 'auth/code':
+            if not body.get('userId'): return 400, self.__error__(400, 'userId is required')
+            code = secrets.token_hex(11)
+            with self.__lock__: self.__codes__[code] = body['userId']
+            return 200, {'authCode': code}
+
+        if endpoint == 'auth/token':
+            user_id, code, key = body.get('userId'), body.get('authCode'), body.get('key')
+            with self.__lock__:
+                issued_to = self.__codes__.pop(code, None)
+                known_keys = self.__keys__.get(user_id)
+            if issued_to is None or issued_to != user_id: return 401, self.__error__(401, 'Unknown or already used authCode')
+            if known_keys and key not in known_keys: return 401, self.__error__(401, 'Public key is not registered for this user')
+            if self.verify_signatures and not self.__verify__(key, code, body.get('signature')):
+                return 401, self.__error__(401, 'Signature verification failed')
+            self.add_user(user_id, key)
+            return 200, self.__issue_tokens__(user_id)
+
+        if endpoint == 'auth/refresh':
+            user_id = self.__bearer__(request, 'refresh')
+            if user_id is None: return 401, self.__error__(401, 'Invalid or expired refresh token')
+            with self.__lock__: self.__tokens__.pop(request['authorization'][7:].strip(), None)
+            return 200, self.__issue_tokens__(user_id)
+
+        if endpoint == 'auth/idexists/{id}':
+            with self.__lock__: return 200, request['path_parms'][0] in self.__keys__
+
+        user_id = self.__bearer__(request)
+        if user_id is None: return 401, self.__error__(401, 'Invalid or expired access token')
+        if endpoint == 'auth/logout':
+            with self.__lock__:
+                self.__tokens__ = {t: v for t, v in self.__tokens__.items() if v[1] != user_id}
+            return 200, {}
+        if endpoint == 'auth/validtoken':
+            with self.__lock__: expires = self.__tokens__[request['authorization'][7:].strip()][2]
+            return 200, {'id': user_id, 'expiration': int(expires * 1000)}
+        if endpoint == 'auth/keys':
+            with self.__lock__: return 200, [{'key': key, 'scheme': 'ED25519'} for key in self.__keys__.get(user_id, [])]
+        return 404, self.__error__(404, f'{endpoint} is not implemented by the mock gateway')
+
+
+
+    # --- sql ---
+
+    def __sql__(self, request:dict) -> tuple:
+        endpoint, body = request['endpoint'], request['body']
+        if endpoint not in ('sql', 'sql/dql', 'sql/dml', 'sql/ddl'): return 404, self.__error__(404, f'{endpoint} is not implemented by the mock gateway')
+        if self.require_auth and self.__bearer__(request) is None: return 401, self.__error__(401, 'Invalid or expired access token')
+        sql_text = str(body.get('sqlText') or '').strip()
+        if not sql_text: return 400, self.__error__(400, 'sqlText is required')
+        expected = endpoint.split('/')[-1]
+        sql_type = SQL_TYPES.get(sql_text.split(None, 1)[0].upper())
+        if expected != 'sql' and sql_type != expected:
+            return 400, self.__error__(400, f'{endpoint} only accepts {expected.upper()} statements')
+        try:
+            sql_type, rows = self.__execute__(sql_text)
+        except sqlite3.IntegrityError as ex: # worded as the gateway does, which clients rely on
+            if 'UNIQUE' not in str(ex): return 400, self.__error__(400, f'{type(ex).__name__}: {ex}')
+            return 400, self.__error__(400, f'Duplicate key during INSERT: {ex}')
+        except sqlite3.Error as ex:
+            return 400, self.__error__(400, f'{type(ex).__name__}: {ex}')
+        if self.max_response_bytes is not None:
+            out = json.dumps(rows).encode('utf-8')
+            if len(out) > self.max_response_bytes:
+                return 400, self.__error__(400, f'Result of {len(out)} bytes exceeds the limit of {self.max_response_bytes}')
+            return 200, out
+        return 200, rows
+
+
+    def __execute__(self, sql_text:str) -> tuple:
+        sql_text = sql_text.strip().rstrip(';').strip()
+        sql_type = SQL_TYPES.get(sql_text.split(None, 1)[0].upper(), 'ddl') if sql_text else 'ddl'
+        with self.__dblock__:
+            if sql_type == 'ddl':
+                sql_text = re.sub(r'\s+WITH\s+"[^"]*"\s*$', '', sql_text, flags=re.IGNORECASE) # SxT access / key options
+                schema = re.match(r'^CREATE\s+SCHEMA\s+(?:IF\s+NOT\s+EXISTS\s+)?"?(\w+)"?\s*$', sql_text, re.IGNORECASE)
+                if schema:
+                    self.__attach__(schema.group(1))
+                    return sql_type, []
+                schema = re.match(r'^DROP\s+SCHEMA\s+(?:IF\s+EXISTS\s+)?"?(\w+)"?\s*$', sql_text, re.IGNORECASE)
+                if schema:
+                    if schema.group(1).upper() in self.__schemas__:
+                        self.__db__.execute(f'DETACH DATABASE "{schema.group(1).upper()}"')
+                        self.__schemas__.discard(schema.group(1).upper())
+                    return sql_type, []
+                created = re.match(r'^CREATE\s+(?:TEMP\w*\s+)?(?:TABLE|VIEW)\s+(?:IF\s+NOT\s+EXISTS\s+)?"?(\w+)"?\.', sql_text, re.IGNORECASE)
+                if created: self.__attach__(created.group(1))
+            cursor = self.__db__.execute(sql_text)
+            if cursor.description is None:
+                return sql_type, ([{'UPDATED': max(cursor.rowcount, 0)}] if sql_type == 'dml' else [])
+            columns = [str(c[0]).upper() for c in cursor.description]
+            raw = cursor.fetchmany(self.row_limit) if self.row_limit is not None else cursor.fetchall()
+        return sql_type, [{c: (v.hex() if isinstance(v, bytes) else v) for c, v in zip(columns, row)} for row in raw]
+
+
+    def __attach__(self, schema:str) -> None:
+        schema = schema.upper()
+        if schema in self.__schemas__ or schema in ('MAIN', 'TEMP'): return None
+        location = ':memory:' if self.database == ':memory:' else str(Path(self.database).with_suffix(f'.{schema.lower()}.db'))
+        self.__db__.execute('ATTACH DATABASE ? AS "%s"' % schema, (location,))
+        self.__schemas__.add(schema)
+
+
+
+    # --- discover ---
+
+    def __objects__(self, object_type:str, schema:str = None) -> list:
+        """Returns (schema, name) of every table or view, optionally in one schema."""
+        with self.__dblock__:
+            found = []
+            for name in sorted(self.__schemas__):
+                if schema and name != schema.upper(): continue
+                found += [(name, str(n).upper()) for (n,) in self.__db__.execute(
+                          f'SELECT name FROM "{name}".sqlite_master WHERE type = ? ORDER BY name', (object_type,))]
+        return found
+
+
+    def __discover__(self, request:dict) -> tuple:
+        endpoint, query = request['endpoint'], request['query']
+        if self.require_auth and self.__bearer__(request) is None: return 401, self.__error__(401, 'Invalid or expired access token')
+        pattern = query.get('searchPattern')
+        def matches(name): return not pattern or re.fullmatch(re.escape(pattern.upper()).replace('%', '.*').replace('_', '.'), name)
+
+        if endpoint == 'discover/schema':
+            with self.__dblock__: return 200, [{'schema': s, 'isPublic': True} for s in sorted(self.__schemas__)]
+        if endpoint in ('discover/table', 'discover/view'):
+            kind = endpoint.split('/')[-1]
+            schema = query.get('schema') or query.get('namespace')
+            return 200, [{'schema': s, kind: n, 'isPublic': True} for s, n in self.__objects__(kind, schema) if matches(n)]
+        if endpoint == 'discover/table/column':
+            schema, table = str(query.get('schema') or query.get('namespace') or '').upper(), str(query.get('table') or '').upper()
+            if schema not in self.__schemas__: return 400, self.__error__(400, f'Unknown schema: {schema}')
+            with self.__dblock__:
+                columns = self.__db__.execute(f'PRAGMA "{schema}".table_info("{table}")').fetchall()
+            return 200, [{'schema': schema, 'table': table, 'column': str(c[1]).upper(), 'dataType': str(c[2]).upper(),
+                          'position': c[0] + 1, 'nullable': not c[3], 'primaryKeyPosition': c[5] or None} for c in columns]
+        return 200, [] # other discover/* endpoints: nothing to report
+
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Serve a local mock Space and Time gateway, backed by SQLite.')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--database', default=':memory:')
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--no-auth', action='store_true', help='accept sql / discover calls without an access token')
+    args = parser.parse_args()
+
+    gateway = SXTMockGateway(database=args.database, latency=args.latency, require_auth=not args.no_auth, port=args.port)
+    print(f'Mock Space and Time gateway listening on {gateway.url}  (Ctrl+C to stop)')
+    try:
+        while True: time.sleep(3600)
+    except KeyboardInterrupt:
+        gateway.close()
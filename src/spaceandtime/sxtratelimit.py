@@ -0,0 +1,320 @@
+import asyncio, threading, time
+from fnmatch import fnmatch
+from .sxtenums import SXTRateLimitPolicy
+from .sxtexceptions import SxTArgumentError, SxTRateLimitError, SxTTimeoutError
+from .sxtcancellation import SXTDeadline, SXTCancelToken, check_abort
+from .sxtendpoints import endpoint_family
+
+
+class SXTTokenBucket():
+    """Token bucket refilled at rate tokens per second, holding at most burst tokens.  The balance may go
+    negative: each caller reserves its token up front, so later callers queue behind earlier ones."""
+
+    rate: float = 1.0
+    burst: float = 1.0
+    tokens: float = 1.0
+    updated: float = 0.0
+
+    def __init__(self, rate:float, burst:float = None) -> None:
+        if not rate or rate <= 0: raise SxTArgumentError(f'Rate limit must be a positive number of calls per second, not {rate}')
+        self.rate = float(rate)
+        self.burst = float(max(1.0, self.rate if burst is None else burst))
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def __str__(self) -> str:
+        return f'SXTTokenBucket(rate={self.rate}/s, burst={self.burst}, tokens={self.tokens:.2f})'
+
+    def refill(self, now:float = None) -> None:
+        """Adds the tokens earned since the last refill, up to burst."""
+        if now is None: now = time.monotonic()
+        if now <= self.updated: return None # another thread already refilled past now
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now:float = None) -> float:
+        """Seconds until one token is available (0.0 if available now)."""
+        self.refill(now)
+        return max(0.0, (1.0 - self.tokens) / self.rate)
+
+
+
+
+class SXTRateLimitStats():
+    """Counters for one bucket (or all buckets): calls admitted, throttled (made to wait) and rejected, and queue waits."""
+
+    acquired: int = 0
+    throttled: int = 0
+    rejected: int = 0
+    server_throttled: int = 0
+    waiting: int = 0
+    wait_total: float = 0.0
+    wait_max: float = 0.0
+
+    def __init__(self) -> None:
+        self.acquired = self.throttled = self.rejected = self.server_throttled = self.waiting = 0
+        self.wait_total = self.wait_max = 0.0
+
+    def __str__(self) -> str:
+        return f'SXTRateLimitStats({self.to_dict()})'
+
+    @property
+    def wait_avg(self) -> float:
+        """Average queue wait in seconds, over all admitted calls."""
+        return self.wait_total / self.acquired if self.acquired else 0.0
+
+    def to_dict(self) -> dict:
+        return {'acquired': self.acquired, 'throttled': self.throttled, 'rejected': self.rejected,
+                'server_throttled': self.server_throttled, 'waiting': self.waiting,
+                'wait_total': self.wait_total, 'wait_avg': self.wait_avg, 'wait_max': self.wait_max}
+
+
+
+
+class SXTRateLimiter():
+    """Client-side rate limiter consulted by SXTBaseAPI.call_api before every attempt (including retries).
+
+    Keeps separate token buckets per user (user_id), per endpoint group and per originApp (app_name); a call
+    must get a token from every bucket that applies to it.  Set the rates a little under the server quota, so
+    sustained throughput is paced just below it instead of bursting into 429s and retries.  A 429 response
+    drains the buckets for that call (for Retry-After seconds, if supplied), slowing everyone sharing them.
+
+    Rates are calls per second, either a number (burst = rate) or a (rate, burst) tuple.  With no rates
+    configured (the default), nothing is limited."""
+
+    enabled: bool = True
+    policy: SXTRateLimitPolicy = SXTRateLimitPolicy.BLOCK
+    max_wait: float = None
+    per_user = None
+    per_app = None
+    per_endpoint: dict = None
+    __buckets__: dict = None
+    __stats__: dict = None
+    __total__: SXTRateLimitStats = None
+    __lock__: threading.Lock = None
+
+
+    def __init__(self, per_user = None, per_endpoint:dict = None, per_app = None,
+                 policy:SXTRateLimitPolicy = None, max_wait:float = None, enabled:bool = None) -> None:
+        """--------------------
+        Creates a new rate limiter.  Normally there is only one per process, shared by every SXTBaseAPI.
+
+        Args:
+            per_user (float | tuple): (optional) Rate for each user_id.
+            per_endpoint (dict): (optional) Rates keyed by endpoint ('sql/dml'), pattern ('discover/*'),
+                family ('sql', 'discover', 'auth') or 'default', matched in that order.  Endpoints matching a
+                pattern, family or 'default' share one bucket.
+            per_app (float | tuple): (optional) Rate for each originApp (app_name).
+            policy (SXTRateLimitPolicy): (optional) BLOCK (default) waits for a token, FAIL_FAST raises SxTRateLimitError.
+            max_wait (float): (optional) With BLOCK, the longest a call will queue before raising SxTRateLimitError.  Default: no limit.
+            enabled (bool): (optional) If False, nothing is limited.
+        """
+        self.per_user = self.__parse_rate__(per_user)
+        self.per_app = self.__parse_rate__(per_app)
+        self.per_endpoint = {k: self.__parse_rate__(v) for k,v in (per_endpoint or {}).items()}
+        if policy is not None: self.policy = SXTRateLimitPolicy(policy)
+        if max_wait is not None: self.max_wait = max_wait
+        if enabled is not None: self.enabled = enabled
+        self.__buckets__ = {}
+        self.__stats__ = {}
+        self.__total__ = SXTRateLimitStats()
+        self.__lock__ = threading.Lock()
+
+    def __str__(self) -> str:
+        return f'SXTRateLimiter(per_user={self.per_user}, per_endpoint={self.per_endpoint}, per_app={self.per_app}, policy={self.policy.value})'
+
+
+    def __parse_rate__(self, rate) -> tuple:
+        if rate is None: return None
+        rate, burst = tuple(rate) if isinstance(rate, (tuple, list)) else (rate, None)
+        if not isinstance(rate, (int, float)) or rate <= 0: 
+            raise SxTArgumentError(f'Rate limit must be a positive number of calls per second, not {rate}')
+        return float(rate), float(max(1.0, rate if burst is None else burst))
+
+
+    def endpoint_group(self, endpoint:str) -> str:
+        """Returns the per_endpoint key that applies to an endpoint, or None if it is not limited."""
+        if endpoint in self.per_endpoint: return endpoint
+        for pattern in self.per_endpoint:
+            if '*' in pattern and fnmatch(endpoint, pattern): return pattern
+        family = endpoint_family(endpoint)
+        if family in self.per_endpoint: return family
+        return 'default' if 'default' in self.per_endpoint else None
+
+
+    def limits_for(self, user_id:str = '', endpoint:str = '', app_name:str = None) -> list:
+        """Returns the (bucket_key, (rate, burst)) pairs that apply to a call."""
+        limits = []
+        if self.per_user: limits.append( (f'user:{user_id}', self.per_user) )
+        group = self.endpoint_group(endpoint) if self.per_endpoint else None
+        if group: limits.append( (f'endpoint:{group}', self.per_endpoint[group]) )
+        if self.per_app and app_name: limits.append( (f'app:{app_name}', self.per_app) )
+        return limits
+
+
+    def acquire(self, user_id:str = '', endpoint:str = '', app_name:str = None,
+                deadline:SXTDeadline = None, cancel_token:SXTCancelToken = None) -> float:
+        """--------------------
+        Takes a token from every bucket that applies to a call, waiting (per policy) until they are available.
+
+        Args:
+            user_id (str): User making the call.
+            endpoint (str): Endpoint being called, e.g. 'sql/dml'.
+            app_name (str): (optional) originApp of the call.
+            deadline (SXTDeadline): (optional) Raises SxTTimeoutError, without waiting, if the token would arrive too late.
+            cancel_token (SXTCancelToken): (optional) Stops the wait early, raising SxTCancelledError.
+
+        Returns:
+            float: Seconds spent queued.
+        """
+        wait, keys = self.__reserve__(user_id, endpoint, app_name, deadline)
+        if wait <= 0: return 0.0
+        try:
+            if cancel_token:
+                cancel_token.wait(wait)
+            else:
+                time.sleep(wait)
+            check_abort(deadline, cancel_token)
+        except BaseException:
+            self.__refund__(keys)
+            raise
+        finally:
+            self.__done_waiting__(keys)
+        return wait
+
+
+    def try_acquire(self, user_id:str = '', endpoint:str = '', app_name:str = None) -> bool:
+        """Takes a token from every bucket that applies to a call only if all are available now, never waiting, e.g. for 
+        an optional hedged duplicate.  Returns True if taken (or nothing is limited), False otherwise."""
+        if not self.enabled: return True
+        limits = self.limits_for(user_id, endpoint, app_name)
+        if not limits: return True
+        now = time.monotonic()
+        with self.__lock__:
+            buckets = [self.__bucket__(key, rate) for key, rate in limits]
+            if max(bucket.wait_time(now) for bucket in buckets) > 0: return False
+            for bucket in buckets: bucket.tokens -= 1.0
+            for stat in [self.__stat__(key) for key, rate in limits] + [self.__total__]: stat.acquired += 1
+        return True
+
+
+    async def acquire_async(self, user_id:str = '', endpoint:str = '', app_name:str = None,
+                            deadline:SXTDeadline = None, cancel_token:SXTCancelToken = None) -> float:
+        """Async version of acquire(), waiting with asyncio.sleep so the event loop is not blocked."""
+        wait, keys = self.__reserve__(user_id, endpoint, app_name, deadline)
+        if wait <= 0: return 0.0
+        try:
+            await asyncio.sleep(wait)
+            check_abort(deadline, cancel_token)
+        except BaseException:
+            self.__refund__(keys)
+            raise
+        finally:
+            self.__done_waiting__(keys)
+        return wait
+
+
+    def penalize(self, user_id:str = '', endpoint:str = '', app_name:str = None, seconds:float = None) -> None:
+        """--------------------
+        Records a server-side throttle (429): empties the buckets for the call, and if seconds
+        (e.g. from Retry-After) is supplied, holds them empty for that long.
+
+        Args:
+            user_id (str): User that made the call.
+            endpoint (str): Endpoint that was called.
+            app_name (str): (optional) originApp of the call.
+            seconds (float): (optional) Extra seconds before the next token is available.
+        """
+        if not self.enabled: return None
+        limits = self.limits_for(user_id, endpoint, app_name)
+        now = time.monotonic()
+        with self.__lock__:
+            for key, rate in limits:
+                bucket = self.__bucket__(key, rate)
+                bucket.refill(now)
+                bucket.tokens = min(bucket.tokens, 0.0) - (seconds or 0.0) * bucket.rate
+                self.__stat__(key).server_throttled += 1
+            if limits: self.__total__.server_throttled += 1
+
+
+    def metrics(self) -> dict:
+        """Returns the counters (acquired, throttled, rejected, server_throttled, waiting, wait_total / avg / max) in total and by bucket."""
+        with self.__lock__:
+            return {'total': self.__total__.to_dict(),
+                    'buckets': {k: v.to_dict() for k,v in self.__stats__.items()}}
+
+
+    def after_fork(self) -> None:
+        """Called in a forked child: replaces the lock (it may have been held by a parent thread) and starts with full buckets."""
+        self.__lock__ = threading.Lock()
+        self.reset()
+
+
+    def reset(self) -> None:
+        """Refills every bucket and clears all counters."""
+        with self.__lock__:
+            self.__buckets__ = {}
+            self.__stats__ = {}
+            self.__total__ = SXTRateLimitStats()
+
+
+    def __bucket__(self, key:str, rate:tuple) -> SXTTokenBucket:
+        bucket = self.__buckets__.get(key)
+        if bucket is None or (bucket.rate, bucket.burst) != rate: # new, or limits changed
+            bucket = SXTTokenBucket(*rate)
+            self.__buckets__[key] = bucket
+        return bucket
+
+
+    def __stat__(self, key:str) -> SXTRateLimitStats:
+        stat = self.__stats__.get(key)
+        if stat is None:
+            stat = SXTRateLimitStats()
+            self.__stats__[key] = stat
+        return stat
+
+
+    def __reserve__(self, user_id:str, endpoint:str, app_name:str, deadline:SXTDeadline) -> tuple:
+        """Reserves a token from each applicable bucket.  Returns (seconds to wait, bucket keys), or raises if the wait is not acceptable."""
+        if not self.enabled: return 0.0, ()
+        limits = self.limits_for(user_id, endpoint, app_name)
+        if not limits: return 0.0, ()
+        keys = tuple(key for key, rate in limits)
+        now = time.monotonic()
+        with self.__lock__:
+            buckets = [self.__bucket__(key, rate) for key, rate in limits]
+            wait = max(bucket.wait_time(now) for bucket in buckets)
+            stats = [self.__stat__(key) for key in keys] + [self.__total__]
+            if wait > 0:
+                longest = 0.0 if self.policy == SXTRateLimitPolicy.FAIL_FAST else self.max_wait
+                error = None
+                if longest is not None and wait > longest:
+                    error = SxTRateLimitError(f'Client rate limit reached for {", ".join(keys)}, next call allowed in {wait:.2f}s')
+                elif deadline and wait >= deadline.remaining():
+                    error = SxTTimeoutError(f'Deadline of {deadline.seconds}s would be exceeded waiting {wait:.2f}s for rate limit {", ".join(keys)}')
+                if error:
+                    for stat in stats: stat.rejected += 1
+                    raise error
+            for bucket in buckets: bucket.tokens -= 1.0
+            for stat in stats:
+                stat.acquired += 1
+                stat.wait_total += wait
+                stat.wait_max = max(stat.wait_max, wait)
+                if wait > 0:
+                    stat.throttled += 1
+                    stat.waiting += 1
+        return wait, keys
+
+
+    def __refund__(self, keys:tuple) -> None:
+        """Returns reserved tokens after an abandoned wait."""
+        with self.__lock__:
+            for key in keys:
+                bucket = self.__buckets__.get(key)
+                if bucket: bucket.tokens = min(bucket.burst, bucket.tokens + 1.0)
+
+
+    def __done_waiting__(self, keys:tuple) -> None:
+        with self.__lock__:
+            for stat in [self.__stats__.get(key) for key in keys] + [self.__total__]:
+                if stat: stat.waiting = max(0, stat.waiting - 1)
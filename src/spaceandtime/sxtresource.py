@@ -1,12 +1,16 @@
-import logging, json, random, time
+import logging, json, random
 from pysteve import pySteve
 from pathlib import Path
 from datetime import datetime
 from .sxtenums import SXTResourceType, SXTPermission, SXTKeyEncodings, SXTTableAccessType
-from .sxtexceptions import SxTArgumentError, SxTFileContentError, SxTExceptions
+from .sxtexceptions import SxTArgumentError, SxTFileContentError, SxTExceptions, SxTTimeoutError, SxTCancelledError
+from .sxtcancellation import SXTDeadline, SXTCancelToken, check_abort
+from .sxtconcurrency import run_parallel, bulk_workers
 from .sxtbiscuits import SXTBiscuit
 from .sxtkeymanager import SXTKeyManager
 from .sxtuser import SXTUser
+from .sxttracing import get_tracer, traced
+from .sxtlogging import get_logger, truncated, sample_row, settings as log_settings
 
 class SXTResource():
     # child objects should override: self.__with__, has_with_statement(), self.resource_type
@@ -20,11 +24,11 @@ class SXTResource():
     key_manager: SXTKeyManager = None
     filepath: Path = ''
     application_name:str = ''
-    biscuits = []
+    biscuits: list = None
     start_time: datetime = None
     __rcn:str = ''
     __ddlt__:str = ''
-    __allprops__: list = []
+    __allprops__: list = None
     __with__:dict 
     __existfunc__ = None
     default_local_folder:Path = None
@@ -48,18 +52,13 @@ class SXTResource():
             if not start_time: start_time = SpaceAndTime_parent.start_time
 
         # set logger if set, otherwise create new
-        if logger: 
-            self.logger = logger 
-        else: 
-            self.logger = logging.getLogger()
-            self.logger.setLevel(logging.INFO)
-            if len(self.logger.handlers) == 0: 
-                self.logger.addHandler( logging.StreamHandler() )
+        self.logger = get_logger('resource', logger, default_output=True)
 
         # load parameters from file into variables 
         if not default_local_folder: default_local_folder = '.'
         self.default_local_folder = Path(Path(default_local_folder) / Path( self.__foname__ )) 
         self.biscuits = []    
+        self.__allprops__ = [] # populated below, per instance
         if from_file: self.load(from_file)
 
         # Continue setting parameters if they exist, or if not, supply new objects /defaults
@@ -399,7 +398,8 @@ class SXTResource():
         return all_valid_user_objects[0]
      
 
-    def create(self, sql_text:str = None, user:SXTUser = None, biscuits:list = None):
+    @traced('{self.__class__.__name__}.create')
+    def create(self, sql_text:str = None, user:SXTUser = None, biscuits:list = None, deadline:float = None, cancel_token:SXTCancelToken = None):
         """--------------------
         Issues the supplied (parameterized) CREATE statement to the Space and Time network, and report back success and details.
 
@@ -407,6 +407,8 @@ class SXTResource():
             sql_text (str): Parameterized CREATE statement.  If omitted, will use the resource.create_ddl class property.  Both will replace {placeholders} with real values before submission.
             user (SXTUser): Authenticated user who will issue the command.  If omitted, will use the default user, resource.user
             biscuits (list): List of biscuits to include with the request, either as string biscuit tokens or as SXTBiscuit objects.  If omitted, will use the class.biscuits list.  Must contain CREATE permissions. 
+            deadline (float | SXTDeadline): (optional) Seconds by which the request must complete, including any retries.
+            cancel_token (SXTCancelToken): (optional) Token that can be cancelled from another thread to abort the request.
 
         Returns: 
             bool: Success flag, True if the object was created.
@@ -422,22 +424,26 @@ class SXTResource():
         if not biscuits: biscuits = self.biscuits if type(self.biscuits)==list else [self.biscuits]
         if biscuits == []: 
             self.logger.warning('No biscuits found. While this may be OK, it can also cause errors.')
-        success, results = user.base_api.sql_ddl(sql_text=sql_text.strip(), biscuits=biscuits, app_name=self.application_name)
+        success, results = user.base_api.sql_ddl(sql_text=sql_text.strip(), biscuits=biscuits, app_name=self.application_name, 
+                                                 deadline=deadline, cancel_token=cancel_token)
         if success: 
-            self.logger.info(f'{self.resource_type.name} Created: {self.resource_name}:\n{sql_text}')
+            self.logger.info('%s Created: %s:\n%s', self.resource_type.name, self.resource_name, truncated(sql_text))
         else:
-            self.logger.error(f'{self.resource_type.name} FAILED TO CREATE with user {user.user_id}:\n{results}\n{sql_text}\n\nBiscuits: {biscuits}')
+            self.logger.error('%s FAILED TO CREATE with user %s:\n%s\n%s\n\nBiscuits: %s', self.resource_type.name, user.user_id, truncated(results), truncated(sql_text), truncated(biscuits))
         self.__lasterr__ = None if success else self.SXTExceptions.SxTQueryError(results) 
         return success, results
 
 
-    def drop(self, user:SXTUser = None, biscuits:list = None):
+    @traced('{self.__class__.__name__}.drop')
+    def drop(self, user:SXTUser = None, biscuits:list = None, deadline:float = None, cancel_token:SXTCancelToken = None):
         """--------------------
         Issues the supplied (parameterized) DROP statement to the Space and Time network, and report back success and details.
 
         Args:
             user (SXTUser): Authenticated user who will issue the command.  If omitted, will use the default user, resource.user
             biscuits (list): List of biscuits to include with the request, either as string biscuit tokens or as SXTBiscuit objects.  If omitted, will use the class.biscuits list.  Must contain DROP permissions. 
+            deadline (float | SXTDeadline): (optional) Seconds by which the request must complete, including any retries.
+            cancel_token (SXTCancelToken): (optional) Token that can be cancelled from another thread to abort the request.
 
         Returns: 
             bool: Success flag, True if the object was dropped.
@@ -450,16 +456,19 @@ class SXTResource():
             raise SxTArgumentError('A biscuit with DROP must be included.', logger=self.logger)
         objtype = 'TABLE' if self.resource_type.name.lower()=='table' else 'VIEW'
         sql_text = f'DROP {objtype} {self.resource_name}' 
-        success, results = user.base_api.sql_ddl(sql_text=sql_text, biscuits=biscuits, app_name=self.application_name)
+        success, results = user.base_api.sql_ddl(sql_text=sql_text, biscuits=biscuits, app_name=self.application_name, 
+                                                 deadline=deadline, cancel_token=cancel_token)
         if success: 
             self.logger.info(f'       DROPPED: {self.resource_name}')
         else:
-            self.logger.error(f'{self.resource_type.name} FAILED TO DROP with user {user.user_id}:\n{results}\n{sql_text}')
+            self.logger.error('%s FAILED TO DROP with user %s:\n%s\n%s', self.resource_type.name, user.user_id, truncated(results), sql_text)
         self.__lasterr__ = None if success else self.SXTExceptions.SxTQueryError(results) 
         return success, results
         
 
-    def select(self, sql_text:str = '', columns:list = ['*'], user:SXTUser = None, biscuits:list = None, row_limit:int = 50) -> json:
+    @traced('{self.__class__.__name__}.select')
+    def select(self, sql_text:str = '', columns:list = ['*'], user:SXTUser = None, biscuits:list = None, row_limit:int = 50, 
+               deadline:float = None, cancel_token:SXTCancelToken = None) -> json:
         """--------------------
         Issues a SELECT statement to the Space and Time network, and report back success and rows (or failure details).
 
@@ -472,6 +481,8 @@ class SXTResource():
             user (SXTUser): Authenticated user who will issue the command.  If omitted, will use the default user, resource.user
             biscuits (list): List of biscuits to include with the request, either as string biscuit tokens or as SXTBiscuit objects.  If omitted, will use the class.biscuits list.  
             row_limit (int): Limits the number of rows returned. If set to -1 or None, no row limit is applied. Default 50.
+            deadline (float | SXTDeadline): (optional) Seconds by which the query must complete, including any retries.
+            cancel_token (SXTCancelToken): (optional) Token that can be cancelled from another thread to abort the query.
 
         Returns: 
             bool: Success flag, True if the object was dropped.
@@ -493,12 +504,13 @@ class SXTResource():
             self.logger.warning('No biscuits found. While this may be OK, it can also cause errors.')
         row_limit = '' if row_limit < 0 or not row_limit else f'LIMIT {row_limit}'
         if sql_text == '': sql_text = f"SELECT { ','.join( columns ) } FROM {self.resource_name} {row_limit}"
-        self.logger.info(f'{self.resource_type.name} Query Started: {self.resource_name}:\n{sql_text}')
-        success, results = user.base_api.sql_dql(sql_text=sql_text, biscuits=biscuits, resources=self.resource_name, app_name=self.application_name)
+        self.logger.info('%s Query Started: %s:\n%s', self.resource_type.name, self.resource_name, truncated(sql_text))
+        success, results = user.base_api.sql_dql(sql_text=sql_text, biscuits=biscuits, resources=self.resource_name, app_name=self.application_name, 
+                                                 deadline=deadline, cancel_token=cancel_token)
         if success: 
             self.logger.info(f'{self.resource_type.name} {self.resource_name} Finished: {len(results)} Rows Returned')
         else:
-            self.logger.error(f'{self.resource_type.name} QUERY FAILED with user {user.user_id}:\n{results}\n{sql_text}')
+            self.logger.error('%s QUERY FAILED with user %s:\n%s\n%s', self.resource_type.name, user.user_id, truncated(results), truncated(sql_text))
         self.__lasterr__ = None if success else self.SXTExceptions.SxTQueryError(results) 
         return success, results
 
@@ -811,6 +823,9 @@ class SXTTable(SXTResource):
                 sql_text (str): INSERT statement to submit to the SxT Network.
                 biscuits (list): List of biscuits to authorize the request. Defaults to all biscuits added to the object.
                 user (SXTUser): User who will execute the request. Defaults to the default user.
+                **kwargs: (optional) Call options retry_budget, deadline (seconds or SXTDeadline), cancel_token and priority.  
+                    retry_non_idempotent=True also retries failures after the statement may have been sent, e.g. a read timeout: 
+                    only safe for statements whose repeat is refused as a duplicate key, see call_api.
 
             Returns: 
                 bool: Success flag, True if the data was fully inserted, False if any of the records failed.
@@ -822,14 +837,17 @@ class SXTTable(SXTResource):
             # not true, if table is public_append or public_write
             # if biscuits == []:  raise SxTArgumentError('A biscuit with INSERT permissions must be included.', logger=self.__rc__.logger)
             
-            if log: self.__rc__.logger.info(f'Inserting SQL:\n{sql_text}\n')
-            success, response = user.base_api.sql_dml(sql_text=sql_text, biscuits=biscuits, app_name=self.__rc__.application_name, resources=[self.__rc__.table_name])
-            if log and success:     self.__rc__.logger.info(   f'    Success: {response}')
-            if log and not success: self.__rc__.logger.warning(f'    Failure: {response}')
+            if log: self.__rc__.logger.info('Inserting SQL:\n%s\n', truncated(sql_text))
+            success, response = user.base_api.sql_dml(sql_text=sql_text, biscuits=biscuits, app_name=self.__rc__.application_name, resources=[self.__rc__.table_name],
+                                                      retry_budget=kwargs.get('retry_budget'), deadline=kwargs.get('deadline'), cancel_token=kwargs.get('cancel_token'), 
+                                                      priority=kwargs.get('priority'), retry_non_idempotent=bool(kwargs.get('retry_non_idempotent')))
+            if log and success:     self.__rc__.logger.info(   '    Success: %s', truncated(response))
+            if log and not success: self.__rc__.logger.warning('    Failure: %s', truncated(response))
             if not success: self.__rc__.__lasterr__ = self.__rc__.SXTExceptions.SxTQueryError(response)
             return success, response
         
 
+        @traced('SXTTable.insert.with_list_of_dicts')
         def with_list_of_dicts(self, list_of_dicts:list = [{}], biscuits:list = None, user:SXTUser = None, **kwargs) -> (bool, dict):
             """--------------------
             Turns a list of dictionaries into multiple INSERT statements and submits for insertion to this resource on the Space and Time Network.
@@ -842,39 +860,62 @@ class SXTTable(SXTResource):
                 list_of_dicts (str): List of dictionaries, each representing a row of name/value pairs to insert.
                 biscuits (list): List of biscuits to authorize the request. Defaults to all biscuits added to the object.
                 user (SXTUser): User who will execute the request. Defaults to the default user.
+                **kwargs: (optional) Call options retry_budget, deadline, cancel_token and priority (default BATCH), shared by every row.  Rows not yet 
+                    attempted when the deadline passes or the token is cancelled are counted as errors.  parallel=True (or a 
+                    number of threads) inserts rows concurrently, as many at once as the api concurrency_limiter allows.  
+                    Each single-row INSERT is retried even after a timeout or 5xx (retry_non_idempotent, default True), and a 
+                    'Duplicate key' response to a retry counts as inserted; pass retry_non_idempotent=False for tables without 
+                    a primary key, where a repeated row would not be refused.
 
             Returns: 
                 bool: Success flag, True if the data was fully inserted, False if any of the records failed.
                 dict: Summary of the insert process, including an error log with any failed insert SQL and individual errors.
             """
             err_rtn = []
+            aborted = []
             good = err = 0
             row_count = len(list_of_dicts)
             self.__rc__.logger.info(f'INSERT {row_count} rows into {self.__rc__.resource_name}...')
+            user = self.__rc__.get_first_valid_user(user)
+            retry_budget = kwargs.get('retry_budget') or user.base_api.retry_policy.new_budget() # one budget for the whole bulk operation
+            deadline = SXTDeadline.coerce(kwargs.get('deadline')) # one deadline for the whole bulk operation
+            cancel_token = kwargs.get('cancel_token')
+            workers = bulk_workers(kwargs.get('parallel'), user.base_api, row_count)
+            get_tracer().current_span().set_attributes({'sxt.resource': self.__rc__.resource_name, 'sxt.rows': row_count, 'sxt.workers': workers})
 
-            for row in list_of_dicts:
+            def insert_row(row):
                 cols = list(row.keys())
                 data = [self.__rc__.safe_column_value(r) for r in row.values()]
 
                 sql_text = f"INSERT INTO {self.__rc__.resource_name} ({ ', '.join(cols) }) \n VALUES \n ({ ', '.join(data) })"
-                tries = 0
-                success = False
-                while success == False:
-                    success, result = self.with_sqltext(sql_text=sql_text, biscuits=biscuits, user=user, log=False)
-                    if not success: 
-                        if len(result)>=1 and 'text' in result[0] and 'Duplicate key during INSERT' in result[0]['text']: break # no point in retrying this
-                        time.sleep(2)
-                    if tries >=3: break
-                    tries +=1
-
+                # transient failures, even after sending, are retried by the api retry_policy; 
+                # a duplicate key in response to a retry means the row landed the first time
+                success, result = self.with_sqltext(sql_text=sql_text, biscuits=biscuits, user=user, log=False, retry_budget=retry_budget, 
+                                                    deadline=deadline, cancel_token=cancel_token, priority=kwargs.get('priority'), 
+                                                    retry_non_idempotent=kwargs.get('retry_non_idempotent', True))
+                return success, result, sql_text
+
+            for i, outcome in run_parallel(insert_row, list_of_dicts, workers, deadline, cancel_token):
+                if isinstance(outcome, (SxTTimeoutError, SxTCancelledError)): 
+                    aborted.append(outcome)
+                    continue
+                success, result, sql_text = outcome
                 if success: good +=1
                 else: 
                     err +=1
-                    self.__rc__.logger.warning(f'    Error during insert: {sql_text[:sql_text.find("(")-1]}...')
+                    if err <= log_settings['row_errors']: self.__rc__.logger.warning('    Error during insert: %s...', truncated(sql_text[:sql_text.find("(")-1]))
                     err_rtn.append((result, sql_text))
             
-                self.__rc__.logger.info(f'    {self.__rc__.resource_name} Inserted Row {good+err} of {row_count} ({(good+err)/row_count:.0%}) - Successes: {good}  Erred: {err}')
+                if sample_row(good+err, row_count):
+                    self.__rc__.logger.info('    %s Inserted Row %d of %d (%.0f%%) - Successes: %d  Erred: %d', self.__rc__.resource_name, good+err, row_count, 
+                                            (good+err)/row_count*100, good, err, extra={'sxt': {'resource': self.__rc__.resource_name, 'row': good+err, 'rows': row_count, 'successes': good, 'errors': err}})
+
+            if aborted:
+                self.__rc__.logger.warning(f'    INSERT stopped, {len(aborted)} rows not attempted: {aborted[0]}')
+                err += len(aborted)
+                err_rtn.append((str(aborted[0]), f'{len(aborted)} rows not attempted'))
 
+            if err > log_settings['row_errors']: self.__rc__.logger.warning(f'    {err - log_settings["row_errors"]} more insert errors not logged, see error_list')
             self.__rc__.logger.info(f'INSERT into {self.__rc__.resource_name} complete - Total Rows: {good+err},  Successes: {good},  Erred: {err}')
             if not err==0: self.__rc__.__lasterr__ = self.__rc__.SXTExceptions.SxTQueryError(err_rtn)
             return err==0, {'rows': good+err, 'successes':good, 'errors':err, 'error_list':err_rtn }
@@ -894,6 +935,7 @@ class SXTTable(SXTResource):
                 sql_text (str): UPDATE statement to submit to the SxT Network.
                 biscuits (list): List of biscuits to authorize the request. Defaults to all biscuits added to the object.
                 user (SXTUser): User who will execute the request. Defaults to the default user.
+                **kwargs: (optional) Call options retry_budget, deadline (seconds or SXTDeadline), cancel_token and priority.
 
             Returns: 
                 bool: Success flag, True if the data was fully updated, False if any of the records failed.
@@ -903,15 +945,18 @@ class SXTTable(SXTResource):
             user = self.__rc__.get_first_valid_user(user)
             if not biscuits: biscuits = list(self.__rc__.biscuits) 
             
-            if log: self.__rc__.logger.info(f'Updating SQL:\n{sql_text}\n')
+            if log: self.__rc__.logger.info('Updating SQL:\n%s\n', truncated(sql_text))
             sql_text = self.__rc__.replace_all(sql_text, {'table_name':self.__rc__.resource_name, 'resource_name':self.__rc__.resource_name} )
-            success, response = user.base_api.sql_dml(sql_text=sql_text, biscuits=biscuits, app_name=self.__rc__.application_name, resources=[self.__rc__.table_name])
-            if log and success:     self.__rc__.logger.info(   f'    Success: {response}')
-            if log and not success: self.__rc__.logger.warning(f'    Failure: {response}')
+            success, response = user.base_api.sql_dml(sql_text=sql_text, biscuits=biscuits, app_name=self.__rc__.application_name, resources=[self.__rc__.table_name],
+                                                      retry_budget=kwargs.get('retry_budget'), deadline=kwargs.get('deadline'), cancel_token=kwargs.get('cancel_token'), 
+                                                      priority=kwargs.get('priority'))
+            if log and success:     self.__rc__.logger.info(   '    Success: %s', truncated(response))
+            if log and not success: self.__rc__.logger.warning('    Failure: %s', truncated(response))
             if not success: self.__rc__.__lasterr__ = self.__rc__.SXTExceptions.SxTQueryError(response)
             return success, response
         
 
+        @traced('SXTTable.update.with_list_of_dicts')
         def with_list_of_dicts(self, pk_column:str, list_of_dicts:list = [{}], upsert:bool = False, biscuits:list = None, user:SXTUser = None, **kwargs) -> (bool, dict):
             """--------------------
             Turns a list of dictionaries into multiple UPDATE statements and submits for insertion to this resource on the Space and Time Network.
@@ -929,6 +974,9 @@ class SXTTable(SXTResource):
                 upsert (bool): If true, will insert any missing records instead of warning.
                 biscuits (list): List of biscuits to authorize the request. Defaults to all biscuits added to the object.
                 user (SXTUser): User who will execute the request. Defaults to the default user.
+                **kwargs: (optional) Call options retry_budget, deadline, cancel_token and priority (default BATCH), shared by every row.  Rows not yet 
+                    attempted when the deadline passes or the token is cancelled are counted as errors.  parallel=True (or a 
+                    number of threads) updates rows concurrently, as many at once as the api concurrency_limiter allows.
 
             Returns: 
                 bool: Success flag, True if the data was fully inserted, False if any of the records failed.
@@ -939,56 +987,62 @@ class SXTTable(SXTResource):
             good = err = 0
             row_count = len(list_of_dicts)
             self.__rc__.logger.info(f'UPDATING {row_count} rows into {self.__rc__.resource_name}...')
+            user = self.__rc__.get_first_valid_user(user)
+            kwargs['retry_budget'] = kwargs.get('retry_budget') or user.base_api.retry_policy.new_budget() # one budget for the whole bulk operation
+            kwargs['deadline'] = SXTDeadline.coerce(kwargs.get('deadline')) # one deadline for the whole bulk operation, including upserts
 
-            for row in list_of_dicts:
-                early_error = False
-                insert_row = False
-                cols = [v.lower() for v in row.keys()]
+            workers = bulk_workers(kwargs.get('parallel'), user.base_api, row_count)
+            get_tracer().current_span().set_attributes({'sxt.resource': self.__rc__.resource_name, 'sxt.rows': row_count, 'sxt.workers': workers, 'sxt.upsert': upsert})
+            aborted = []
 
+            def update_row(item):
+                i, row = item
+                cols = [v.lower() for v in row.keys()]
                 if pk_column.lower() not in cols: # PK not in column list
-                    early_error = True
-                    result = f'Row {good+err+1} - Primary Key (PK) column not found in row.'
+                    return False, f'Row {i+1} - Primary Key (PK) column not found in row.', ''
                 elif len(cols) < 2: # ONLY PK in column list (nothing to update)
-                    early_error = True
-                    result = f'Row {good+err+1} - No update-able data found.'
+                    return False, f'Row {i+1} - No update-able data found.', ''
 
                 # build update statement
-                sql_text = ''
-                if not early_error:
-                    data = [f" {n} = {self.__rc__.safe_column_value(v)}" for n,v in row.items() if n.lower() != pk_column.lower() ]
-                    update_where = f'{pk_column} = {self.__rc__.safe_column_value( row[pk_column] )}'
-                    update_set = ' ' + '\n,'.join(data)
-                    sql_text = f"UPDATE {self.__rc__.resource_name} SET \n{update_set}\nWHERE {update_where}"
-                
-                tries = 0
-                success = False
-                while success == False:
-                    if early_error: break
-                    if tries >3: break
-                    success, result = self.with_sqltext(sql_text=sql_text, biscuits=biscuits, user=user, log=False)
-                    if not success: 
-                        time.sleep(2)
-                    tries +=1
-
-                # add to upsert if flagged, and record didn't exist
+                data = [f" {n} = {self.__rc__.safe_column_value(v)}" for n,v in row.items() if n.lower() != pk_column.lower() ]
+                update_where = f'{pk_column} = {self.__rc__.safe_column_value( row[pk_column] )}'
+                update_set = ' ' + '\n,'.join(data)
+                sql_text = f"UPDATE {self.__rc__.resource_name} SET \n{update_set}\nWHERE {update_where}"
+
+                # transient failures are retried by the api retry_policy
+                success, result = self.with_sqltext(sql_text=sql_text, biscuits=biscuits, user=user, log=False, retry_budget=kwargs['retry_budget'], 
+                                                    deadline=kwargs['deadline'], cancel_token=kwargs.get('cancel_token'), priority=kwargs.get('priority'))
+
+                # record didn't exist: None flags the row for upsert
                 if success and len(result) > 0 and result[0] == {'UPDATED': 0}:
-                    if upsert: 
-                        inserts.append(row)
-                        insert_row = True
-                    else:
-                        result = f'Row {good+err+1} - Primary Key (PK) not found in table: {update_where}'
-                        success = False
-
-                if not insert_row:
-                    if success: 
-                        good +=1
-                    else: 
-                        err +=1
-                        self.__rc__.logger.warning(f'    Error during update: {sql_text[:sql_text.find("SET")-1]}...')
-                        err_rtn.append((result, sql_text))
-                
-                    self.__rc__.logger.info(f'    {self.__rc__.resource_name} Updated Row {good+err} of {row_count} ({(good+err)/row_count:.0%}) - Successes: {good}  Erred: {err}')
+                    if upsert: return None, result, sql_text
+                    return False, f'Row {i+1} - Primary Key (PK) not found in table: {update_where}', sql_text
+                return success, result, sql_text
+
+            for i, outcome in run_parallel(update_row, list(enumerate(list_of_dicts)), workers, kwargs['deadline'], kwargs.get('cancel_token')):
+                if isinstance(outcome, (SxTTimeoutError, SxTCancelledError)):
+                    aborted.append(outcome)
+                    continue
+                success, result, sql_text = outcome
+                if success is None: # add to upsert
+                    inserts.append(list_of_dicts[i])
+                    continue
+                if success: 
+                    good +=1
+                else: 
+                    err +=1
+                    if err <= log_settings['row_errors']: self.__rc__.logger.warning('    Error during update: %s...', truncated(sql_text[:sql_text.find("SET")-1]))
+                    err_rtn.append((result, sql_text))
+                if sample_row(good+err+len(inserts), row_count):
+                    self.__rc__.logger.info('    %s Updated Row %d of %d (%.0f%%) - Successes: %d  Erred: %d', self.__rc__.resource_name, good+err, row_count, 
+                                            (good+err)/row_count*100, good, err, extra={'sxt': {'resource': self.__rc__.resource_name, 'row': good+err, 'rows': row_count, 'successes': good, 'errors': err}})
+
+            if aborted:
+                self.__rc__.logger.warning(f'    UPDATE stopped, {len(aborted)} rows not attempted: {aborted[0]}')
+                err += len(aborted)
+                err_rtn.append((str(aborted[0]), f'{len(aborted)} rows not attempted'))
 
+            if err > log_settings['row_errors']: self.__rc__.logger.warning(f'    {err - log_settings["row_errors"]} more update errors not logged, see error_list')
             if upsert:  # send missing rows to insert
                 success, results = self.__rc__.insert.with_list_of_dicts(list_of_dicts = inserts, biscuits = biscuits, user = user, **kwargs)
                 good += results['successes'] 
@@ -1000,7 +1054,9 @@ class SXTTable(SXTResource):
             return err==0, {'rows': good+err, 'successes':good, 'errors':err, 'error_list':err_rtn }
         
 
-    def delete(self, sql_text:str = None, where:str = '0=1', user:SXTUser = None, biscuits:list = None) -> (bool, dict):
+    @traced('SXTTable.delete')
+    def delete(self, sql_text:str = None, where:str = '0=1', user:SXTUser = None, biscuits:list = None, 
+               deadline:float = None, cancel_token:SXTCancelToken = None) -> (bool, dict):
         """--------------------
         Deletes records from the table, with a required WHERE statement.
 
@@ -1011,6 +1067,8 @@ class SXTTable(SXTResource):
             where (str): A WHERE statement to limit rows deleted. This defaults to a zero-delete statement, so must be overridden to execute a meaningful delete. 
             user (SXTUser): User who will execute the request. Defaults to the default user.
             biscuits (list): List of biscuits required to authorize this request. 
+            deadline (float | SXTDeadline): (optional) Seconds by which the request must complete, including any retries.
+            cancel_token (SXTCancelToken): (optional) Token that can be cancelled from another thread to abort the request.
 
         Returns: 
             bool: Success flag, True if the data was fully inserted, False if any of the records failed.
@@ -1022,9 +1080,9 @@ class SXTTable(SXTResource):
             raise SxTArgumentError('A biscuit with DELETE permissions must be included.', logger=self.logger)
         if len(where) >0 and not str(where).strip().startswith('where'): where = f' WHERE {where} '
         if not sql_text: sql_text = f"DELETE FROM {self.table_name} {where}"
-        self.logger.info(f'DELETING: {sql_text}')
-        success, results = user.base_api.sql_dml(sql_text=sql_text, biscuits=biscuits, app_name=self.application_name, resources=[self.table_name])
-        time.sleep(1)
+        self.logger.info('DELETING: %s', truncated(sql_text))
+        success, results = user.base_api.sql_dml(sql_text=sql_text, biscuits=biscuits, app_name=self.application_name, resources=[self.table_name], 
+                                                 deadline=deadline, cancel_token=cancel_token)
         if not success: self.__lasterr__ = self.SXTExceptions.SxTQueryError(results)
         return success, results
 
@@ -0,0 +1,210 @@
+import random, threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import requests
+from urllib3.exceptions import NewConnectionError
+
+
+class SXTRetryBudget():
+    """Retry allowance shared by every API call made for one logical operation, such as one bulk insert."""
+
+    min_retries: int = 10
+    retry_ratio: float = 0.2
+    max_seconds: float = None
+    calls: int = 0
+    retries: int = 0
+    seconds_waited: float = 0.0
+    __lock__: threading.Lock = None
+
+
+    def __init__(self, min_retries:int = None, retry_ratio:float = None, max_seconds:float = None) -> None:
+        """--------------------
+        Creates a new retry budget.  A retry is allowed while retries < min_retries + (retry_ratio * calls),
+        so a budget scales with the size of the operation, but a failing gateway cannot turn one operation into
+        an unbounded retry storm.
+
+        Args:
+            min_retries (int): (optional) Retries always available, regardless of calls made.
+            retry_ratio (float): (optional) Additional retries earned per call made, e.g. 0.2 = one retry per 5 calls.
+            max_seconds (float): (optional) Maximum total time to spend sleeping between retries.  None for no limit.
+        """
+        if min_retries is not None: self.min_retries = min_retries
+        if retry_ratio is not None: self.retry_ratio = retry_ratio
+        if max_seconds is not None: self.max_seconds = max_seconds
+        self.calls = 0
+        self.retries = 0
+        self.seconds_waited = 0.0
+        self.__lock__ = threading.Lock()
+
+    def __str__(self) -> str:
+        return f'SXTRetryBudget(calls={self.calls}, retries={self.retries}, seconds_waited={self.seconds_waited:.2f})'
+
+    @property
+    def exhausted(self) -> bool:
+        """True if no further retries would be allowed."""
+        return self.retries >= self.min_retries + (self.retry_ratio * self.calls) or \
+               (self.max_seconds is not None and self.seconds_waited >= self.max_seconds)
+
+    def record_call(self) -> None:
+        """Records a (first attempt) call made as part of this operation."""
+        with self.__lock__:
+            self.calls += 1
+
+    def try_spend(self, delay:float) -> bool:
+        """Consumes one retry (plus delay seconds) from the budget if available.  Returns False if the budget is exhausted."""
+        with self.__lock__:
+            if self.exhausted: return False
+            if self.max_seconds is not None and self.seconds_waited + delay > self.max_seconds: return False
+            self.retries += 1
+            self.seconds_waited += delay
+            return True
+
+
+
+
+class SXTRetryPolicy():
+    """Central retry policy used by SXTBaseAPI.call_api: exponential backoff with jitter, Retry-After, and retryable / fatal classification."""
+
+    max_attempts: int = 4
+    backoff_base: float = 0.25
+    backoff_max: float = 10.0
+    jitter: bool = True
+    respect_retry_after: bool = True
+    max_retry_after: float = 60.0
+    retry_status_codes: tuple = (408, 425, 429, 500, 502, 503, 504)
+    retry_non_idempotent: bool = False
+    unprocessed_status_codes: tuple = (408, 425, 429)
+    fatal_texts: tuple = ('Duplicate key',)
+    applied_texts: tuple = ('Duplicate key',)
+    retryable_exceptions: tuple = (requests.exceptions.ConnectionError, requests.exceptions.Timeout, ConnectionError, TimeoutError)
+    __random__: random.Random = None
+    __seed__: int = None
+
+
+    def __init__(self, max_attempts:int = None, backoff_base:float = None, backoff_max:float = None,
+                 jitter:bool = None, respect_retry_after:bool = None, max_retry_after:float = None,
+                 retry_status_codes:tuple = None, fatal_texts:tuple = None, retry_non_idempotent:bool = None, seed:int = None) -> None:
+        """--------------------
+        Creates a new retry policy.
+
+        Args:
+            max_attempts (int): (optional) Total attempts per call, including the first.  1 disables retries.
+            backoff_base (float): (optional) Seconds of backoff before the first retry, doubled for every retry after.
+            backoff_max (float): (optional) Upper limit, in seconds, of any single backoff.
+            jitter (bool): (optional) If True, use "full jitter": a random delay between 0 and the computed backoff.
+            respect_retry_after (bool): (optional) If True, wait at least as long as a server supplied Retry-After header.
+            max_retry_after (float): (optional) Upper limit, in seconds, honored from Retry-After.  Longer requests are treated as fatal.
+            retry_status_codes (tuple): (optional) HTTP status codes that are considered transient.
+            fatal_texts (tuple): (optional) Response text fragments that are never worth retrying (e.g. 'Duplicate key').
+            retry_non_idempotent (bool): (optional) If True, retry non-idempotent calls (e.g. sql/dml) like any other.  By default they
+                are only retried when the request cannot have been processed: see is_unprocessed().
+            seed (int): (optional) Seed for the jitter random generator, for reproducible runs.
+        """
+        if max_attempts is not None: self.max_attempts = max(1, int(max_attempts))
+        if backoff_base is not None: self.backoff_base = backoff_base
+        if backoff_max is not None: self.backoff_max = backoff_max
+        if jitter is not None: self.jitter = jitter
+        if respect_retry_after is not None: self.respect_retry_after = respect_retry_after
+        if max_retry_after is not None: self.max_retry_after = max_retry_after
+        if retry_status_codes is not None: self.retry_status_codes = tuple(retry_status_codes)
+        if fatal_texts is not None: self.fatal_texts = tuple(fatal_texts)
+        if retry_non_idempotent is not None: self.retry_non_idempotent = retry_non_idempotent
+        self.__seed__ = seed
+        self.__random__ = random.Random(seed)
+
+
+    def after_fork(self) -> None:
+        """Called in a forked child: reseeds the jitter generator (unless seeded explicitly), so workers do not back off in lockstep."""
+        if self.__seed__ is None: self.__random__ = random.Random()
+
+
+    def new_budget(self, min_retries:int = None, retry_ratio:float = None, max_seconds:float = None) -> SXTRetryBudget:
+        """Returns a new SXTRetryBudget, to be shared by all calls of one logical operation."""
+        return SXTRetryBudget(min_retries=min_retries, retry_ratio=retry_ratio, max_seconds=max_seconds)
+
+
+    def is_retryable(self, status_code:int = None, text:str = '', exception:Exception = None) -> bool:
+        """--------------------
+        Classifies a failed call as retryable (transient) or fatal.
+
+        Args:
+            status_code (int): HTTP status code, if a response was received.
+            text (str): Response text, if any.
+            exception (Exception): Exception raised by the call, if any.
+
+        Returns:
+            bool: True if the call may succeed if tried again.
+        """
+        if text and any(fatal in str(text) for fatal in self.fatal_texts): return False
+        if status_code in self.retry_status_codes: return True
+        return isinstance(exception, self.retryable_exceptions)
+
+
+    def is_unprocessed(self, status_code:int = None, exception:Exception = None) -> bool:
+        """True if a failed call cannot have been processed by the server, so is safe to repeat even if not idempotent: 
+        the connection was never established, or the status is one of unprocessed_status_codes (e.g. 429)."""
+        if status_code in self.unprocessed_status_codes: return True
+        if exception is None or isinstance(exception, requests.exceptions.HTTPError): return False
+        if isinstance(exception, requests.exceptions.ConnectTimeout): return True
+        reason = getattr(exception.args[0], 'reason', None) if exception.args else None # urllib3 MaxRetryError
+        return isinstance(exception, requests.exceptions.ConnectionError) and isinstance(reason, NewConnectionError)
+
+
+    def already_applied(self, attempt:int, text:str = '') -> bool:
+        """True if a retry of a non-idempotent call failed only because an earlier attempt was applied, 
+        e.g. 'Duplicate key' in response to a retried single INSERT whose first response was lost."""
+        return attempt > 1 and bool(text) and any(applied in str(text) for applied in self.applied_texts)
+
+
+    def backoff(self, attempt:int) -> float:
+        """Returns the backoff delay in seconds before retry number {attempt} (1-based), with jitter if enabled."""
+        delay = min(self.backoff_max, self.backoff_base * (2 ** max(0, attempt-1)))
+        if self.jitter: delay = self.__random__.uniform(0, delay)
+        return delay
+
+
+    def parse_retry_after(self, value:str) -> float:
+        """Parses a Retry-After header (delta-seconds or HTTP-date) into seconds, or None if missing / unparseable."""
+        if value is None or str(value).strip() == '': return None
+        value = str(value).strip()
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            when = parsedate_to_datetime(value)
+            if when.tzinfo is None: when = when.replace(tzinfo=timezone.utc)
+            return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+        except (TypeError, ValueError):
+            return None
+
+
+    def retry_delay(self, attempt:int, status_code:int = None, text:str = '', exception:Exception = None,
+                    retry_after:str = None, budget:SXTRetryBudget = None, idempotent:bool = True) -> float:
+        """--------------------
+        Decides whether a failed attempt should be retried, and if so, how long to wait first.
+
+        Args:
+            attempt (int): The attempt number that just failed (1-based).
+            status_code (int): HTTP status code of the failed attempt, if any.
+            text (str): Response text of the failed attempt, if any.
+            exception (Exception): Exception raised by the failed attempt, if any.
+            retry_after (str): Value of the Retry-After response header, if any.
+            budget (SXTRetryBudget): (optional) Operation-wide budget to draw the retry from.
+            idempotent (bool): (optional) False if the call is not safe to repeat, e.g. DML, in which case it is only retried 
+                if retry_non_idempotent is set, or the server cannot have processed it (see is_unprocessed).
+
+        Returns:
+            float: Seconds to wait before retrying, or None if the call should not be retried.
+        """
+        if attempt >= self.max_attempts: return None
+        if not self.is_retryable(status_code, text, exception): return None
+        if not (idempotent or self.retry_non_idempotent or self.is_unprocessed(status_code, exception)): return None
+        delay = self.backoff(attempt)
+        if self.respect_retry_after:
+            server_delay = self.parse_retry_after(retry_after)
+            if server_delay is not None:
+                if server_delay > self.max_retry_after: return None
+                delay = max(delay, server_delay)
+        if budget is not None and not budget.try_spend(delay): return None
+        return delay
@@ -0,0 +1,127 @@
+import itertools, time
+from collections import deque
+from .sxtenums import SXTPriority
+
+
+class SXTScheduler():
+    """Order in which callers waiting for a concurrency permit are let through, see SXTConcurrencyLimiter.
+
+    Waiting calls are served by priority class first (INTERACTIVE, then BATCH, then MAINTENANCE), so
+    latency-sensitive reads go ahead of queued bulk writes.  Within a class, apps (the originApp header, i.e.
+    application_name) share permits in proportion to their weights, using virtual-time weighted fair queueing,
+    so one app's bulk load cannot crowd out another's.  A call waiting longer than aging seconds is treated as
+    one class higher, so lower classes are never starved.  Callers only queue when the limiter is at its limit.
+
+    Not thread-safe on its own: the limiter calls it while holding its lock."""
+
+    ranks: dict = {SXTPriority.INTERACTIVE: 0, SXTPriority.BATCH: 1, SXTPriority.MAINTENANCE: 2}
+    weights: dict = None
+    default_weight: float = 1.0
+    aging: float = 30.0
+    __queues__: dict = None
+    __vtime__: dict = None
+    __clock__: float = 0.0
+    __seq__: itertools.count = None
+    __granted__: dict = None
+
+
+    def __init__(self, weights:dict = None, default_weight:float = None, aging:float = None) -> None:
+        """--------------------
+        Creates a new scheduler.
+
+        Args:
+            weights (dict): (optional) Share of permits per app name, e.g. {'dashboard': 4, 'nightly-load': 1}.
+            default_weight (float): (optional) Weight of apps not in weights, including calls without an app.  Default 1.
+            aging (float): (optional) Seconds of waiting after which a call is promoted one class.  None to never promote.  Default 30.
+        """
+        self.weights = dict(weights or {})
+        if default_weight is not None: self.default_weight = default_weight
+        if aging is not None: self.aging = aging
+        self.__queues__ = {} # (app, priority) -> deque of tickets, oldest first
+        self.__vtime__ = {}
+        self.__clock__ = 0.0
+        self.__seq__ = itertools.count()
+        self.__granted__ = {}
+
+    def __str__(self) -> str:
+        return f'SXTScheduler(pending={self.pending}, weights={self.weights})'
+
+
+    @property
+    def pending(self) -> int:
+        """Number of calls currently waiting."""
+        return sum(len(queue) for queue in self.__queues__.values())
+
+
+    def weight(self, app:str) -> float:
+        """Share of permits for an app."""
+        return max(1e-6, float(self.weights.get(app, self.default_weight)))
+
+
+    def enqueue(self, priority:SXTPriority = None, app:str = None) -> list:
+        """--------------------
+        Adds a waiting call.
+
+        Args:
+            priority (SXTPriority): (optional) Priority class of the call.  Default BATCH.
+            app (str): (optional) App the call is made for (originApp).
+
+        Returns:
+            list: Ticket for the call, passed back to head(), grant() and cancel().
+        """
+        priority = SXTPriority(priority) if priority is not None else SXTPriority.BATCH
+        if not any(key[0] == app for key in self.__queues__): # newly active, so no credit for time spent idle
+            self.__vtime__[app] = max(self.__vtime__.get(app, 0.0), self.__clock__)
+        ticket = [app, priority, time.monotonic(), next(self.__seq__)]
+        self.__queues__.setdefault((app, priority), deque()).append(ticket)
+        return ticket
+
+
+    def head(self) -> list:
+        """Returns the ticket of the call that should go next, or None if none are waiting."""
+        best = None
+        now = time.monotonic()
+        for queue in self.__queues__.values():
+            app, priority, enqueued, seq = queue[0]
+            rank = self.ranks[priority]
+            if self.aging: rank = max(0, rank - int((now - enqueued) / self.aging))
+            key = (rank, self.__vtime__.get(app, 0.0), seq)
+            if best is None or key < best[0]: best = (key, queue[0])
+        return None if best is None else best[1]
+
+
+    def grant(self, ticket:list) -> None:
+        """Removes a ticket that has been given its permit, charging its app one call's worth of virtual time."""
+        app = ticket[0]
+        self.__remove__(ticket)
+        self.__clock__ = max(self.__clock__, self.__vtime__.get(app, 0.0))
+        self.__vtime__[app] = self.__vtime__.get(app, 0.0) + 1.0 / self.weight(app)
+        self.__granted__[app] = self.__granted__.get(app, 0) + 1
+
+
+    def cancel(self, ticket:list) -> None:
+        """Removes a ticket whose call stopped waiting (deadline or cancellation).  Does nothing if it was already granted."""
+        self.__remove__(ticket)
+
+
+    def __remove__(self, ticket:list) -> None:
+        key = (ticket[0], ticket[1])
+        queue = self.__queues__.get(key)
+        if queue is None: return None
+        try:
+            queue.remove(ticket)
+        except ValueError:
+            pass
+        if not queue: del self.__queues__[key]
+
+
+    def after_fork(self) -> None:
+        """Called in a forked child: drops tickets of the parent's waiting threads.  Weights and virtual times are kept."""
+        self.__queues__ = {}
+
+
+    def metrics(self) -> dict:
+        """Returns waiting calls per priority class, and permits granted after waiting per app."""
+        waiting = {str(p.value): 0 for p in self.ranks}
+        for (app, priority), queue in self.__queues__.items(): waiting[str(priority.value)] += len(queue)
+        return {'waiting': waiting, 'granted': dict(self.__granted__)}
@@ -0,0 +1,157 @@
+import asyncio, threading
+from .sxtcancellation import SXTDeadline, SXTCancelToken, check_abort
+
+
+class SXTFlight():
+    """One in-flight call, and the result shared with every caller that joined it."""
+
+    event: threading.Event = None
+    result: object = None
+    error: BaseException = None
+    followers: int = 0
+
+    def __init__(self) -> None:
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.followers = 0
+
+
+
+
+class SXTSingleFlight():
+    """Coalesces concurrent identical calls: while one call is in flight, later callers with the same key
+    wait for its result instead of issuing their own."""
+
+    leaders: int = 0
+    followers: int = 0
+    poll_interval: float = 0.05
+    __flights__: dict = None
+    __async_flights__: dict = None
+    __lock__: threading.Lock = None
+
+
+    def __init__(self) -> None:
+        self.leaders = 0
+        self.followers = 0
+        self.__flights__ = {}
+        self.__async_flights__ = {}
+        self.__lock__ = threading.Lock()
+
+    def __str__(self) -> str:
+        return f'SXTSingleFlight(in_flight={self.in_flight}, leaders={self.leaders}, followers={self.followers})'
+
+    def after_fork(self) -> None:
+        """Called in a forked child: drops flights led by the parent's threads, which will never complete here."""
+        self.__flights__ = {}
+        self.__async_flights__ = {}
+        self.__lock__ = threading.Lock()
+
+    @property
+    def in_flight(self) -> int:
+        """Number of distinct calls currently in flight."""
+        return len(self.__flights__) + len(self.__async_flights__)
+
+
+    def do(self, key, func, deadline:SXTDeadline = None, cancel_token:SXTCancelToken = None) -> tuple:
+        """--------------------
+        Runs func, unless a call with the same key is already in flight, in which case waits for and returns that call's result.
+
+        Args:
+            key (hashable): Identifies identical calls.
+            func (function): No-argument function that performs the call.
+            deadline (SXTDeadline): (optional) Limits how long a follower waits.  Raises SxTTimeoutError when reached.
+            cancel_token (SXTCancelToken): (optional) Stops a follower waiting.  Raises SxTCancelledError when cancelled.
+
+        Returns:
+            object: Result of func (the same object for every caller of the flight).
+            bool: True if the result was shared from another caller's call, False if this caller ran func.
+        """
+        with self.__lock__:
+            flight = self.__flights__.get(key)
+            leader = flight is None
+            if leader:
+                flight = SXTFlight()
+                self.__flights__[key] = flight
+                self.leaders += 1
+            else:
+                flight.followers += 1
+                self.followers += 1
+
+        if leader:
+            try:
+                flight.result = func()
+                return flight.result, False
+            except BaseException as ex:
+                flight.error = ex
+                raise
+            finally:
+                with self.__lock__:
+                    self.__flights__.pop(key, None)
+                flight.event.set()
+
+        if deadline is None and cancel_token is None:
+            flight.event.wait()
+        else:
+            while not flight.event.wait(self.poll_interval):
+                check_abort(deadline, cancel_token)
+        if flight.error is not None: raise flight.error
+        return flight.result, True
+
+
+    async def do_async(self, key, func, deadline:SXTDeadline = None, cancel_token:SXTCancelToken = None) -> tuple:
+        """--------------------
+        Async version of do: awaits func, unless a call with the same key is already in flight on this event loop, 
+        in which case waits for and returns that call's result.  If the leading task is cancelled, a follower runs func itself.
+
+        Args:
+            key (hashable): Identifies identical calls.
+            func (function): No-argument coroutine function that performs the call.
+            deadline (SXTDeadline): (optional) Limits how long a follower waits.  Raises SxTTimeoutError when reached.
+            cancel_token (SXTCancelToken): (optional) Stops a follower waiting.  Raises SxTCancelledError when cancelled.
+
+        Returns:
+            object: Result of func (the same object for every caller of the flight).
+            bool: True if the result was shared from another caller's call, False if this caller ran func.
+        """
+        loop = asyncio.get_running_loop()
+        key = (id(loop), key) # futures belong to one loop
+        with self.__lock__:
+            flight = self.__async_flights__.get(key)
+            leader = flight is None
+            if leader:
+                flight = loop.create_future()
+                self.__async_flights__[key] = flight
+                self.leaders += 1
+            else:
+                self.followers += 1
+
+        if leader:
+            try:
+                result = await func()
+                flight.set_result(result)
+                return result, False
+            except asyncio.CancelledError:
+                flight.cancel()
+                raise
+            except BaseException as ex:
+                flight.set_exception(ex)
+                flight.exception() # retrieved, whether or not anyone followed
+                raise
+            finally:
+                with self.__lock__:
+                    self.__async_flights__.pop(key, None)
+
+        stop = loop.create_future()
+        stopper = lambda: loop.call_soon_threadsafe(lambda: stop.done() or stop.set_result(None))
+        if cancel_token is not None: cancel_token.add_callback(stopper)
+        try:
+            while not flight.done():
+                check_abort(deadline, cancel_token)
+                await asyncio.wait({flight, stop}, timeout = deadline.remaining() if deadline is not None else None, 
+                                   return_when = asyncio.FIRST_COMPLETED)
+        finally:
+            if cancel_token is not None: cancel_token.remove_callback(stopper)
+            stop.cancel()
+        if flight.cancelled(): return await func(), False
+        return flight.result(), True
@@ -0,0 +1,189 @@
+import json, codecs
+from .sxtcancellation import SXTDeadline, SXTCancelToken, check_abort
+
+
+class SXTRowStream():
+    """Iterator over the rows of a JSON array response, parsed incrementally as the body arrives.
+    Memory held is proportional to one network chunk plus one batch, rather than the whole result."""
+
+    response: object = None
+    chunk_size: int = 65536
+    deadline: SXTDeadline = None
+    cancel_token: SXTCancelToken = None
+    rows_read: int = 0
+    bytes_read: int = 0
+    __iterator__: object = None
+
+
+    def __init__(self, response, chunk_size:int = None, deadline:SXTDeadline = None, cancel_token:SXTCancelToken = None) -> None:
+        """--------------------
+        Wraps a streamed (not yet read) HTTP response whose body is a JSON array.
+
+        Args:
+            response (requests.Response): Response opened with stream=True.  Closed when the stream is exhausted or closed.
+            chunk_size (int): (optional) Bytes to read from the network at a time.
+            deadline (SXTDeadline): (optional) Deadline checked between chunks.
+            cancel_token (SXTCancelToken): (optional) Token checked between chunks.
+        """
+        self.response = response
+        if chunk_size: self.chunk_size = chunk_size
+        self.deadline = deadline
+        self.cancel_token = cancel_token
+        self.rows_read = 0
+        self.bytes_read = 0
+        self.__iterator__ = None
+
+    def __str__(self) -> str:
+        return f'SXTRowStream(rows_read={self.rows_read}, bytes_read={self.bytes_read})'
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.__iterator__ is None: self.__iterator__ = self.__rows__()
+        return next(self.__iterator__)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Stops the stream and releases the underlying connection.  Safe to call more than once."""
+        if self.__iterator__ is not None: self.__iterator__.close()
+        if self.response is not None and hasattr(self.response, 'close'): self.response.close()
+
+
+    def batches(self, batch_size:int = 1000):
+        """--------------------
+        Yields the remaining rows as lists of up to batch_size rows.
+
+        Args:
+            batch_size (int): Maximum rows per batch.
+
+        Returns:
+            iterator: Lists of rows.
+        """
+        return batched(self, batch_size)
+
+
+    def __chunks__(self):
+        for chunk in self.response.iter_content(chunk_size=self.chunk_size):
+            check_abort(self.deadline, self.cancel_token)
+            self.bytes_read += len(chunk)
+            yield chunk
+
+
+    def __rows__(self):
+        try:
+            for row in parse_json_array(self.__chunks__()):
+                self.rows_read += 1
+                yield row
+        finally:
+            self.response.close()
+
+
+
+
+def batched(rows, batch_size:int = 1000):
+    """Yields lists of up to batch_size items from any iterable of rows."""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch: yield batch
+
+
+def parse_json_array(chunks):
+    """--------------------
+    Incrementally parses an iterable of bytes chunks holding one JSON array, yielding each element as soon as it is complete.
+    If the body turns out not to be an array (e.g. a single JSON object), it is parsed whole and yielded as one element.
+
+    Args:
+        chunks (iterable): bytes chunks, in order.
+
+    Yields:
+        object: Each element of the array.
+    """
+    parser = SXTJsonArrayParser()
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    yield from parser.feed(b'', eof=True)
+
+
+
+
+class SXTJsonArrayParser():
+    """Push parser for one JSON array arriving in bytes chunks: each feed() returns the elements completed by that chunk.
+    Used by parse_json_array, and directly where chunks are awaited rather than iterated (e.g. the async row stream)."""
+
+    whitespace: str = ' \t\n\r'
+    started: bool = False
+    finished: bool = False
+    __decoder__: json.JSONDecoder = None
+    __utf8__: codecs.IncrementalDecoder = None
+    __buffer__: str = ''
+    __whole__: list = None
+
+
+    def __init__(self) -> None:
+        self.started = self.finished = False
+        self.__decoder__ = json.JSONDecoder()
+        self.__utf8__ = codecs.getincrementaldecoder('utf-8')()
+        self.__buffer__ = ''
+        self.__whole__ = None
+
+
+    def feed(self, chunk:bytes, eof:bool = False) -> list:
+        """--------------------
+        Adds the next chunk of the body, and returns the array elements it completes.
+        If the body turns out not to be an array (e.g. a single JSON object), it is parsed whole at eof and returned as one element.
+
+        Args:
+            chunk (bytes): Next bytes of the body (b'' is fine at eof).
+            eof (bool): (optional) True once the body has ended.
+
+        Returns:
+            list: Elements completed by this chunk, in order.
+        """
+        if self.finished: return []
+        text = self.__utf8__.decode(chunk, final=eof)
+        if self.__whole__ is not None:  # not an array: nothing to stream, parse whole
+            self.__whole__.append(text)
+            return [json.loads(''.join(self.__whole__))] if eof else []
+        buffer = self.__buffer__ + text
+        elements = []
+
+        if not self.started:
+            stripped = buffer.lstrip(self.whitespace)
+            if stripped == '' and not eof: 
+                self.__buffer__ = buffer
+                return elements
+            if not stripped.startswith('['):
+                self.__whole__ = [buffer]
+                return [json.loads(buffer)] if eof else elements
+            buffer = stripped[1:]
+            self.started = True
+
+        pos = 0
+        while True:
+            while pos < len(buffer) and buffer[pos] in self.whitespace + ',': pos += 1
+            if pos < len(buffer) and buffer[pos] == ']':
+                self.finished = True
+                break
+            try:
+                element, end = self.__decoder__.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof: raise
+                break # incomplete element, wait for more data
+            if end >= len(buffer) and not eof: break # a number may continue in the next chunk
+            elements.append(element)
+            pos = end
+        self.__buffer__ = buffer[pos:]
+
+        if eof and not self.finished:
+            raise json.JSONDecodeError('Unterminated JSON array', buffer, pos)
+        return elements
@@ -0,0 +1,413 @@
+import contextlib, contextvars, functools, inspect, logging, random, re, time
+try:
+    from opentelemetry import trace as otel_trace, propagate as otel_propagate
+    from opentelemetry.trace import SpanKind as OtelSpanKind, Status as OtelStatus, StatusCode as OtelStatusCode
+except ImportError: # optional dependency, see pyproject [otel] extra
+    otel_trace = None
+from .sxtlogging import get_logger
+
+
+TRACEPARENT = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+__current_span__ = contextvars.ContextVar('sxt_current_span', default=None)
+
+
+class SXTNoopSpan():
+    """Span returned while tracing is off: accepts everything, records nothing, adds no headers."""
+    recording = False
+    traceparent = None
+    name = trace_id = span_id = parent_id = None
+
+    def set_attribute(self, key:str, value) -> None: pass
+    def set_attributes(self, attributes:dict) -> None: pass
+    def add_event(self, name:str, **attributes) -> None: pass
+    def record_exception(self, ex:Exception) -> None: pass
+    def set_error(self, description:str = None) -> None: pass
+    def end(self) -> None: pass
+
+    def __str__(self) -> str:
+        return 'SXTNoopSpan()'
+
+NOOP_SPAN = SXTNoopSpan()
+
+
+
+
+class SXTSpan():
+    """One timed operation in a trace, e.g. a facade call, a bulk operation, an API call or one HTTP request.
+
+    Spans nest: each has the trace_id of its root and the span_id of its parent.  Attributes follow OpenTelemetry
+    naming where there is one (http.request.method, url.full, http.response.status_code) and sxt.* otherwise.
+    When ended, the span is passed to its tracer's exporters."""
+
+    __slots__ = ('name', 'kind', 'trace_id', 'span_id', 'parent_id', 'attributes', 'events', 'error', 'start_time', 'end_time', 'tracer', 'started')
+
+    def __init__(self, tracer:'SXTTracer', name:str, kind:str = 'internal', trace_id:str = None, parent_id:str = None, attributes:dict = None) -> None:
+        self.tracer = tracer
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id or f'{random.getrandbits(128):032x}'
+        self.span_id = f'{random.getrandbits(64):016x}'
+        self.parent_id = parent_id
+        self.attributes = {k: v for k, v in (attributes or {}).items() if v is not None}
+        self.events = []
+        self.error = None
+        self.start_time = time.time()
+        self.end_time = None
+        self.started = time.monotonic()
+
+    def __str__(self) -> str:
+        duration = f'{self.duration*1000:.1f}ms' if self.duration is not None else 'open'
+        return f'SXTSpan({self.name}, trace={self.trace_id}, span={self.span_id}, parent={self.parent_id}, {duration}{", error" if self.error else ""})'
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+
+    @property
+    def recording(self) -> bool:
+        """True until the span is ended."""
+        return self.end_time is None
+
+    @property
+    def traceparent(self) -> str:
+        """W3C trace-context header value identifying this span, sent to the gateway on HTTP requests."""
+        return f'00-{self.trace_id}-{self.span_id}-01'
+
+    @property
+    def duration(self) -> float:
+        """Seconds from start to end, or None while the span is open."""
+        return None if self.end_time is None else self.end_time - self.start_time
+
+
+    def set_attribute(self, key:str, value) -> None:
+        """Sets one attribute; None values are skipped."""
+        if value is not None: self.attributes[key] = value
+
+    def set_attributes(self, attributes:dict) -> None:
+        """Sets several attributes; None values are skipped."""
+        for key, value in attributes.items(): self.set_attribute(key, value)
+
+    def add_event(self, name:str, **attributes) -> None:
+        """Records a point-in-time event within the span, e.g. a retry being scheduled."""
+        self.events.append((name, time.time(), attributes))
+
+    def record_exception(self, ex:Exception) -> None:
+        """Records an exception as an event, and marks the span as failed."""
+        self.add_event('exception', **{'exception.type': type(ex).__name__, 'exception.message': str(ex)})
+        self.set_error(str(ex))
+
+    def set_error(self, description:str = None) -> None:
+        """Marks the span as failed."""
+        self.error = description or 'error'
+
+    def end(self) -> None:
+        """Ends the span and exports it.  Later calls have no effect."""
+        if self.end_time is not None: return None
+        self.end_time = self.start_time + (time.monotonic() - self.started)
+        self.tracer.export(self)
+
+
+    def as_dict(self) -> dict:
+        """Returns the span's fields as a dict, e.g. for structured logs."""
+        return {'name': self.name, 'kind': self.kind, 'trace_id': self.trace_id, 'span_id': self.span_id, 'parent_id': self.parent_id,
+                'start_time': self.start_time, 'end_time': self.end_time, 'duration': self.duration, 'error': self.error,
+                'attributes': dict(self.attributes), 'events': list(self.events)}
+
+
+
+
+class SXTTracer():
+    """Dependency-free tracer for SDK operations.
+
+    Spans are opened for SpaceAndTime facade calls, SXTResource operations (including each row of bulk inserts
+    and updates), authentication and token refresh, each call_api call, each HTTP attempt, and each retry backoff.
+    The current span follows contextvars, so nesting is kept across asyncio tasks and bulk worker threads, and
+    every HTTP request carries a W3C traceparent header so gateway-side work joins the same trace.
+
+    Tracing is off (no spans, no headers, next to no overhead) until an exporter is added; exporters are called
+    with each SXTSpan as it ends.  To report spans to OpenTelemetry instead, see use_opentelemetry().
+
+        >>> get_tracer().add_exporter(lambda span: print(span))"""
+
+    logger: logging.Logger = None
+    __exporters__: tuple = ()
+
+
+    def __init__(self, logger:logging.Logger = None) -> None:
+        self.logger = get_logger('tracing', logger)
+        self.__exporters__ = ()
+
+    def __str__(self) -> str:
+        return f'{type(self).__name__}(active={self.active}, exporters={len(self.__exporters__)})'
+
+
+    @property
+    def active(self) -> bool:
+        """True if spans are being recorded."""
+        return bool(self.__exporters__)
+
+
+    def add_exporter(self, func = None):
+        """--------------------
+        Subscribes a function to receive each span as it ends.  Usable as a decorator.
+
+        Args:
+            func (function): Function of one SXTSpan.  Exceptions it raises are logged and ignored.
+
+        Returns:
+            function: func, unchanged.
+        """
+        if func is None: return lambda f: self.add_exporter(f)
+        self.__exporters__ = self.__exporters__ + (func,) # copy-on-write, exported without a lock
+        return func
+
+    def remove_exporter(self, func) -> None:
+        """Unsubscribes a function added with add_exporter()."""
+        self.__exporters__ = tuple(f for f in self.__exporters__ if f is not func)
+
+    def clear(self) -> None:
+        """Unsubscribes every exporter, turning tracing off."""
+        self.__exporters__ = ()
+
+
+    def export(self, span:SXTSpan) -> None:
+        """Passes an ended span to every exporter."""
+        for func in self.__exporters__:
+            try:
+                func(span)
+            except Exception as ex:
+                self.logger.warning(f'Span exporter {getattr(func, "__name__", func)} failed: {ex}')
+
+
+    def current_span(self):
+        """The span open in this context (thread, or asyncio task), or a no-op span."""
+        span = __current_span__.get()
+        return span if span is not None else NOOP_SPAN
+
+
+    def start_span(self, name:str, kind:str = 'internal', parent = None, attributes:dict = None):
+        """--------------------
+        Starts a span without making it current; call end() on it when done.
+
+        Args:
+            name (str): Span name, low cardinality, e.g. 'POST sql/dql'.
+            kind (str): (optional) 'internal' or 'client'.  Default 'internal'.
+            parent (SXTSpan | str): (optional) Parent span, or an incoming traceparent header value.  Defaults to the current span.
+            attributes (dict): (optional) Initial attributes.
+
+        Returns:
+            SXTSpan: The new span, or a no-op span if tracing is off.
+        """
+        if not self.active: return NOOP_SPAN
+        if parent is None: parent = __current_span__.get()
+        trace_id = parent_id = None
+        if isinstance(parent, str):
+            match = TRACEPARENT.match(parent.strip().lower())
+            if match: trace_id, parent_id = match.group(1), match.group(2)
+        elif parent is not None and parent.recording:
+            trace_id, parent_id = parent.trace_id, parent.span_id
+        return SXTSpan(self, name, kind, trace_id, parent_id, attributes)
+
+
+    @contextlib.contextmanager
+    def span(self, name:str, kind:str = 'internal', parent = None, attributes:dict = None):
+        """--------------------
+        Context manager that opens a span, makes it current for its duration, records any exception raised
+        within it, and ends it.  Arguments as for start_span().
+
+            >>> with get_tracer().span('load blocks', attributes={'rows': 1000}) as span: ...
+        """
+        span = self.start_span(name, kind, parent, attributes)
+        if not span.recording:
+            yield span
+            return None
+        token = __current_span__.set(span)
+        try:
+            yield span
+        except BaseException as ex:
+            span.record_exception(ex)
+            raise
+        finally:
+            __current_span__.reset(token)
+            span.end()
+
+
+    def inject(self, headers:dict, span = None) -> dict:
+        """Returns headers plus the trace-context header for span (default the current span), or headers unchanged if not tracing."""
+        span = span if span is not None else self.current_span()
+        if not span.recording: return headers
+        return dict(headers, traceparent=span.traceparent)
+
+
+
+
+class SXTOpenTelemetrySpan():
+    """Wraps an OpenTelemetry span in the SXTSpan interface."""
+
+    __slots__ = ('span', 'ended')
+
+    def __init__(self, span) -> None:
+        self.span = span
+        self.ended = False
+
+    def __str__(self) -> str:
+        return f'SXTOpenTelemetrySpan({self.span})'
+
+    @property
+    def recording(self) -> bool:
+        return not self.ended and self.span.is_recording()
+
+    @property
+    def traceparent(self) -> str:
+        context = self.span.get_span_context()
+        return f'00-{context.trace_id:032x}-{context.span_id:016x}-{int(context.trace_flags):02x}'
+
+    def set_attribute(self, key:str, value) -> None:
+        if value is not None: self.span.set_attribute(key, value if isinstance(value, (str, bool, int, float)) else str(value))
+
+    def set_attributes(self, attributes:dict) -> None:
+        for key, value in attributes.items(): self.set_attribute(key, value)
+
+    def add_event(self, name:str, **attributes) -> None:
+        self.span.add_event(name, {k: v if isinstance(v, (str, bool, int, float)) else str(v) for k, v in attributes.items() if v is not None})
+
+    def record_exception(self, ex:Exception) -> None:
+        self.span.record_exception(ex)
+        self.set_error(str(ex))
+
+    def set_error(self, description:str = None) -> None:
+        self.span.set_status(OtelStatus(OtelStatusCode.ERROR, description))
+
+    def end(self) -> None:
+        if self.ended: return None
+        self.ended = True
+        self.span.end()
+
+
+
+
+class SXTOpenTelemetryTracer(SXTTracer):
+    """SXTTracer that reports spans through OpenTelemetry, so SDK spans nest under (and around) the application's
+    own spans, and headers are injected by the configured OpenTelemetry propagators.  Install with use_opentelemetry()."""
+
+    otel_tracer: object = None
+
+
+    def __init__(self, tracer_provider:object = None, logger:logging.Logger = None) -> None:
+        """--------------------
+        Args:
+            tracer_provider (TracerProvider): (optional) OpenTelemetry tracer provider.  Defaults to the global one.
+        """
+        if otel_trace is None:
+            raise ImportError('SXTOpenTelemetryTracer requires the optional dependency opentelemetry-api:  pip install spaceandtime[otel]')
+        super().__init__(logger)
+        self.otel_tracer = otel_trace.get_tracer(__package__, tracer_provider=tracer_provider)
+
+    @property
+    def active(self) -> bool:
+        return True
+
+
+    def current_span(self):
+        span = otel_trace.get_current_span()
+        return SXTOpenTelemetrySpan(span) if span.is_recording() else NOOP_SPAN
+
+
+    def start_span(self, name:str, kind:str = 'internal', parent = None, attributes:dict = None):
+        if isinstance(parent, str):
+            context = otel_propagate.extract({'traceparent': parent})
+        elif isinstance(parent, SXTOpenTelemetrySpan):
+            context = otel_trace.set_span_in_context(parent.span)
+        else:
+            context = None # the current OpenTelemetry context
+        span = SXTOpenTelemetrySpan(self.otel_tracer.start_span(name, context=context, kind=OtelSpanKind.CLIENT if kind == 'client' else OtelSpanKind.INTERNAL))
+        if attributes: span.set_attributes(attributes)
+        return span
+
+
+    @contextlib.contextmanager
+    def span(self, name:str, kind:str = 'internal', parent = None, attributes:dict = None):
+        span = self.start_span(name, kind, parent, attributes)
+        try:
+            with otel_trace.use_span(span.span, end_on_exit=False, record_exception=False, set_status_on_exception=False):
+                yield span
+        except BaseException as ex:
+            span.record_exception(ex)
+            raise
+        finally:
+            span.end()
+
+
+    def inject(self, headers:dict, span = None) -> dict:
+        carrier = dict(headers)
+        context = otel_trace.set_span_in_context(span.span) if isinstance(span, SXTOpenTelemetrySpan) else None
+        otel_propagate.inject(carrier, context=context)
+        return carrier
+
+
+
+
+__tracer__ = SXTTracer()
+
+
+def get_tracer() -> SXTTracer:
+    """Returns the tracer used by every SDK object in the process."""
+    return __tracer__
+
+
+def set_tracer(tracer:SXTTracer) -> SXTTracer:
+    """Replaces the tracer used by every SDK object in the process, returning the previous one."""
+    global __tracer__
+    previous, __tracer__ = __tracer__, tracer
+    return previous
+
+
+def use_opentelemetry(tracer_provider:object = None) -> SXTOpenTelemetryTracer:
+    """Reports SDK spans through OpenTelemetry from now on (requires opentelemetry-api), and returns the new tracer."""
+    tracer = SXTOpenTelemetryTracer(tracer_provider)
+    set_tracer(tracer)
+    return tracer
+
+
+def traced(name:str, kind:str = 'internal'):
+    """--------------------
+    Decorator that runs a function or coroutine function in a span of the process tracer.  The name may hold
+    {argument} placeholders, filled from the call's arguments.  A (False, ...) return, the SDK's failure result,
+    marks the span as failed, as does an exception.
+
+    Args:
+        name (str): Span name, e.g. 'SpaceAndTime.execute_query' or 'sxt {endpoint}'.
+        kind (str): (optional) 'internal' or 'client'.  Default 'internal'.
+
+    Returns:
+        function: Decorator.
+    """
+    def decorator(func):
+        signature = inspect.signature(func) if '{' in name else None
+        def span_name(args, kwargs) -> str:
+            if signature is None: return name
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return name.format(**bound.arguments)
+        def check(span, result):
+            if type(result) == tuple and len(result) == 2 and result[0] is False:
+                span.set_error(str(result[1])[:500])
+            return result
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                tracer = __tracer__
+                if not tracer.active: return await func(*args, **kwargs)
+                with tracer.span(span_name(args, kwargs), kind) as span:
+                    return check(span, await func(*args, **kwargs))
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            tracer = __tracer__
+            if not tracer.active: return func(*args, **kwargs)
+            with tracer.span(span_name(args, kwargs), kind) as span:
+                return check(span, func(*args, **kwargs))
+        return wrapper
+    return decorator
@@ -1,18 +1,22 @@
-import os, logging, datetime, random
+import os, logging, datetime, random, threading, weakref
 from pathlib import Path
 from dotenv import load_dotenv
 from .sxtexceptions import SxTAuthenticationError, SxTArgumentError
 from .sxtkeymanager import SXTKeyManager, SXTKeyEncodings
 from .sxtbaseapi import SXTBaseAPI, SXTApiCallTypes 
+from .sxtasyncapi import AsyncSXTBaseAPI
+from .sxtgateway import gateway_urls
+from .sxttracing import traced
+from .sxtlogging import get_logger
 
 
 class SXTUser():
     user_id: str = ''
-    api_url: str = ''
     logger: logging.Logger = None 
     key_manager: SXTKeyManager = None
     ENCODINGS = SXTKeyEncodings
     base_api: SXTBaseAPI = None
+    __asyncapi__: AsyncSXTBaseAPI = None
     access_token: str = ''
     refresh_token: str = ''
     access_token_expire_epoch: int = 0
@@ -21,6 +25,7 @@ class SXTUser():
     start_time:datetime.datetime = None
     __bs: list = None
     __usrtyp__:list = None
+    __token_lock__: threading.RLock = None
 
     def __init__(self, dotenv_file:Path = None, user_id:str = None, 
                  user_private_key:str = None, api_url:str = None,
@@ -36,15 +41,11 @@ class SXTUser():
             if not logger: logger = SpaceAndTime_parent.logger
             self.start_time = SpaceAndTime_parent.start_time if SpaceAndTime_parent.start_time else datetime.datetime.now()
 
-        if logger: 
-            self.logger = logger 
-        else: 
-            self.logger = logging.getLogger()
-            self.logger.setLevel(logging.INFO)
-            if len(self.logger.handlers) == 0: 
-                self.logger.addHandler( logging.StreamHandler() )
+        self.logger = get_logger('user', logger, default_output=True)
         self.logger.debug(f'SXT User instantiating...')
 
+        self.__token_lock__ = threading.RLock() # held while tokens are fetched or swapped
+        __users__.add(self)
         encoding = encoding if encoding else SXTKeyEncodings.BASE64 
         self.key_manager = SXTKeyManager(private_key = user_private_key, encoding = encoding, logger=self.logger)
         self.base_api = SXTBaseAPI(logger = self.logger)
@@ -64,6 +65,7 @@ class SXTUser():
         if 'testuser' in kwargs: 
             self.user_id = 'testuser_' + kwargs['testuser'] + '_' + f"{random.randint(0,999999999999):012}"
 
+        self.base_api.user_id = self.user_id
         self.logger.info(f'SXT User instantiated: {self.user_id}')
         if authenticate: self.authenticate()
 
@@ -123,6 +125,28 @@ class SXTUser():
         filename = f'./users/{self.user_id}.env' 
         return Path(filename)
 
+    @property
+    def api_url(self):
+        """Gateway URL (str) or URLs (list) used by this user's base_api and async_api."""
+        return self.base_api.api_url if self.base_api else SXTBaseAPI.api_url
+
+    @api_url.setter
+    def api_url(self, value) -> None:
+        if not value: return None
+        urls = gateway_urls(value)
+        value = urls[0] if len(urls) == 1 else urls
+        self.base_api.api_url = value
+        if self.__asyncapi__ is not None: self.__asyncapi__.api_url = value
+
+    @property
+    def async_api(self) -> AsyncSXTBaseAPI:
+        """asyncio counterpart of base_api, created on first use and kept in sync with this user's access_token."""
+        if self.__asyncapi__ is None:
+            self.__asyncapi__ = AsyncSXTBaseAPI(access_token = self.access_token, logger = self.logger)
+            self.__asyncapi__.api_url = self.base_api.api_url
+            self.__asyncapi__.user_id = self.user_id
+        return self.__asyncapi__
+
 
     def __str__(self):
         flds = {fld: getattr(self, fld) for fld in ['api_url','user_id','private_key','public_key','encoding']}
@@ -198,7 +222,9 @@ class SXTUser():
             hdr = '# -------- Below was added by the SxT SDK'
             lines = [hdr]
             for pyname, envname in fieldmap.items():
-                lines.append( f'{envname}="{ getattr(self, pyname) }"' )
+                value = getattr(self, pyname)
+                if type(value) in (list, tuple): value = ','.join(value) # e.g. several api_url gateways
+                lines.append( f'{envname}="{ value }"' )
 
             dotenv_file = Path(dotenv_file)
             dotenv_file.parent.mkdir(parents=True, exist_ok=True)
@@ -240,22 +266,53 @@ class SXTUser():
     def authenticate(self) -> str:
         return self.register_new_user()
 
+    @traced('SXTUser.authenticate')
     def register_new_user(self, join_code:str = None) -> str:
         """--------------------
-        Authenticate to the Space and Time network, and store access_token and refresh_token.
+        Authenticate to the Space and Time network, and store access_token and refresh_token.  Thread-safe: 
+        other threads authenticating the same user wait, rather than requesting tokens at the same time.
+        """
+        if not (self.user_id and self.private_key):
+            raise SxTArgumentError('Must have valid UserID and Private Key to authenticate.', logger=self.logger)
+        
+        with self.__token_lock__:
+            try: 
+                success, response = self.base_api.get_auth_challenge_token(user_id = self.user_id, joincode=join_code)
+                if success:
+                    challenge_token = response['authCode']
+                    signed_challenge_token = self.key_manager.sign_message(challenge_token)
+                    success, response = self.base_api.get_access_token(user_id = self.user_id, 
+                                                                       challange_token = challenge_token, 
+                                                                       signed_challange_token = signed_challenge_token,
+                                                                       public_key = self.public_key)
+                if success:
+                    tokens = response
+                else: 
+                    raise SxTAuthenticationError(str(response), logger=self.logger)
+                if len( [v for v in tokens if v in ['accessToken','refreshToken','accessTokenExpires','refreshTokenExpires']] ) < 4:
+                    raise SxTAuthenticationError('Authentication produced incorrect / incomplete output', logger=self.logger)
+            except SxTAuthenticationError as ex:
+                return False, [ex]
+            return True, self.__set_tokens__(tokens)
+
+
+    @traced('SXTUser.authenticate')
+    async def authenticate_async(self, join_code:str = None) -> str:
+        """--------------------
+        Async version of authenticate(): authenticate to the Space and Time network without blocking the event loop, and store access_token and refresh_token.
         """
         if not (self.user_id and self.private_key):
             raise SxTArgumentError('Must have valid UserID and Private Key to authenticate.', logger=self.logger)
         
         try: 
-            success, response = self.base_api.get_auth_challenge_token(user_id = self.user_id, joincode=join_code)
+            success, response = await self.async_api.get_auth_challenge_token(user_id = self.user_id, joincode=join_code)
             if success:
                 challenge_token = response['authCode']
                 signed_challenge_token = self.key_manager.sign_message(challenge_token)
-                success, response = self.base_api.get_access_token(user_id = self.user_id, 
-                                                                   challange_token = challenge_token, 
-                                                                   signed_challange_token = signed_challenge_token,
-                                                                   public_key = self.public_key)
+                success, response = await self.async_api.get_access_token(user_id = self.user_id, 
+                                                                          challange_token = challenge_token, 
+                                                                          signed_challange_token = signed_challenge_token,
+                                                                          public_key = self.public_key)
             if success:
                 tokens = response
             else: 
@@ -264,32 +321,42 @@ class SXTUser():
                 raise SxTAuthenticationError('Authentication produced incorrect / incomplete output', logger=self.logger)
         except SxTAuthenticationError as ex:
             return False, [ex]
-        self.access_token = tokens['accessToken']
-        self.refresh_token = tokens['refreshToken']
-        self.access_token_expire_epoch = tokens['accessTokenExpires']
-        self.refresh_token_expire_epoch = tokens['refreshTokenExpires']
-        self.base_api.access_token = tokens['accessToken']
-        return True, self.access_token 
+        return True, self.__set_tokens__(tokens)
+
+
+    def __set_tokens__(self, tokens:dict) -> str:
+        """Stores a token response on the user and pushes the new access_token to the sync and async api objects."""
+        with self.__token_lock__:
+            self.access_token = tokens['accessToken']
+            self.refresh_token = tokens['refreshToken']
+            self.access_token_expire_epoch = tokens['accessTokenExpires']
+            self.refresh_token_expire_epoch = tokens['refreshTokenExpires']
+            self.base_api.access_token = self.access_token
+            self.base_api.user_id = self.user_id
+            if self.__asyncapi__ is not None: 
+                self.__asyncapi__.access_token = self.access_token
+                self.__asyncapi__.user_id = self.user_id
+            return self.access_token
 
 
+    @traced('SXTUser.reauthenticate')
     def reauthenticate(self) -> str:
-        """Re-authenticate an existing access_token to the Space and Time network."""
+        """Re-authenticate an existing access_token to the Space and Time network.  Thread-safe: if another thread 
+        refreshes the tokens while this one waits, its new access_token is returned without refreshing again."""
         if not self.refresh_expired:
             raise SxTArgumentError('Refresh token has expired', logger=self.logger)
-        try:
-            success, tokens = self.base_api.token_refresh(self.refresh_token)
-            if not success:
-                raise SxTAuthenticationError(str(tokens), logger=self.logger)
-            if len( [v for v in tokens if v in ['accessToken','refreshToken','accessTokenExpires','refreshTokenExpires']] ) < 4:
-                raise SxTAuthenticationError('Authentication produced incorrect / incomplete output', logger=self.logger)
-        except SxTAuthenticationError as ex:
-            return False, [ex]
-        self.access_token = tokens['accessToken']
-        self.refresh_token = tokens['refreshToken']
-        self.access_token_expire_epoch = tokens['accessTokenExpires']
-        self.refresh_token_expire_epoch = tokens['refreshTokenExpires']
-        self.base_api.access_token = self.access_token
-        return True, self.access_token 
+        refresh_token = self.refresh_token
+        with self.__token_lock__:
+            if self.refresh_token != refresh_token: return True, self.access_token # already refreshed by another thread
+            try:
+                success, tokens = self.base_api.token_refresh(self.refresh_token)
+                if not success:
+                    raise SxTAuthenticationError(str(tokens), logger=self.logger)
+                if len( [v for v in tokens if v in ['accessToken','refreshToken','accessTokenExpires','refreshTokenExpires']] ) < 4:
+                    raise SxTAuthenticationError('Authentication produced incorrect / incomplete output', logger=self.logger)
+            except SxTAuthenticationError as ex:
+                return False, [ex]
+            return True, self.__set_tokens__(tokens)
 
     def execute_sql(self, sql_text:str, biscuits:list = None, app_name:str = None):
         """
@@ -317,6 +384,16 @@ class SXTUser():
         return True, 'Consumed join_code and joined subscription!'
         
 
+__users__ = weakref.WeakSet()
+
+def __after_fork__() -> None:
+    """Runs in the child after os.fork(): a token lock held by a parent thread at the time of the fork would never be released."""
+    for user in list(__users__): user.__token_lock__ = threading.RLock()
+
+if hasattr(os, 'register_at_fork'): os.register_at_fork(after_in_child=__after_fork__)
+
+
+
 if __name__ == '__main__':
 
     # BASIC USAGE
@@ -0,0 +1,94 @@
+import sys, io, json, asyncio, logging, pytest
+from pathlib import Path
+
+# load local copy of libraries
+sys.path.append(str( Path(Path(__file__).parents[1] / 'src').resolve() ))
+from spaceandtime.sxtretry import SXTRetryPolicy
+from spaceandtime.sxtexceptions import SxTTimeoutError
+from spaceandtime.sxtmockgateway import SXTMockGateway
+from spaceandtime.sxtkeymanager import SXTKeyManager
+
+aiohttp = pytest.importorskip('aiohttp')
+from spaceandtime.sxtasyncapi import AsyncSXTBaseAPI, SXTAsyncRetryPolicy
+
+rows = [{'BLOCK_NUMBER': n, 'HASH': f'0x{n:04x}'} for n in range(50)]
+
+
+def blocks_gateway(**kwargs) -> SXTMockGateway:
+    gateway = SXTMockGateway(require_auth=False, **kwargs)
+    gateway.execute('CREATE TABLE ETH.BLOCKS (BLOCK_NUMBER INT, HASH VARCHAR)')
+    gateway.execute('INSERT INTO ETH.BLOCKS VALUES ' + ', '.join(f"({r['BLOCK_NUMBER']}, '{r['HASH']}')" for r in rows))
+    return gateway
+
+
+def run(gateway, test):
+    async def main():
+        api = AsyncSXTBaseAPI()
+        api.api_url = gateway.url
+        try:
+            return await test(api)
+        finally:
+            await api.close()
+    return asyncio.run(main())
+
+
+def test_retry_policy_not_patched():
+    assert aiohttp.ClientConnectionError not in SXTRetryPolicy.retryable_exceptions
+    assert aiohttp.ClientConnectionError in SXTAsyncRetryPolicy.retryable_exceptions
+    assert isinstance(AsyncSXTBaseAPI.retry_policy, SXTAsyncRetryPolicy)
+    assert SXTAsyncRetryPolicy().is_unprocessed(None, aiohttp.ClientConnectorError(None, OSError('refused')))
+
+
+def test_discovery_passes_call_options():
+    async def test(api):
+        return await api.discovery_get_tables('ETH', deadline=0.2, retry_policy=SXTRetryPolicy(max_attempts=1))
+    with SXTMockGateway(require_auth=False, latency=1) as gateway:
+        success, rtn = run(gateway, test)
+    assert not success and isinstance(rtn[0]['exception'], SxTTimeoutError)
+
+
+def test_sql_dql_stream():
+    async def test(api):
+        success, stream = await api.sql_dql_stream('SELECT * FROM ETH.BLOCKS', ['ETH.BLOCKS'])
+        assert success
+        streamed = [row async for row in stream]
+        success, batches = await api.sql_dql_stream('SELECT * FROM ETH.BLOCKS', ['ETH.BLOCKS'], batch_size=20)
+        return streamed, [batch async for batch in batches]
+    with blocks_gateway() as gateway:
+        streamed, batches = run(gateway, test)
+    assert streamed == rows
+    assert [len(batch) for batch in batches] == [20, 20, 10] and sum(batches, []) == rows
+
+
+def test_sql_dql_coalesced():
+    async def test(api):
+        query = lambda: api.sql_dql('SELECT * FROM ETH.BLOCKS', ['ETH.BLOCKS'])
+        return await asyncio.gather(*[query() for _ in range(5)])
+    with blocks_gateway(latency=0.2) as gateway:
+        results = run(gateway, test)
+        assert len(gateway.requests) == 1
+    assert all(success and rtn == rows for success, rtn in results)
+    assert results[0][1] is not results[1][1] # each caller gets its own copy
+
+
+def test_execute_query_async_output_options():
+    from spaceandtime.spaceandtime import SpaceAndTime
+    async def test(sxt, sink):
+        query = lambda **options: sxt.execute_query_async('SELECT * FROM SXTDEMO.T ORDER BY ID', resources=['SXTDEMO.T'], **options)
+        try:
+            success, stream = await query(stream=True, batch_size=2)
+            batches = [batch async for batch in stream]
+            return batches, await query(raw=True), await query(sink=sink)
+        finally:
+            await sxt.user.async_api.close()
+    with SXTMockGateway() as gateway:
+        gateway.execute('CREATE TABLE SXTDEMO.T (ID INT PRIMARY KEY)')
+        gateway.execute('INSERT INTO SXTDEMO.T VALUES (1), (2), (3)')
+        sxt = SpaceAndTime(api_url=gateway.url, user_id='suzy', user_private_key=SXTKeyManager(new_keypair=True).private_key)
+        logging.getLogger().setLevel(logging.CRITICAL)
+        assert sxt.authenticate()[0]
+        sink = io.BytesIO()
+        batches, (success, content), (sunk, written) = asyncio.run(test(sxt, sink))
+    assert batches == [[{'ID': 1}, {'ID': 2}], [{'ID': 3}]]
+    assert success and json.loads(content) == [{'ID': 1}, {'ID': 2}, {'ID': 3}]
+    assert sunk and sink.getvalue() == content and written == len(content)
@@ -0,0 +1,77 @@
+import sys, time, threading, pytest
+from pathlib import Path
+
+# load local copy of libraries
+sys.path.append(str( Path(Path(__file__).parents[1] / 'src').resolve() ))
+from spaceandtime.sxtcancellation import SXTDeadline, SXTCancelToken, check_abort, run_cancellable
+from spaceandtime.sxtconnectionpool import SXTConnectionPool, SXTAbortableSend
+from spaceandtime.sxtexceptions import SxTTimeoutError, SxTCancelledError
+from spaceandtime.sxtbaseapi import SXTBaseAPI
+from spaceandtime.sxtmockgateway import SXTMockGateway
+
+
+def test_deadline():
+    assert SXTDeadline.coerce(None) is None
+    deadline = SXTDeadline.coerce(0.2)
+    assert SXTDeadline.coerce(deadline) is deadline
+    assert not deadline.expired
+    assert 0 < deadline.remaining() <= 0.2
+    assert deadline.cap((5, 300)) == (pytest.approx(0.2, abs=0.05), pytest.approx(0.2, abs=0.05))
+    time.sleep(0.25)
+    assert deadline.expired and deadline.remaining() == 0
+    with pytest.raises(SxTTimeoutError): check_abort(deadline)
+
+
+def test_cancel_token():
+    token = SXTCancelToken()
+    called = []
+    token.add_callback(lambda: called.append(1))
+    check_abort(None, token)
+    threading.Timer(0.1, token.cancel).start()
+    assert token.wait(5)
+    token.cancel() # second cancel is a no-op
+    assert token.cancelled and called == [1]
+    with pytest.raises(SxTCancelledError): check_abort(None, token)
+
+
+def test_run_cancellable():
+    assert run_cancellable(lambda: 42) == 42
+    assert run_cancellable(lambda: 42, SXTCancelToken()) == 42
+
+    token = SXTCancelToken()
+    abandoned = threading.Event()
+    threading.Timer(0.1, token.cancel).start()
+    start = time.monotonic()
+    with pytest.raises(SxTCancelledError):
+        run_cancellable(lambda: time.sleep(0.5) or 'late', token, on_abandon=lambda result: abandoned.set())
+    assert time.monotonic() - start < 0.4
+    assert abandoned.wait(2)
+
+
+def test_cancelled_send_frees_worker():
+    with SXTMockGateway(require_auth=False, latency=5) as gateway:
+        session = SXTConnectionPool().get_session(gateway.url)
+        send = SXTAbortableSend(lambda: session.get(gateway.url + '/v1/sql/dql', timeout=(5, 30)))
+        finished = threading.Event()
+        def func():
+            try:
+                return send()
+            finally:
+                finished.set()
+        token = SXTCancelToken()
+        threading.Timer(0.2, token.cancel).start()
+        with pytest.raises(SxTCancelledError):
+            run_cancellable(func, token, abort=send.abort)
+        assert finished.wait(1) # the worker is not held until the read timeout
+        with pytest.raises(Exception): send() # nor does a retry of an aborted send go out
+
+
+def test_endpoint_timeouts():
+    api = SXTBaseAPI()
+    assert api.endpoint_family('auth/code') == 'auth'
+    assert api.endpoint_family('sql/dql') == 'sql'
+    assert api.endpoint_family('encryption/sql/dql') == 'sql'
+    assert api.endpoint_family('discover/table') == 'discover'
+    assert api.endpoint_family('subscription') == 'default'
+    assert api.timeout_for('sql/dql') == api.timeouts['sql']
+    assert max(api.timeout_for('sql/dql', SXTDeadline(1))) <= 1
@@ -0,0 +1,73 @@
+import sys, gzip, time, logging, pytest
+from pathlib import Path
+
+# load local copy of libraries
+sys.path.append(str( Path(Path(__file__).parents[1] / 'src').resolve() ))
+from spaceandtime.sxtcassette import SXTCassette
+from spaceandtime.sxtmockgateway import SXTMockGateway
+from spaceandtime.sxtuser import SXTUser
+from spaceandtime.sxtkeymanager import SXTKeyManager
+from spaceandtime.sxtbaseapi import SXTBaseAPI
+from spaceandtime.sxtexceptions import SxTCassetteError
+
+sql = 'SELECT * FROM SXTDEMO.BLOCKS ORDER BY BLOCK_NUMBER'
+
+
+@pytest.fixture
+def recorded(tmp_path):
+    """Records a session against a mock gateway, returning (cassette path, secrets used, results seen)."""
+    path = tmp_path / 'session.cassette.gz'
+    with SXTMockGateway(latency={'sql/dql': 0.2, 'default': 0.0}) as gateway:
+        gateway.execute('CREATE TABLE SXTDEMO.BLOCKS (BLOCK_NUMBER INT PRIMARY KEY, MINER VARCHAR)')
+        gateway.execute('INSERT INTO SXTDEMO.BLOCKS VALUES ' + ', '.join(f"({i}, '0x{i:04x}')" for i in range(300)))
+        user = SXTUser(user_id='suzy', user_private_key=SXTKeyManager(new_keypair=True).private_key, api_url=gateway.url)
+        logging.getLogger().setLevel(logging.CRITICAL)
+        cassette = SXTCassette(path, 'record').install(user.base_api)
+        user.authenticate()
+        results = [user.base_api.sql_dql(sql, ['SXTDEMO.BLOCKS'], biscuits=['secret-biscuit'])[1],
+                   user.base_api.sql_dml("DELETE FROM SXTDEMO.BLOCKS WHERE BLOCK_NUMBER >= 200", ['SXTDEMO.BLOCKS'])[1],
+                   user.base_api.sql_dql(sql, ['SXTDEMO.BLOCKS'], biscuits=['secret-biscuit'])[1]]
+        secrets = [user.access_token, user.refresh_token, user.private_key, user.public_key, 'secret-biscuit']
+        cassette.uninstall(user.base_api)
+    return path, secrets, results
+
+
+def test_record_redacts_secrets(recorded):
+    path, secrets, results = recorded
+    text = gzip.decompress(path.read_bytes()).decode('utf-8')
+    assert len(text.splitlines()) == 6 # header and 5 exchanges
+    assert not [s for s in secrets if s and s in text]
+    assert len(results[0]) == 300 and len(results[2]) == 200
+
+
+def test_replay_without_network(recorded):
+    path, secrets, results = recorded
+    api = SXTBaseAPI()
+    logging.getLogger().setLevel(logging.CRITICAL)
+    api.api_url = 'http://127.0.0.1:9' # nothing listening
+    cassette = SXTCassette(path, 'replay', speed=0).install(api)
+    start = time.monotonic()
+    replayed = [api.sql_dql(sql, ['SXTDEMO.BLOCKS'], biscuits=['other-biscuit'])[1],
+                api.sql_dml("DELETE FROM SXTDEMO.BLOCKS WHERE BLOCK_NUMBER >= 200", ['SXTDEMO.BLOCKS'])[1],
+                api.sql_dql(sql, ['SXTDEMO.BLOCKS'], biscuits=['other-biscuit'])[1]]
+    assert replayed == results # same request replays successive recordings, in order
+    assert time.monotonic() - start < 0.2
+
+    success, rows = api.sql_dql('SELECT 1', ['SXTDEMO.BLOCKS'])
+    assert success and rows == results[0] # unknown body: falls back to recordings for the same method and path
+    success, errors = api.discovery_get_schemas()
+    assert not success and isinstance(errors[0]['exception'], SxTCassetteError)
+    cassette.uninstall(api)
+    assert 'connection_pool' not in vars(api)
+
+
+def test_replay_speed(recorded):
+    path, secrets, results = recorded
+    api = SXTBaseAPI()
+    logging.getLogger().setLevel(logging.CRITICAL)
+    for speed, low, high in ((1, 0.19, 0.5), (4, 0.04, 0.15)):
+        SXTCassette(path, 'replay', speed=speed).install(api)
+        start = time.monotonic()
+        assert api.sql_dql(sql, ['SXTDEMO.BLOCKS'])[1] == results[0]
+        assert low <= time.monotonic() - start < high
+    with pytest.raises(SxTCassetteError): SXTCassette(path.with_suffix('.missing'))
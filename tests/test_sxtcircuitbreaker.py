@@ -0,0 +1,38 @@
+import sys, time, pytest
+from pathlib import Path
+
+# load local copy of libraries
+sys.path.append(str( Path(Path(__file__).parents[1] / 'src').resolve() ))
+from spaceandtime.sxtcircuitbreaker import SXTCircuitBreaker
+from spaceandtime.sxtenums import SXTCircuitState
+
+
+def test_circuit_opens_and_recovers():
+    breaker = SXTCircuitBreaker(failure_threshold=3, recovery_timeout=0.1)
+    for i in range(2): breaker.record_failure('sql/dql')
+    breaker.record_success('sql/dql')  # resets the consecutive count
+    for i in range(2): breaker.record_failure('sql/dql')
+    assert breaker.state('sql/dql') == SXTCircuitState.CLOSED
+    breaker.record_failure('sql/dql')
+    assert breaker.state('sql/dql') == SXTCircuitState.OPEN
+    assert breaker.is_open('sql/dql') and not breaker.allow('sql/dql')
+    assert breaker.allow('discover/table')  # circuits are per endpoint
+
+    time.sleep(0.12)
+    assert breaker.allow('sql/dql')       # probe
+    assert not breaker.allow('sql/dql')   # only one probe at a time
+    assert breaker.state('sql/dql') == SXTCircuitState.HALF_OPEN
+    breaker.record_failure('sql/dql')     # failed probe re-opens
+    assert breaker.state('sql/dql') == SXTCircuitState.OPEN
+
+    time.sleep(0.12)
+    assert breaker.allow('sql/dql')
+    breaker.record_success('sql/dql')
+    assert breaker.state('sql/dql') == SXTCircuitState.CLOSED
+    assert breaker.circuit('sql/dql').times_opened == 2
+
+
+def test_circuit_disabled():
+    breaker = SXTCircuitBreaker(failure_threshold=1, enabled=False)
+    breaker.record_failure('sql')
+    assert breaker.allow('sql') and not breaker.is_open('sql')
@@ -0,0 +1,56 @@
+import sys, json, pytest
+from pathlib import Path
+
+# load local copy of libraries
+sys.path.append(str( Path(Path(__file__).parents[1] / 'src').resolve() ))
+from spaceandtime.sxtcodec import SXTCodec, orjson
+from spaceandtime.spaceandtime import SpaceAndTime
+
+backends = ['json'] if orjson is None else ['json', 'orjson']
+
+
+@pytest.mark.parametrize('backend', backends)
+def test_codec_roundtrip(backend):
+    codec = SXTCodec(backend)
+    data = {'sqlText': "INSERT INTO S.T VALUES ('résumé', 1.5)", 'biscuits': ['abc'], 'big': 2**70, 'none': None}
+    encoded = codec.dumps(data)
+    assert type(encoded) == bytes
+    assert json.loads(encoded) == data
+    assert codec.loads(encoded) == data
+    assert codec.loads(memoryview(encoded)) == data
+    assert codec.loads(encoded.decode('utf-8')) == data
+    with pytest.raises(codec.decode_errors):
+        codec.loads(b'<html>Bad Gateway</html>')
+
+
+@pytest.mark.parametrize('backend', backends)
+def test_codec_big_integers(backend):
+    codec = SXTCodec(backend)
+    values = [12345678901234567890123, 2**256 - 1, -(2**63) - 1, 2**64 - 1, -(2**63), 3]
+    encoded = codec.dumps({'rows': values})
+    for data in (encoded, memoryview(encoded), encoded.decode('utf-8')):
+        decoded = codec.loads(data)['rows']
+        assert decoded == values and all(type(v) == int for v in decoded)
+
+
+def test_codec_backend():
+    assert SXTCodec().backend == ('json' if orjson is None else 'orjson')
+    with pytest.raises(ValueError):
+        SXTCodec('yaml')
+
+
+@pytest.mark.parametrize('backend', backends)
+def test_codec_dumps_iter(backend):
+    codec = SXTCodec(backend)
+    chunks = ['INSERT INTO S.T VALUES ', "(1, 'a \"quoted\"\nline')", ", (2, 'résumé')"] * 100
+    pieces = list(codec.dumps_iter({'sqlText': iter(chunks), 'biscuits': ['abc'], 'resources': ['S.T']}, buffer_size=512))
+    assert len(pieces) > 1
+    assert all(len(p) < 1024 for p in pieces)
+    assert json.loads(b''.join(pieces)) == {'sqlText': ''.join(chunks), 'biscuits': ['abc'], 'resources': ['S.T']}
+    assert [json.loads(p) for p in codec.dumps_iter({'a': 1})] == [{'a': 1}]
+
+
+def test_json_to_csv_uses_codec():
+    sxt = SpaceAndTime()
+    success, rows = sxt.json_to_csv([{'ID': 1, 'META': {'tags': ['a', 'b']}, 'TXT': 'say "hi"', 'BIG': 2**70 + 1}])
+    assert success and rows == ['ID,META,TXT,BIG', '"1","{""tags"":[""a"",""b""]}","say ""hi""","1180591620717411303425"']
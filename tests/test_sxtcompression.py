@@ -0,0 +1,90 @@
+import sys, io, gzip, asyncio, logging, pytest
+from pathlib import Path
+
+# load local copy of libraries
+sys.path.append(str( Path(Path(__file__).parents[1] / 'src').resolve() ))
+from spaceandtime.sxtbaseapi import SXTBaseAPI
+from spaceandtime.sxtcodec import gzip_chunks
+from spaceandtime.sxtmockgateway import SXTMockGateway
+
+rows = [{'BLOCK_NUMBER': i, 'BLOCK_HASH': '0x' + '0'*60 + str(i%10), 'MINER': '0xabc', 'GAS_USED': 21000} for i in range(2000)]
+
+
+@pytest.fixture
+def gateway():
+    with SXTMockGateway(require_auth=False) as gateway:
+        gateway.execute('CREATE TABLE ETH.BLOCKS (BLOCK_NUMBER INT, BLOCK_HASH VARCHAR, MINER VARCHAR, GAS_USED INT)')
+        gateway.execute('INSERT INTO ETH.BLOCKS VALUES ' + ', '.join(f"({r['BLOCK_NUMBER']}, '{r['BLOCK_HASH']}', '{r['MINER']}', {r['GAS_USED']})" for r in rows))
+        gateway.execute('CREATE TABLE S.T (A INT, B VARCHAR)')
+        yield gateway
+
+
+@pytest.fixture
+def api():
+    api = SXTBaseAPI()
+    logging.getLogger().setLevel(logging.CRITICAL)
+    api.coalesce_dql = False
+    yield api
+    api.compress_requests_over = None
+
+
+def test_gzip_chunks():
+    chunks = [b'INSERT INTO S.T VALUES ', b"(1, 'a'), " * 1000, b"(2, 'b')"]
+    assert gzip.decompress(b''.join(gzip_chunks(iter(chunks)))) == b''.join(chunks)
+
+
+def test_compressed_responses(api, gateway):
+    api.api_url = gateway.url
+    success, result = api.sql_dql('SELECT * FROM ETH.BLOCKS', ['ETH.BLOCKS'])
+    assert success and result == rows
+    assert gateway.responses[-1]['encoding'] == 'gzip'
+    assert gateway.responses[-1]['wire_bytes'] < len(api.codec.dumps(rows)) / 10
+
+    success, stream = api.sql_dql('SELECT * FROM ETH.BLOCKS', ['ETH.BLOCKS'], stream=True)
+    assert success and list(stream) == rows
+    sink = io.BytesIO()
+    success, written = api.sql_dql('SELECT * FROM ETH.BLOCKS', ['ETH.BLOCKS'], sink=sink)
+    assert api.codec.loads(sink.getvalue()) == rows
+
+
+def test_compressed_requests(api, gateway):
+    api.api_url = gateway.url
+    sql = 'INSERT INTO S.T (A, B) VALUES ' + ', '.join(f"({i}, 'some repeated text')" for i in range(1000))
+    assert api.sql_dml(sql, ['S.T'])[0]
+    assert 'content-encoding' not in gateway.requests[-1]['headers'] # off by default
+
+    api.compress_requests_over = 1024
+    assert api.sql_dml(sql, ['S.T'])[0]
+    request = gateway.requests[-1]
+    assert request['headers']['content-encoding'] == 'gzip'
+    assert request['body']['sqlText'] == sql
+    assert request['wire_bytes'] < len(sql) / 5
+
+    assert api.sql_dml('DELETE FROM S.T WHERE A=1', ['S.T'])[0] # under the threshold
+    assert 'content-encoding' not in gateway.requests[-1]['headers']
+
+    assert api.sql_dml(iter([sql[:100], sql[100:]]), ['S.T'])[0] # streamed
+    request = gateway.requests[-1]
+    assert request['headers']['content-encoding'] == 'gzip'
+    assert request['headers']['transfer-encoding'] == 'chunked'
+    assert request['body']['sqlText'] == sql
+    assert gateway.execute('SELECT COUNT(*) AS N FROM S.T') == [{'N': 2998}]
+
+
+def test_compressed_async(api, gateway):
+    aiohttp = pytest.importorskip('aiohttp')
+    from spaceandtime.sxtasyncapi import AsyncSXTBaseAPI
+    async def run(url):
+        async_api = AsyncSXTBaseAPI()
+        async_api.api_url = url
+        async_api.compress_requests_over = 1024
+        try:
+            dql = await async_api.sql_dql('SELECT * FROM ETH.BLOCKS', ['ETH.BLOCKS'])
+            dml = await async_api.sql_dml('INSERT INTO S.T VALUES ' + "(1, 'x'), " * 500 + "(2, 'y')", ['S.T'])
+            return dql, dml
+        finally:
+            await async_api.close()
+    (success, result), (inserted, _) = asyncio.run(run(gateway.url))
+    assert success and result == rows and inserted
+    assert gateway.responses[0]['encoding'] == 'gzip'
+    assert gateway.requests[-1]['headers']['content-encoding'] == 'gzip'
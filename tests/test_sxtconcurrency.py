@@ -0,0 +1,152 @@
+import sys, time, asyncio, logging, threading, pytest
+from pathlib import Path
+
+# load local copy of libraries
+sys.path.append(str( Path(Path(__file__).parents[1] / 'src').resolve() ))
+from spaceandtime.sxtconcurrency import SXTConcurrencyLimiter, run_parallel, bulk_workers
+from spaceandtime.sxtexceptions import SxTTimeoutError, SxTCancelledError, SxTCircuitOpenError, SxTRateLimitError, SxTControlFlowError
+from spaceandtime.sxtcancellation import SXTDeadline, SXTCancelToken
+from spaceandtime.sxtbaseapi import SXTBaseAPI
+from spaceandtime.sxtmockgateway import SXTMockGateway
+from spaceandtime.sxtkeymanager import SXTKeyManager
+from spaceandtime.spaceandtime import SpaceAndTime
+
+
+def test_limit_grows_and_shrinks():
+    limiter = SXTConcurrencyLimiter(initial_limit=4, max_limit=6)
+    for i in range(4): assert limiter.try_acquire()
+    assert not limiter.try_acquire()
+    for i in range(4): limiter.release(False)
+    assert limiter.limit == 6 # capped at max_limit
+    limiter.try_acquire()
+    limiter.release(True)
+    assert limiter.limit == pytest.approx(5.4)
+    assert limiter.drops == 1
+    limiter.try_acquire()
+    limiter.release(None) # says nothing about load
+    assert limiter.limit == pytest.approx(5.4)
+    assert limiter.in_flight == 0
+
+
+def test_idle_success_does_not_grow():
+    limiter = SXTConcurrencyLimiter(initial_limit=10)
+    for i in range(20):
+        limiter.try_acquire()
+        limiter.release(False)
+    assert limiter.limit == 10
+
+
+def test_slow_response_counts_as_drop():
+    limiter = SXTConcurrencyLimiter(initial_limit=10, latency_tolerance=2.0)
+    limiter.try_acquire()
+    limiter.release(False, 0.1, 'sql/dql')
+    limiter.try_acquire()
+    limiter.release(False, 0.5, 'sql/dql')
+    assert limiter.drops == 1
+    assert limiter.limit == 9
+    limiter.try_acquire()
+    limiter.release(False, 0.5, 'sql/dml') # separate baseline per key
+    assert limiter.drops == 1
+
+
+def test_acquire_waits_for_release():
+    limiter = SXTConcurrencyLimiter(initial_limit=1)
+    limiter.acquire()
+    threading.Timer(0.2, limiter.release).start()
+    waited = limiter.acquire()
+    assert waited >= 0.15
+    assert limiter.in_flight == 1
+    with pytest.raises(SxTTimeoutError): limiter.acquire(deadline=SXTDeadline(0.1))
+    assert limiter.waiting == 0
+    disabled = SXTConcurrencyLimiter(initial_limit=1, enabled=False)
+    for i in range(5): assert disabled.acquire() == 0.0
+
+
+def test_acquire_async_woken_by_release():
+    limiter = SXTConcurrencyLimiter(initial_limit=1)
+    limiter.poll_interval = 30 # waiters must be woken by release(), not by polling
+    limiter.acquire()
+    async def wait():
+        threading.Timer(0.1, limiter.release).start()
+        waited = await limiter.acquire_async()
+        with pytest.raises(SxTTimeoutError): await limiter.acquire_async(deadline=SXTDeadline(0.1))
+        token = SXTCancelToken()
+        threading.Timer(0.1, token.cancel).start()
+        with pytest.raises(SxTCancelledError): await limiter.acquire_async(cancel_token=token)
+        return waited
+    start = time.monotonic()
+    assert 0.05 <= asyncio.run(wait()) < 1
+    assert time.monotonic() - start < 2
+    assert limiter.in_flight == 1 and limiter.waiting == 0
+
+
+def test_shared_limiter_is_opt_in():
+    assert not SXTBaseAPI.concurrency_limiter.enabled
+    api = SXTBaseAPI()
+    assert bulk_workers(True, api, 1000) == api.connection_pool.pool_maxsize
+
+
+def test_run_parallel_concurrent():
+    active = []
+    peak = []
+    lock = threading.Lock()
+    def work(x):
+        with lock: active.append(x); peak.append(len(active))
+        time.sleep(0.05)
+        with lock: active.remove(x)
+        return x * 2
+    start = time.monotonic()
+    results = dict(run_parallel(work, list(range(8)), max_workers=4))
+    assert results == {i: i*2 for i in range(8)}
+    assert max(peak) == 4
+    assert time.monotonic() - start < 0.3
+    assert list(run_parallel(work, [1,2,3])) == [(0,2), (1,4), (2,6)] # sequential, in order
+
+
+def test_run_parallel_abort():
+    token = SXTCancelToken()
+    def work(x):
+        if x == 1: token.cancel()
+        return x
+    results = list(run_parallel(work, list(range(4)), cancel_token=token))
+    assert results[:2] == [(0,0), (1,1)]
+    assert all(isinstance(r, SxTCancelledError) for i, r in results[2:])
+    results = dict(run_parallel(work, list(range(4)), max_workers=2, deadline=SXTDeadline(-1)))
+    assert all(isinstance(r, SxTTimeoutError) for r in results.values())
+    with pytest.raises(ValueError): list(run_parallel(int, ['a', 'b'], max_workers=2))
+
+
+def test_run_parallel_abort_not_logged(caplog):
+    with caplog.at_level(logging.INFO):
+        results = dict(run_parallel(lambda i: i, list(range(5)), max_workers=2, deadline=SXTDeadline(0)))
+    assert all(isinstance(r, SxTTimeoutError) for r in results.values())
+    assert [r for r in caplog.records if r.levelno >= logging.ERROR] == [] # control flow, reported by the caller
+    assert all(issubclass(e, SxTControlFlowError) for e in (SxTTimeoutError, SxTCancelledError, SxTCircuitOpenError, SxTRateLimitError))
+
+
+def test_bulk_workers():
+    api = SXTBaseAPI()
+    api.concurrency_limiter = SXTConcurrencyLimiter(max_limit=8)
+    assert bulk_workers(False, api, 100) == 1
+    assert bulk_workers(True, api, 100) == 8
+    assert bulk_workers(True, api, 3) == 3
+    assert bulk_workers(4, api, 100) == 4
+    api.concurrency_limiter = SXTConcurrencyLimiter(max_limit=64)
+    assert bulk_workers(True, api, 100) == api.connection_pool.pool_maxsize
+
+
+def test_execute_queries_per_query_options():
+    with SXTMockGateway() as gateway:
+        gateway.execute('CREATE TABLE SXTDEMO.T (ID INT PRIMARY KEY)')
+        gateway.execute('INSERT INTO SXTDEMO.T VALUES (1), (2)')
+        sxt = SpaceAndTime(api_url=gateway.url, user_id='suzy', user_private_key=SXTKeyManager(new_keypair=True).private_key)
+        logging.getLogger().setLevel(logging.CRITICAL)
+        assert sxt.authenticate()[0]
+        sxt.user.base_api.coalesce_dql = False
+        query = {'sql_text': 'SELECT * FROM SXTDEMO.T', 'resources': ['SXTDEMO.T']}
+        token = SXTCancelToken()
+        token.cancel()
+        results = sxt.execute_queries([query, {**query, 'deadline': SXTDeadline(0)}, {**query, 'cancel_token': token}], deadline=30)
+    assert results[0] == (True, [{'ID': 1}, {'ID': 2}])
+    assert not results[1][0] and 'Deadline' in results[1][1]['error'] # the query's own deadline, not the batch's
+    assert not results[2][0]
@@ -0,0 +1,71 @@
+import sys, time, pytest
+from pathlib import Path
+
+# load local copy of libraries
+sys.path.append(str( Path(Path(__file__).parents[1] / 'src').resolve() ))
+from spaceandtime.sxtconnectionpool import SXTConnectionPool, SXTHTTPAdapter
+from spaceandtime.sxtmockgateway import SXTMockGateway
+
+
+def test_session_per_gateway():
+    pool = SXTConnectionPool(pool_maxsize=5)
+    session = pool.get_session('https://api.spaceandtime.app/v1/sql')
+    assert pool.get_session('HTTPS://API.spaceandtime.app/v2/discover/table') is session # same host, any path or case
+    other = pool.get_session('https://api2.spaceandtime.app/v1')
+    assert other is not session and pool.get_session('http://api.spaceandtime.app') is not session
+    assert sorted(pool.hosts) == ['http://api.spaceandtime.app', 'https://api.spaceandtime.app', 'https://api2.spaceandtime.app']
+    adapter = session.get_adapter('https://api.spaceandtime.app')
+    assert isinstance(adapter, SXTHTTPAdapter) and adapter._pool_maxsize == 5
+    assert session.headers['Connection'] == 'keep-alive'
+    assert SXTConnectionPool(keep_alive=False).new_session().headers['Connection'] == 'close'
+
+
+def test_keep_alive_connection_reused():
+    pool = SXTConnectionPool()
+    with SXTMockGateway(require_auth=False) as gateway:
+        responses = [pool.get_session(gateway.url).post(gateway.url + '/v1/sql/dql', json={'sqlText': 'SELECT 1'}) for _ in range(3)]
+        assert [r.ok for r in responses] == [True] * 3
+        assert [r.connect_seconds > 0 for r in responses] == [True, False, False] # one connection, then reused
+        pool.close()
+        assert pool.hosts == []
+        assert pool.get_session(gateway.url).get(gateway.url).connect_seconds > 0 # usable again, on a new connection
+        pool.close()
+
+
+def test_prune_idle():
+    pool = SXTConnectionPool(max_idle_seconds=0.1)
+    stale = pool.get_session('https://a.example.com')
+    time.sleep(0.2)
+    fresh = pool.get_session('https://b.example.com') # prunes a on the way
+    assert pool.hosts == ['https://b.example.com']
+    assert pool.get_session('https://a.example.com') is not stale # rebuilt on next use
+    assert pool.get_session('https://b.example.com') is fresh
+    assert pool.prune_idle(60) == 0
+    assert pool.prune_idle(60, now = time.monotonic() + 61) == 2 and pool.hosts == []
+    pool = SXTConnectionPool(max_idle_seconds=-1) # negative disables pruning
+    pool.get_session('https://a.example.com')
+    assert pool.prune_idle(now = time.monotonic() + 10**6) == 0 and len(pool.hosts) == 1
+
+
+def test_after_fork_forgets_sessions():
+    pool = SXTConnectionPool()
+    session = pool.get_session('https://a.example.com')
+    closed = []
+    session.close = lambda: closed.append(session) # the parent's sockets must not be closed from the child
+    lock = pool.__lock__
+    pool.after_fork()
+    assert pool.hosts == [] and closed == [] and pool.__lock__ is not lock
+    assert pool.get_session('https://a.example.com') is not session
+
+
+def test_prune_skips_sessions_in_use():
+    pool = SXTConnectionPool(max_idle_seconds=60)
+    with SXTMockGateway(require_auth=False) as gateway:
+        gateway.execute('CREATE TABLE S.T (ID INT)')
+        session = pool.get_session(gateway.url)
+        response = session.post(gateway.url + '/v1/sql/dql', json={'sqlText': 'SELECT * FROM S.T', 'resources': ['S.T']}, stream=True)
+        assert pool.in_use(session) == 1 # a streamed response not yet read holds its connection
+        assert pool.prune_idle(now = time.monotonic() + 61) == 0 and pool.hosts == [gateway.url]
+        assert response.json() == [] and pool.in_use(session) == 0 # released once read
+        assert pool.prune_idle(now = time.monotonic() + 61) == 0 # idle counted from when it was last seen busy
+        assert pool.prune_idle(now = time.monotonic() + 122) == 1 and pool.hosts == []
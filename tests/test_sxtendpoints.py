@@ -0,0 +1,50 @@
+import sys, pytest
+from pathlib import Path
+
+# load local copy of libraries
+sys.path.append(str( Path(Path(__file__).parents[1] / 'src').resolve() ))
+from spaceandtime.sxtendpoints import SXTEndpointRegistry, SXTRoute
+from spaceandtime.sxtexceptions import SxTArgumentError, SxTAPINotDefinedError
+from spaceandtime.sxtbaseapi import SXTBaseAPI
+
+
+def test_registry_shared():
+    a, b = SXTBaseAPI(), SXTBaseAPI()
+    assert a.versions == b.versions and a.versions is not b.versions
+    assert a.route('sql/dql') is b.route('sql/dql')
+    a.versions['sql/dql'] = 'v9' # one client's override does not leak into another's
+    assert a.route('sql/dql').template == 'v9/sql/dql' and b.route('sql/dql').template != 'v9/sql/dql'
+    assert SXTBaseAPI().versions['sql/dql'] == b.versions['sql/dql']
+    assert len(SXTEndpointRegistry().routes()) == len(a.versions)
+    with pytest.raises(SxTAPINotDefinedError):
+        a.route('not/an/endpoint')
+
+
+def test_route_attributes():
+    registry = SXTEndpointRegistry()
+    dql = registry.route('sql/dql')
+    assert (dql.version, dql.method, dql.auth, dql.idempotent, dql.family) == ('v1', 'POST', True, True, 'sql')
+    assert not registry.route('sql/dml').is_idempotent()
+    assert registry.route('auth/keys').is_idempotent('GET')
+    assert not registry.route('auth/keys').is_idempotent('POST')
+    assert registry.route('discover/table').is_idempotent()
+    assert not registry.route('auth/code').auth
+
+
+def test_route_urls():
+    route = SXTRoute('auth/idexists/{id}', 'v1')
+    assert route.placeholders == ('id',)
+    assert route.url('https://api', {'id': 'bob smith/1'}) == 'https://api/v1/auth/idexists/bob%20smith%2F1'
+    assert route.path({'{id}': 'bob'}) == 'v1/auth/idexists/bob'
+    with pytest.raises(SxTArgumentError):
+        route.path({})
+    route = SXTRoute('discover/table', 'v2')
+    assert route.url('https://api', query_parms={'scope': 'ALL', 'schema': 'A&B C'}) == 'https://api/v2/discover/table?scope=ALL&schema=A%26B%20C'
+
+
+def test_version_override():
+    registry = SXTEndpointRegistry()
+    versions = dict(registry.versions)
+    versions['sql/dql'] = 'v9'
+    assert registry.route('sql/dql', versions).template == 'v9/sql/dql'
+    assert registry.route('sql/dql').template == 'v1/sql/dql'
@@ -0,0 +1,101 @@
+import sys, json, time, logging, pytest
+from pathlib import Path
+
+# load local copy of libraries
+sys.path.append(str( Path(Path(__file__).parents[1] / 'src').resolve() ))
+from spaceandtime.sxtfaults import SXTFault, SXTFaultScenario
+from spaceandtime.sxtmockgateway import SXTMockGateway
+from spaceandtime.sxtbaseapi import SXTBaseAPI
+from spaceandtime.sxtretry import SXTRetryPolicy
+from spaceandtime.sxtcircuitbreaker import SXTCircuitBreaker
+from spaceandtime.sxtexceptions import SxTArgumentError
+
+
+@pytest.fixture
+def api():
+    with SXTMockGateway(require_auth=False) as gateway:
+        gateway.execute('CREATE TABLE S.T (ID INT, TXT VARCHAR)')
+        gateway.execute('INSERT INTO S.T VALUES ' + ', '.join(f"({i}, '{'x' * 40}')" for i in range(500)))
+        api = SXTBaseAPI()
+        logging.getLogger().setLevel(logging.CRITICAL)
+        api.api_url = gateway.url
+        api.coalesce_dql = False
+        api.retry_policy = SXTRetryPolicy(max_attempts=1)
+        api.circuit_breaker = SXTCircuitBreaker(enabled=False)
+        yield api
+        SXTFaultScenario().uninstall(api)
+
+
+def query(api, **kwargs):
+    return api.sql_dql('SELECT * FROM S.T', ['S.T'], **kwargs)
+
+
+def test_replayable_decisions():
+    faults = [{'kind': 'status', 'endpoint': 'sql/*', 'probability': 0.3, 'status': 503},
+              {'kind': 'latency', 'distribution': 'lognormal', 'median': 0.1, 'sigma': 0.5}]
+    def run(scenario, endpoints):
+        return [(e, [(f.kind.value, round(f.delay(rng), 6)) for f, rng in scenario.decide(e)]) for e in endpoints]
+    first = run(SXTFaultScenario(faults, seed=7), ['sql/dql'] * 20 + ['auth/code'] * 5)
+    interleaved = run(SXTFaultScenario(faults, seed=7), ['auth/code', 'sql/dql'] * 5 + ['sql/dql'] * 15)
+    for endpoint in ('sql/dql', 'auth/code'): # same faults for the n-th call to each endpoint, however they interleave
+        assert [f for e, f in first if e == endpoint] == [f for e, f in interleaved if e == endpoint]
+    assert 3 <= sum(1 for e, f in first if ('status', 0.0) in f) <= 10
+    assert all(('status', 0.0) not in f for e, f in first if e == 'auth/code')
+    assert run(SXTFaultScenario(faults, seed=8), ['sql/dql'] * 20) != first[:20]
+
+
+def test_scenario_file(tmp_path):
+    path = tmp_path / 'bad-day.json'
+    path.write_text(json.dumps({'seed': 3, 'faults': [{'kind': 'reset', 'endpoint': 'sql/dml', 'probability': 0.5, 'when': 'after'}]}))
+    scenario = SXTFaultScenario.from_file(path)
+    assert scenario.name == 'bad-day' and scenario.seed == 3
+    assert scenario.faults[0].settings == {'when': 'after'}
+    with pytest.raises(SxTArgumentError): SXTFault('meteor')
+    with pytest.raises(SxTArgumentError): SXTFault('status')
+
+
+def test_status_and_reset(api):
+    SXTFaultScenario([{'kind': 'status', 'status': 429, 'retry_after': 0}]).install(api)
+    success, errors = query(api)
+    assert not success and errors[0]['status_code'] == 429
+    assert errors[0]['response_object'].headers['Retry-After'] == '0'
+
+    for when in ('before', 'after'):
+        scenario = SXTFaultScenario([{'kind': 'reset', 'endpoint': 'sql/dml', 'when': when}])
+        scenario.install(api)
+        success, errors = api.sql_dml("INSERT INTO S.T VALUES (9999, 'z')", ['S.T'])
+        assert not success and 'reset' in str(errors[0]['exception'])
+        assert query(api)[0] # other endpoints unaffected
+    assert len(api.sql_exec('SELECT * FROM S.T WHERE ID = 9999')[1]) == 1 # 'after' reached the server
+
+
+def test_broken_and_slow_bodies(api):
+    SXTFaultScenario([{'kind': 'truncate', 'fraction': 0.5}]).install(api)
+    assert not query(api)[0]
+    success, rows = api.sql_dql_stream('SELECT * FROM S.T', ['S.T'])
+    with pytest.raises(Exception): list(rows)
+
+    SXTFaultScenario([{'kind': 'slow_drip', 'chunk_size': 8192, 'interval': 0.05}]).install(api)
+    start = time.monotonic()
+    success, rows = query(api)
+    assert success and len(rows) == 500
+    assert time.monotonic() - start >= 0.1
+
+    api.timeouts = dict(api.timeouts, sql=(1.0, 0.02))
+    assert not query(api)[0] # each drip is longer than the read timeout
+    SXTFaultScenario([{'kind': 'latency', 'seconds': 0.5}]).install(api)
+    success, errors = query(api)
+    assert not success and 'timed out' in str(errors[0]['exception'])
+
+
+def test_retries_ride_out_faults(api):
+    scenario = SXTFaultScenario([{'kind': 'status', 'endpoint': 'sql/dql', 'probability': 0.4, 'status': 503},
+                                 {'kind': 'reset', 'endpoint': 'sql/dql', 'probability': 0.2}], seed=11)
+    scenario.install(api)
+    api.retry_policy = SXTRetryPolicy(max_attempts=10, backoff_base=0.001, backoff_max=0.01)
+    assert all(query(api)[0] for i in range(20))
+    metrics = scenario.metrics()
+    assert metrics['calls']['sql/dql'] > 20
+    assert metrics['injected']['sql/dql']['status'] > 0
+    scenario.reset()
+    assert scenario.metrics() == {'calls': {}, 'injected': {}}
@@ -0,0 +1,98 @@
+import sys, os, threading, logging, pytest
+from pathlib import Path
+
+# load local copy of libraries
+sys.path.append(str( Path(Path(__file__).parents[1] / 'src').resolve() ))
+from spaceandtime.sxtbaseapi import SXTBaseAPI
+from spaceandtime.sxtuser import SXTUser
+from spaceandtime.sxtkeymanager import SXTKeyManager
+from spaceandtime.sxtmockgateway import SXTMockGateway
+
+needs_fork = pytest.mark.skipif(not hasattr(os, 'fork'), reason='os.fork not available')
+
+
+def in_child(func) -> int:
+    """Runs func in a forked child, returning the child's exit code: 0 if func returned True."""
+    pid = os.fork()
+    if pid == 0:
+        try:
+            code = 0 if func() else 1
+        except BaseException:
+            code = 2
+        os._exit(code)
+    return os.waitstatus_to_exitcode(os.waitpid(pid, 0)[1])
+
+
+def test_per_instance_state():
+    api1, api2 = SXTBaseAPI(), SXTBaseAPI()
+    api1.standard_headers['x-trace'] = '1'
+    assert 'x-trace' not in api2.standard_headers
+    assert 'x-trace' not in SXTBaseAPI.standard_headers
+    km1, km2 = SXTKeyManager(), SXTKeyManager()
+    km1.biscuits.append('b')
+    assert km2.biscuits == []
+    assert km1.keychange_callback_func_list is not km2.keychange_callback_func_list
+
+
+def test_concurrent_reauthenticate_refreshes_once():
+    user = SXTUser(user_id='suzy')
+    user.refresh_token = 'r0'
+    calls = []
+    def token_refresh(refresh_token):
+        calls.append(refresh_token)
+        threading.Event().wait(0.1)
+        return True, {'accessToken': f'a{len(calls)}', 'refreshToken': f'r{len(calls)}',
+                      'accessTokenExpires': 0, 'refreshTokenExpires': 0}
+    user.base_api.token_refresh = token_refresh
+    type(user).refresh_expired = property(lambda self: True) # reauthenticate() proceeds only while this is True
+    try:
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(user.reauthenticate())) for i in range(5)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+    finally:
+        del type(user).refresh_expired
+    assert calls == ['r0']
+    assert results == [(True, 'a1')] * 5
+    assert user.base_api.access_token == 'a1'
+
+
+@needs_fork
+def test_locks_held_at_fork_are_released_in_child():
+    api = SXTBaseAPI()
+    logging.getLogger().setLevel(logging.CRITICAL)
+    limiter = SXTBaseAPI.concurrency_limiter
+    user = SXTUser(user_id='suzy')
+    holding = threading.Event()
+    release = threading.Event()
+    def hold():
+        with limiter.__cond__, user.__token_lock__:
+            holding.set()
+            release.wait(5)
+    holder = threading.Thread(target=hold)
+    holder.start()
+    holding.wait(5)
+    try:
+        def child():
+            acquired = limiter.__cond__.acquire(timeout=1) and user.__token_lock__.acquire(timeout=1)
+            return acquired and limiter.in_flight == 0 and SXTBaseAPI.connection_pool.hosts == []
+        assert in_child(child) == 0
+    finally:
+        release.set()
+        holder.join()
+
+
+@needs_fork
+def test_client_created_before_fork_works_in_child():
+    with SXTMockGateway(require_auth=False) as gateway:
+        api = SXTBaseAPI()
+        logging.getLogger().setLevel(logging.CRITICAL)
+        api.api_url = gateway.url
+        api.coalesce_dql = False
+        assert api.sql_dql('SELECT 1', ['S.T'])[0] # parent has a keep-alive connection open
+        def child():
+            return all(api.sql_dql('SELECT 1', ['S.T'])[0] for i in range(3))
+        assert in_child(child) == 0
+        assert in_child(child) == 0
+        assert api.sql_dql('SELECT 1', ['S.T'])[0] # parent's connection still usable
+        assert len(gateway.requests) == 8
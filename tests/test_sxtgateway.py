@@ -0,0 +1,45 @@
+import sys, time, socket, pytest
+from pathlib import Path
+
+# load local copy of libraries
+sys.path.append(str( Path(Path(__file__).parents[1] / 'src').resolve() ))
+from spaceandtime.sxtgateway import SXTGatewayPool, gateway_urls, get_gateway_pool
+
+
+def test_gateway_urls():
+    assert gateway_urls('https://a.io/') == ['https://a.io']
+    assert gateway_urls('https://a.io, https://b.io') == ['https://a.io', 'https://b.io']
+    assert gateway_urls(['https://a.io', 'https://b.io/']) == ['https://a.io', 'https://b.io']
+    assert get_gateway_pool('https://a.io,https://b.io') is get_gateway_pool(['https://a.io', 'https://b.io'])
+
+
+def test_choose_by_latency_and_errors():
+    pool = SXTGatewayPool(['https://far.io', 'https://near.io'], health_interval=60)
+    assert pool.choose() == 'https://far.io'  # unmeasured, first configured
+    pool.record_success('https://far.io', 0.200)
+    assert pool.choose() == 'https://near.io'  # unmeasured gets tried
+    pool.record_success('https://near.io', 0.020)
+    assert pool.choose() == 'https://near.io'
+    assert pool.choose(exclude=['https://near.io']) == 'https://far.io'
+    for i in range(3): pool.record_failure('https://near.io')
+    assert pool.healthy == ['https://far.io']
+    assert pool.choose() == 'https://far.io'
+    pool.record_success('https://near.io', 0.020)
+    assert pool.choose() == 'https://near.io'  # healthy again, and still faster despite recent errors
+
+
+def test_single_gateway_never_unhealthy():
+    pool = SXTGatewayPool('https://only.io')
+    for i in range(10): pool.record_failure('https://only.io')
+    assert pool.choose() == 'https://only.io' and pool.healthy == ['https://only.io']
+
+
+def test_health_check_of_down_gateway():
+    sock = socket.socket(); sock.bind(('127.0.0.1', 0)); sock.listen(5)
+    url = f'http://127.0.0.1:{sock.getsockname()[1]}'
+    sock.close()
+    pool = SXTGatewayPool([url, 'https://other.io'], failure_threshold=1, health_interval=0.05)
+    pool.health_timeout = 0.5
+    pool.record_failure(url)
+    assert pool.healthy == ['https://other.io']
+    assert not pool.check(url)
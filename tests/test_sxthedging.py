@@ -0,0 +1,119 @@
+import sys, time, threading, pytest
+from pathlib import Path
+
+# load local copy of libraries
+sys.path.append(str( Path(Path(__file__).parents[1] / 'src').resolve() ))
+from spaceandtime.sxthedging import SXTLatencyTracker, SXTHedgePolicy, hedged_send
+from spaceandtime.sxtcancellation import SXTCancelToken
+from spaceandtime.sxtexceptions import SxTCancelledError
+from spaceandtime.sxtratelimit import SXTRateLimiter
+from spaceandtime.sxtconcurrency import SXTConcurrencyLimiter
+from spaceandtime.sxtbaseapi import SXTBaseAPI
+
+
+class FakeResponse():
+    def __init__(self, name, ok=True): 
+        self.name, self.ok, self.closed = name, ok, False
+    def close(self): self.closed = True
+
+
+def test_latency_percentile():
+    tracker = SXTLatencyTracker(window=100)
+    assert tracker.percentile('sql/dql', 95) is None
+    for i in range(1, 201): tracker.record('sql/dql', i/1000)
+    assert tracker.count('sql/dql') == 100  # rolling window
+    assert tracker.percentile('sql/dql', 50) == pytest.approx(0.150)
+    assert tracker.percentile('sql/dql', 95) == pytest.approx(0.195)
+    assert tracker.percentile('sql/dql', 100) == pytest.approx(0.200)
+
+
+def test_policy_delay():
+    tracker = SXTLatencyTracker()
+    policy = SXTHedgePolicy(percentile=90, min_samples=10, initial_delay=0.5, max_delay=0.3)
+    assert policy.delay('sql/dql', tracker) == 0.3
+    for i in range(10): tracker.record('sql/dql', 0.001)
+    assert policy.delay('sql/dql', tracker) == policy.min_delay
+
+
+def test_hedge_wins_and_loser_is_closed():
+    calls = []
+    def send():
+        calls.append(1)
+        if len(calls) == 1: 
+            time.sleep(0.5)
+            return FakeResponse('slow')
+        return FakeResponse('fast')
+    closed = []
+    policy = SXTHedgePolicy()
+    start = time.monotonic()
+    response, latency, hedged = hedged_send(send, 0.05, policy, on_abandon=lambda r: closed.append(r.name))
+    assert response.name == 'fast' and hedged and time.monotonic() - start < 0.3
+    assert (policy.calls, policy.hedged, policy.won) == (1, 1, 1)
+    time.sleep(0.6)
+    assert closed == ['slow']
+
+
+def test_fast_response_not_hedged():
+    calls = []
+    send = lambda: calls.append(1) or FakeResponse('only')
+    response, latency, hedged = hedged_send(send, 0.2)
+    assert response.name == 'only' and not hedged and len(calls) == 1
+
+
+def test_failures():
+    def fail(): raise ConnectionError('down')
+    with pytest.raises(ConnectionError): hedged_send(fail, 0.05)
+    calls = []
+    def error_then_ok():
+        calls.append(1)
+        if len(calls) == 1:
+            time.sleep(0.1)
+            return FakeResponse('503', ok=False)
+        time.sleep(0.2)
+        return FakeResponse('200')
+    response, latency, hedged = hedged_send(error_then_ok, 0.05)
+    assert response.name == '200' and hedged  # an error does not beat a pending success
+
+
+def test_max_ratio_and_cancel():
+    policy = SXTHedgePolicy(max_ratio=0.0)
+    calls = []
+    send = lambda: calls.append(1) or time.sleep(0.2) or FakeResponse('one')
+    hedged_send(send, 0.01, policy)
+    assert len(calls) == 1
+
+    token = SXTCancelToken()
+    token.cancel()
+    with pytest.raises(SxTCancelledError): hedged_send(lambda: time.sleep(0.2), 0.05, cancel_token=token)
+
+
+def test_hedge_admission():
+    calls, released = [], []
+    send = lambda: calls.append(1) or time.sleep(0.2) or FakeResponse('one')
+    response, latency, hedged = hedged_send(send, 0.01, SXTHedgePolicy(), admit=lambda: False)
+    assert len(calls) == 1 and not hedged # held back, e.g. no permit free
+    calls.clear()
+    hedged_send(send, 0.01, SXTHedgePolicy(), admit=lambda: True, release=lambda: released.append(1))
+    time.sleep(0.3)
+    assert len(calls) == 2 and released == [1]
+
+    api = SXTBaseAPI()
+    api.concurrency_limiter = SXTConcurrencyLimiter(initial_limit=1)
+    api.rate_limiter = SXTRateLimiter(per_endpoint={'sql/dql': (1, 1)})
+    assert api.__admit_hedge__('sql/dql', None)     # duplicate holds a permit and a token
+    assert not api.__admit_hedge__('sql/dql', None) # none left
+    api.concurrency_limiter.release()
+    assert not api.__admit_hedge__('sql/dql', None) # rate limited: the permit is given back
+    assert api.concurrency_limiter.in_flight == 0
+
+
+def test_policy_counters_thread_safe():
+    policy = SXTHedgePolicy(max_ratio=0.5)
+    def hedge():
+        for i in range(1000):
+            policy.record_call()
+            policy.try_hedge()
+    threads = [threading.Thread(target=hedge) for i in range(8)]
+    [t.start() for t in threads]
+    [t.join() for t in threads]
+    assert policy.calls == 8000 and policy.hedged <= 4000
@@ -0,0 +1,96 @@
+import sys, asyncio, logging, pytest
+from pathlib import Path
+
+# load local copy of libraries
+sys.path.append(str( Path(Path(__file__).parents[1] / 'src').resolve() ))
+from spaceandtime.sxthooks import SXTHooks, SXTCallEvent
+from spaceandtime.sxtenums import SXTHookEvent
+from spaceandtime.sxtmockgateway import SXTMockGateway
+from spaceandtime.sxtfaults import SXTFaultScenario
+from spaceandtime.sxtbaseapi import SXTBaseAPI
+from spaceandtime.sxtretry import SXTRetryPolicy
+from spaceandtime.sxtcircuitbreaker import SXTCircuitBreaker
+
+
+@pytest.fixture
+def gateway():
+    with SXTMockGateway(require_auth=False, latency={'sql/dql': 0.1, 'default': 0.0}) as gateway:
+        gateway.execute('CREATE TABLE S.T (ID INT, TXT VARCHAR)')
+        gateway.execute('INSERT INTO S.T VALUES ' + ', '.join(f"({i}, 'row {i}')" for i in range(1000)))
+        yield gateway
+
+
+@pytest.fixture
+def api(gateway):
+    api = SXTBaseAPI()
+    logging.getLogger().setLevel(logging.CRITICAL)
+    api.api_url = gateway.url
+    api.coalesce_dql = False
+    api.hooks = SXTHooks()
+    api.connection_pool = api.connection_pool.copy() # fresh connections, so the first call connects
+    api.circuit_breaker = SXTCircuitBreaker(enabled=False)
+    api.retry_policy = SXTRetryPolicy(max_attempts=3, backoff_base=0.01, retry_non_idempotent=True) # DML faults below are retried too
+    return api
+
+
+def record(hooks):
+    events = []
+    for hook in SXTHookEvent: hooks.add(hook, lambda e: events.append((e.event, e.attempt, e.status, dict(e.timings), e.request_bytes, e.response_bytes)))
+    return events
+
+
+def test_hooks_registry():
+    hooks = SXTHooks()
+    assert not hooks.active
+    seen = []
+    @hooks.add('post_response')
+    def on_response(event): seen.append(event.endpoint)
+    hooks.add(SXTHookEvent.POST_RESPONSE, lambda e: 1 / 0) # failing subscriber is logged and skipped
+    hooks.emit(SXTHookEvent.POST_RESPONSE, SXTCallEvent('sql/dql'))
+    hooks.emit(SXTHookEvent.ON_ERROR, SXTCallEvent('sql/dml'))
+    assert seen == ['sql/dql'] and hooks.active
+    hooks.remove('post_response', on_response)
+    hooks.clear()
+    assert not hooks.active
+
+
+def test_phase_timings(api):
+    events = record(api.hooks)
+    for i in range(2): assert api.sql_dql('SELECT * FROM S.T', ['S.T'])[0]
+    assert [e[0] for e in events] == [SXTHookEvent.PRE_REQUEST, SXTHookEvent.POST_RESPONSE] * 2
+    first, second = events[1], events[3]
+    assert first[2] == 200 and first[4] > 0 and first[5] > 20000
+    for phase in ('queue', 'connect', 'ttfb', 'download', 'parse', 'total'): assert phase in first[3]
+    assert first[3]['connect'] > 0 and second[3]['connect'] == 0 # keep-alive connection reused
+    assert first[3]['ttfb'] >= 0.1
+    assert first[3]['total'] >= first[3]['ttfb'] + first[3]['download'] + first[3]['parse']
+
+
+def test_retry_and_error(api):
+    events = record(api.hooks)
+    SXTFaultScenario([{'kind': 'status', 'endpoint': 'sql/dml', 'status': 503}]).install(api)
+    assert not api.sql_dml("DELETE FROM S.T WHERE ID = 1", ['S.T'])[0]
+    kinds = [(e[0], e[1]) for e in events]
+    assert kinds == [(SXTHookEvent.PRE_REQUEST, 1), (SXTHookEvent.POST_RESPONSE, 1), (SXTHookEvent.ON_RETRY, 1),
+                     (SXTHookEvent.PRE_REQUEST, 2), (SXTHookEvent.POST_RESPONSE, 2), (SXTHookEvent.ON_RETRY, 2),
+                     (SXTHookEvent.PRE_REQUEST, 3), (SXTHookEvent.POST_RESPONSE, 3), (SXTHookEvent.ON_ERROR, 3)]
+    assert all(e[2] == 503 for e in events if e[0] != SXTHookEvent.PRE_REQUEST)
+    SXTFaultScenario().uninstall(api)
+
+
+def test_async_hooks(gateway):
+    aiohttp = pytest.importorskip('aiohttp')
+    from spaceandtime.sxtasyncapi import AsyncSXTBaseAPI
+    async def run():
+        api = AsyncSXTBaseAPI()
+        api.api_url = gateway.url
+        api.hooks = SXTHooks()
+        events = record(api.hooks)
+        try:
+            assert (await api.sql_dql('SELECT * FROM S.T', ['S.T']))[0]
+        finally:
+            await api.close()
+        return events
+    events = asyncio.run(run())
+    assert [e[0] for e in events] == [SXTHookEvent.PRE_REQUEST, SXTHookEvent.POST_RESPONSE]
+    assert events[1][3]['ttfb'] >= 0.1 and 'parse' in events[1][3]
@@ -0,0 +1,92 @@
+import sys, io, json, logging, pytest
+from pathlib import Path
+
+# load local copy of libraries
+sys.path.append(str( Path(Path(__file__).parents[1] / 'src').resolve() ))
+from spaceandtime import sxtlogging
+from spaceandtime.sxtlogging import get_logger, truncated, sample_row, configure
+from spaceandtime.sxtmockgateway import SXTMockGateway
+from spaceandtime.sxtbaseapi import SXTBaseAPI
+from spaceandtime.sxtbiscuits import SXTBiscuit
+from spaceandtime.sxtuser import SXTUser
+from spaceandtime.sxtresource import SXTTable
+from spaceandtime.sxtkeymanager import SXTKeyManager
+
+
+@pytest.fixture
+def settings():
+    saved = dict(sxtlogging.settings)
+    yield sxtlogging.settings
+    sxtlogging.settings.update(saved)
+
+
+def test_component_loggers_leave_root_alone():
+    root = logging.getLogger()
+    level = root.level
+    root.setLevel(logging.WARNING)
+    try:
+        api = SXTBaseAPI()
+        biscuit = SXTBiscuit()
+        assert root.level == logging.WARNING
+        assert api.logger.name == 'spaceandtime.api' and biscuit.logger.name == 'spaceandtime.biscuits'
+        assert biscuit.key_manager.logger.name == 'spaceandtime.keys' # a parent's SDK logger is not handed down
+    finally:
+        root.setLevel(level)
+    mine = logging.getLogger('myapp')
+    assert SXTBaseAPI(logger=mine).logger is mine and SXTBiscuit(logger=mine).key_manager.logger is mine
+
+
+def test_truncated_is_lazy_and_capped(settings):
+    calls = []
+    def expensive():
+        calls.append(1)
+        return 'x' * 5000
+    logger = get_logger('test')
+    logger.setLevel(logging.INFO)
+    logger.debug('payload %s', truncated(expensive))
+    assert calls == []
+    assert str(truncated(expensive)) == 'x' * 2000 + '... (3,000 more chars)'
+    settings['max_chars'] = 10
+    assert str(truncated(b'0123456789abcdef')) == '0123456789... (16 bytes)'
+    assert str(truncated('short', 100)) == 'short'
+
+
+def test_sample_row(settings):
+    logged = [n for n in range(1, 1001) if sample_row(n, 1000)]
+    assert logged[0] == 1 and logged[-1] == 1000 and len(logged) == 11
+    settings['row_messages'] = 1000
+    assert all(sample_row(n, 10) for n in range(1, 11))
+
+
+def test_bulk_progress_sampled(settings, caplog):
+    settings['row_messages'], settings['row_errors'] = 4, 2
+    with SXTMockGateway() as gateway:
+        gateway.execute('CREATE TABLE SXTDEMO.T (ID INT PRIMARY KEY, TXT VARCHAR)')
+        user = SXTUser(user_id='suzy', user_private_key=SXTKeyManager(new_keypair=True).private_key, api_url=gateway.url)
+        assert user.authenticate()[0]
+        table = SXTTable('SXTDEMO.T', default_user=user)
+        rows = [{'ID': i, 'TXT': f'row {i}'} for i in range(40)] + [{'ID': i, 'BAD': 1} for i in range(5)]
+        with caplog.at_level(logging.INFO, logger='spaceandtime'):
+            assert not table.insert.with_list_of_dicts(rows)[0]
+    messages = [r.getMessage() for r in caplog.records if r.name == 'spaceandtime.resource']
+    progress = [m for m in messages if 'Inserted Row' in m]
+    assert len(progress) == 5 and progress[-1].strip().startswith('SXTDEMO.T Inserted Row 45 of 45')
+    assert len([m for m in messages if 'Error during insert' in m]) == 2
+    assert any('3 more insert errors not logged' in m for m in messages)
+
+
+def test_json_output():
+    package = logging.getLogger('spaceandtime')
+    saved = (package.level, list(package.handlers), package.propagate)
+    stream = io.StringIO()
+    try:
+        configure(level=logging.INFO, json=True, handler=logging.StreamHandler(stream))
+        get_logger('api').info('Executing query: %s', truncated('SELECT 1'), extra={'sxt': {'endpoint': 'sql/dql', 'rows': 1}})
+    finally:
+        package.setLevel(saved[0])
+        for handler in list(package.handlers): package.removeHandler(handler)
+        for handler in saved[1]: package.addHandler(handler)
+        package.propagate = saved[2]
+    record = json.loads(stream.getvalue())
+    assert record['logger'] == 'spaceandtime.api' and record['level'] == 'INFO'
+    assert record['message'] == 'Executing query: SELECT 1' and record['endpoint'] == 'sql/dql' and record['rows'] == 1
@@ -0,0 +1,97 @@
+import sys, logging, urllib.request, pytest
+from pathlib import Path
+
+# load local copy of libraries
+sys.path.append(str( Path(Path(__file__).parents[1] / 'src').resolve() ))
+from spaceandtime.sxtmetrics import SXTMetricsRegistry, prometheus_text
+from spaceandtime.sxthooks import SXTHooks
+from spaceandtime.sxtmockgateway import SXTMockGateway
+from spaceandtime.sxtfaults import SXTFaultScenario
+from spaceandtime.sxtbaseapi import SXTBaseAPI
+from spaceandtime.sxtretry import SXTRetryPolicy
+from spaceandtime.sxtcircuitbreaker import SXTCircuitBreaker
+from spaceandtime.sxtexceptions import SxTArgumentError
+
+
+@pytest.fixture
+def gateway():
+    with SXTMockGateway(require_auth=False) as gateway:
+        gateway.execute('CREATE TABLE S.T (ID INT, TXT VARCHAR)')
+        gateway.execute('INSERT INTO S.T VALUES ' + ', '.join(f"({i}, 'row {i}')" for i in range(50)))
+        yield gateway
+
+
+@pytest.fixture
+def api(gateway):
+    api = SXTBaseAPI()
+    logging.getLogger().setLevel(logging.CRITICAL)
+    api.api_url = gateway.url
+    api.user_id = 'suzy'
+    api.coalesce_dql = False
+    api.hooks = SXTHooks()
+    api.metrics = SXTMetricsRegistry()
+    api.circuit_breaker = SXTCircuitBreaker(enabled=False)
+    api.retry_policy = SXTRetryPolicy(max_attempts=3, backoff_base=0.01, retry_non_idempotent=True) # DML faults below are retried too
+    return api
+
+
+def test_metric_types_and_exposition():
+    registry = SXTMetricsRegistry()
+    calls = registry.counter('calls_total', 'Calls made.', ('endpoint',))
+    calls.inc(endpoint='sql/dql')
+    calls.inc(2, endpoint='sql/dql')
+    calls.inc(endpoint='say "hi"\n')
+    assert registry.counter('calls_total', labels=('endpoint',)) is calls
+    with pytest.raises(SxTArgumentError): registry.gauge('calls_total')
+    registry.gauge('depth', 'Queue depth.').set_function(lambda: 7)
+    latency = registry.histogram('latency_seconds', 'Latency.', buckets=(0.1, 1))
+    for value in (0.05, 0.5, 5): latency.observe(value)
+    assert calls.value(endpoint='sql/dql') == 3
+    assert latency.value() == {'count': 3, 'sum': 5.55, 'buckets': {0.1: 1, 1.0: 2}}
+    lines = prometheus_text(registry).splitlines()
+    assert '# TYPE calls_total counter' in lines
+    assert 'calls_total{endpoint="sql/dql"} 3' in lines
+    assert 'calls_total{endpoint="say \\"hi\\"\\n"} 1' in lines
+    assert 'depth 7' in lines
+    assert ['latency_seconds_bucket{le="0.1"} 1', 'latency_seconds_bucket{le="1"} 2', 'latency_seconds_bucket{le="+Inf"} 3',
+            'latency_seconds_sum 5.55', 'latency_seconds_count 3'] == [l for l in lines if l.startswith('latency_seconds_')]
+
+
+def test_instrumented_calls(api):
+    api.metrics.instrument(api).instrument(api) # second call has no effect
+    for i in range(3): assert api.sql_dql('SELECT * FROM S.T', ['S.T'])[0]
+    SXTFaultScenario([{'kind': 'status', 'endpoint': 'sql/dml', 'status': 503}]).install(api)
+    assert not api.sql_dml('DELETE FROM S.T WHERE ID = 1', ['S.T'])[0]
+    SXTFaultScenario().uninstall(api)
+    SXTFaultScenario([{'kind': 'reset', 'endpoint': 'sql/ddl', 'when': 'before'}]).install(api)
+    assert not api.sql_ddl('DROP TABLE S.T', ['S.T'])[0]
+    SXTFaultScenario().uninstall(api)
+
+    m = api.metrics
+    requests_total = m.get('sxt_requests_total')
+    assert requests_total.value(endpoint='sql/dql', app=None, user_id='suzy', outcome='success') == 3
+    assert requests_total.value(endpoint='sql/dml', app=None, user_id='suzy', outcome='server_error') == 3
+    assert requests_total.value(endpoint='sql/ddl', app=None, user_id='suzy', outcome='transport_error') == 3
+    assert m.get('sxt_retries_total').value(endpoint='sql/dml', app=None, user_id='suzy', outcome='server_error') == 2
+    assert m.get('sxt_call_failures_total').value(endpoint='sql/dml', app=None, user_id='suzy', outcome='server_error') == 1
+    rows = m.get('sxt_rows_returned').value(endpoint='sql/dql', app=None)
+    assert rows['count'] == 3 and rows['sum'] == 150
+    assert m.get('sxt_response_bytes').value(endpoint='sql/dql')['count'] == 3
+    assert m.get('sxt_request_duration_seconds').value(endpoint='sql/dql', app=None, outcome='success')['count'] == 3
+    assert m.get('sxt_concurrency_in_flight').value() == 0
+    text = m.prometheus_text()
+    assert 'sxt_requests_total{endpoint="sql/dql",app="",user_id="suzy",outcome="success"} 3' in text
+    assert '# TYPE sxt_request_duration_seconds histogram' in text
+
+
+def test_metrics_endpoint(api):
+    api.metrics.instrument(api)
+    assert api.sql_dql('SELECT * FROM S.T', ['S.T'])[0]
+    server = api.metrics.serve(port=0)
+    try:
+        with urllib.request.urlopen(f'http://127.0.0.1:{server.server_port}/metrics', timeout=5) as response:
+            assert response.headers['content-type'].startswith('text/plain; version=0.0.4')
+            assert 'sxt_requests_total{endpoint="sql/dql"' in response.read().decode('utf-8')
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,115 @@
+import sys, time, logging, pytest
+from pathlib import Path
+
+# load local copy of libraries
+sys.path.append(str( Path(Path(__file__).parents[1] / 'src').resolve() ))
+from spaceandtime.sxtmockgateway import SXTMockGateway
+from spaceandtime.sxtuser import SXTUser
+from spaceandtime.sxtkeymanager import SXTKeyManager
+from spaceandtime.sxtbaseapi import SXTBaseAPI
+from spaceandtime.sxtretry import SXTRetryPolicy
+
+
+@pytest.fixture
+def gateway():
+    with SXTMockGateway() as gateway:
+        gateway.execute('CREATE TABLE SXTDEMO.BLOCKS (BLOCK_NUMBER INT PRIMARY KEY, MINER VARCHAR)')
+        gateway.execute('INSERT INTO SXTDEMO.BLOCKS VALUES ' + ', '.join(f"({i}, '0x{i:04x}')" for i in range(100)))
+        yield gateway
+
+
+@pytest.fixture
+def user(gateway):
+    keys = SXTKeyManager(new_keypair=True)
+    user = SXTUser(user_id='suzy', user_private_key=keys.private_key, api_url=gateway.url)
+    logging.getLogger().setLevel(logging.CRITICAL)
+    user.base_api.coalesce_dql = False
+    assert user.authenticate()[0]
+    return user
+
+
+def test_authenticate_and_refresh(gateway, user):
+    api = user.base_api
+    assert api.auth_validtoken()[1]['id'] == 'suzy'
+    assert api.auth_idexists('suzy') == (True, True)
+    old_token = api.access_token
+    success, tokens = api.token_refresh(user.refresh_token)
+    assert success and tokens['accessToken'] != old_token
+    assert not api.token_refresh(user.refresh_token)[0] # refresh tokens are single-use
+
+    impostor = SXTUser(user_id='suzy', user_private_key=SXTKeyManager(new_keypair=True).private_key, api_url=gateway.url)
+    assert not impostor.authenticate()[0] # a different key for a known user
+
+
+def test_sql_endpoints(gateway, user):
+    api = user.base_api
+    assert api.sql_ddl('CREATE TABLE SXTDEMO.T (ID INT PRIMARY KEY, TXT VARCHAR) WITH "public_key=ab,access_type=public_read"', biscuits=['b'])[0]
+    assert api.sql_dml("INSERT INTO SXTDEMO.T VALUES (1, 'a'), (2, 'b')", ['SXTDEMO.T']) == (True, [{'UPDATED': 2}])
+    assert api.sql_dml("UPDATE SXTDEMO.T SET TXT = 'c' WHERE ID = 3", ['SXTDEMO.T']) == (True, [{'UPDATED': 0}])
+    assert api.sql_dql('SELECT * FROM SXTDEMO.T ORDER BY ID', ['SXTDEMO.T']) == (True, [{'ID': 1, 'TXT': 'a'}, {'ID': 2, 'TXT': 'b'}])
+    assert api.sql_exec('SELECT COUNT(*) AS N FROM SXTDEMO.BLOCKS') == (True, [{'N': 100}])
+    assert not api.sql_dql('DELETE FROM SXTDEMO.T', ['SXTDEMO.T'])[0] # wrong statement type for the endpoint
+    success, errors = api.sql_dql('SELECT * FROM SXTDEMO.MISSING', ['SXTDEMO.MISSING'])
+    assert not success and errors[0]['status_code'] == 400
+
+    anonymous = SXTBaseAPI()
+    logging.getLogger().setLevel(logging.CRITICAL)
+    anonymous.api_url = gateway.url
+    anonymous.retry_policy = anonymous.retry_policy.__class__(max_attempts=1)
+    assert anonymous.sql_dql('SELECT 1', ['SXTDEMO.T'])[1][0]['status_code'] == 401
+
+
+def test_discovery(gateway, user):
+    api = user.base_api
+    gateway.execute('CREATE VIEW SXTDEMO.RECENT AS SELECT * FROM BLOCKS WHERE BLOCK_NUMBER > 90')
+    assert api.discovery_get_schemas() == (True, [{'schema': 'SXTDEMO', 'isPublic': True}])
+    assert [t['table'] for t in api.discovery_get_tables('SXTDEMO')[1]] == ['BLOCKS']
+    assert [v['view'] for v in api.discovery_get_views('sxtdemo', search_pattern='REC%')[1]] == ['RECENT']
+    columns = api.discovery_get_columns('SXTDEMO', 'BLOCKS')[1]
+    assert [(c['column'], c['dataType'], c['primaryKeyPosition']) for c in columns] == [('BLOCK_NUMBER', 'INT', 1), ('MINER', 'VARCHAR', None)]
+
+
+def test_latency_and_limits(gateway, user):
+    api = user.base_api
+    gateway.latency = {'sql/dql': 0.2, 'default': 0.0}
+    start = time.monotonic()
+    assert api.sql_dql('SELECT * FROM SXTDEMO.BLOCKS', ['SXTDEMO.BLOCKS'])[0]
+    assert time.monotonic() - start >= 0.2
+    gateway.latency = 0.0
+
+    gateway.row_limit = 10
+    assert len(api.sql_dql('SELECT * FROM SXTDEMO.BLOCKS', ['SXTDEMO.BLOCKS'])[1]) == 10
+    success, rows = api.sql_dql_stream('SELECT * FROM SXTDEMO.BLOCKS', ['SXTDEMO.BLOCKS'])
+    assert success and len(list(rows)) == 10
+    gateway.row_limit = None
+
+    gateway.max_response_bytes = 1000
+    assert not api.sql_dql('SELECT * FROM SXTDEMO.BLOCKS', ['SXTDEMO.BLOCKS'])[0]
+    gateway.max_response_bytes = None
+    gateway.max_request_bytes = 200
+    success, errors = api.sql_dml('INSERT INTO SXTDEMO.BLOCKS VALUES ' + ', '.join(f"({i}, 'x')" for i in range(1000, 1100)), ['SXTDEMO.BLOCKS'])
+    assert not success and errors[0]['status_code'] == 413
+    assert gateway.calls['sql/dql'] == 4
+
+
+def test_history_and_fail_next(gateway, user):
+    api = user.base_api
+    assert api.sql_dql('SELECT * FROM SXTDEMO.BLOCKS', ['SXTDEMO.BLOCKS'])[0]
+    request, response = gateway.requests[-1], gateway.responses[-1]
+    assert request['endpoint'] == 'sql/dql' and request['body']['sqlText'] == 'SELECT * FROM SXTDEMO.BLOCKS'
+    assert request['headers']['authorization'].startswith('Bearer ') and request['wire_bytes'] > 0
+    assert response['status'] == 200 and response['encoding'] == 'gzip'
+
+    gateway.fail_next(503, 'overloaded', endpoint='sql/dml', count=2)
+    assert api.sql_dql('SELECT * FROM SXTDEMO.BLOCKS', ['SXTDEMO.BLOCKS'])[0] # other endpoints are served
+    for i in range(2):
+        success, errors = api.sql_dml("INSERT INTO SXTDEMO.BLOCKS VALUES (500, 'x')", ['SXTDEMO.BLOCKS'], retry_policy=SXTRetryPolicy(max_attempts=1))
+        assert not success and errors[0]['status_code'] == 503 and 'overloaded' in errors[0]['text']
+    assert api.sql_dml("INSERT INTO SXTDEMO.BLOCKS VALUES (500, 'x')", ['SXTDEMO.BLOCKS'])[0]
+    assert [r['status'] for r in gateway.responses][-4:] == [200, 503, 503, 200]
+
+    with SXTMockGateway(require_auth=False, history=2) as small:
+        other = SXTBaseAPI()
+        other.api_url = small.url
+        [other.sql_dql('SELECT 1', ['S.T']) for i in range(3)]
+        assert len(small.requests) == 2 and small.calls['sql/dql'] == 3
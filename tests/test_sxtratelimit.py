@@ -0,0 +1,68 @@
+import sys, time, pytest
+from pathlib import Path
+
+# load local copy of libraries
+sys.path.append(str( Path(Path(__file__).parents[1] / 'src').resolve() ))
+from spaceandtime.sxtratelimit import SXTRateLimiter, SXTTokenBucket
+from spaceandtime.sxtenums import SXTRateLimitPolicy
+from spaceandtime.sxtexceptions import SxTRateLimitError, SxTTimeoutError, SxTArgumentError
+from spaceandtime.sxtcancellation import SXTDeadline
+
+
+def test_token_bucket():
+    bucket = SXTTokenBucket(10, 2)
+    assert bucket.wait_time() == 0
+    bucket.tokens -= 2
+    assert bucket.wait_time() == pytest.approx(0.1, abs=0.01)
+    with pytest.raises(SxTArgumentError): SXTTokenBucket(0)
+
+
+def test_endpoint_groups():
+    limiter = SXTRateLimiter(per_endpoint={'sql/dml':5, 'discover/*':(2,4), 'sql':10})
+    assert limiter.endpoint_group('sql/dml') == 'sql/dml'
+    assert limiter.endpoint_group('discover/table/column') == 'discover/*'
+    assert limiter.endpoint_group('sql/dql') == 'sql'
+    assert limiter.endpoint_group('auth/token') is None
+    assert [k for k,r in limiter.limits_for('bob', 'auth/token', 'app')] == []
+    limiter = SXTRateLimiter(per_user=1, per_app=1)
+    assert [k for k,r in limiter.limits_for('bob', 'sql', 'app')] == ['user:bob', 'app:app']
+
+
+def test_no_limits_never_waits():
+    limiter = SXTRateLimiter()
+    for i in range(1000): assert limiter.acquire('bob', 'sql/dml') == 0.0
+    assert limiter.metrics()['total']['acquired'] == 0
+
+
+def test_blocking_paces_calls():
+    limiter = SXTRateLimiter(per_user=(50, 1))
+    start = time.monotonic()
+    for i in range(6): limiter.acquire('bob', 'sql')
+    assert time.monotonic() - start == pytest.approx(0.1, abs=0.05)
+    assert limiter.acquire('alice', 'sql') == 0.0  # separate bucket per user
+    metrics = limiter.metrics()
+    assert metrics['total']['acquired'] == 7 and metrics['total']['throttled'] == 5
+    assert metrics['buckets']['user:bob']['wait_max'] > 0 and metrics['buckets']['user:alice']['throttled'] == 0
+
+
+def test_fail_fast_max_wait_and_deadline():
+    limiter = SXTRateLimiter(per_app=(1, 1), policy=SXTRateLimitPolicy.FAIL_FAST)
+    limiter.acquire('bob', 'sql', 'loader')
+    with pytest.raises(SxTRateLimitError): limiter.acquire('bob', 'sql', 'loader')
+    assert limiter.acquire('bob', 'sql') == 0.0  # no originApp, no app bucket
+
+    limiter = SXTRateLimiter(per_user=(1, 1), max_wait=0.5)
+    limiter.acquire('bob', 'sql')
+    with pytest.raises(SxTRateLimitError): limiter.acquire('bob', 'sql')
+    limiter.max_wait = None
+    with pytest.raises(SxTTimeoutError): limiter.acquire('bob', 'sql', deadline=SXTDeadline(0.2))
+    assert limiter.metrics()['total']['rejected'] == 2
+
+
+def test_penalize():
+    limiter = SXTRateLimiter(per_endpoint={'sql/dml': (100, 10)})
+    limiter.penalize('bob', 'sql/dml', seconds=0.1)
+    start = time.monotonic()
+    limiter.acquire('bob', 'sql/dml')
+    assert time.monotonic() - start >= 0.1
+    assert limiter.metrics()['total']['server_throttled'] == 1
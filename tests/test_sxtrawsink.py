@@ -0,0 +1,98 @@
+import sys, io, json, time, asyncio, pytest
+from pathlib import Path
+
+# load local copy of libraries
+sys.path.append(str( Path(Path(__file__).parents[1] / 'src').resolve() ))
+from spaceandtime.sxtbaseapi import SXTBaseAPI
+from spaceandtime.sxtretry import SXTRetryPolicy
+from spaceandtime.sxtmockgateway import SXTMockGateway
+from spaceandtime.sxtcancellation import SXTCancelToken
+from spaceandtime.sxtexceptions import SxTCancelledError
+rows = [{'BLOCK_NUMBER': i, 'MINER': 'résumé', 'BIG': 2**62 + 3 * i} for i in range(500)]
+body = json.dumps(rows).encode('utf-8') # exactly what SXTMockGateway sends, before any compression
+
+
+@pytest.fixture
+def api():
+    api = SXTBaseAPI()
+    api.coalesce_dql = False
+    return api
+
+
+@pytest.fixture
+def gateway():
+    with SXTMockGateway(require_auth=False) as gateway:
+        gateway.execute('CREATE TABLE ETH.BLOCKS (BLOCK_NUMBER INT, MINER VARCHAR, BIG BIGINT)')
+        gateway.execute('INSERT INTO ETH.BLOCKS VALUES ' + ', '.join(f"({r['BLOCK_NUMBER']}, '{r['MINER']}', {r['BIG']})" for r in rows))
+        yield gateway
+
+
+def test_raw_bytes(api, gateway):
+    api.api_url = gateway.url
+    success, content = api.sql_dql('SELECT * FROM ETH.BLOCKS', ['ETH.BLOCKS'], raw=True)
+    assert success and content == body # undecoded, byte for byte (and not gzip)
+    assert gateway.responses[-1]['encoding'] == 'gzip'
+
+    gateway.fail_next(400, 'bad sql')
+    success, rtn = api.sql_dql('SELECT * FROM ETH.BLOCKS', ['ETH.BLOCKS'], raw=True)
+    assert not success and 'bad sql' in rtn[0]['text'] # failures are reported as usual, not as bytes
+
+
+def test_sink(api, gateway):
+    api.api_url = gateway.url
+    sink = io.BytesIO()
+    success, written = api.sql_dql('SELECT * FROM ETH.BLOCKS', ['ETH.BLOCKS'], sink=sink)
+    assert success and sink.getvalue() == body and written == len(body)
+
+    sink = io.BytesIO()
+    gateway.fail_next(500, 'down')
+    success, rtn = api.sql_dql('SELECT * FROM ETH.BLOCKS', ['ETH.BLOCKS'], sink=sink, retry_policy=SXTRetryPolicy(max_attempts=1))
+    assert not success and sink.getvalue() == b'' # an error body is never written to the sink
+
+
+def test_raw_and_sink_async(gateway):
+    pytest.importorskip('aiohttp')
+    from spaceandtime.sxtasyncapi import AsyncSXTBaseAPI
+    async def run(url, sink):
+        api = AsyncSXTBaseAPI()
+        api.api_url = url
+        api.coalesce_dql = False
+        try:
+            return (await api.sql_dql('SELECT * FROM ETH.BLOCKS', ['ETH.BLOCKS'], raw=True), 
+                    await api.sql_dql('SELECT * FROM ETH.BLOCKS', ['ETH.BLOCKS'], sink=sink))
+        finally:
+            await api.close()
+    sink = io.BytesIO()
+    (success, content), (sunk, written) = asyncio.run(run(gateway.url, sink))
+    assert success and content == body
+    assert sunk and sink.getvalue() == body and written == len(body)
+
+
+def test_sink_cancelled_async():
+    pytest.importorskip('aiohttp')
+    from spaceandtime.sxtasyncapi import AsyncSXTBaseAPI
+    class CancellingSink(io.BytesIO):
+        def __init__(self, token, after:int):
+            super().__init__()
+            self.token, self.after = token, after
+        def write(self, chunk):
+            if self.tell() + len(chunk) >= self.after: self.token.cancel()
+            return super().write(chunk)
+    async def run(url, sink, token):
+        api = AsyncSXTBaseAPI()
+        api.api_url = url
+        api.coalesce_dql = False
+        api.read_chunk_size = 1024
+        try:
+            return await api.sql_dql('SELECT * FROM S.T', ['S.T'], sink=sink, cancel_token=token)
+        finally:
+            await api.close()
+    with SXTMockGateway(require_auth=False) as gateway:
+        gateway.compress = False
+        gateway.execute('CREATE TABLE S.T (ID INT, TXT VARCHAR)')
+        gateway.execute('INSERT INTO S.T VALUES ' + ', '.join(f"({i}, '{'x' * 40}')" for i in range(20000)))
+        token = SXTCancelToken()
+        sink = CancellingSink(token, after=10000)
+        success, rtn = asyncio.run(run(gateway.url, sink, token))
+    assert not success and isinstance(rtn[0]['exception'], SxTCancelledError)
+    assert len(sink.getvalue()) < 12000 # stopped at the next chunk, even with more of the body already buffered
@@ -0,0 +1,122 @@
+import sys, logging, pytest, requests
+from pathlib import Path
+
+# load local copy of libraries
+sys.path.append(str( Path(Path(__file__).parents[1] / 'src').resolve() ))
+from spaceandtime.sxtretry import SXTRetryPolicy, SXTRetryBudget
+from spaceandtime.sxtbaseapi import SXTBaseAPI
+from spaceandtime.sxtcircuitbreaker import SXTCircuitBreaker
+from spaceandtime.sxtmockgateway import SXTMockGateway
+from spaceandtime.sxtfaults import SXTFaultScenario
+from spaceandtime.sxtuser import SXTUser
+from spaceandtime.sxtkeymanager import SXTKeyManager
+from spaceandtime.sxtresource import SXTTable
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+
+
+def test_retry_classification():
+    policy = SXTRetryPolicy()
+    assert policy.is_retryable(503, 'Service Unavailable')
+    assert policy.is_retryable(429, 'Too Many Requests')
+    assert policy.is_retryable(555, '', requests.exceptions.ConnectionError('reset'))
+    assert policy.is_retryable(555, '', requests.exceptions.ReadTimeout('slow'))
+    assert not policy.is_retryable(400, 'syntax error at or near SELEKT')
+    assert not policy.is_retryable(401, 'JWT authorization failed')
+    assert not policy.is_retryable(500, 'Duplicate key during INSERT')
+    assert not policy.is_retryable(555, '', ValueError('not a transport error'))
+
+
+def test_retry_backoff():
+    policy = SXTRetryPolicy(backoff_base=1, backoff_max=5, jitter=False)
+    assert [policy.backoff(i) for i in range(1,6)] == [1, 2, 4, 5, 5]
+
+    policy = SXTRetryPolicy(backoff_base=1, backoff_max=5, jitter=True, seed=42)
+    for attempt in range(1,10):
+        assert 0 <= policy.backoff(attempt) <= 5
+
+    # retry-after is a floor, not a ceiling
+    policy = SXTRetryPolicy(backoff_base=0.1, jitter=False)
+    assert policy.retry_delay(1, 503, '', None, retry_after='3') == 3
+    assert policy.retry_delay(1, 503, '', None, retry_after='not-a-date') == 0.1
+    assert policy.retry_delay(1, 503, '', None, retry_after='600') == None  # longer than max_retry_after
+    assert policy.retry_delay(policy.max_attempts, 503, '') == None
+    assert policy.retry_delay(1, 400, '') == None
+
+
+def test_retry_budget():
+    policy = SXTRetryPolicy(backoff_base=0, jitter=False)
+    budget = policy.new_budget(min_retries=2, retry_ratio=0.5)
+    assert policy.retry_delay(1, 503, budget=budget) == 0
+    assert policy.retry_delay(1, 503, budget=budget) == 0
+    assert policy.retry_delay(1, 503, budget=budget) == None  # 2 retries spent, no calls recorded
+    budget.record_call()
+    budget.record_call()
+    assert not budget.exhausted  # earned one more retry
+    assert policy.retry_delay(1, 503, budget=budget) == 0
+    assert budget.exhausted
+
+    budget = SXTRetryBudget(max_seconds=1)
+    assert budget.try_spend(0.6)
+    assert not budget.try_spend(0.6)
+
+
+def test_non_idempotent_calls():
+    policy = SXTRetryPolicy(backoff_base=0, jitter=False)
+    refused = requests.exceptions.ConnectionError(MaxRetryError(None, '/', NewConnectionError(None, 'Connection refused')))
+    assert policy.retry_delay(1, 503, idempotent=True) == 0
+    assert policy.retry_delay(1, 503, idempotent=False) == None # may have run already
+    assert policy.retry_delay(1, 555, '', requests.exceptions.ReadTimeout('slow'), idempotent=False) == None
+    assert policy.retry_delay(1, 429, idempotent=False) == 0     # rejected, not processed
+    assert policy.retry_delay(1, 555, '', requests.exceptions.ConnectTimeout('no route'), idempotent=False) == 0
+    assert policy.retry_delay(1, 555, '', refused, idempotent=False) == 0
+    assert SXTRetryPolicy(backoff_base=0, retry_non_idempotent=True).retry_delay(1, 503, idempotent=False) == 0
+
+
+def test_dml_timeout_not_resent():
+    with SXTMockGateway(require_auth=False) as gateway:
+        gateway.execute('CREATE TABLE S.T (ID INT, TXT VARCHAR)')
+        api = SXTBaseAPI()
+        logging.getLogger().setLevel(logging.CRITICAL)
+        api.api_url = gateway.url
+        api.coalesce_dql = False
+        api.timeouts = dict(api.timeouts, sql=(2, 0.2))
+        api.circuit_breaker = SXTCircuitBreaker(enabled=False)
+        api.retry_policy = SXTRetryPolicy(max_attempts=3, backoff_base=0.01)
+        gateway.latency = 0.5
+        assert not api.sql_dml("INSERT INTO S.T VALUES (1, 'a')", ['S.T'])[0]
+        assert len(gateway.requests) == 1
+        assert not api.sql_dql('SELECT * FROM S.T', ['S.T'])[0] # read-only, so retried
+        assert len(gateway.requests) == 4
+        gateway.latency = 0
+        gateway.fail_next(429, 'slow down')
+        assert api.sql_dml("INSERT INTO S.T VALUES (2, 'b')", ['S.T'])[0]
+        assert len(gateway.requests) == 6
+
+
+def test_insert_retried_after_lost_response():
+    policy = SXTRetryPolicy()
+    assert policy.already_applied(2, 'Duplicate key during INSERT') and not policy.already_applied(1, 'Duplicate key during INSERT')
+    with SXTMockGateway() as gateway:
+        gateway.execute('CREATE TABLE SXTDEMO.T (ID INT PRIMARY KEY, TXT VARCHAR)')
+        user = SXTUser(user_id='suzy', user_private_key=SXTKeyManager(new_keypair=True).private_key, api_url=gateway.url)
+        logging.getLogger().setLevel(logging.CRITICAL)
+        assert user.authenticate()[0]
+        api = user.base_api
+        api.retry_policy = SXTRetryPolicy(backoff_base=0.01)
+        scenario = SXTFaultScenario([{'kind': 'reset', 'endpoint': 'sql/dml', 'when': 'after'}])
+        scenario.install(api)
+        lost_once = lambda event: setattr(scenario.faults[0], 'probability', 0) # only the first response is lost
+        api.hooks.add('on_retry', lost_once)
+        try:
+            table = SXTTable('SXTDEMO.T', default_user=user)
+            success, summary = table.insert.with_list_of_dicts([{'ID': 1, 'TXT': 'a'}])
+            assert success and summary['successes'] == 1 # the retry found the row already inserted
+            assert gateway.execute('SELECT COUNT(*) AS N FROM SXTDEMO.T') == [{'N': 1}]
+
+            scenario.faults[0].probability = 1
+            success, result = table.insert.with_sqltext("INSERT INTO SXTDEMO.T VALUES (2, 'b')") # no opt-in: sent once
+            assert not success and scenario.metrics()['injected']['sql/dml']['reset'] == 2
+            assert not table.insert.with_sqltext("INSERT INTO SXTDEMO.T VALUES (1, 'a')")[0] # a first-attempt duplicate is still an error
+        finally:
+            api.hooks.remove('on_retry', lost_once)
+            scenario.uninstall(api)
@@ -0,0 +1,89 @@
+import sys, time, threading, pytest
+from pathlib import Path
+
+# load local copy of libraries
+sys.path.append(str( Path(Path(__file__).parents[1] / 'src').resolve() ))
+from spaceandtime.sxtscheduler import SXTScheduler
+from spaceandtime.sxtconcurrency import SXTConcurrencyLimiter
+from spaceandtime.sxtenums import SXTPriority
+from spaceandtime.sxtexceptions import SxTTimeoutError
+from spaceandtime.sxtcancellation import SXTDeadline
+
+
+def drain(scheduler):
+    order = []
+    while scheduler.pending:
+        ticket = scheduler.head()
+        scheduler.grant(ticket)
+        order.append(ticket)
+    return order
+
+
+def test_priority_order():
+    scheduler = SXTScheduler()
+    scheduler.enqueue(SXTPriority.MAINTENANCE, 'ops')
+    scheduler.enqueue(SXTPriority.BATCH, 'loader')
+    scheduler.enqueue(SXTPriority.INTERACTIVE, 'dashboard')
+    scheduler.enqueue('batch', 'loader')
+    assert [t[1] for t in drain(scheduler)] == [SXTPriority.INTERACTIVE, SXTPriority.BATCH, SXTPriority.BATCH, SXTPriority.MAINTENANCE]
+    assert scheduler.head() is None
+
+
+def test_weighted_fair_share():
+    scheduler = SXTScheduler(weights={'a': 3, 'b': 1})
+    for i in range(40): scheduler.enqueue(SXTPriority.BATCH, 'a')
+    for i in range(40): scheduler.enqueue(SXTPriority.BATCH, 'b')
+    first = [t[0] for t in drain(scheduler)[:40]]
+    assert first.count('a') == 30
+    assert first.count('b') == 10
+
+
+def test_new_app_gets_no_idle_credit():
+    scheduler = SXTScheduler()
+    for i in range(10): scheduler.enqueue(SXTPriority.BATCH, 'a')
+    for i in range(5): scheduler.grant(scheduler.head())
+    for i in range(10): scheduler.enqueue(SXTPriority.BATCH, 'b')
+    first = [t[0] for t in drain(scheduler)[:6]]
+    assert first.count('b') == 3 # alternates from now on, rather than b catching up on a's 5 calls
+
+
+def test_aging_promotes_waiting_calls():
+    scheduler = SXTScheduler(aging=0.05)
+    old = scheduler.enqueue(SXTPriority.BATCH, 'loader')
+    time.sleep(0.06)
+    scheduler.enqueue(SXTPriority.INTERACTIVE, 'dashboard')
+    assert scheduler.head() is old
+    scheduler.cancel(old)
+    assert scheduler.head()[0] == 'dashboard'
+    assert scheduler.metrics()['waiting'] == {'interactive': 1, 'batch': 0, 'maintenance': 0}
+
+
+def test_limiter_lets_interactive_jump_queue():
+    limiter = SXTConcurrencyLimiter(initial_limit=1)
+    limiter.acquire()
+    order = []
+    def call(priority, app):
+        limiter.acquire(priority=priority, app=app)
+        order.append(priority)
+        limiter.release()
+    threads = [threading.Thread(target=call, args=(SXTPriority.BATCH, 'loader')) for i in range(3)]
+    for t in threads: t.start()
+    while limiter.waiting < 3: time.sleep(0.01)
+    threads.append(threading.Thread(target=call, args=(SXTPriority.INTERACTIVE, 'dashboard')))
+    threads[-1].start()
+    while limiter.waiting < 4: time.sleep(0.01)
+    assert limiter.scheduler.pending == 4
+    limiter.release()
+    for t in threads: t.join(5)
+    assert order[0] == SXTPriority.INTERACTIVE
+    assert len(order) == 4
+    assert limiter.in_flight == 0 and limiter.scheduler.pending == 0
+
+
+def test_limiter_timeout_leaves_queue():
+    limiter = SXTConcurrencyLimiter(initial_limit=1)
+    limiter.acquire()
+    with pytest.raises(SxTTimeoutError): limiter.acquire(SXTDeadline(0.05), priority=SXTPriority.BATCH, app='loader')
+    assert limiter.scheduler.pending == 0
+    limiter.release()
+    assert limiter.acquire() == 0.0
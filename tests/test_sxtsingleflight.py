@@ -0,0 +1,82 @@
+import sys, time, logging, threading, pytest
+from pathlib import Path
+
+# load local copy of libraries
+sys.path.append(str( Path(Path(__file__).parents[1] / 'src').resolve() ))
+from spaceandtime.sxtsingleflight import SXTSingleFlight
+from spaceandtime.sxtcancellation import SXTDeadline, SXTCancelToken
+from spaceandtime.sxtexceptions import SxTTimeoutError
+from spaceandtime.sxtbaseapi import SXTBaseAPI
+from spaceandtime.sxtretry import SXTRetryPolicy
+from spaceandtime.sxtcircuitbreaker import SXTCircuitBreaker
+from spaceandtime.sxtmockgateway import SXTMockGateway
+
+
+def test_single_flight_coalesces():
+    flight = SXTSingleFlight()
+    calls = []
+    results = []
+    def slow_query():
+        calls.append(1)
+        time.sleep(0.2)
+        return ['row']
+    def caller(key):
+        results.append(flight.do(key, slow_query))
+    threads = [threading.Thread(target=caller, args=('same',)) for i in range(10)]
+    threads.append(threading.Thread(target=caller, args=('different',)))
+    [t.start() for t in threads]
+    [t.join() for t in threads]
+    assert len(calls) == 2
+    assert sorted(shared for _, shared in results).count(False) == 2
+    assert all(result == ['row'] for result, _ in results)
+    assert flight.in_flight == 0 and flight.followers == 9
+
+
+def test_single_flight_errors_and_deadline():
+    flight = SXTSingleFlight()
+    def failing():
+        time.sleep(0.1)
+        raise ValueError('boom')
+    errors = []
+    def caller():
+        try: flight.do('k', failing)
+        except ValueError as ex: errors.append(ex)
+    threads = [threading.Thread(target=caller) for i in range(3)]
+    [t.start() for t in threads]
+    [t.join() for t in threads]
+    assert len(errors) == 3
+
+    leader = threading.Thread(target=flight.do, args=('slow', lambda: time.sleep(0.5)))
+    leader.start()
+    time.sleep(0.05)
+    with pytest.raises(SxTTimeoutError):
+        flight.do('slow', lambda: None, deadline=SXTDeadline(0.1))
+    leader.join()
+
+
+def test_followers_share_leader_failure():
+    with SXTMockGateway(require_auth=False) as gateway:
+        api = SXTBaseAPI()
+        logging.getLogger().setLevel(logging.CRITICAL)
+        api.api_url = gateway.url
+        api.single_flight = SXTSingleFlight()
+        api.circuit_breaker = SXTCircuitBreaker(enabled=False)
+        api.retry_policy = SXTRetryPolicy(max_attempts=1)
+        gateway.latency = 0.3
+        gateway.fail_next(503, 'overloaded')
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(api.sql_dql('SELECT * FROM S.T', ['S.T']))) for i in range(5)]
+        [t.start() for t in threads]
+        [t.join() for t in threads]
+        assert len(gateway.requests) == 1 # one upstream call, not one per follower
+        assert len(results) == 5 and all(not success and rtn[0]['status_code'] == 503 for success, rtn in results)
+
+        # a leader stopped by its own cancel_token: followers call for themselves
+        token = SXTCancelToken()
+        leader = threading.Thread(target=lambda: results.append(api.sql_dql('SELECT 1', ['S.T'], cancel_token=token)))
+        leader.start()
+        time.sleep(0.05)
+        threading.Timer(0.1, token.cancel).start()
+        assert api.sql_dql('SELECT 1 AS OK', ['S.T']) == (True, [{'OK': 1}])
+        leader.join()
+        assert not results[-1][0] and len(gateway.requests) == 3
@@ -0,0 +1,36 @@
+import sys, json, pytest
+from pathlib import Path
+
+# load local copy of libraries
+sys.path.append(str( Path(Path(__file__).parents[1] / 'src').resolve() ))
+from spaceandtime.sxtstream import parse_json_array, batched
+
+
+def chunked(data:bytes, size:int) -> list:
+    return [data[i:i+size] for i in range(0, len(data), size)]
+
+
+def test_parse_json_array():
+    rows = [{'ID': i, 'NAME': f'résumé {i}', 'VAL': i * 1.5, 'TAGS': [1, 'a,]', None]} for i in range(200)] + [12345, 'x']
+    data = json.dumps(rows).encode('utf-8')
+    for size in [1, 2, 7, 64, len(data)]:  # split anywhere, including mid multi-byte character and mid number
+        assert list(parse_json_array(chunked(data, size))) == rows
+
+    assert list(parse_json_array([b' [ ', b' ] '])) == []
+    assert list(parse_json_array([b'{"error":', b' "bad"}'])) == [{'error': 'bad'}]  # not an array
+    with pytest.raises(json.JSONDecodeError):
+        list(parse_json_array([b'[{"a":1}, {"b":']))
+
+
+def test_parse_is_incremental():
+    def chunks():
+        yield b'[{"a":1},'
+        yield b'{"a":2},'
+        raise AssertionError('read past the rows requested')
+    rows = parse_json_array(chunks())
+    assert next(rows) == {'a': 1}
+
+
+def test_batched():
+    assert list(batched(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(batched([], 2)) == []
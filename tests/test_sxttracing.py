@@ -0,0 +1,111 @@
+import sys, logging, asyncio, pytest
+from pathlib import Path
+
+# load local copy of libraries
+sys.path.append(str( Path(Path(__file__).parents[1] / 'src').resolve() ))
+from spaceandtime.sxttracing import SXTTracer, NOOP_SPAN, set_tracer, traced
+from spaceandtime.sxtmockgateway import SXTMockGateway
+from spaceandtime.sxtfaults import SXTFaultScenario
+from spaceandtime.sxtbaseapi import SXTBaseAPI
+from spaceandtime.sxtuser import SXTUser
+from spaceandtime.sxtresource import SXTTable
+from spaceandtime.sxtkeymanager import SXTKeyManager
+from spaceandtime.sxtretry import SXTRetryPolicy
+from spaceandtime.sxtcircuitbreaker import SXTCircuitBreaker
+
+
+@pytest.fixture
+def spans():
+    spans = []
+    tracer = SXTTracer()
+    tracer.add_exporter(spans.append)
+    previous = set_tracer(tracer)
+    yield spans
+    set_tracer(previous)
+
+
+def children(spans, parent):
+    return [s for s in spans if s.parent_id == parent.span_id]
+
+
+def test_tracer():
+    tracer = SXTTracer()
+    assert tracer.start_span('off') is NOOP_SPAN and tracer.inject({'a': 1}) == {'a': 1}
+    spans = []
+    tracer.add_exporter(spans.append)
+    with tracer.span('outer', attributes={'rows': 3}) as outer:
+        with tracer.span('inner') as inner:
+            assert tracer.current_span() is inner
+            assert tracer.inject({})['traceparent'] == f'00-{outer.trace_id}-{inner.span_id}-01'
+        with pytest.raises(ZeroDivisionError):
+            with tracer.span('failing'): 1 / 0
+    assert [s.name for s in spans] == ['inner', 'failing', 'outer']
+    assert spans[0].parent_id == outer.span_id and spans[0].trace_id == outer.trace_id
+    assert spans[1].error == 'division by zero' and spans[2].attributes == {'rows': 3} and spans[2].error is None
+    assert tracer.current_span() is NOOP_SPAN
+
+    incoming = '00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01'
+    span = tracer.start_span('continued', parent=incoming)
+    assert (span.trace_id, span.parent_id) == ('4bf92f3577b34da6a3ce929d0e0e4736', '00f067aa0ba902b7')
+
+
+def test_traced_decorator(spans):
+    @traced('lookup {key}')
+    def lookup(key, found=True): return found, key
+    @traced('async lookup')
+    async def lookup_async(): return False, 'missing'
+    lookup('a')
+    lookup('b', found=False)
+    asyncio.run(lookup_async())
+    assert [(s.name, s.error) for s in spans] == [('lookup a', None), ('lookup b', 'b'), ('async lookup', 'missing')]
+
+
+def test_upsert_span_tree(spans):
+    with SXTMockGateway() as gateway:
+        gateway.execute('CREATE TABLE SXTDEMO.T (ID INT PRIMARY KEY, TXT VARCHAR)')
+        gateway.execute("INSERT INTO SXTDEMO.T VALUES (1, 'a')")
+        user = SXTUser(user_id='suzy', user_private_key=SXTKeyManager(new_keypair=True).private_key, api_url=gateway.url)
+        logging.getLogger().setLevel(logging.CRITICAL)
+        assert user.authenticate()[0]
+        spans.clear()
+        table = SXTTable('SXTDEMO.T', default_user=user)
+        rows = [{'ID': 1, 'TXT': 'b'}, {'ID': 2, 'TXT': 'c'}, {'ID': 3, 'TXT': 'd'}]
+        assert table.update.with_list_of_dicts('ID', rows, upsert=True, parallel=2)[0]
+
+    update = spans[-1]
+    assert update.name == 'SXTTable.update.with_list_of_dicts' and update.parent_id is None
+    assert update.attributes['sxt.rows'] == 3 and update.attributes['sxt.resource'] == 'SXTDEMO.T'
+    insert = next(s for s in children(spans, update) if s.name == 'SXTTable.insert.with_list_of_dicts')
+    assert insert.attributes['sxt.rows'] == 2
+    for parent, count in ((update, 3), (insert, 2)): # one call per row, on the worker threads
+        calls = [s for s in children(spans, parent) if s.name == 'sxt sql/dml']
+        assert len(calls) == count
+        for call in calls:
+            assert [s.name for s in children(spans, call)] == ['POST sql/dml']
+            assert children(spans, call)[0].attributes['http.response.status_code'] == 200
+    assert len({s.trace_id for s in spans}) == 1
+
+
+def test_retry_spans_and_headers(spans):
+    with SXTMockGateway(require_auth=False) as gateway:
+        api = SXTBaseAPI()
+        logging.getLogger().setLevel(logging.CRITICAL)
+        api.api_url = gateway.url
+        api.coalesce_dql = False
+        assert api.sql_dql('SELECT 1', ['S.T'])[0]
+        http = next(s for s in spans if s.name == 'POST sql/dql')
+        assert gateway.requests[-1]['headers']['traceparent'] == http.traceparent
+
+        spans.clear()
+        api.circuit_breaker = SXTCircuitBreaker(enabled=False)
+        api.retry_policy = SXTRetryPolicy(max_attempts=2, backoff_base=0.01, retry_non_idempotent=True)
+        SXTFaultScenario([{'kind': 'status', 'endpoint': 'sql/dml', 'status': 503}]).install(api)
+        assert not api.sql_dml('DELETE FROM S.T', ['S.T'])[0]
+        SXTFaultScenario().uninstall(api)
+
+    call = spans[-1]
+    assert call.name == 'sxt sql/dml' and call.error
+    steps = children(spans, call)
+    assert [s.name for s in steps] == ['POST sql/dml', 'sxt.retry.backoff', 'POST sql/dml']
+    assert [s.attributes['sxt.attempt'] for s in steps] == [1, 1, 2]
+    assert all(s.error and s.attributes['http.response.status_code'] == 503 for s in steps[::2])